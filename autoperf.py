@@ -1,7 +1,6 @@
 import subprocess
 import sys
 import time
-import ast
 import itertools
 import re
 import os
@@ -11,9 +10,10 @@ import datetime
 import warnings
 import random
 import shutil
-import socket
+import copy
 import smtplib
 import asyncio
+import threading
 import toml
 
 from tapo import ApiClient
@@ -23,7 +23,6 @@ from email.mime.text import MIMEText
 from my_secrets import APP_PASSWORD, TAPO_USERNAME, TAPO_PASSWORD
 from typing import Dict, List, Optional, Tuple
 from pprint import pprint
-from multiprocessing import Process, Manager
 from rich.progress import track
 from rich.console import Console
 console = Console()
@@ -33,9 +32,75 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 import pandas as pd
 
 from constants import *
+from dataset_stats import get_dataset_row_stats
+from qos_codec import (
+    get_test_name_from_combination_dict,
+    get_qos_dict_from_test_name,
+    get_qos_dicts_from_test_names,
+)
+from orchestrator import run_command, run_stage_on_machines, get_failed_stage_results
+from campaign_pipeline import StagedTestValidator
+from campaign_scheduler import run_campaigns
+from campaign_planner import (
+    get_pcg_test_plan,
+    get_setup_key,
+    get_unchanged_setup_ips,
+    get_next_setup_state
+)
+from completion import run_scripts_until_complete, get_output_files_from_script
+from ess_journal import EssJournal, read_ess_journal, merge_ess_journal
+from ess_schema import (
+    ESS_COLUMNS,
+    ESS_STAGE_DURATION_COLUMNS,
+    get_failure_stage,
+    get_ess_scripts,
+    get_typed_ess_df,
+    get_qos_settings_from_ess_row,
+    get_failed_machine_ips
+)
+from machine_health import probe_machine_health, get_reboot_decision
+from readiness import wait_until_ssh_ready
+from result_transfer import download_csvs_as_tar_stream
+from blob_store import add_dir_to_blob_store, remove_unreferenced_blobs
+from campaign_archive import add_test_to_campaign_archive, sync_campaign_archive
+from result_check import (
+    check_results_on_machine,
+    get_result_check,
+    get_files_without_footer,
+    write_result_manifests
+)
+from ssh_pool import (
+    get_ssh_command,
+    get_scp_command,
+    open_ssh_connection,
+    close_ssh_connection,
+)
+from summary_manifest import (
+    get_manifest_path,
+    read_manifest,
+    write_manifest,
+    get_tests_to_summarise,
+    record_summarised_test
+)
 
 DEBUG_MODE = True
-SKIP_RESTART = False
+
+# "always" reboots every machine before every test, "health" only reboots machines
+# whose health probe finds a problem and "never" doesn't reboot.
+REBOOT_POLICY = "health"
+
+# How long each machine gets for each stage of a test before it's cancelled.
+CONNECTION_CHECK_DEADLINE_SECS = 120
+HEALTH_PROBE_DEADLINE_SECS = 30
+RESTART_DEADLINE_SECS = 60
+READINESS_DEADLINE_SECS = 150
+DELETE_CSVS_DEADLINE_SECS = 60
+RESULT_CHECK_DEADLINE_SECS = 90
+DOWNLOAD_RESULTS_DEADLINE_SECS = 180
+
+# The summary manifest is saved every this many tests so an interrupted run can
+# carry on from where it stopped.
+SUMMARY_MANIFEST_SAVE_INTERVAL = 50
 
 # Set up logging
 logging.basicConfig(
@@ -142,37 +207,6 @@ def send_email(
 
     return True, None
 
-def check_connection(machine, connection_type="ping"):
-    # TODO: Validate parameters 
-    # connection type can be only ping or ssh
-
-    name = machine['machine_name']
-    username = machine['username']
-    ip = machine['ip']
-    
-    if connection_type == "ping":
-        command = ["ping", "-c", "5", "-W", "10", ip]
-    else:
-        command = [
-            "ssh",
-            "-o", "ConnectTimeout=10",
-            f"{username}@{ip}",
-            "hostname"
-        ]
-
-    try:
-        result = subprocess.run(command, capture_output=True, text=True, timeout=10)
-
-        if result.returncode != 0:
-            return False, result.stderr.strip()
-        else:
-            return True, None
-
-    except subprocess.TimeoutExpired:
-        return False, "Timed out"
-    except Exception as e:
-        return False, e
-
 def ping_machine(ip: str = "") -> Tuple[Optional[bool], Optional[str]]:
     """
     Ping a machine to check if it's online.
@@ -202,22 +236,6 @@ def ping_machine(ip: str = "") -> Tuple[Optional[bool], Optional[str]]:
     else:
         return False, f"Failed to ping {ip}"
 
-def check_ssh_connection_with_socket(machine_config: Dict = {}) -> Tuple[Optional[bool], Optional[str]]:
-    ssh_key_path = machine_config['ssh_key_path']
-    username = machine_config['username']
-    ip = machine_config['ip']
-
-    logger.info(f"SSHing into {username}@{ip}")
-    
-    try:
-        test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        test_socket.connect((ip, 22))
-
-    except Exception as e:
-        return False, e
-    else:
-        return True, None
-    
 def check_ssh_connection(machine_config: Dict = {}) -> Tuple[Optional[bool], Optional[str]]:
     """
     Check if an SSH connection can be established to a machine.
@@ -594,6 +612,11 @@ def get_ess_df(ess_filepath: str = "") -> Tuple[Optional[pd.DataFrame], Optional
     if ess_filepath == "":
         return None, f"No filepath passes for ESS."
 
+    # The journal has to be read before the parquet.
+    journal_records, journal_error = read_ess_journal(ess_filepath)
+    if journal_error:
+        return None, journal_error
+
     ess_exists = os.path.exists(ess_filepath)
     if ess_exists:
         try:
@@ -601,238 +624,9 @@ def get_ess_df(ess_filepath: str = "") -> Tuple[Optional[pd.DataFrame], Optional
         except Exception as e:
             return None, f"Couldn't read {ess_filepath}: \n\t{e}"
     else:
-        ess_df = pd.DataFrame(columns=[
-            "start_timestamp",
-            "end_timestamp",
-            "test_name",
-            "ping_count",
-            "ssh_check_count",
-            "end_status",
-            "qos_settings",
-            "scripts_per_machine",
-            "comments"
-       ])
-
-    return ess_df, None
-
-def get_test_name_from_combination_dict(combination_dict: Dict = {}) -> Tuple[Optional[str], Optional[str]]:
-    """
-    Get the test name from the combination dict by concatenating the values of the dict together.
-
-    Params:
-        - combination_dict (Dict): Combination dict.
-
-    Returns:
-        - str: Test name if valid, None otherwise.
-        - error
-    """
-    if combination_dict == {}:
-        return None, f"No combination dict passed."
-
-    if combination_dict is None:
-        return None, f"Combination dict is None."
-
-    if combination_dict.keys() == []:
-        return None, f"No keys found in combination dict."
-
-    diff_between_keys, diff_error = get_difference_between_lists(
-        list(combination_dict.keys()),
-        REQUIRED_QOS_KEYS
-    )
-    if diff_error:
-        return None, f"Error comparing keys for {combination_dict}"
-
-    if len(diff_between_keys) > 0:
-        return None, f"Invalid configuration options in combination dict."
-
-    duration_string = None
-    datalen_string = None
-    pub_string = None
-    sub_string = None
-    rel_string = None
-    mc_string = None
-    dur_string = None
-    lc_string = None
-
-    for key, value in combination_dict.items():
-        if value == "":
-            return None, f"Value for {key} is empty."
-
-        if key.lower() == "duration_secs":
-            duration_string = f"{value}SEC"
-
-        elif key.lower() == "datalen_bytes":
-            datalen_string = f"{value}B"
-
-        elif key.lower() == "pub_count":
-            pub_string = f"{value}PUB"
-            
-        elif key.lower() == "sub_count":
-            sub_string = f"{value}SUB"
-
-        elif key.lower() == "use_reliable":
-
-            if value:
-                rel_string = "REL"
-            else:
-                rel_string = "BE"
-
-        elif key.lower() == "use_multicast":
-            if value:
-                mc_string = "MC"
-            else:
-                mc_string = "UC"
-
-        elif key.lower() == "durability_level":
-            dur_string = f"{value}DUR"
-
-        elif key.lower() == "latency_count":
-            lc_string = f"{value}LC"
-
-    if duration_string is None:
-        duration_string = ""
-    if datalen_string is None:
-        datalen_string = ""
-    if pub_string is None:
-        pub_string = ""
-    if sub_string is None:
-        sub_string = ""
-    if rel_string is None:
-        rel_string = ""
-    if mc_string is None:
-        mc_string = ""
-    if dur_string is None:
-        dur_string = ""
-    if lc_string is None:
-        lc_string = ""
-
-    test_name = f"{duration_string}_"
-    test_name = f"{test_name}{datalen_string}_"
-    test_name = f"{test_name}{pub_string}_"
-    test_name = f"{test_name}{sub_string}_"
-    test_name = f"{test_name}{rel_string}_"
-    test_name = f"{test_name}{mc_string}_"
-    test_name = f"{test_name}{dur_string}_"
-    test_name = f"{test_name}{lc_string}"
-
-    return test_name, None
-
-def get_qos_dict_from_test_name(test_name: str = "") -> Optional[Dict]:
-    """
-    Take test name and get qos settings from it.
-    e.g. 100SEC_100B_5PUB_1SUB_REL_MC_0DUR_100LC returns:
-    {
-        "datalen_byts": 100,
-        "durability_level": 0,
-        "duration_secs": 100,
-        "latency_count": 100,
-        "pub_count": 5,
-        "sub_count": 1,
-        "use_multicast": true,
-        "use_reliable": true
-    }
-    """
-    if test_name == "":
-        logger.error(
-            "No test name passed to get_qos_dict_from_test_name()."
-        )
-        return None
-
-    # TODO: Write unit tests for this function
-
-    qos_dict = {
-        "datalen_bytes": None,
-        "durability_level": None,
-        "duration_secs": None,
-        "latency_count": None,
-        "pub_count": None,
-        "sub_count": None,
-        "use_multicast": None,
-        "use_reliable": None
-    }
-
-    if "." in test_name:
-        test_name = test_name.split('.')[0]
-
-    if "_" not in test_name:
-        logger.error(
-            "No _ found in test name: {test_name}"
-        )
-        return None
-
-    test_name_sections = test_name.split("_")
-    
-    if len(test_name_sections) != len(REQUIRED_QOS_KEYS):
-        logger.error(
-            f"Mismatch in test_name sections. Expected {len(REQUIRED_QOS_KEYS)} parts."
-        )
-        return None
-
-    for section in test_name_sections:
-        if "sec" in section.lower():
-            value = section.lower().replace("sec", "")
-            value = int(value)
-            qos_dict["duration_secs"] = value
-
-        elif "pub" in section.lower():
-            value = section.lower().replace("pub", "")
-            value = int(value)
-            qos_dict["pub_count"] = value
-
-        elif "sub" in section.lower():
-            value = section.lower().replace("sub", "")
-            value = int(value)
-            qos_dict["sub_count"] = value
-
-        elif "dur" in section.lower():
-            value = section.lower().replace("dur", "")
-            value = int(value)
-            qos_dict["durability_level"] = value
-
-        elif "lc" in section.lower():
-            value = section.lower().replace("lc", "")
-            value = int(value)
-            qos_dict["latency_count"] = value
-
-        elif "rel" in section.lower() or "be" in section.lower():
-            use_reliable = None
-            if "rel" in section.lower():
-                use_reliable = True
-            else:
-                use_reliable = False
-
-            qos_dict['use_reliable'] = use_reliable
+        ess_df = pd.DataFrame(columns=ESS_COLUMNS)
 
-        elif "mc" in section.lower() or 'uc' in section.lower():
-            use_multicast = None
-
-            if 'mc' in section.lower():
-                use_multicast = True
-            else:
-                use_multicast = False
-
-            qos_dict['use_multicast'] = use_multicast
-
-        elif section.lower().endswith('b'):
-            value = section.lower().replace("b", "")
-            value = int(value)
-            qos_dict["datalen_bytes"] = value
-
-        else:
-            logger.error(
-                f"Couldn't recognise following section: {section}"
-            )
-            return None
-
-    # Final check for any None values
-    for key, value in qos_dict.items():
-        if value is None:
-            logger.error(
-                f"Value for {key} is None."
-            )
-            return None
-
-    return qos_dict
+    return merge_ess_journal(ess_df, journal_records), None
 
 def get_next_test_from_ess(ess_df: pd.DataFrame) -> Optional[Dict]:
     """
@@ -864,13 +658,7 @@ def get_next_test_from_ess(ess_df: pd.DataFrame) -> Optional[Dict]:
         )
         return None
 
-    if isinstance(last_test['qos_settings'], str):
-        last_test_qos = last_test['qos_settings'].replace("'", "\"")
-        last_test_qos = ast.literal_eval(last_test_qos)
-    else:
-        last_test_qos = last_test['qos_settings']
-
-    return last_test_qos
+    return get_qos_settings_from_ess_row(last_test)
 
 def have_last_n_tests_failed(ess_df: pd.DataFrame, n: int = 10) -> Tuple[Optional[bool], Optional[str]]:
     """
@@ -1205,87 +993,110 @@ def get_buffer_duration_secs_from_test_duration_secs(test_duration_secs: int = 0
 
     return int(buffer_duration_sec)
 
-def has_failures_in_machine_statuses(machine_statuses) -> Optional[bool]:
+async def check_machine_connection(
+    machine_config: Dict = {},
+    attempts: int = 3,
+    test_prefix: str = ""
+) -> Dict:
     """
-    Check if there are any failures in the machine statuses.
+    Check a machine can be pinged and SSHed into. The SSH check opens the pooled
+    connection that the rest of the test reuses.
 
     Params:
-        - machine_statuses (Dict): Machine statuses.
+        - machine_config (Dict): Machine config.
+        - attempts (int): Attempts for each of the ping and SSH checks.
+        - test_prefix (str): the campaign and test counter string for messages
 
     Returns:
-        - bool: True if there are failures, False otherwise.
+        - Dict: {"status", "ping_count", "ssh_check_count"}
+            - status is "complete", "ping_check_fail" or "ssh_check_fail"
     """
-    if machine_statuses == {}:
-        logger.error(
-            f"No machine statuses passed."
-        )
-        return None
+    machine_ip = machine_config['ip']
+    machine_name = machine_config['machine_name']
+    username = machine_config['username']
 
-    if len(machine_statuses.keys()) == 0:
-        logger.error(
-            f"No keys in machine statuses."
+    for ping_count in range(1, attempts + 1):
+        logger.info(
+            f"{test_prefix} [{ping_count}/{attempts}] Pinging {machine_name}"
         )
-        return None
-
-    for _, status in machine_statuses.items():
-        if status != "complete" and status != "pending" and status != "results downloaded":
-            return True
-
-    return False
+        ping_result = await run_command(["ping", "-c", "1", "-W", "10", machine_ip], 15)
+        if ping_result['return_code'] == 0:
+            break
+    else:
+        return {
+            "status": "ping_check_fail",
+            "ping_count": attempts,
+            "ssh_check_count": 0,
+            "comments": f"Failed to even ping {machine_ip} after {attempts} attempts."
+        }
+
+    for ssh_check_count in range(1, attempts + 1):
+        logger.info(
+            f"{test_prefix} [{ssh_check_count}/{attempts}] SSHing {machine_name}"
+        )
+        _, error = await asyncio.to_thread(open_ssh_connection, username, machine_ip)
+        if error is None:
+            break
+    else:
+        return {
+            "status": "ssh_check_fail",
+            "ping_count": ping_count,
+            "ssh_check_count": attempts,
+            "comments": f"Failed to even ssh {machine_ip} after {attempts} attempts."
+        }
+
+    return {
+        "status": "complete",
+        "ping_count": ping_count,
+        "ssh_check_count": ssh_check_count
+    }
 
-def update_machine_status(machine_statuses: Dict = {}, machine_ip: str = "", new_status: str = "") -> Optional[Dict]:
+async def restart_machine(machine_config: Dict = {}, test_prefix: str = "") -> Dict:
     """
-    Update the machine status in the machine statuses.
+    Reboot a machine and drop its pooled SSH connection.
 
     Params:
-        - machine_statuses (Dict): Machine statuses.
-        - machine_ip (str): Machine IP.
-        - new_status (str): New status.
+        - machine_config (Dict): Machine config.
+        - test_prefix (str): the campaign and test counter string for messages
 
     Returns:
-        - Dict: Updated machine statuses if valid, None otherwise.
+        - Dict: {"status", "rebooted_at"}
+            - rebooted_at is the time.monotonic() the reboot was sent at
     """
-    if machine_statuses == {}:
-        logger.error(
-            f"No machine statuses passed."
-        )
-        return None
+    machine_ip = machine_config['ip']
+    username = machine_config['username']
 
-    if machine_ip == "":
-        logger.error(
-            f"No machine IP passed."
-        )
-        return None
+    logger.info(
+        f"{test_prefix} Restarting {machine_config['machine_name']}..."
+    )
 
-    if new_status == "":
-        logger.error(
-            f"No new status passed."
-        )
-        return None
+    rebooted_at = time.monotonic()
 
-    if machine_ip not in machine_statuses.keys():
-        logger.error(
-            f"Machine IP not found in machine statuses."
-        )
-        return None
+    # The connection drops as the machine goes down so the return code is ignored.
+    await run_command(
+        get_ssh_command(username, machine_ip, "sudo reboot", machine_config['ssh_key_path']),
+        30
+    )
 
-    machine_statuses[machine_ip] = new_status
+    # The pooled connection dies with the reboot so drop it now rather
+    # than have the next command wait for its keepalives to time out.
+    error = await asyncio.to_thread(close_ssh_connection, username, machine_ip)
+    if error:
+        logger.warning(f"{test_prefix} {error}")
 
-    return machine_statuses
+    return {"status": "restarted", "rebooted_at": rebooted_at}
 
-def run_script_on_machine(
+async def run_script_on_machine(
         machine_config: Dict = {}, 
-        machine_statuses: Dict = {}, 
         timeout_secs: int = 0,
         test_prefix: str = ""
-    ) -> Optional[str]:
+    ) -> Dict:
 
     """
     Run a script on a machine using SSH.
 
     Params:
         - machine_config (Dict): Machine config.
-        - machine_statuses (Dict): Machine statuses.
         - timeout_secs (int): Timeout in seconds.
         - test_prefix (str): the campaign and test counter string for messages
             - Looks like:
@@ -1295,54 +1106,19 @@ def run_script_on_machine(
                 "
 
     Returns:
-        - None
+        - Dict: {"status"}
     """
     if machine_config == {}:
         logger.error(
             f"No machine config passed."
         )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: no machine config passed"
-        )
-        return "error: no machine config passed"
-
-    if machine_statuses == {}:
-        logger.error(
-            f"No machine statuses passed."
-        )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: no machine statuses passed"
-        )
-        return "error: no machine statuses passed"
+        return {"status": "error: no machine config passed"}
 
     if timeout_secs == 0:
         logger.error(
             f"No timeout passed to run_script_on_machine()."
         )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: no timeout passed"
-        )
-        return "error: no timeout passed"
-
-    if has_failures_in_machine_statuses(machine_statuses):
-        logger.error(
-            f"Machine statuses have failures:"
-        )
-        logger.error(
-            f"{machine_statuses}"
-        )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: machine statuses have failures"
-        )
-        return "error: machine statuses have failures"
+        return {"status": "error: no timeout passed"}
 
     logger.info(
         f"{test_prefix}Running script on {machine_config['machine_name']} ({machine_config['ip']})."
@@ -1357,136 +1133,104 @@ def run_script_on_machine(
 
     machine_ip = machine_config['ip']
     username = machine_config['username']
-    ssh_command = f"ssh {username}@{machine_ip} '{script_string}'"
-
-    process = subprocess.Popen(
-        ssh_command,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
 
-    try:
-        stdout, stderr = process.communicate(timeout=timeout_secs)
-        stdout = stdout.decode('utf-8').strip()
-        stderr = stderr.decode('utf-8').strip()
+    _, error = await asyncio.to_thread(open_ssh_connection, username, machine_ip)
+    if error:
+        logger.warning(
+            f"{test_prefix}{error} Falling back to a direct connection."
+        )
 
-        return_code = process.returncode
+    result = await run_command(
+        get_ssh_command(username, machine_ip, script_string),
+        timeout_secs
+    )
+    stdout = result['stdout']
+    stderr = result['stderr']
 
-        if DEBUG_MODE:
-            logger.debug(
-                f"{test_prefix}{username}@{machine_ip}"
-            )
-            logger.debug(
-                f"{test_prefix}STDOUT:\n\t{stdout}"
-            )
-            logger.debug(
-                f"{test_prefix}STDERR:\n\t{stderr}"
-            )
-            logger.debug(
-                f"""
-                {test_prefix}
-                Script:
-                {script_string}
-                """
-            )
+    if DEBUG_MODE:
+        logger.debug(
+            f"{test_prefix}{username}@{machine_ip}"
+        )
+        logger.debug(
+            f"{test_prefix}STDOUT:\n\t{stdout}"
+        )
+        logger.debug(
+            f"{test_prefix}STDERR:\n\t{stderr}"
+        )
+        logger.debug(
+            f"""
+            {test_prefix}
+            Script:
+            {script_string}
+            """
+        )
 
-        if return_code != 0:
-            logger.error(
-                f"{test_prefix}Error running script on {machine_config['machine_name']}."
-            )
+    if result['timed_out']:
+        logger.error(
+            f"{test_prefix}Script on {machine_config['machine_name']} timed out."
+        )
+        if stdout != "":
             logger.error(
-                f"{test_prefix}Return code: \t{return_code}"
+                f"{test_prefix}stdout: \t\t{stdout}"
             )
-            if stdout != "":
-                logger.error(
-                    f"{test_prefix}stdout: \t{stdout}"
-                )
-            if stderr != "":
-                logger.error(
-                    f"{test_prefix}stderr: \t{stderr}"
-                )
 
-            update_machine_status(
-                machine_statuses,
-                machine_config['ip'],
-                "error: return code not 0"
-            )
-        else:
-            logger.info(
-                f"{test_prefix}Script on {machine_config['machine_name']} ran successfully."
-            )
-            update_machine_status(
-                machine_statuses,
-                machine_config['ip'],
-                "complete"
+        if stderr != "":
+            logger.error(
+                f"{test_prefix}stderr: \t\t{stderr}"
             )
 
-    except subprocess.TimeoutExpired:
-        process.kill()
-        stdout, stderr = process.communicate()
-        stdout = stdout.decode('utf-8').strip()
-        stderr = stderr.decode('utf-8').strip()
+        return {"status": f"error: timed out after {timeout_secs} seconds"}
 
+    if result['return_code'] != 0:
         logger.error(
-            f"{test_prefix}Script on {machine_config['machine_name']} timed out."
+            f"{test_prefix}Error running script on {machine_config['machine_name']}."
+        )
+        logger.error(
+            f"{test_prefix}Return code: \t{result['return_code']}"
         )
         if stdout != "":
             logger.error(
-                f"{test_prefix}stdout: \t\t{stdout}"
+                f"{test_prefix}stdout: \t{stdout}"
             )
-
         if stderr != "":
             logger.error(
-                f"{test_prefix}stderr: \t\t{stderr}"
+                f"{test_prefix}stderr: \t{stderr}"
             )
 
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            f"error: timed out after {timeout_secs} seconds"
-        )
+        return {"status": "error: return code not 0"}
 
-    return None
+    logger.info(
+        f"{test_prefix}Script on {machine_config['machine_name']} ran successfully."
+    )
 
-def download_results_from_machine(machine_config, machine_statuses, local_results_dirpath) -> Optional[None]:
+    return {"status": "complete"}
+
+async def download_results_from_machine(
+    machine_config: Dict = {},
+    local_results_dirpath: str = ""
+) -> Dict:
     """
     Download results from the machine to the local results directory.
 
     Params:
         - machine_config (Dict): Machine config.
-        - machine_statuses (Dict): Machine statuses.
         - local_results_dirpath (str): Local results directory path.
 
     Returns:
-        - None
+        - Dict: {"status", "csvs_deleted"}
+            - csvs_deleted is True if the csv files were deleted from the machine after downloading.
     """
     if machine_config == {}:
         logger.error(
             f"No machine config passed."
         )
-        return None
-
-    if machine_statuses == {}:
-        logger.error(
-            f"No machine statuses passed."
-        )
-        return None
+        return {"status": "error: no machine config passed"}
 
     if local_results_dirpath == "":
         logger.error(
             f"No local results dirpath passed."
         )
-        return None
-
-    if has_failures_in_machine_statuses(machine_statuses):
-        logger.error(
-            f"Machine statuses have failures:"
-        )
-        logger.error(
-            f"{machine_statuses}"
-        )
-        return None
+        return {"status": "error: no local results dirpath passed"}
 
     machine_name = machine_config['machine_name']
     machine_ip = machine_config['ip']
@@ -1499,112 +1243,100 @@ def download_results_from_machine(machine_config, machine_statuses, local_result
     perftest_exec_path = machine_config['perftest_exec_path']
     results_dir = os.path.dirname(perftest_exec_path)
 
-    check_for_csv_command = f"ssh {username}@{machine_ip} 'ls {results_dir}/*.csv'"
-    check_for_csv_process = subprocess.Popen(
-        check_for_csv_command,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    stdout, stderr = check_for_csv_process.communicate(timeout=30)
-    stdout = stdout.decode('utf-8').strip()
-    stderr = stderr.decode('utf-8').strip()
-
-    if check_for_csv_process.returncode != 0:
-        logger.error(
-            f"Error checking for CSV files on {machine_name}: {stderr}"
-        )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: couldn't check for CSV files"
+    _, error = await asyncio.to_thread(open_ssh_connection, username, machine_ip)
+    if error:
+        logger.warning(
+            f"\t\t{error} Falling back to a direct connection."
         )
-        return None
 
-    if stdout == "":
+    check_for_csv_result = await run_command(
+        get_ssh_command(username, machine_ip, f"ls {results_dir}/*.csv"),
+        30
+    )
+
+    if check_for_csv_result['return_code'] != 0:
         logger.error(
-            f"No CSV files found on {machine_name}."
+            f"Error checking for CSV files on {machine_name}: {check_for_csv_result['stderr']}"
         )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: no CSV files found"
-        )
-        return None
+        return {"status": "error: couldn't check for CSV files"}
 
-    csv_files = stdout.split()
+    csv_files = check_for_csv_result['stdout'].split()
     csv_file_count = len(csv_files)
 
     if csv_file_count == 0:
         logger.error(
             f"No CSV files found on {machine_name}."
         )
-        update_machine_status(
-            machine_statuses,
-            machine_config['ip'],
-            "error: no CSV files found"
-        )
-        return None
+        return {"status": "error: no CSV files found"}
 
     os.makedirs(local_results_dirpath, exist_ok=True)
 
+    logger.info(
+        f"\t\t{machine_name}: Downloading {csv_file_count} files as one tar stream..."
+    )
+    # ? Cancelling the await doesn't stop the thread so the ssh process is killed
+    # ? through the event instead of running on past the stage deadline.
+    cancel_event = threading.Event()
+    try:
+        downloaded_files, error = await asyncio.to_thread(
+            download_csvs_as_tar_stream,
+            username,
+            machine_ip,
+            results_dir,
+            local_results_dirpath,
+            cancel_event
+        )
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+
+    if error:
+        downloaded_files = downloaded_files or []
+        logger.warning(
+            f"\t\t{machine_name}: Tar stream download failed after {len(downloaded_files)} files. Downloading the rest one by one: {error}"
+        )
+
     for csv_filepath in csv_files:
+        if os.path.basename(csv_filepath) in downloaded_files:
+            continue
+
         csv_file = os.path.basename(csv_filepath)
         remote_csv_filepath = os.path.join(results_dir, csv_filepath)
         local_csv_filepath = os.path.join(local_results_dirpath, csv_file)
         logger.info(
-            # f"\t\t\t{machine_name}: Downloading...\n\t{remote_csv_filepath} \n\tto \n\t{local_csv_filepath}",
             f"\t\t{machine_name}: Downloading {csv_file}..."
         )
-        download_command = f"scp {username}@{machine_ip}:{remote_csv_filepath} {local_csv_filepath}"
-        download_process = subprocess.Popen(
-            download_command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+        download_result = await run_command(
+            get_scp_command(username, machine_ip, remote_csv_filepath, local_csv_filepath),
+            120
         )
-        stdout, stderr = download_process.communicate(timeout=120)
-        stdout = stdout.decode('utf-8').strip()
-        stderr = stderr.decode('utf-8').strip()
 
-        if download_process.returncode != 0:
+        if download_result['return_code'] != 0:
             logger.error(
-                f"Error downloading {csv_file} from {machine_name}: {stderr}"
+                f"Error downloading {csv_file} from {machine_name}: {download_result['stderr']}"
             )
-            update_machine_status(
-                machine_statuses,
-                machine_config['ip'],
-                "error: couldn't download CSV files"
-            )
-            return None 
-
-    delete_all_csv_command = f"ssh {username}@{machine_ip} 'rm {results_dir}/*.csv'"
-    delete_all_csv_process = subprocess.Popen(
-        delete_all_csv_command,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+            return {"status": "error: couldn't download CSV files"}
+
+    delete_all_csv_result = await run_command(
+        get_ssh_command(username, machine_ip, f"rm {results_dir}/*.csv"),
+        120
     )
-    stdout, stderr = delete_all_csv_process.communicate(timeout=120)
-    stdout = stdout.decode('utf-8').strip()
-    stderr = stderr.decode('utf-8').strip()
 
-    if delete_all_csv_process.returncode != 0:
+    if delete_all_csv_result['return_code'] != 0:
         logger.warning(
-            f"Couldn't delete CSV files on {machine_name}. Relying on next pre-test deletion: {stderr}"
+            f"Couldn't delete CSV files on {machine_name}. Relying on next pre-test deletion: {delete_all_csv_result['stderr']}"
         )
 
-    update_machine_status(
-        machine_statuses,
-        machine_config['ip'],
-        "results downloaded"
-    )
-
     logger.info(
         f"\t\tResults downloaded from {machine_name} ({machine_ip})."
     )
 
-def delete_csvs_from_machines(machine_config) -> Optional[None]:
+    return {
+        "status": "results downloaded",
+        "csvs_deleted": delete_all_csv_result['return_code'] == 0
+    }
+
+async def delete_csvs_from_machines(machine_config: Dict = {}) -> Dict:
     """
     Delete all CSV files in the Perftest directory from the machine.
 
@@ -1612,7 +1344,7 @@ def delete_csvs_from_machines(machine_config) -> Optional[None]:
         - machine_config (Dict): Machine config.
 
     Returns:
-        - None
+        - Dict: {"status"}
     """
     machine_ip = machine_config['ip']
     machine_name = machine_config['machine_name']
@@ -1620,30 +1352,30 @@ def delete_csvs_from_machines(machine_config) -> Optional[None]:
     perftest_exec_path = machine_config['perftest_exec_path']
     results_dir = os.path.dirname(perftest_exec_path)
 
-    delete_all_csv_command = f"ssh {username}@{machine_ip} 'rm -rf {results_dir}/*.csv'"
-    delete_all_csv_process = subprocess.Popen(
-        delete_all_csv_command,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+    _, error = await asyncio.to_thread(open_ssh_connection, username, machine_ip)
+    if error:
+        logger.warning(
+            f"{error} Falling back to a direct connection."
+        )
+
+    delete_all_csv_result = await run_command(
+        get_ssh_command(username, machine_ip, f"rm -rf {results_dir}/*.csv"),
+        30
     )
-    try:
-        stdout, stderr = delete_all_csv_process.communicate(timeout=30)
-    except subprocess.TimeoutExpired:
+
+    if delete_all_csv_result['timed_out']:
         logger.error(
             f"Timed out deleting CSV files from {machine_name}."
         )
-        delete_all_csv_process.kill()
-        stdout, stderr = delete_all_csv_process.communicate()
+        return {"status": "error: timed out deleting CSV files"}
 
-    stdout = stdout.decode('utf-8').strip()
-    stderr = stderr.decode('utf-8').strip()
-
-    if delete_all_csv_process.returncode != 0:
+    if delete_all_csv_result['return_code'] != 0:
         logger.error(
-            f"Error deleting csv files from {machine_name}: {stderr}"
+            f"Error deleting csv files from {machine_name}: {delete_all_csv_result['stderr']}"
         )
-        return None
+        return {"status": "error: couldn't delete CSV files"}
+
+    return {"status": "complete"}
 
 def update_ess_df(
     ess_df: pd.DataFrame = pd.DataFrame(),
@@ -1655,7 +1387,12 @@ def update_ess_df(
     end_status: str = "",
     qos_settings: Dict = {},
     scripts_per_machine: Dict = {},
-    comments: str = ""
+    comments: str = "",
+    boot_to_ready_secs: Optional[Dict] = None,
+    reboot_decisions: Optional[Dict] = None,
+    failed_machine_ip: Optional[str] = None,
+    stage_durations: Optional[Dict] = None,
+    failure_stage: Optional[str] = None
 ) -> Optional[pd.DataFrame]:
     """
     Update the ESS dataframe with the new test results.
@@ -1671,10 +1408,21 @@ def update_ess_df(
         - qos_settings (Dict): QoS settings.
         - scirpts_per_machine (Dict): Scripts run per machine.
         - comments (str): Comments.
+        - boot_to_ready_secs (Dict): {machine_name: seconds from reboot to sshd answering}.
+            None if no machines were rebooted.
+        - reboot_decisions (Dict): {machine_name: whether it was rebooted and why}.
+        - failed_machine_ip (str): IP of the machine the test failed on.
+        - stage_durations (Dict): {stage duration column: seconds} for the stages that ran.
+        - failure_stage (str): One of FAILURE_STAGES. Worked out from end_status if not passed.
 
     Returns:
         - pd.DataFrame: Updated ESS dataframe if valid, None otherwise.
     """
+    if failure_stage is None:
+        failure_stage = get_failure_stage(end_status)
+
+    stage_durations = stage_durations or {}
+
     new_ess_row = {}
     new_ess_row['start_timestamp'] = start_timestamp
     new_ess_row['end_timestamp'] = end_timestamp
@@ -1682,20 +1430,24 @@ def update_ess_df(
     new_ess_row['ping_count'] = ping_count
     new_ess_row['ssh_check_count'] = ssh_check_count
     new_ess_row['end_status'] = end_status
-    new_ess_row['qos_settings'] = qos_settings
-    new_ess_row['scripts_per_machine'] = scripts_per_machine
+    new_ess_row['failure_stage'] = failure_stage
+    new_ess_row['failed_machine_ip'] = failed_machine_ip
+    for qos_key in REQUIRED_QOS_KEYS:
+        new_ess_row[qos_key] = qos_settings.get(qos_key)
+    for stage_duration_column in ESS_STAGE_DURATION_COLUMNS:
+        new_ess_row[stage_duration_column] = stage_durations.get(stage_duration_column)
     new_ess_row['comments'] = comments
+    new_ess_row['scripts_per_machine'] = get_ess_scripts(scripts_per_machine)
+    new_ess_row['boot_to_ready_secs'] = boot_to_ready_secs
+    new_ess_row['reboot_decisions'] = reboot_decisions
 
-    new_ess_row_df = pd.DataFrame([new_ess_row])
+    new_ess_row_df = get_typed_ess_df(pd.DataFrame([new_ess_row]))
     new_ess_df = pd.concat(
         [ess_df, new_ess_row_df],
         axis = 0,
         ignore_index = True
     )
 
-    # Generate the IPs from the comments
-    new_ess_df['ip'] = new_ess_df['comments'].apply(extract_ip)
-
     return new_ess_df
 
 def get_noise_gen_scripts(config: Dict = {}) -> Tuple[Optional[List[str]], Optional[str]]:
@@ -1748,16 +1500,19 @@ def get_file_size_from_filepath(filepath: str = "") -> Tuple[Optional[int], Opti
     except (OSError, ValueError) as e:
         return None, f"Error getting file size of {filepath}: {e}"
 
-def run_test(
+def stage_test(
     test_config: Dict = {}, 
     machine_configs: List = [],
     ess_df: pd.DataFrame = pd.DataFrame(),
     campaign_dirpath: str = "",
     noise_gen_config: Dict = {},
-    test_prefix: str = ""
-) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    test_prefix: str = "",
+    setup_state: Optional[Dict] = None
+) -> Tuple[Optional[Dict], Optional[pd.DataFrame], Optional[str]]:
     """
-    Run the test using the given test config, machine configs and ESS dataframe.
+    Run the test on the machines and download its results into a staging
+    directory, ready for validate_staged_test(). Nothing in here needs the
+    results to be validated so the next test can start as soon as this returns.
 
     Params:
         - test_config (Dict): Test config.
@@ -1776,40 +1531,45 @@ def run_test(
         - ess_df (pd.DataFrame): ESS dataframe.
         - campaign_dirpath (str): campaign directory path.
         - nosie_gen_config (Dict): Config for noise generation.
+        - setup_state (Dict): setup_state of the previous test's staged test.
+            Machines it left with the same setup skip their tc reconfiguration
+            and csv cleanup. None to set every machine up from scratch.
 
     Returns:
-        - pd.DataFrame: Updated ESS dataframe if valid, None otherwise.
+        - Dict: Staged test to pass to validate_staged_test(). None if the test
+            failed before its results were downloaded.
+        - pd.DataFrame: ESS dataframe, updated with the failed test if it failed.
         - error
     """
     if test_config == {}:
-        return None, f"No test config passed."
+        return None, None, f"No test config passed."
 
     if machine_configs == []:
-        return None, f"No machine config passed."
+        return None, None, f"No machine config passed."
 
     if ess_df is None:
-        return None, f"No ESS dataframe passed."
+        return None, None, f"No ESS dataframe passed."
 
     if not isinstance(ess_df, pd.DataFrame):
-        return None, f"ESS dataframe is not a dataframe."
+        return None, None, f"ESS dataframe is not a dataframe."
 
     if not isinstance(test_config, dict):
-        return None, f"Next test config is not a dictionary."
+        return None, None, f"Next test config is not a dictionary."
 
     if not isinstance(machine_configs, List):
-        return None, f"Machine config is not a list."
+        return None, None, f"Machine config is not a list."
 
     if campaign_dirpath == "":
-        return None, f"No campaign dirpath passed."
+        return None, None, f"No campaign dirpath passed."
 
     if noise_gen_config is None:
-        return None, f"No noise generation config passed."
+        return None, None, f"No noise generation config passed."
 
     if not isinstance(noise_gen_config, Dict):
-        return None, f"Noise gen config is not a dict."
+        return None, None, f"Noise gen config is not a dict."
 
     if test_prefix == "":
-        return ess_df, "No test prefix string passed."
+        return None, ess_df, "No test prefix string passed."
 
     new_ess_df = ess_df
 
@@ -1817,139 +1577,135 @@ def run_test(
 
     test_name, test_error = get_test_name_from_combination_dict(test_config)
     if test_error:
-        return new_ess_df, f"Couldn't get the name of the next test to run."
+        return None, new_ess_df, f"Couldn't get the name of the next test to run."
 
     """
     1. Check connections to machine (ping + ssh).
-    2. Restart machines.
-    3. Check connections to machines (ping + ssh).
+    2. Restart machines that fail their health probe.
+    3. Wait for machines to be ready (sshd banner).
     4. Get QoS configuration.
     5. Generate test scripts from QoS config.
     6. Allocate scripts per machine.
-    7. Delete any artifact csv files.
-    8. Generate noise genertion scripts if needed and add to existing scripts. 
+    7. Delete any artifact csv files unless the last test left none.
+    8. Generate noise genertion scripts if needed and add to existing scripts
+        unless the last test left the same noise in place.
     9. Run scripts.
-    10. Check for and download results.
-    11. Confirm all files are downloaded.
-    12. Updated ESS.
-    13. Return ESS.
+    10. Check for and download results into the staging directory.
+    11. Return the staged test.
     """
 
     start_timestamp = pd.Timestamp.now()
 
     new_ess_row = {}
     new_ess_row['comments'] = ""
+    stage_durations = {}
 
     # 1. Check connections to machine (ping + ssh).
-    for machine_config in machine_configs:
-        machine_ip = machine_config['ip']
-        machine_name = machine_config['machine_name']
-
-        ping_attempts = 3
-        while ping_attempts > 0:
-            logger.info(
-                f"{test_prefix} [{4 - ping_attempts}/3] Pinging {machine_name}"
-            )
-            was_pinged, ping_error = check_connection(machine_config, "ping")    
-            if was_pinged:
-                break
+    stage_start_time = time.monotonic()
+    connection_results = run_stage_on_machines(
+        machine_configs,
+        check_machine_connection,
+        CONNECTION_CHECK_DEADLINE_SECS,
+        3,
+        test_prefix
+    )
+    stage_durations['ping_secs'] = time.monotonic() - stage_start_time
 
-            ping_attempts -= 1
+    failed_connection_results = get_failed_stage_results(connection_results)
+    if len(failed_connection_results) > 0:
+        failed_result = failed_connection_results[0]
+        end_status = failed_result['status']
+        if not end_status.endswith("_fail"):
+            end_status = "ping_check_fail"
 
-        if ping_attempts == 0:
-            return update_ess_df(
-                new_ess_df,
-                start_timestamp,
-                datetime.datetime.now(),
-                test_name,
-                0,
-                0,
-                f"ping_check_fail",
-                test_config,
-                {},
-                new_ess_row['comments'] + f"Failed to even ping {machine_ip} after 3 attempts."
-            ), f"failed initial ping check on {machine_ip}"
-
-        ssh_attempts = 3
-        while ssh_attempts > 0 and ping_attempts > 0:
-            logger.info(
-                f"{test_prefix} [{4 - ssh_attempts}/3] SSHing {machine_name}"
-            )
-            was_sshed, ssh_error = check_connection(machine_config, "ssh")
-            if was_sshed:
-                break
+        return None, update_ess_df(
+            new_ess_df,
+            start_timestamp,
+            datetime.datetime.now(),
+            test_name,
+            0,
+            0,
+            end_status,
+            test_config,
+            {},
+            new_ess_row['comments'] + failed_result.get('comments', failed_result['status']),
+            failed_machine_ip=failed_result['ip'],
+            stage_durations=stage_durations
+        ), f"failed initial {end_status.replace('_fail', '')} on {failed_result['ip']}"
+
+    # 2. Restart machines that need it.
+    stage_start_time = time.monotonic()
+    health_results = {}
+    if REBOOT_POLICY == "health":
+        health_results = run_stage_on_machines(
+            machine_configs,
+            probe_machine_health,
+            HEALTH_PROBE_DEADLINE_SECS,
+            noise_gen_config != {}
+        )
+
+    reboot_decisions = {}
+    machines_to_restart = []
+    for machine_config in machine_configs:
+        should_reboot, reboot_reason = get_reboot_decision(
+            REBOOT_POLICY,
+            health_results.get(machine_config['ip'])
+        )
+        reboot_decision = f"{'rebooted' if should_reboot else 'skipped'}: {reboot_reason}"
+        reboot_decisions[machine_config['machine_name']] = reboot_decision
 
-            ssh_attempts -= 1
+        logger.info(
+            f"{test_prefix} {machine_config['machine_name']} {reboot_decision}"
+        )
 
-        if ssh_attempts == 0:
-            return update_ess_df(
-                new_ess_df,
-                start_timestamp,
-                datetime.datetime.now(),
-                test_name,
-                0,
-                0,
-                f"ssh_check_fail",
-                test_config,
-                {},
-                new_ess_row['comments'] + f"Failed to even ssh {machine_ip} after 3 attempts."
-            ), f"failed initial ssh check on {machine_ip}"
+        if should_reboot:
+            machines_to_restart.append(machine_config)
 
-    logger.info(
-        f"{test_prefix} Restarting all machines..."
+    restart_results = run_stage_on_machines(
+        machines_to_restart,
+        restart_machine,
+        RESTART_DEADLINE_SECS,
+        test_prefix
     )
+    rebooted_at_by_ip = {
+        ip: restart_result['rebooted_at']
+        for ip, restart_result in restart_results.items()
+        if 'rebooted_at' in restart_result
+    }
 
-    # 2. Restart machines.
-    if not SKIP_RESTART:
-        for machine_config in machine_configs:
-            logger.info(
-                f"{test_prefix} Restarting {machine_config['machine_name']}..."
-            )
-            machine_ip = machine_config['ip']
-            restart_command = f"ssh -i {machine_config['ssh_key_path']} {machine_config['username']}@{machine_ip} 'sudo reboot'"
-            with open(os.devnull, 'w') as devnull:
-                subprocess.run(
-                    restart_command, 
-                    shell=True, 
-                    stdout=devnull, 
-                    stderr=devnull
-                )
-        
+    if len(machines_to_restart) > 0:
         logger.info(
-            f"{test_prefix} All machines have restarted. Waiting 15 seconds..."
+            f"{test_prefix} {len(machines_to_restart)} machines have restarted. Waiting for them to be ready..."
         )
         
-        time.sleep(15)
-        
-    # 3. Check connections to machines (ping + ssh).
-    ping_count = 0
-    ssh_check_count = 0
-    for machine_config in machine_configs:
-        machine_ip = machine_config['ip']
-        machine_name = machine_config['machine_name']
-       
-        # Ping machine up to 5 times.
-        for attempt in range(1, 6):
-            if ping_machine(machine_ip):
-                ping_count = attempt
-                break
-                    
-            time.sleep(3)
-    
-        # SSH into machine up to 5 times.
-        for attempt in range(1, 6):
-            if check_ssh_connection_with_socket(
-                machine_config
-            ):
-                ssh_check_count = attempt
-                break
-    
-            time.sleep(1)
-    
-    if ping_count == 5 and ssh_check_count == 5:
+    # 3. Wait for every machine's sshd to answer.
+    readiness_results = run_stage_on_machines(
+        machine_configs,
+        wait_until_ssh_ready,
+        READINESS_DEADLINE_SECS + 10,
+        READINESS_DEADLINE_SECS,
+        rebooted_at_by_ip
+    )
+    stage_durations['reboot_secs'] = time.monotonic() - stage_start_time
+
+    ping_count = max([_.get('ping_count', 0) for _ in connection_results.values()])
+    ssh_check_count = max([_.get('probe_count', 0) for _ in readiness_results.values()])
+
+    boot_to_ready_secs = None
+    if len(rebooted_at_by_ip) > 0:
+        boot_to_ready_secs = {
+            result['machine_name']: result.get('boot_to_ready_secs')
+            for ip, result in readiness_results.items()
+            if ip in rebooted_at_by_ip
+        }
+
+    failed_readiness_results = get_failed_stage_results(readiness_results)
+    if len(failed_readiness_results) > 0:
         logger.warning(f"{test_prefix} Machines failed connection checks.")
+        for failed_result in failed_readiness_results:
+            logger.warning(f"{test_prefix}{failed_result['ip']}: {failed_result['status']}")
 
-        return update_ess_df(
+        return None, update_ess_df(
             new_ess_df,
             start_timestamp,
             datetime.datetime.now(),
@@ -1959,7 +1715,11 @@ def run_test(
             "connection_check_fail",
             test_config,
             {},
-            new_ess_row['comments'] + f"Failed connection check after 5 pings and ssh checks."
+            new_ess_row['comments'] + f"Failed connection check after {READINESS_DEADLINE_SECS} seconds.",
+            boot_to_ready_secs,
+            reboot_decisions,
+            failed_machine_ip=failed_readiness_results[0]['ip'],
+            stage_durations=stage_durations
         ), "failed connection checks"
         
     else:
@@ -1967,6 +1727,14 @@ def run_test(
             f"{test_prefix} All machines are available."
         )
 
+    setup_key = get_setup_key(test_config, noise_gen_config)
+    noise_ready_ips, clean_ips = get_unchanged_setup_ips(
+        setup_state,
+        setup_key,
+        health_results,
+        set([_['ip'] for _ in machines_to_restart])
+    )
+
     # 4. Get QoS configuration.
     qos_config = test_config
 
@@ -1979,7 +1747,7 @@ def run_test(
         logger.error(
             f"{test_prefix} Error generating scripts from: \n\t{qos_config}"
         )
-        return update_ess_df(
+        return None, update_ess_df(
             new_ess_df,
             start_timestamp,
             datetime.datetime.now(),
@@ -1989,7 +1757,10 @@ def run_test(
             "script_generation_fail",
             qos_config,
             {},
-            new_ess_row['comments'] + " Failed to generate scripts from qos config."
+            new_ess_row['comments'] + " Failed to generate scripts from qos config.",
+            boot_to_ready_secs,
+            reboot_decisions,
+            stage_durations=stage_durations
         ), "failed script generation"
 
     # 6. Allocate scripts per machine.
@@ -1999,7 +1770,7 @@ def run_test(
     )
     if scripts_per_machine is None:
         logger.error(f"{test_prefix} Error distributing scripts to machines.")
-        return update_ess_df(
+        return None, update_ess_df(
             new_ess_df,
             start_timestamp,
             datetime.datetime.now(),
@@ -2009,12 +1780,15 @@ def run_test(
             "script_distribution_fail",
             qos_config,
             {},
-            new_ess_row['comments'] + " Failed to distribute scripts across machines."
+            new_ess_row['comments'] + " Failed to distribute scripts across machines.",
+            boot_to_ready_secs,
+            reboot_decisions,
+            stage_durations=stage_durations
         ), "failed script distribution"
 
     if len(scripts_per_machine) == 0:
         logger.error(f"{test_prefix} No scripts allocated to machines.")
-        return update_ess_df(
+        return None, update_ess_df(
             new_ess_df,
             start_timestamp,
             datetime.datetime.now(),
@@ -2024,44 +1798,40 @@ def run_test(
             "script_distribution_fail",
             qos_config,
             {},
-            new_ess_row['comments'] + " No scripts allocated to machines."
+            new_ess_row['comments'] + " No scripts allocated to machines.",
+            boot_to_ready_secs,
+            reboot_decisions,
+            stage_durations=stage_durations
         ), "failed script distribution"
 
-    # 7. Delete any artifact csv files.
+    # 7. Delete any artifact csv files unless the last test left none.
+    machines_to_clean = [_ for _ in scripts_per_machine if _['ip'] not in clean_ips]
     logger.info(
-        f"{test_prefix} Deleting .csv files before test..."
+        f"{test_prefix} Deleting .csv files before test on {len(machines_to_clean)} machines "
+        f"({len(scripts_per_machine) - len(machines_to_clean)} already clean)..."
     )
 
-    with Manager() as manager:
-        processes = []
-        for machine_config in scripts_per_machine:
-            process = Process(
-                target=delete_csvs_from_machines,
-                args=(
-                    machine_config,
-                )
-            )
-            processes.append(process)
-            process.start()
-
-        for process in processes:
-            process.join(60)
-            if process.is_alive():
-                logger.error(
-                    f"Process for deleting old .csv files timed out after 60 seconds. Terminating..."
-                )
-                process.terminate()
-                process.join()
+    delete_results = run_stage_on_machines(
+        machines_to_clean,
+        delete_csvs_from_machines,
+        DELETE_CSVS_DEADLINE_SECS
+    )
+    for failed_result in get_failed_stage_results(delete_results):
+        logger.error(
+            f"{test_prefix}{failed_result['ip']}: {failed_result['status']}"
+        )
 
     logger.info(
         f"{test_prefix}.csv files deleted"
     )
 
-    # 8. Generate noise genertion scripts if needed and add to existing scripts. 
+    # 8. Generate noise genertion scripts if needed and add to existing scripts
+    # unless the last test left the same noise in place.
+    noise_ips = set()
     if noise_gen_config != {}:
         noise_gen_scripts, noise_gen_error = get_noise_gen_scripts(noise_gen_config)
         if noise_gen_error:
-            return update_ess_df(
+            return None, update_ess_df(
                 new_ess_df,
                 start_timestamp,
                 datetime.datetime.now(),
@@ -2071,7 +1841,10 @@ def run_test(
                 "noise_script_generation_fail",
                 qos_config,
                 scripts_per_machine,
-                new_ess_row['comments'] + " Failed to generate scripts from noise generation config."
+                new_ess_row['comments'] + " Failed to generate scripts from noise generation config.",
+                boot_to_ready_secs,
+                reboot_decisions,
+                stage_durations=stage_durations
             ), f"failed noise generation script generation: {noise_gen_error}"
 
         if len(noise_gen_scripts) > 0:
@@ -2080,9 +1853,18 @@ def run_test(
             noise_gen_script = ""
             
         for script_per_machine in scripts_per_machine:
+            noise_ips.add(script_per_machine['ip'])
+            if script_per_machine['ip'] in noise_ready_ips:
+                continue
+
             script = script_per_machine['script']
             script_per_machine['script'] = f"{noise_gen_script};{script}"
 
+        if len(noise_ready_ips) > 0:
+            logger.info(
+                f"{test_prefix} Skipping tc reconfiguration on {len(noise_ready_ips)} machines."
+            )
+
     # 9. Run scripts.
     test_duration_secs = qos_config['duration_secs']
     buffer_duration_secs = get_buffer_duration_secs_from_test_duration_secs(
@@ -2093,175 +1875,303 @@ def run_test(
     # Start Timestamp
     start_timestamp = datetime.datetime.now()
 
-    with Manager() as manager:
-        machine_statuses = manager.dict()
+    # The test ends as soon as every participant has reported rather than when
+    # the slowest machine's timeout runs out. timeout_secs covers the whole test.
+    stage_start_time = time.monotonic()
+    script_results = run_scripts_until_complete(
+        scripts_per_machine,
+        run_script_on_machine,
+        timeout_secs,
+        timeout_secs,
+        test_prefix
+    )
+    stage_durations['run_secs'] = time.monotonic() - stage_start_time
 
-        # Initialise machine statuses with IP and "pending"
-        for machine_config in scripts_per_machine:
-            machine_statuses[machine_config['ip']] = "pending"
+    failed_script_results = get_failed_stage_results(script_results)
+    if len(failed_script_results) > 0:
+        logger.error(
+            f"{test_prefix} Errors running scripts on machines."
+        )
+        for failed_result in failed_script_results:
+            logger.error(
+                f"{test_prefix}{failed_result['ip']}: {failed_result['status']}"
+            )
 
-        processes = []
-        for machine_config in scripts_per_machine:
-            machine_ip = machine_config['ip']
+        return None, update_ess_df(
+            new_ess_df,
+            start_timestamp,
+            datetime.datetime.now(),
+            test_name,
+            ping_count,
+            ssh_check_count,
+            "script_execution_fail",
+            qos_config,
+            scripts_per_machine,
+            new_ess_row['comments'] + " Errors running scripts on machines.",
+            boot_to_ready_secs,
+            reboot_decisions,
+            failed_machine_ip=failed_script_results[0]['ip'],
+            stage_durations=stage_durations
+        ), "failed script execution"
 
-            process = Process(
-                target=run_script_on_machine,
-                args=(
-                    machine_config,
-                    machine_statuses,
-                    timeout_secs,
-                    test_prefix
-                )
-            )
-            processes.append(process)
-            process.start()
+    # End timestamp
+    end_timestamp = pd.Timestamp.now()
 
-        for index, process in enumerate(processes):
-            if index == 0:
-                process.join(timeout_secs)
-            else:
-                process.join(buffer_duration_secs)
+    # Machines that weren't given a participant have nothing to check or download.
+    machines_with_results = [
+        _ for _ in scripts_per_machine if len(get_output_files_from_script(_['script'])) > 0
+    ]
+    ips_with_results = [_['ip'] for _ in machines_with_results]
+
+    # 10. Check the results on the machines so a test that failed isn't downloaded.
+    stage_start_time = time.monotonic()
+    check_results = run_stage_on_machines(
+        machines_with_results,
+        check_results_on_machine,
+        RESULT_CHECK_DEADLINE_SECS
+    )
+    stage_durations['check_secs'] = time.monotonic() - stage_start_time
 
-            if process.is_alive():
-                logger.error(
-                    f"{test_prefix} Process for running scripts is still alive after {timeout_secs} seconds. Terminating..."
-                )
-                process.terminate()
-                process.join()
-                process.close()
+    for failed_result in get_failed_stage_results(check_results):
+        logger.warning(
+            f"{test_prefix}{failed_result['ip']}: {failed_result['status']}. Checking its results after downloading instead."
+        )
 
-        if has_failures_in_machine_statuses(machine_statuses):
-            logger.error(
-                f"{test_prefix} Errors running scripts on machines."
-            )
-            for machine_ip, status in machine_statuses.items():
-                if status != "complete":
-                    logger.error(
-                        f"{test_prefix}{machine_ip}: {status}"
-                    )
+    result_check = get_result_check(
+        check_results,
+        machines_with_results,
+        get_expected_csv_file_count_from_test_name(test_name)
+    )
+    if result_check['accepted'] is False:
+        logger.error(
+            f"{test_prefix}Results rejected on {result_check['failed_machine_ip']}: {result_check['error']}"
+        )
 
-            return update_ess_df(
-                new_ess_df,
-                start_timestamp,
-                datetime.datetime.now(),
-                test_name,
-                ping_count,
-                ssh_check_count,
-                "script_execution_fail",
-                qos_config,
-                scripts_per_machine,
-                new_ess_row['comments'] + " Errors running scripts on machines."
-            ), "failed script execution"
+    files_without_footer = get_files_without_footer(result_check)
+    if len(files_without_footer) > 0:
+        logger.warning(
+            f"{test_prefix}No summary footer in {', '.join(files_without_footer)}."
+        )
 
-    # End timestamp
-    end_timestamp = pd.Timestamp.now()
+    # 11. Download results into the staging directory.
+    staging_dirpath = get_staging_dirpath(campaign_dirpath, test_name)
+    if os.path.exists(staging_dirpath):
+        shutil.rmtree(staging_dirpath)
 
-    # 10. Check for and download results.
-    local_results_dir = os.path.join(campaign_dirpath, test_name)
-    with Manager() as manager:
-        machine_statuses = manager.dict()
-
-        # Initialise machine statuses with IP and "pending"
-        for machine_config in scripts_per_machine:
-            machine_statuses[machine_config['ip']] = "pending"
-
-        processes = []
-        for machine_config in scripts_per_machine:
-            machine_ip = machine_config['ip']
-
-            process = Process(
-                target = download_results_from_machine,
-                args = (
-                    machine_config,
-                    machine_statuses,
-                    local_results_dir
-                )
-            )
-            processes.append(process)
-            process.start()
-
-        for process in processes:
-            process.join(60)
-            if process.is_alive():
-                logger.error(
-                    f"{test_prefix} Process for downloading results is still alive after 60 seconds. Terminating..."
-                )
-                process.terminate()
-                process.join()
+    download_results = {}
+    stage_start_time = time.monotonic()
+    if result_check['accepted'] is not False:
+        download_results = run_stage_on_machines(
+            scripts_per_machine,
+            download_results_from_machine,
+            DOWNLOAD_RESULTS_DEADLINE_SECS,
+            staging_dirpath
+        )
+    stage_durations['download_secs'] = time.monotonic() - stage_start_time
+
+    error = write_result_manifests(result_check, staging_dirpath)
+    if error:
+        logger.warning(f"{test_prefix}{error}")
+
+    failed_download_ips = []
+    for failed_result in get_failed_stage_results(download_results):
+        logger.error(
+            f"{test_prefix}{failed_result['ip']}: {failed_result['status']}"
+        )
+        if failed_result['ip'] in ips_with_results:
+            failed_download_ips.append(failed_result['ip'])
+
+    # 12. Return the staged test.
+    # The machine configs get the next test's scripts written into them so the
+    # staged test keeps its own copy.
+    staged_test = {
+        "test_name": test_name,
+        "staging_dirpath": staging_dirpath,
+        "results_dirpath": os.path.join(campaign_dirpath, test_name),
+        "start_timestamp": start_timestamp,
+        "end_timestamp": end_timestamp,
+        "ping_count": ping_count,
+        "ssh_check_count": ssh_check_count,
+        "qos_config": qos_config,
+        "scripts_per_machine": copy.deepcopy(scripts_per_machine),
+        "comments": new_ess_row['comments'],
+        "boot_to_ready_secs": boot_to_ready_secs,
+        "reboot_decisions": reboot_decisions,
+        "setup_state": get_next_setup_state(setup_key, noise_ips, download_results),
+        "stage_durations": stage_durations,
+        "failed_download_ips": failed_download_ips,
+        "result_check": result_check
+    }
+
+    return staged_test, new_ess_df, None
+
+def get_staging_dirpath(campaign_dirpath: str = "", test_name: str = "") -> str:
+    """
+    Get where a test's results are downloaded to before they're validated e.g.
+    output/staging/<campaign>/<test_name>. This is outside the campaign directory
+    so half-validated tests never show up in it.
+    """
+    return os.path.join(STAGING_DIR, os.path.basename(campaign_dirpath), test_name)
+
+def validate_staged_test(
+    staged_test: Dict = {},
+    ess_df: pd.DataFrame = pd.DataFrame(),
+    test_prefix: str = ""
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Check a staged test has every csv and none are empty, move its results into
+    the campaign directory and add it to the ESS. Tests whose results were already
+    checked on the machines only need their file count confirmed. Only touches the test's own
+    directories and the ESS dataframe passed in, so it can run in the background
+    while the next test runs.
+
+    Params:
+        - staged_test (Dict): Staged test from stage_test().
+        - ess_df (pd.DataFrame): ESS dataframe to add the test to.
+        - test_prefix (str): the campaign and test counter string for messages
 
-    # 11. Confirm all files are downloaded.
+    Returns:
+        - pd.DataFrame: Updated ESS dataframe.
+        - error
+    """
+    if staged_test == {}:
+        return ess_df, "No staged test passed."
+
+    test_name = staged_test['test_name']
+    staging_dirpath = staged_test['staging_dirpath']
+    results_dirpath = staged_test['results_dirpath']
+
+    end_status = "success"
+    failure_stage = None
+    failed_machine_ip = None
+    comments = staged_test['comments']
+    error = None
+
+    # 1. Use the verdict from the machines if they rejected the results.
+    result_check = staged_test.get('result_check', {})
+    if result_check.get('accepted') is False:
+        end_status = result_check['end_status']
+        failed_machine_ip = result_check['failed_machine_ip']
+        error = result_check['error']
+        comments = comments + error
+
+    # 2. Confirm all files are downloaded.
     expected_csv_file_count = get_expected_csv_file_count_from_test_name(test_name)
-    actual_csv_file_count = get_csv_file_count_from_dir(local_results_dir)
+    actual_csv_file_count = 0
+    if os.path.isdir(staging_dirpath):
+        actual_csv_file_count = get_csv_file_count_from_dir(staging_dirpath)
 
     file_count_string = f"{actual_csv_file_count}/{expected_csv_file_count}"
     logger.debug(f"{test_prefix}{file_count_string} downloaded files found.")
 
-    if expected_csv_file_count != actual_csv_file_count:
-        return update_ess_df(
-            new_ess_df,
-            start_timestamp,
-            end_timestamp,
-            test_name,
-            ping_count,
-            ssh_check_count,
-            f"file_count_mismatch",
-            qos_config,
-            scripts_per_machine,
-            new_ess_row['comments'] + f"expected {expected_csv_file_count} files and found {actual_csv_file_count} files instead."
-        ), f"expected {expected_csv_file_count} files and found {actual_csv_file_count} files instead."
+    if error is None and expected_csv_file_count != actual_csv_file_count:
+        end_status = "file_count_mismatch"
+        error = f"expected {expected_csv_file_count} files and found {actual_csv_file_count} files instead."
+        comments = comments + error
 
-    result_files = os.listdir(local_results_dir)
-    result_files = [os.path.join(local_results_dir, file) for file in result_files]
-    result_files = [_ for _ in result_files if _.lower().endswith(".csv")]
+        # Files are most likely missing because a machine's download failed.
+        failed_download_ips = staged_test.get('failed_download_ips', [])
+        if len(failed_download_ips) > 0:
+            failure_stage = "download"
+            failed_machine_ip = failed_download_ips[0]
 
-    for result_file in result_files:
-        # filesize, filesize_error = get_file_size_from_filepath(result_file)
-        # if filesize_error:
-        #     logger.error(f"{test_prefix} Error getting filesize: {filesize_error}")
-        #     continue
+    # 3. Check none of the files are empty.
+    if error is None and result_check.get('accepted') is not True:
+        result_files = sorted([_ for _ in os.listdir(staging_dirpath) if _.lower().endswith(".csv")])
 
-        try:
-            result_file_df = pd.read_csv(result_file, nrows=10)
+        for result_file in result_files:
+            result_filepath = os.path.join(results_dirpath, result_file)
 
-            if result_file_df.empty:
-                message = f"{result_file} is empty."
-                comments = new_ess_row['comments'] + message
-            else:
-                continue
-            
-        except Exception as e:
-            message = f"Error reading {result_file}: {e}"
-            comments = new_ess_row['comments'] + message
+            try:
+                result_file_df = pd.read_csv(
+                    os.path.join(staging_dirpath, result_file),
+                    nrows=10
+                )
 
-        return update_ess_df(
-            new_ess_df,
-            start_timestamp,
-            end_timestamp,
-            test_name,
-            ping_count,
-            ssh_check_count,
-            "empty_file_found",
-            qos_config,
-            scripts_per_machine,
-            comments
-        ), message
+                if result_file_df.empty:
+                    error = f"{result_filepath} is empty."
+                else:
+                    continue
+
+            except Exception as e:
+                error = f"Error reading {result_filepath}: {e}"
+
+            end_status = "empty_file_found"
+            comments = comments + error
+            break
+
+    # 4. Move the results into the campaign directory, even if they failed
+    # validation, so they can still be salvaged.
+    if os.path.isdir(staging_dirpath):
+        if os.path.exists(results_dirpath):
+            shutil.rmtree(results_dirpath)
+        os.makedirs(os.path.dirname(results_dirpath), exist_ok=True)
+        shutil.move(staging_dirpath, results_dirpath)
+
+        _, blob_store_error = add_dir_to_blob_store(results_dirpath, BLOB_STORE_DIR)
+        if blob_store_error:
+            logger.warning(f"{test_prefix}Couldn't add results to the blob store: {blob_store_error}")
 
-    # 12. Update ESS
+        archive_error = add_test_to_campaign_archive(results_dirpath)
+        if archive_error:
+            logger.warning(f"{test_prefix}Couldn't add results to the campaign archive: {archive_error}")
+
+    # 5. Update ESS
     new_ess_df = update_ess_df(
-        new_ess_df,
-        start_timestamp,
-        end_timestamp,
+        ess_df,
+        staged_test['start_timestamp'],
+        staged_test['end_timestamp'],
         test_name,
-        ping_count,
-        ssh_check_count,
-        "success",
-        qos_config,
-        scripts_per_machine,
-        new_ess_row['comments']
+        staged_test['ping_count'],
+        staged_test['ssh_check_count'],
+        end_status,
+        staged_test['qos_config'],
+        staged_test['scripts_per_machine'],
+        comments,
+        staged_test['boot_to_ready_secs'],
+        staged_test['reboot_decisions'],
+        failed_machine_ip=failed_machine_ip,
+        stage_durations=staged_test.get('stage_durations'),
+        failure_stage=failure_stage
+    )
+
+    return new_ess_df, error
+
+def run_test(
+    test_config: Dict = {}, 
+    machine_configs: List = [],
+    ess_df: pd.DataFrame = pd.DataFrame(),
+    campaign_dirpath: str = "",
+    noise_gen_config: Dict = {},
+    test_prefix: str = ""
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Run the test using the given test config, machine configs and ESS dataframe
+    and validate its results before returning.
+
+    Params:
+        - test_config (Dict): Test config.
+        - machine_configs (List): List of machine configs.
+        - ess_df (pd.DataFrame): ESS dataframe.
+        - campaign_dirpath (str): campaign directory path.
+        - nosie_gen_config (Dict): Config for noise generation.
+
+    Returns:
+        - pd.DataFrame: Updated ESS dataframe if valid, None otherwise.
+        - error
+    """
+    staged_test, new_ess_df, error = stage_test(
+        test_config,
+        machine_configs,
+        ess_df,
+        campaign_dirpath,
+        noise_gen_config,
+        test_prefix
     )
+    if staged_test is None:
+        return new_ess_df, error
 
-    # 13. Return ESS
-    return new_ess_df, None
+    return validate_staged_test(staged_test, new_ess_df, test_prefix)
 
 def generate_test_config_from_qos(
     qos: Optional[Dict] = None
@@ -2573,6 +2483,67 @@ def get_subs_df_from_sub_files(sub_files: List[str] = []) -> Optional[pd.DataFra
 
     return test_df
 
+def summarise_test_to_csv(
+    test_dirpath: str = "", summaries_dirpath: str = ""
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Summarise one test's csvs into <summaries_dirpath>/<test_name>.csv.
+
+    Params:
+        - test_dirpath (str): Test folder with the pub and sub csvs.
+        - summaries_dirpath (str): Directory the summary is written to.
+
+    Returns:
+        - str: Summary filename or None if the test couldn't be summarised.
+        - error
+    """
+    test_name = os.path.basename(test_dirpath)
+
+    expected_csv_file_count = get_expected_csv_file_count_from_test_name(test_name)
+    actual_csv_file_count = get_csv_file_count_from_dir(test_dirpath)
+
+    if expected_csv_file_count != actual_csv_file_count:
+        return None, f"Skipping {test_name} because its missing {expected_csv_file_count - actual_csv_file_count} files"
+
+    csv_files = [os.path.join(test_dirpath, _) for _ in os.listdir(test_dirpath)]
+    csv_files = [_ for _ in csv_files if _.endswith("csv")]
+
+    pub_csv_files = [_ for _ in csv_files if os.path.basename(_).startswith("pub_")]
+
+    pub_0_filepath = [_ for _ in pub_csv_files if _.endswith("0.csv")][0]
+    pub_df = get_pub_df_from_pub_0_filepath(pub_0_filepath)
+    if pub_df is None:
+        return None, f"Couldn't get pub_df for {pub_0_filepath}"
+
+    pub_df = pub_df.to_frame().reset_index()
+
+    sub_csv_files = [_ for _ in csv_files if os.path.basename(_).startswith("sub_")]
+    subs_df = get_subs_df_from_sub_files(sub_csv_files)
+
+    df_list = [pub_df, subs_df]
+    df = pd.concat(df_list, axis=1)
+
+    # Calculate average and total for subs
+    sub_cols = [col for col in df.columns if 'sub' in col.lower()]
+    sub_cols_without_sub = ["_".join(col.split("_")[2:]) for col in sub_cols]
+    sub_metrics = list(set(sub_cols_without_sub))
+    for sub_metric in sub_metrics:
+        sub_metric_cols = [col for col in sub_cols if sub_metric in col]
+        sub_metric_df = df[sub_metric_cols]
+
+        df['avg_' + sub_metric + "_per_sub"] = sub_metric_df.mean(axis=1)
+        df['total_' + sub_metric + "_over_subs"] = sub_metric_df.sum(axis=1)
+
+    summary_filename = f"{test_name}.csv"
+    summary_path = os.path.join(summaries_dirpath, summary_filename)
+
+    # Written next to the summary and moved over it so a summary is never half written.
+    tmp_summary_path = f"{summary_path}.tmp"
+    df.to_csv(tmp_summary_path, index=False)
+    os.replace(tmp_summary_path, summary_path)
+
+    return summary_filename, None
+
 def summarise_tests(dirpath: str = "") -> Optional[str]:
     """
     Summarise the data from the tests in the given directory to a folder.
@@ -2627,14 +2598,6 @@ def summarise_tests(dirpath: str = "") -> Optional[str]:
     else:
         summaries_dirpath = os.path.join(SUMMARISED_DIR, campaign_name)
 
-    if os.path.exists(summaries_dirpath):
-        summaries_dirpath_files = os.listdir(summaries_dirpath)
-        if len(summaries_dirpath_files) > 0:
-            logger.error(
-                f"Summarised data {summaries_dirpath} already exists."
-            )
-            return None
-
     os.makedirs(summaries_dirpath, exist_ok=True)
     test_dirpaths = [os.path.join(dirpath, _) for _ in os.listdir(dirpath)]
     test_dirpaths = [_ for _ in test_dirpaths if os.path.isdir(_)]
@@ -2643,71 +2606,68 @@ def summarise_tests(dirpath: str = "") -> Optional[str]:
         logger.warning(f"Found no test folders in {dirpath}")
         return None
 
+    # Only summarise the tests that are new or have changed since the last run.
+    manifest_path, error = get_manifest_path(summaries_dirpath, "csv")
+    if error:
+        logger.error(f"Couldn't get summary manifest path: {error}")
+        return None
+
+    manifest, error = read_manifest(manifest_path)
+    if error:
+        logger.error(f"Couldn't read summary manifest: {error}")
+        return None
+
+    all_test_count = len(test_dirpaths)
+    test_dirpaths, fingerprints, error = get_tests_to_summarise(
+        test_dirpaths,
+        summaries_dirpath,
+        manifest
+    )
+    if error:
+        logger.error(f"Couldn't check which tests need summarising: {error}")
+        return None
+
     logger.info(
-        f"Summarising {len(test_dirpaths)} tests..."
+        f"Summarising {len(test_dirpaths)} new or changed tests out of {all_test_count}..."
     )
 
     summarised_test_count = 0
-    for test_dirpath in test_dirpaths:
-        test_index = test_dirpaths.index(test_dirpath)
+    for test_index, test_dirpath in enumerate(test_dirpaths):
         test_name = os.path.basename(test_dirpath)
 
-        expected_csv_file_count = get_expected_csv_file_count_from_test_name(test_name)
-        actual_csv_file_count = get_csv_file_count_from_dir(test_dirpath)
-
-        if expected_csv_file_count != actual_csv_file_count:
-            logger.info(
-                f"Skipping {test_name} because its missing {expected_csv_file_count - actual_csv_file_count} files"
-            )
-            continue
-
-        csv_files = [os.path.join(test_dirpath, _) for _ in os.listdir(test_dirpath)]
-        csv_files = [_ for _ in csv_files if _.endswith("csv")]
+        summary_filename, error = summarise_test_to_csv(test_dirpath, summaries_dirpath)
+        if error:
+            logger.error(error)
 
-        pub_csv_files = [_ for _ in csv_files if os.path.basename(_).startswith("pub_")]
+        # Only recorded once the test has been summarised or has failed so a test
+        # that was interrupted isn't in the manifest and is summarised again.
+        record_summarised_test(
+            manifest,
+            test_name,
+            fingerprints[test_name],
+            summary_filename
+        )
+        if (test_index + 1) % SUMMARY_MANIFEST_SAVE_INTERVAL == 0:
+            write_manifest(manifest_path, manifest)
 
-        pub_0_filepath = [_ for _ in pub_csv_files if _.endswith("0.csv")][0]
-        pub_df = get_pub_df_from_pub_0_filepath(pub_0_filepath)
-        if pub_df is None:
-            logger.error(f"Couldn't get pub_df for {pub_0_filepath}")
+        if summary_filename is None:
             continue
 
-        pub_df = pub_df.to_frame().reset_index()
-
-        sub_csv_files = [_ for _ in csv_files if os.path.basename(_).startswith("sub_")]
-        subs_df = get_subs_df_from_sub_files(sub_csv_files)
-
-        df_list = [pub_df, subs_df]
-        df = pd.concat(df_list, axis=1)
-
-        # Calculate average and total for subs
-        sub_cols = [col for col in df.columns if 'sub' in col.lower()]
-        sub_cols_without_sub = ["_".join(col.split("_")[2:]) for col in sub_cols]
-        sub_metrics = list(set(sub_cols_without_sub))
-        for sub_metric in sub_metrics:
-            sub_metric_cols = [col for col in sub_cols if sub_metric in col]
-            sub_metric_df = df[sub_metric_cols]
-
-            df['avg_' + sub_metric + "_per_sub"] = sub_metric_df.mean(axis=1)
-            df['total_' + sub_metric + "_over_subs"] = sub_metric_df.sum(axis=1)
-
-        df.to_csv(
-            os.path.join(
-                summaries_dirpath,
-                f"{test_name}.csv"
-            ),
-            index=False
-        )
-
         logger.info(
-            f"[{test_index + 1}/{len(test_dirpaths)}] Summarised {test_name}.csv"
+            f"[{test_index + 1}/{len(test_dirpaths)}] Summarised {summary_filename}"
         )
         summarised_test_count += 1
 
+    error = write_manifest(manifest_path, manifest)
+    if error:
+        logger.error(f"Couldn't write summary manifest: {error}")
+
     logger.info(
         f"Summarised {summarised_test_count}/{len(test_dirpaths)} tests..."
     )
 
+    return summaries_dirpath
+
 def generate_dataset(dirpath: str = "", truncation_percent: int = 0) -> Optional[str]:
     # TODO: Write unit tests for this function
     """
@@ -2750,9 +2710,19 @@ def generate_dataset(dirpath: str = "", truncation_percent: int = 0) -> Optional
     filename = f"{current_timestamp}_{campaign_name}_dataset_{truncation_percent}_percent_truncation.csv"
     filename = os.path.join("output/datasets", filename)
 
-    dataset_df = pd.DataFrame()
-    for test_csv in track(test_csvs, description="Processing..."):
-        new_dataset_row = {}
+    qos_dicts = get_qos_dicts_from_test_names(
+        [os.path.basename(_) for _ in test_csvs], bools_as_ints=True
+    )
+
+    dataset_rows = []
+    for test_csv, qos_dict in track(zip(test_csvs, qos_dicts), total=len(test_csvs), description="Processing..."):
+        test_name = os.path.basename(test_csv)
+
+        if qos_dict is None:
+            logger.error(
+                f"Couldn't get qos dict for {test_name}."
+            )
+            continue
 
         try:
             test_df = pd.read_csv(test_csv)
@@ -2762,61 +2732,19 @@ def generate_dataset(dirpath: str = "", truncation_percent: int = 0) -> Optional
             )
             continue
 
-        test_name = os.path.basename(test_csv)
+        new_dataset_row = dict(qos_dict)
 
-        new_dataset_row = get_qos_dict_from_test_name(test_name)
-        if new_dataset_row is None:
+        row_stats, error = get_dataset_row_stats(test_df, truncation_percent)
+        if error:
             logger.error(
-                f"Couldn't get qos dict for {test_name}."
+                f"Couldn't get stats for {test_name}: {error}"
             )
             continue
 
-        for key, value in new_dataset_row.items():
-            if value == True:
-                new_dataset_row[key] = 1
-            elif value == False:
-                new_dataset_row[key] = 0
-
-        for column in test_df.columns:
-            if "index" in column.lower():
-                continue
-
-            column_values = test_df[column]
-            value_count = len(column_values)
-
-            values_to_truncate = int(
-                value_count * (truncation_percent / 100)
-            )
-
-            column_values = test_df[column].iloc[values_to_truncate:]
-            column_df = pd.DataFrame(column_values)
-            
-            for PERCENTILE in PERCENTILES:
-                new_dataset_row[f"{column}_{PERCENTILE}%"] = column_df.quantile(PERCENTILE / 100).values[0]
-
-            for STAT in DISTRIBUTION_STATS:
-                if STAT == "mean":
-                    new_dataset_row[f"{column}_mean"] = column_df.mean().values[0]
-
-                elif STAT == "std":
-                    new_dataset_row[f"{column}_std"] = column_df.std().values[0]
-
-                elif STAT == "min":
-                    new_dataset_row[f"{column}_min"] = column_df.min().values[0]
-
-                elif STAT == "max":
-                    new_dataset_row[f"{column}_max"] = column_df.max().values[0]
-
-        new_dataset_row_df = pd.DataFrame(
-            [new_dataset_row]
-        )
-
-        dataset_df = pd.concat(
-            [dataset_df, new_dataset_row_df],
-            axis = 0,
-            ignore_index = True
-        )
+        new_dataset_row.update(row_stats)
+        dataset_rows.append(new_dataset_row)
 
+    dataset_df = pd.DataFrame(dataset_rows)
     dataset_df.to_csv(filename, index=False)
 
     logger.info(
@@ -2919,25 +2847,10 @@ def get_must_wait_for_self_reboot(ess_df: pd.DataFrame = pd.DataFrame()) -> Tupl
         return False, None
 
     ess_df_tail = ess_df.tail(3)
-    all_ips_match = ess_df_tail['ip'].nunique() == 1
+    all_ips_match = get_failed_machine_ips(ess_df_tail).nunique() == 1
 
     return all_ips_match, None
 
-def extract_ip(comment: str = ""):
-    if comment == "":
-        # logger.warning("No comment passed to extract_ip()")
-        return None
-
-    if 'nan' in str(comment).lower():
-        return None
-
-    try:
-        ips = re.findall(r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b', comment)
-        return ips[0] if ips else None
-    except Exception as e:
-        logger.error(f"Error when extracting ip from '{comment}': {e}")
-        return None
-    
 def get_ip_output_from_ess_df(
     ess_df, 
     line_break_point: int = 5
@@ -2945,10 +2858,11 @@ def get_ip_output_from_ess_df(
     if ess_df is None:
         return "", {}, None
 
-    if 'ip' not in ess_df.columns:
+    if 'failed_machine_ip' not in ess_df.columns and 'ip' not in ess_df.columns:
         return "", {}, None
 
-    ip_df = ess_df['ip'].dropna()
+    failed_machine_ips = get_failed_machine_ips(ess_df)
+    ip_df = failed_machine_ips.dropna()
 
     unique_ips = ip_df.unique()
     all_emojis = ["🟠", "🟣", "🟡", "🔵", "🟤", "⚫", "⚪", "🟦", "🟧", "🟨", "🟩", "🟪", "🟫", "🟥", "🟦", "🟪", "🟧", "🟨", "🟩", "🟪", "🟫"]
@@ -2966,10 +2880,8 @@ def get_ip_output_from_ess_df(
     # if comment has fail and IP then swap the IP with the emoji
 
     ip_output = ""
-    for index, row in ess_df.iterrows():
-        end_status = row['end_status']
-        ip = str(row['ip'])
-        ip = "xxx." + ip.split(".")[-1]
+    for end_status, ip in zip(ess_df['end_status'], failed_machine_ips):
+        ip = "xxx." + str(ip).split(".")[-1]
 
         if "success" in end_status.lower():
             ip_output += "🟢"
@@ -3005,10 +2917,9 @@ def get_unreachable_machine_ip_from_ess_df(
     if len(ess_df.index) == 0:
         return None, "ESS is empty."
 
-    ess_df['ip'] = ess_df['comments'].apply(extract_ip)
-    ess_df['end_status'] = ess_df['end_status'].apply(lambda x: x.lower())
+    failed_tests = ess_df['end_status'].astype(str).str.lower().str.contains("fail")
 
-    unreachable_machines = ess_df[ess_df['end_status'].str.contains("fail")]['ip']
+    unreachable_machines = get_failed_machine_ips(ess_df)[failed_tests]
     unreachable_machines = unreachable_machines.dropna()
 
     if len(unreachable_machines) == 0:
@@ -3055,6 +2966,8 @@ def make_output_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(SUMMARISED_DIR, exist_ok=True)
     os.makedirs(DATASET_DIR, exist_ok=True)
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    os.makedirs(BLOB_STORE_DIR, exist_ok=True)
 
 def check_for_self_reboot(
     ess_df: pd.DataFrame = pd.DataFrame(), 
@@ -3100,156 +3013,208 @@ def check_for_self_reboot(
 
     return None
 
-def main(sys_args: list[str] = []) -> Optional[None]:
-    if len(sys_args) < 2:
-        logger.error(
-            f"Config filepath not specified."
-        )
-        return 
+def collect_validated_test(
+    validator: StagedTestValidator,
+    ess_journal: EssJournal
+) -> pd.DataFrame:
+    """
+    Wait for the test being validated in the background and add it to the ESS.
 
-    make_output_dirs()
-    
-    CONFIG_PATH = sys_args[1]
+    Params:
+        - validator (StagedTestValidator): Validator the test was submitted to.
+        - ess_journal (EssJournal): Journal for the campaign's ESS.
 
-    logger.info(f"Reading AP config: {CONFIG_PATH}", )
+    Returns:
+        - pd.DataFrame: Updated ESS dataframe.
+    """
+    test_ess_df, error, test_prefix = validator.collect()
+    if error:
+        logger.error(f"{test_prefix} Error running test: {error}")
 
-    CONFIG, error = read_config(CONFIG_PATH)
+    return append_test_to_ess_or_log(ess_journal, test_ess_df)
+
+def append_test_to_ess_or_log(
+    ess_journal: EssJournal,
+    test_ess_df: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    new_ess_df, error = ess_journal.append(test_ess_df)
     if error:
-        logger.error(f"Error reading config: {error}")
+        logger.error(f"Error updating ESS: {error}")
+
+    return new_ess_df
+
+def run_campaign(
+    CAMPAIGN_INDEX: int = 0,
+    CAMPAIGN_CONF: Dict = {},
+    campaign_count: int = 0
+) -> None:
+    """
+    Run every test in a campaign, rerun the failed ones and compress the results.
+    Campaigns that don't share machines run in their own threads at the same time.
+
+    Params:
+        - CAMPAIGN_INDEX (int): Index of the campaign in the config.
+        - CAMPAIGN_CONF (Dict): Campaign config.
+        - campaign_count (int): Number of campaigns in the config.
+    """
+    CAMPAIGN_NAME = CAMPAIGN_CONF['campaign_name']
+    campaign_count_string = f"[{CAMPAIGN_INDEX + 1}/{campaign_count}]"
+    campaign_name_string = f"[{CAMPAIGN_NAME}]"
+    campaign_prefix = f"\n\t{campaign_count_string} {campaign_name_string}\n\t"
+
+    logger.info(
+        f"{campaign_prefix} Starting..."
+    )
+
+    CAMPAIGN_DIRPATH, error = get_campaign_dirpath(CAMPAIGN_CONF)
+    if error:
+        logger.error(f"Error getting campaign dirpath: {error}")
         return
 
-    logger.info(f"Found {len(CONFIG)} campaigns.")
+    os.makedirs(CAMPAIGN_DIRPATH, exist_ok=True)
+    logger.info(
+        f"{campaign_prefix} Created {CAMPAIGN_DIRPATH}"
+    )
 
-    for CAMPAIGN_INDEX, CAMPAIGN_CONF in enumerate(CONFIG):
-        CAMPAIGN_NAME = CAMPAIGN_CONF['campaign_name']
-        campaign_count_string = f"[{CAMPAIGN_INDEX + 1}/{len(CONFIG)}]"
-        campaign_name_string = f"[{CAMPAIGN_NAME}]"
-        campaign_prefix = f"\n\t{campaign_count_string} {campaign_name_string}\n\t"
+    custom_test_list, error = get_custom_test_list(CAMPAIGN_CONF)
+    if error:
+        logger.error(
+            f"{campaign_prefix} Couldn't get custom test list for {CAMPAIGN_NAME}: {error}"
+        )
+        return
 
-        logger.info(
-            f"{campaign_prefix} Starting..."
+    TEST_GEN_TYPE, error = get_test_gen_type(CAMPAIGN_CONF)
+    if error:
+        logger.error(
+            f"{campaign_prefix} Error getting test gen type: {error}"
         )
+        return 
 
-        CAMPAIGN_DIRPATH, error = get_campaign_dirpath(CAMPAIGN_CONF)
+    CAMPAIGN_DIRNAME = os.path.basename(CAMPAIGN_DIRPATH)
+    ESS_PATH = os.path.join(ESS_DIR, f"{CAMPAIGN_DIRNAME}.parquet")
+    ess_df, ess_error = get_ess_df(ESS_PATH)
+    if ess_error:
+        logger.error(f"{campaign_prefix} Error getting ess: {ess_error}")
+        return
+
+    if TEST_GEN_TYPE == "pcg":
+        COMBINATIONS, error = generate_combinations_from_qos(
+            CAMPAIGN_CONF['qos_settings']
+        )
         if error:
-            logger.error(f"Error getting campaign dirpath: {error}")
-            continue
+            logger.error(f"{campaign_prefix} Error generating combinations: {error}")
+            return
 
-        os.makedirs(CAMPAIGN_DIRPATH, exist_ok=True)
-        logger.info(
-            f"{campaign_prefix} Created {CAMPAIGN_DIRPATH}"
+        # Tests with the same noise config and participant layout run back to back.
+        COMBINATIONS = get_pcg_test_plan(
+            COMBINATIONS,
+            CAMPAIGN_CONF['noise_generation'],
+            ess_df['test_name'].tolist()
         )
 
-        custom_test_list, error = get_custom_test_list(CAMPAIGN_CONF)
-        if error:
-            logger.error(
-                f"{campaign_prefix} Couldn't get custom test list for {CAMPAIGN_NAME}: {error}"
-            )
-            continue
+        target_test_count = len(COMBINATIONS)
 
-        TEST_GEN_TYPE, error = get_test_gen_type(CAMPAIGN_CONF)
-        if error:
-            logger.error(
-                f"{campaign_prefix} Error getting test gen type: {error}"
-            )
-            continue 
+    elif TEST_GEN_TYPE == "rcg":
+        target_test_count = CAMPAIGN_CONF['rcg_target_test_count']
 
-        CAMPAIGN_DIRNAME = os.path.basename(CAMPAIGN_DIRPATH)
-        ESS_PATH = os.path.join(ESS_DIR, f"{CAMPAIGN_DIRNAME}.parquet")
-        ess_df, ess_error = get_ess_df(ESS_PATH)
-        if ess_error:
-            logger.error(f"{campaign_prefix} Error getting ess: {ess_error}")
-            continue
+    elif TEST_GEN_TYPE == "custom_test_list":
+        target_test_count = len(custom_test_list)
 
-        if TEST_GEN_TYPE == "pcg":
-            COMBINATIONS, error = generate_combinations_from_qos(
-                CAMPAIGN_CONF['qos_settings']
-            )
-            if error:
-                logger.error(f"{campaign_prefix} Error generating combinations: {error}")
-                continue
+    else:
+        loger.error(f"Unknown test gen type: {TEST_GEN_TYPE}")
+        return
 
-            target_test_count = len(COMBINATIONS)
+    ESS_DF_ROW_COUNT = len(ess_df.index)
 
-        elif TEST_GEN_TYPE == "rcg":
-            target_test_count = CAMPAIGN_CONF['rcg_target_test_count']
+    current_test_index = ESS_DF_ROW_COUNT
+    last_test_index = target_test_count
 
-        elif TEST_GEN_TYPE == "custom_test_list":
-            target_test_count = len(custom_test_list)
-            
-        else:
-            loger.error(f"Unknown test gen type: {TEST_GEN_TYPE}")
-            continue
+    # Every test appends its ESS rows to a journal that is compacted into
+    # ESS_PATH in the background. Closing it compacts whatever is left.
+    ess_journal = EssJournal(ESS_PATH, ess_df)
+    if ess_journal.store_error:
+        logger.warning(f"{campaign_prefix} ESS store isn't up to date: {ess_journal.store_error}")
 
-        ESS_DF_ROW_COUNT = len(ess_df.index)
+    try:
+        # Each test's results are validated in the background while the next
+        # test runs. The ESS is only ever written from here.
+        validator = StagedTestValidator(validate_staged_test)
+        setup_state = None
+        try:
+            for test_index in range(current_test_index, last_test_index):
+                current_test_index_string = test_index + 1
+                target_test_count_string = target_test_count
+                counter_string = f"[{current_test_index_string}/{target_test_count_string}]"
 
-        current_test_index = ESS_DF_ROW_COUNT
-        last_test_index = target_test_count
+                error = check_for_self_reboot(
+                    ess_df,
+                    CAMPAIGN_CONF,
+                    campaign_prefix
+                )
+                if error:
+                    logger.error(f"{campaign_prefix} Error checking for self reboot: {error}")
+                    continue
 
-        for test_index in range(current_test_index, last_test_index):
-            current_test_index_string = test_index + 1
-            target_test_count_string = target_test_count
-            counter_string = f"[{current_test_index_string}/{target_test_count_string}]"
+                if TEST_GEN_TYPE == "pcg":
+                    test_config = COMBINATIONS[test_index]
 
-            ess_df, ess_error = get_ess_df(ESS_PATH)
-            if ess_error:
-                logger.error(f"Error getting ess: {ess_error}")
-                continue
+                elif TEST_GEN_TYPE == "rcg":
+                    test_config, error = generate_test_config_from_qos(CAMPAIGN_CONF['qos_settings'])
+                    if error:
+                        logger.error(f"{campaign_prefix} Error generating RCG config: {error}")
+                        continue
 
-            error = check_for_self_reboot(
-                ess_df,
-                CAMPAIGN_CONF,
-                campaign_prefix
-            )
-            if error:
-                logger.error(f"{campaign_prefix} Error checking for self reboot: {error}")
-                continue
-            
-            if TEST_GEN_TYPE == "pcg":
-                test_config = COMBINATIONS[test_index]
+                elif TEST_GEN_TYPE == "custom_test_list":
+                    test_config = get_qos_dict_from_test_name(custom_test_list[test_index])
+                    if test_config is not None:
+                        test_config = dict(test_config)
+
+                else:
+                    logger.error(f"{campaign_prefix} Unknown test gen type: {TEST_GEN_TYPE}")
+                    continue
 
-            elif TEST_GEN_TYPE == "rcg":
-                test_config, error = generate_test_config_from_qos(CAMPAIGN_CONF['qos_settings'])
+                test_name, error = get_test_name_from_combination_dict(
+                    test_config
+                )
                 if error:
-                    logger.error(f"{campaign_prefix} Error generating RCG config: {error}")
+                    logger.error(f"{campaign_prefix} Error getting test name: {error}")
                     continue
 
-            elif TEST_GEN_TYPE == "custom_test_list":
-                test_config = get_qos_dict_from_test_name(custom_test_list[test_index])
+                test_prefix = f"{counter_string} [{test_name}]\n\t"
+                test_prefix = f"{campaign_prefix}{test_prefix}"
 
-            else:
-                logger.error(f"{campaign_prefix} Unknown test gen type: {TEST_GEN_TYPE}")
-                continue
+                logger.info(
+                    f"{test_prefix} Running test..."
+                )
 
-            test_name, error = get_test_name_from_combination_dict(
-                test_config
-            )
-            if error:
-                logger.error(f"{campaign_prefix} Error getting test name: {error}")
-                continue
+                staged_test, test_ess_df, error = stage_test(
+                    test_config,
+                    CAMPAIGN_CONF['slave_machines'],
+                    pd.DataFrame(),
+                    CAMPAIGN_DIRPATH,
+                    CAMPAIGN_CONF['noise_generation'],
+                    test_prefix,
+                    setup_state
+                )
 
-            test_prefix = f"{counter_string} [{test_name}]\n\t"
-            test_prefix = f"{campaign_prefix}{test_prefix}"
+                # The previous test was validated while this one ran.
+                ess_df = collect_validated_test(validator, ess_journal)
 
-            logger.info(
-                f"{test_prefix} Running test..."
-            )
+                # A failed test can leave anything behind on the machines.
+                setup_state = None if staged_test is None else staged_test['setup_state']
 
-            ess_df, error = run_test(
-                test_config,
-                CAMPAIGN_CONF['slave_machines'],
-                ess_df,
-                CAMPAIGN_DIRPATH,
-                CAMPAIGN_CONF['noise_generation'],
-                test_prefix
-            )
+                if staged_test is None:
+                    ess_df = append_test_to_ess_or_log(ess_journal, test_ess_df)
+                    logger.error(f"{test_prefix} Error running test {test_name}: {error}")
+                    continue
 
-            ess_df.to_parquet(ESS_PATH, index = False)
+                validator.submit(staged_test, test_prefix)
+
+            ess_df = collect_validated_test(validator, ess_journal)
+
+        finally:
+            validator.close()
 
-            if error:
-                logger.error(f"{test_prefix} Error running test {test_name}: {error}")
-                continue
-        
         do_ess_rows_match_test_count, error = check_if_ess_rows_match_expected_test_count(
             CAMPAIGN_CONF
         )
@@ -3258,28 +3223,28 @@ def main(sys_args: list[str] = []) -> Optional[None]:
                 {error}
                 Error checking if ESS row count matches expected test count for {CAMPAIGN_NAME}.
                 Skipping post test data processing...""")
-            continue
+            return
 
         if not do_ess_rows_match_test_count:
             ess_row_count = len(ess_df.index)
             expected_row_count, error = get_expected_test_count_from_campaign(CAMPAIGN_CONF)
             if error:
                 logger.error(f"Error getting expected test count: {error}")
-                continue
+                return
 
             logger.warning(f"""
                 ESS rows don't match expected test count for {CAMPAIGN_NAME}. 
                 ESS Count:  {ess_row_count}
                 Expected:   {expected_row_count}
                 Skipping post test data processing...""")
-            continue
+            return
 
         logger.info(f"{campaign_prefix} Re attempting failed tests")
         logger.debug(f"{campaign_prefix} Getting failed test names")
         failed_test_names, error = get_failed_test_names(ess_df)
         if error:
             logger.error(f"Failed to get which tests failed from ESS DF: {error}")
-            continue
+            return
 
         logger.debug(f"{campaign_prefix} Found {len(failed_test_names)} failed tests.")
         logger.debug(f"{campaign_prefix} Getting configs for failed test names")
@@ -3287,6 +3252,9 @@ def main(sys_args: list[str] = []) -> Optional[None]:
         failed_test_configs = []
         for test_name in failed_test_names:
             test_config = get_qos_dict_from_test_name(test_name)
+            if test_config is not None:
+                test_config = dict(test_config)
+
             failed_test_configs.append(test_config)
 
         logger.debug(f"{campaign_prefix} Running failed tests")
@@ -3313,11 +3281,6 @@ def main(sys_args: list[str] = []) -> Optional[None]:
             test_status = "failed"
 
             while retry_counter > 0 and test_status != "success":
-                ess_df, ess_error = get_ess_df(ESS_PATH)
-                if ess_error:
-                    logger.error(f"Error getting ess: {ess_error}")
-                    continue
-
                 error = check_for_self_reboot(
                     ess_df,
                     CAMPAIGN_CONF,
@@ -3327,16 +3290,16 @@ def main(sys_args: list[str] = []) -> Optional[None]:
                     logger.error(f"{campaign_prefix} Error checking for self reboot: {error}")
                 break
 
-                ess_df, run_test_error = run_test(
+                test_ess_df, run_test_error = run_test(
                     failed_test,
                     CAMPAIGN_CONF['slave_machines'],
-                    ess_df,
+                    pd.DataFrame(),
                     CAMPAIGN_DIRPATH,
                     CAMPAIGN_CONF['noise_generation'],
                     test_prefix
                 )
 
-                ess_df.to_parquet(ESS_PATH, index = False)
+                ess_df = append_test_to_ess_or_log(ess_journal, test_ess_df)
 
                 if run_test_error:
                     logger.error(f"{campaign_prefix}Error running test {test_name}: {run_test_error}")
@@ -3349,19 +3312,54 @@ def main(sys_args: list[str] = []) -> Optional[None]:
                 test_status = "success"
                 retry_counter -= 1
 
-        
-        # Compress results at end of campaign
-        if os.path.exists(f"{CAMPAIGN_DIRPATH}.zip"):
-            logger.warning(f"A compressed version of the results already exists...")
+    finally:
+        error = ess_journal.close()
+        if error:
+            logger.error(f"{campaign_prefix} Error compacting ESS: {error}")
 
-        else:
-            logger.info(f"Compressing {CAMPAIGN_DIRPATH} to {CAMPAIGN_DIRPATH}.zip...")
-            shutil.make_archive(
-                CAMPAIGN_DIRPATH,
-                'zip',
-                CAMPAIGN_DIRPATH
+    # Each test was added to the archive as it was validated. This only picks up
+    # tests that weren't, e.g. from before the campaign was resumed.
+    archived_test_names, error = sync_campaign_archive(CAMPAIGN_DIRPATH)
+    if error:
+        logger.error(f"{campaign_prefix} Error archiving {CAMPAIGN_DIRPATH}: {error}")
+    elif len(archived_test_names) > 0:
+        logger.info(f"{campaign_prefix} Added {len(archived_test_names)} tests to {CAMPAIGN_DIRPATH}.zip.")
+
+def main(sys_args: list[str] = []) -> Optional[None]:
+    if len(sys_args) < 2:
+        logger.error(
+            f"Config filepath not specified."
+        )
+        return 
+
+    make_output_dirs()
+    
+    CONFIG_PATH = sys_args[1]
+
+    logger.info(f"Reading AP config: {CONFIG_PATH}", )
+
+    CONFIG, error = read_config(CONFIG_PATH)
+    if error:
+        logger.error(f"Error reading config: {error}")
+        return
+
+    logger.info(f"Found {len(CONFIG)} campaigns.")
+
+    # Campaigns on separate machines run at the same time.
+    campaign_errors = run_campaigns(CONFIG, run_campaign)
+    for campaign_index, campaign_error in campaign_errors.items():
+        if campaign_error:
+            logger.error(
+                f"Campaign {CONFIG[campaign_index]['campaign_name']} stopped: {campaign_error}"
             )
 
+    # Results replaced by re-runs leave blobs behind that nothing links to.
+    removed_sha1s, error = remove_unreferenced_blobs(BLOB_STORE_DIR, [DATA_DIR])
+    if error:
+        logger.warning(f"Couldn't clean up the blob store: {error}")
+    elif len(removed_sha1s) > 0:
+        logger.info(f"Removed {len(removed_sha1s)} unused blobs from {BLOB_STORE_DIR}.")
+
 if __name__ == "__main__":
     main(sys.argv)
     
@@ -2,12 +2,16 @@ import paramiko
 import os
 import time
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.pretty import pprint
 from rich.console import Console
 from rich.progress import track
 from rich.markdown import Markdown
 
 from constants import *
+from sftp_download import (
+    DOWNLOAD_STREAM_COUNT, download_files, get_hash_path, get_remote_hashes
+)
 
 console = Console(record=True)
 
@@ -51,13 +55,6 @@ def remove_zi_files(sftp, remote_data_path):
         console.print(f"{count_string} {file} deleted.", style="bold green")
 
 
-def get_remote_hash(ssh, remote_file_path):
-    stdin, stdout, stderr = ssh.exec_command(
-        f"sha1sum {remote_file_path} | awk '{{print $1}}'"
-    )
-    return stdout.read().decode().strip()
-
-
 def format_bytes(bytes):
     # Return the number of bytes in a human-readable format
     if bytes == 0:
@@ -71,154 +68,171 @@ def format_bytes(bytes):
     return f"{int(bytes)}{suffixes[i]}"
 
 
-def zip_and_download(ssh, sftp, output_type, ap_path, local_download_output_dir):
+def get_remote_data_path(ap_path, output_type):
     if output_type == "data":
-        remote_data_path = f"{ap_path}/output/data"
+        return f"{ap_path}/output/data"
     elif output_type == "summarised_data":
-        remote_data_path = f"{ap_path}/output/summarised_data"
+        return f"{ap_path}/output/summarised_data"
     else:
         raise ValueError(f"Invalid output type: {output_type}")
 
-    data_dirs = sftp.listdir(remote_data_path)
-    data_dirs = [data_dir for data_dir in data_dirs if not data_dir.endswith(".zip")]
-    for index, data_dir in enumerate(data_dirs):
-        count_string = f"[{index + 1}/{len(data_dirs)}]"
 
-        remote_filesize_bytes = sftp.stat(f"{remote_data_path}/{data_dir}").st_size
-        remote_filesize = format_bytes(remote_filesize_bytes)
+def create_remote_zip(ssh, remote_parent_path, dirname):
+    stdin, stdout, stderr = ssh.exec_command(
+        f"cd {remote_parent_path} && zip -r {dirname}.zip {dirname}"
+    )
+    exit_status = stdout.channel.recv_exit_status()
+    if exit_status != 0:
+        return f"Couldn't create {dirname}.zip:\n\t{stderr.read().decode()}"
+
+    return None
+
+
+def get_zip_downloads(ssh, sftp, remote_parent_path, dirnames, local_dirpath):
+    """
+    Get the sftp_download.download_files() entries for the zips of some remote
+    directories, zipping any directory that hasn't been zipped yet.
+    """
+    zip_sizes = {
+        file_attr.filename: file_attr.st_size
+        for file_attr in sftp.listdir_attr(remote_parent_path)
+        if file_attr.filename.endswith(".zip")
+    }
+
+    zip_filenames = []
+    for dirname in dirnames:
+        zip_filename = f"{dirname}.zip"
+        if zip_filename not in zip_sizes:
+            console.print(f"{zip_filename} does NOT exist. Creating...")
+            error = create_remote_zip(ssh, remote_parent_path, dirname)
+            if error:
+                console.print(error, style="bold red")
+                continue
 
-        with console.status(
-            f"{count_string} Downloading {data_dir} ({remote_filesize})..."
-        ) as status:
-            remote_data_zip = f"{remote_data_path}/{data_dir}.zip"
+            zip_sizes[zip_filename] = sftp.stat(f"{remote_parent_path}/{zip_filename}").st_size
 
-            # If the zip doesn't exist, create it
-            if not check_remote_file_exists(sftp, remote_data_zip):
-                status.update(
-                    f"{data_dir}.zip ({remote_filesize}) does NOT exist. Creating..."
-                )
-                stdin, stdout, stderr = ssh.exec_command(
-                    f"cd {remote_data_path} && zip -r {data_dir}.zip {data_dir}"
-                )
-                exit_status = stdout.channel.recv_exit_status()
-                if exit_status != 0:
-                    console.print(
-                        f"Couldn't create {data_dir}.zip:\n\t{stderr.read().decode()}",
-                        style="bold red",
-                    )
-                    continue
+        zip_filenames.append(zip_filename)
 
-                # console.print(f"{data_dir}.zip created.", style="bold green")
+    remote_hashes, error = get_remote_hashes(ssh, remote_parent_path, zip_filenames)
+    if error:
+        console.print(error, style="bold red")
+        return []
 
-            os.makedirs(f"{local_download_output_dir}/{output_type}", exist_ok=True)
+    os.makedirs(local_dirpath, exist_ok=True)
 
-            # console.print(
-            #     "Downloading {}\n\t{}\n\t{}".format(
-            #         data_dir,
-            #         f"remote: {remote_data_zip}",
-            #         f"local: {local_download_output_dir}/{output_type}/{data_dir}.zip"
-            #     )
-            # )
+    downloads = []
+    for zip_filename in zip_filenames:
+        if zip_filename not in remote_hashes:
+            console.print(f"Couldn't hash {zip_filename}.", style="bold red")
+            continue
 
-            remote_hash = get_remote_hash(ssh, remote_data_zip)
+        local_path = f"{local_dirpath}/{zip_filename}"
+        if not SKIP_DOWNLOADED and os.path.exists(get_hash_path(local_path)):
+            os.remove(get_hash_path(local_path))
 
-            try:
-                if SKIP_DOWNLOADED:
-                    if os.path.exists(
-                        f"{local_download_output_dir}/{output_type}/{data_dir}.zip"
-                    ):
-                        local_hash = (
-                            os.popen(
-                                f"sha1sum {local_download_output_dir}/{output_type}/{data_dir}.zip | awk '{{print $1}}'"
-                            )
-                            .read()
-                            .strip()
-                        )
-
-                        if remote_hash == local_hash:
-                            # console.print(
-                            #     "{} {} already exists locally. Skipping...".format(
-                            #         count_string,
-                            #         f"{data_dir}.zip"
-                            #     ),
-                            #     style="bold green"
-                            # )
-                            continue
-
-                sftp.get(
-                    remote_data_zip,
-                    f"{local_download_output_dir}/{output_type}/{data_dir}.zip",
-                )
+        downloads.append({
+            "remote_path": f"{remote_parent_path}/{zip_filename}",
+            "local_path": local_path,
+            "size": zip_sizes[zip_filename],
+            "sha1": remote_hashes[zip_filename],
+        })
 
-                local_hash = (
-                    os.popen(
-                        f"sha1sum {local_download_output_dir}/{output_type}/{data_dir}.zip | awk '{{print $1}}'"
-                    )
-                    .read()
-                    .strip()
-                )
+    return downloads
 
-                if remote_hash != local_hash:
-                    console.print(
-                        f"Hashes don't match for {data_dir}.zip. Deleting...",
-                        style="bold red",
-                    )
-                    os.remove(
-                        f"{local_download_output_dir}/{output_type}/{data_dir}.zip"
-                    )
-                    continue
-
-                # console.print(
-                #     f"{count_string} {data_dir}.zip ({remote_filesize}) downloaded.",
-                #     style="bold green"
-                # )
-            except Exception as e:
-                console.print(f"Couldn't download {data_dir}:\n\t{e}", style="bold red")
-                continue
 
-    remove_zi_files(sftp, remote_data_path)
-    remove_zi_files(sftp, os.path.dirname(remote_data_path))
+def get_data_downloads(ssh, sftp, output_type, ap_path, local_download_output_dir):
+    remote_data_path = get_remote_data_path(ap_path, output_type)
 
+    data_dirs = sftp.listdir(remote_data_path)
+    data_dirs = [data_dir for data_dir in data_dirs if not data_dir.endswith(".zip")]
 
-def main() -> None:
-    for MACHINE in MACHINES:
-        console.print(f"Downloading from {MACHINE['name']} ({MACHINE['ip']})...")
-
-        local_download_output_dir = f"./output/downloads/{MACHINE['name']}"
-        os.makedirs(local_download_output_dir, exist_ok=True)
-
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(
-            MACHINE["ip"],
-            username=MACHINE["username"],
-            key_filename=MACHINE["ssh_key_path"],
+    return get_zip_downloads(
+        ssh,
+        sftp,
+        remote_data_path,
+        data_dirs,
+        f"{local_download_output_dir}/{output_type}"
+    )
+
+
+def download_from_machine(machine):
+    """
+    Download every campaign zip and datasets.zip from one machine. The zips are
+    downloaded over several SFTP channels of the one connection at once.
+    """
+    name = machine['name']
+    local_download_output_dir = f"./output/downloads/{name}"
+    os.makedirs(local_download_output_dir, exist_ok=True)
+
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(
+        machine["ip"],
+        username=machine["username"],
+        key_filename=machine["ssh_key_path"],
+    )
+    sftp = ssh.open_sftp()
+    ap_path = machine["ap_path"]
+
+    try:
+        downloads = get_data_downloads(ssh, sftp, "data", ap_path, local_download_output_dir)
+        # downloads += get_data_downloads(
+        #     ssh, sftp, "summarised_data", ap_path, local_download_output_dir
+        # )
+        downloads += get_zip_downloads(
+            ssh, sftp, f"{ap_path}/output", ["datasets"], local_download_output_dir
         )
-        sftp = ssh.open_sftp()
-        ap_path = MACHINE["ap_path"]
 
-        # console.print(Markdown(f"# /data"))
-        zip_and_download(ssh, sftp, "data", ap_path, local_download_output_dir)
-        # console.print(Markdown(f"# /summarised_data"))
-        # zip_and_download(ssh, sftp, "summarised_data", ap_path, local_download_output_dir)
+        total_bytes = sum([_['size'] for _ in downloads])
+        console.print(
+            f"{name}: Downloading {len(downloads)} zips ({format_bytes(total_bytes)})..."
+        )
 
-        remote_ds_dir = f"{ap_path}/output/datasets"
+        done_count = 0
 
-        if not check_remote_file_exists(sftp, f"{remote_ds_dir}.zip"):
-            console.print(f"{remote_ds_dir}.zip does NOT exist. Creating...")
-            ssh.exec_command(f"cd {ap_path}/output && zip -r datasets.zip datasets")
+        def print_download(download, status, error):
+            nonlocal done_count
+            done_count += 1
+            count_string = f"{name}: [{done_count}/{len(downloads)}]"
+            filename = os.path.basename(download['local_path'])
 
-        try:
-            sftp.get(
-                f"{remote_ds_dir}.zip", f"{local_download_output_dir}/datasets.zip"
-            )
-            console.print(f"datasets.zip downloaded.", style="bold green")
-        except Exception as e:
-            console.print(f"Couldn't download datasets.zip:\n\t{e}", style="bold red")
+            if error:
+                console.print(f"{count_string} Couldn't download {filename}:\n\t{error}", style="bold red")
+            elif status != "skipped":
+                console.print(
+                    f"{count_string} {filename} ({format_bytes(download['size'])}) {status}.",
+                    style="bold green"
+                )
 
+        download_files(ssh, downloads, DOWNLOAD_STREAM_COUNT, print_download)
+
+        remote_data_path = get_remote_data_path(ap_path, "data")
+        remove_zi_files(sftp, remote_data_path)
+        remove_zi_files(sftp, os.path.dirname(remote_data_path))
+
+    finally:
         sftp.close()
         ssh.close()
 
 
+def main() -> None:
+    # Each machine has its own connection so they download at the same time.
+    with ThreadPoolExecutor(max_workers=len(MACHINES)) as executor:
+        futures = {
+            executor.submit(download_from_machine, machine): machine
+            for machine in MACHINES
+        }
+        for future in as_completed(futures):
+            machine = futures[future]
+            try:
+                future.result()
+                console.print(f"Finished downloading from {machine['name']} ({machine['ip']}).")
+            except Exception as e:
+                console.print(
+                    f"Couldn't download from {machine['name']} ({machine['ip']}):\n\t{e}",
+                    style="bold red"
+                )
+
+
 if __name__ == "__main__":
     main()
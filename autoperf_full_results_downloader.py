@@ -12,6 +12,7 @@ import datetime
 import warnings
 import random
 import shutil
+import shlex
 import rich
 import paramiko
 
@@ -25,6 +26,10 @@ from rich.console import Console
 from rich.markdown import Markdown
 from io import StringIO
 from constants import *
+from sftp_download import DOWNLOAD_STREAM_COUNT, download_files
+from sync_manifest import (
+    SYNC_MANIFEST_VERSION, get_changed_files, read_sync_manifest, write_sync_manifest
+)
 
 console = Console()
 
@@ -278,6 +283,11 @@ def read_config(config_path: str = ""):
     return config
 
 
+# ? ips that have already passed the ping and SSH checks so each machine is only
+# ? checked before its first command.
+connected_machine_ips = set()
+
+
 def run_command_via_ssh(machine_config: Dict = {}, command: str = "") -> Optional[str]:
     """
     Run a command on a machine via SSH.
@@ -304,13 +314,16 @@ def run_command_via_ssh(machine_config: Dict = {}, command: str = "") -> Optiona
 
     logger.debug(f"Running {command} on {machine_name} ({machine_ip}).")
 
-    if not ping_machine(machine_ip):
-        logger.error(f"Couldn't ping {machine_name} ({machine_ip}).")
-        return None
+    if machine_ip not in connected_machine_ips:
+        if not ping_machine(machine_ip):
+            logger.error(f"Couldn't ping {machine_name} ({machine_ip}).")
+            return None
 
-    if not check_ssh_connection(machine_config):
-        logger.error(f"Couldn't SSH into {machine_name} ({machine_ip}).")
-        return None
+        if not check_ssh_connection(machine_config):
+            logger.error(f"Couldn't SSH into {machine_name} ({machine_ip}).")
+            return None
+
+        connected_machine_ips.add(machine_ip)
 
     ssh_command = f"ssh -i {ssh_key} {username}@{machine_ip} '{command}'"
     command_process = subprocess.Popen(
@@ -330,18 +343,33 @@ def run_command_via_ssh(machine_config: Dict = {}, command: str = "") -> Optiona
     return stdout
 
 
-def download_items_from_machine(
-    machine: Dict = {}, item_type: str = "", status: Console.status = None
-) -> Tuple[Optional[List], Optional[str]]:
-    if machine == {}:
-        return None, "No machine config passed."
+ITEM_TYPES = ["zipped_dirs", "datasets", "summarised_data"]
+
+# ? {item type: (file name pattern, only top level files)} of the files sync mode
+# ? downloads, matching what download_items_from_machine() lists and scps.
+SYNC_ITEM_FILES = {
+    "zipped_dirs": ("*.zip", True),
+    "datasets": ("*", True),
+    "summarised_data": ("*", False),
+}
+
+SYNC_MANIFEST_SCRIPT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "sync_manifest.py"
+)
+SYNC_MANIFEST_TIMEOUT_SECS = 600
 
-    if item_type not in ["zipped_dirs", "datasets", "summarised_data"]:
-        return (
-            None,
-            f"Invalid item type: {item_type}. Must be one of ['zipped_dirs', 'datasets', 'summarised_data'].",
-        )
 
+def get_item_dirs(
+    machine: Dict = {}, item_type: str = ""
+) -> Tuple[Optional[Tuple[str, str, str]], Optional[str]]:
+    """
+    Get the remote directory, old remote directory and local directory of an
+    item type.
+
+    Returns:
+        - Tuple: (remote_item_dir, backup_remote_dir, local_item_dir)
+        - error
+    """
     if item_type == "zipped_dirs":
         remote_item_dir = f"~/AutoPerf/{DATA_DIR}"
         backup_remote_dir = "~/AutoPerf/data"
@@ -360,9 +388,24 @@ def download_items_from_machine(
     else:
         return (
             None,
-            f"Invalid item type: {item_type}. Must be one of ['zipped_dirs', 'datasets', 'summarised_data'].",
+            f"Invalid item type: {item_type}. Must be one of {ITEM_TYPES}.",
         )
 
+    return (remote_item_dir, backup_remote_dir, local_item_dir), None
+
+
+def download_items_from_machine(
+    machine: Dict = {}, item_type: str = "", status: Console.status = None
+) -> Tuple[Optional[List], Optional[str]]:
+    if machine == {}:
+        return None, "No machine config passed."
+
+    item_dirs, error = get_item_dirs(machine, item_type)
+    if error:
+        return None, error
+
+    remote_item_dir, backup_remote_dir, local_item_dir = item_dirs
+
     status.update(f"Getting {item_type} from {machine['name']} ({machine['ip']})...")
 
     get_items_command = f"ls {remote_item_dir}"
@@ -469,12 +512,223 @@ def download_items_from_machine(
     return item_dirs, None
 
 
+def parse_sync_manifest(manifest_output: str = "") -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get the manifest from sync_manifest.py's stdout. The manifest is the last line
+    so anything the shell prints before it is ignored.
+
+    Returns:
+        - Dict: {"version", "dirpath", "files"}
+        - error
+    """
+    lines = [_ for _ in manifest_output.splitlines() if _.strip() != ""]
+    if len(lines) == 0:
+        return None, "No manifest received."
+
+    try:
+        manifest = json.loads(lines[-1])
+    except json.JSONDecodeError as e:
+        return None, f"Couldn't decode manifest: {e}"
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+        return None, "Manifest has no files."
+
+    if manifest.get("version") != SYNC_MANIFEST_VERSION:
+        return None, f"Expected manifest version {SYNC_MANIFEST_VERSION} and got {manifest.get('version')}."
+
+    return manifest, None
+
+
+def get_remote_sync_manifest(
+    ssh: paramiko.SSHClient = None,
+    remote_dir: str = "",
+    include_pattern: str = "*",
+    top_level: bool = False
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get the manifest of a remote directory in one SSH call by piping
+    sync_manifest.py into python3 on the machine.
+
+    Params:
+        - ssh (paramiko.SSHClient): Connection to the machine.
+        - remote_dir (str): Remote directory. May start with ~.
+        - include_pattern (str): Only files whose names match e.g. "*.zip".
+        - top_level (bool): Don't look in subdirectories.
+
+    Returns:
+        - Dict: {"version", "dirpath", "files"}
+        - error
+    """
+    command = "python3 - --dir {} --include {}".format(
+        shlex.quote(remote_dir), shlex.quote(include_pattern)
+    )
+    if top_level:
+        command = f"{command} --top-level"
+
+    with open(SYNC_MANIFEST_SCRIPT_PATH, "r") as f:
+        script = f.read()
+
+    try:
+        stdin, stdout, stderr = ssh.exec_command(command, timeout=SYNC_MANIFEST_TIMEOUT_SECS)
+        stdin.write(script)
+        stdin.channel.shutdown_write()
+
+        manifest_output = stdout.read().decode()
+        exit_status = stdout.channel.recv_exit_status()
+    except Exception as e:
+        return None, f"Couldn't get the manifest of {remote_dir}: {e}"
+
+    if exit_status != 0:
+        return None, f"Couldn't get the manifest of {remote_dir}: {stderr.read().decode().strip()}"
+
+    return parse_sync_manifest(manifest_output)
+
+
+def sync_items_from_machine(
+    ssh: paramiko.SSHClient = None, machine: Dict = {}, item_type: str = ""
+) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    Download only the files of an item type that are new or have changed since
+    the last sync. The remote manifest is compared with the local one the last
+    sync left in the local directory and the changed files are downloaded over
+    several SFTP channels at once.
+
+    Params:
+        - ssh (paramiko.SSHClient): Connection to the machine.
+        - machine (Dict): Machine config.
+        - item_type (str): One of ITEM_TYPES.
+
+    Returns:
+        - List[str]: Relative paths of the files that were downloaded.
+        - error
+    """
+    if machine == {}:
+        return None, "No machine config passed."
+
+    item_dirs, error = get_item_dirs(machine, item_type)
+    if error:
+        return None, error
+
+    remote_item_dir, backup_remote_dir, local_item_dir = item_dirs
+    include_pattern, top_level = SYNC_ITEM_FILES[item_type]
+
+    remote_manifest, error = get_remote_sync_manifest(
+        ssh, remote_item_dir, include_pattern, top_level
+    )
+    if error:
+        return None, error
+
+    if len(remote_manifest["files"]) == 0:
+        remote_manifest, error = get_remote_sync_manifest(
+            ssh, backup_remote_dir, include_pattern, top_level
+        )
+        if error:
+            return None, error
+
+        if len(remote_manifest["files"]) == 0:
+            return [], None
+
+        console.print(
+            f"Found {len(remote_manifest['files'])} {item_type} in old location ({backup_remote_dir}).",
+            style="bold yellow",
+        )
+
+    os.makedirs(local_item_dir, exist_ok=True)
+
+    remote_files = remote_manifest["files"]
+    local_files = read_sync_manifest(local_item_dir)
+    changed_relpaths = get_changed_files(remote_files, local_files, local_item_dir)
+
+    console.print(
+        f"{machine['name']}: {len(changed_relpaths)}/{len(remote_files)} {item_type} files to download."
+    )
+
+    downloads = []
+    for relpath in changed_relpaths:
+        local_path = os.path.join(local_item_dir, relpath)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+        downloads.append({
+            "remote_path": f"{remote_manifest['dirpath']}/{relpath}",
+            "local_path": local_path,
+            "size": remote_files[relpath]["size"],
+            "sha1": remote_files[relpath]["sha1"],
+            # The sync manifest already holds the hashes.
+            "record_hash": False,
+            "relpath": relpath,
+        })
+
+    def print_download(download, download_status, error):
+        if error:
+            console.print(f"❌ {download['relpath']}\n\t{error}", style="bold red")
+        else:
+            console.print(f"✅ {download['relpath']}", style="bold green")
+
+    download_results = download_files(ssh, downloads, DOWNLOAD_STREAM_COUNT, print_download)
+
+    # Files that failed keep their entry from the last sync so they're tried again
+    # next time, and files that have gone from the machine are kept locally.
+    synced_files = {
+        relpath: entry for relpath, entry in local_files.items()
+        if relpath not in changed_relpaths
+        and os.path.isfile(os.path.join(local_item_dir, relpath))
+    }
+    synced_files.update({
+        relpath: entry for relpath, entry in remote_files.items()
+        if relpath not in changed_relpaths
+    })
+
+    downloaded_relpaths = []
+    for download in downloads:
+        download_status, error = download_results[download["local_path"]]
+        if error:
+            continue
+
+        entry = remote_files[download["relpath"]]
+        os.utime(download["local_path"], (entry["mtime"], entry["mtime"]))
+        synced_files[download["relpath"]] = entry
+        downloaded_relpaths.append(download["relpath"])
+
+    error = write_sync_manifest(local_item_dir, synced_files)
+    if error:
+        return downloaded_relpaths, error
+
+    failed_count = len(downloads) - len(downloaded_relpaths)
+    if failed_count > 0:
+        return downloaded_relpaths, f"Couldn't download {failed_count} {item_type} files."
+
+    return downloaded_relpaths, None
+
+
+def sync_machine(machine: Dict = {}) -> None:
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(
+        machine["ip"],
+        username=machine["username"],
+        key_filename=machine["ssh_key_path"],
+    )
+
+    try:
+        for item_type in ITEM_TYPES:
+            downloaded_relpaths, error = sync_items_from_machine(ssh, machine, item_type)
+            if error:
+                logger.error(f"Couldn't sync {item_type} from {machine['name']}: {error}")
+                continue
+
+            logger.info(
+                f"Synced {item_type} from {machine['name']}: {len(downloaded_relpaths)} files downloaded."
+            )
+    finally:
+        ssh.close()
+
+
 def main(sys_args: list[str] = []) -> None:
     if len(sys_args) < 2:
         logger.error(
             "\n\t{}\n\t{}".format(
                 "Config file path not passed.",
-                "Usage: python autoperf_results_downloader.py <config_file_path>",
+                "Usage: python autoperf_results_downloader.py <config_file_path> [--skip-downloaded | --sync]",
             )
         )
         return
@@ -493,6 +747,14 @@ def main(sys_args: list[str] = []) -> None:
     if "--skip-downloaded" in sys_args:
         SKIP_DOWNLOADED = True
 
+    if "--sync" in sys_args:
+        for MACHINE_CONFIG in CONFIG:
+            try:
+                sync_machine(MACHINE_CONFIG)
+            except Exception as e:
+                logger.error(f"Couldn't sync {MACHINE_CONFIG['name']}: {e}")
+        return
+
     for MACHINE_CONFIG in CONFIG:
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
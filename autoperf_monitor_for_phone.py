@@ -14,6 +14,7 @@ from rich.table import Table
 from rich.console import Console
 from rich.markdown import Markdown
 from io import StringIO
+from ess_schema import get_failed_machine_ips
 
 console = Console()
 
@@ -335,122 +336,6 @@ def get_valid_dirname(dir_name: str = "") -> Optional[str]:
     return dir_name
 
 
-def get_qos_dict_from_test_name(test_name: str = "") -> Optional[Dict]:
-    """
-    Take test name and get qos settings from it.
-    e.g. 100SEC_100B_5PUB_1SUB_REL_MC_0DUR_100LC returns:
-    {
-        "datalen_byts": 100,
-        "durability_level": 0,
-        "duration_secs": 100,
-        "latency_count": 100,
-        "pub_count": 5,
-        "sub_count": 1,
-        "use_multicast": true,
-        "use_reliable": true
-    }
-
-    Params:
-        test_name: str: Test name to get qos settings from.
-
-    Returns:
-        Dict: QoS settings if successful, None if not.
-    """
-    if test_name == "":
-        logger.error("No test name passed to get_qos_dict_from_test_name().")
-        return None
-
-    # TODO: Write unit tests for this function
-
-    qos_dict = {
-        "datalen_bytes": None,
-        "durability_level": None,
-        "duration_secs": None,
-        "latency_count": None,
-        "pub_count": None,
-        "sub_count": None,
-        "use_multicast": None,
-        "use_reliable": None,
-    }
-
-    if "." in test_name:
-        test_name = test_name.split(".")[0]
-
-    if "_" not in test_name:
-        logger.error("No _ found in test name: {test_name}")
-        return None
-
-    test_name_sections = test_name.split("_")
-
-    if len(test_name_sections) != len(REQUIRED_QOS_KEYS):
-        logger.error(
-            f"Mismatch in test_name sections. Expected {len(REQUIRED_QOS_KEYS)} parts."
-        )
-        return None
-
-    for section in test_name_sections:
-        if "sec" in section.lower():
-            value = section.lower().replace("sec", "")
-            value = int(value)
-            qos_dict["duration_secs"] = value
-
-        elif "pub" in section.lower():
-            value = section.lower().replace("pub", "")
-            value = int(value)
-            qos_dict["pub_count"] = value
-
-        elif "sub" in section.lower():
-            value = section.lower().replace("sub", "")
-            value = int(value)
-            qos_dict["sub_count"] = value
-
-        elif "dur" in section.lower():
-            value = section.lower().replace("dur", "")
-            value = int(value)
-            qos_dict["durability_level"] = value
-
-        elif "lc" in section.lower():
-            value = section.lower().replace("lc", "")
-            value = int(value)
-            qos_dict["latency_count"] = value
-
-        elif "rel" in section.lower() or "be" in section.lower():
-            use_reliable = None
-            if "rel" in section.lower():
-                use_reliable = True
-            else:
-                use_reliable = False
-
-            qos_dict["use_reliable"] = use_reliable
-
-        elif "mc" in section.lower() or "uc" in section.lower():
-            use_multicast = None
-
-            if "mc" in section.lower():
-                use_multicast = True
-            else:
-                use_multicast = False
-
-            qos_dict["use_multicast"] = use_reliable
-
-        elif section.lower().endswith("b"):
-            value = section.lower().replace("b", "")
-            value = int(value)
-            qos_dict["datalen_bytes"] = value
-
-        else:
-            logger.error(f"Couldn't recognise following section: {section}")
-            return None
-
-    # Final check for any None values
-    for key, value in qos_dict.items():
-        if value is None:
-            logger.error(f"Value for {key} is None.")
-            return None
-
-    return qos_dict
-
-
 def run_command_via_ssh(machine_config: Dict = {}, command: str = "") -> Optional[str]:
     """
     Run a command on a machine via SSH.
@@ -1424,9 +1309,12 @@ def get_ip_output_from_ess_df(ess_df, line_break_point: int = 5):
     if ess_df is None:
         return "", {}
 
-    if "ip" not in ess_df.columns:
+    if "ip" not in ess_df.columns and "failed_machine_ip" not in ess_df.columns:
         return "", {}
 
+    ess_df = ess_df.copy()
+    ess_df["ip"] = get_failed_machine_ips(ess_df)
+
     ip_df = ess_df["ip"].dropna()
 
     unique_ips = ip_df.unique()
@@ -27,6 +27,11 @@ warnings.simplefilter(action="ignore", category=FutureWarning)
 
 import pandas as pd
 
+from constants import BLOB_STORE_DIR
+from dataset_stats import get_dataset_row_stats_per_truncation
+from qos_codec import get_qos_dicts_from_test_names
+from blob_store import add_file_to_blob_store, materialise_blobs
+
 DEBUG_MODE = False
 SKIP_RESTART = False
 
@@ -98,116 +103,6 @@ CONFIG = [
 ]
 
 
-def get_qos_dict_from_test_name(test_name: str = "") -> Optional[Dict]:
-    """
-    Take test name and get qos settings from it.
-    e.g. 100SEC_100B_5PUB_1SUB_REL_MC_0DUR_100LC returns:
-    {
-        "datalen_byts": 100,
-        "durability_level": 0,
-        "duration_secs": 100,
-        "latency_count": 100,
-        "pub_count": 5,
-        "sub_count": 1,
-        "use_multicast": true,
-        "use_reliable": true
-    }
-    """
-    if test_name == "":
-        logger.error("No test name passed to get_qos_dict_from_test_name().")
-        return None
-
-    # TODO: Write unit tests for this function
-
-    qos_dict = {
-        "datalen_bytes": None,
-        "durability_level": None,
-        "duration_secs": None,
-        "latency_count": None,
-        "pub_count": None,
-        "sub_count": None,
-        "use_multicast": None,
-        "use_reliable": None,
-    }
-
-    if "." in test_name:
-        test_name = test_name.split(".")[0]
-
-    if "_" not in test_name:
-        logger.error("No _ found in test name: {test_name}")
-        return None
-
-    test_name_sections = test_name.split("_")
-
-    if len(test_name_sections) != len(REQUIRED_QOS_KEYS):
-        logger.error(
-            f"Mismatch in test_name sections. Expected {len(REQUIRED_QOS_KEYS)} parts."
-        )
-        return None
-
-    for section in test_name_sections:
-        if "sec" in section.lower():
-            value = section.lower().replace("sec", "")
-            value = int(value)
-            qos_dict["duration_secs"] = value
-
-        elif "pub" in section.lower():
-            value = section.lower().replace("pub", "")
-            value = int(value)
-            qos_dict["pub_count"] = value
-
-        elif "sub" in section.lower():
-            value = section.lower().replace("sub", "")
-            value = int(value)
-            qos_dict["sub_count"] = value
-
-        elif "dur" in section.lower():
-            value = section.lower().replace("dur", "")
-            value = int(value)
-            qos_dict["durability_level"] = value
-
-        elif "lc" in section.lower():
-            value = section.lower().replace("lc", "")
-            value = int(value)
-            qos_dict["latency_count"] = value
-
-        elif "rel" in section.lower() or "be" in section.lower():
-            use_reliable = None
-            if "rel" in section.lower():
-                use_reliable = True
-            else:
-                use_reliable = False
-
-            qos_dict["use_reliable"] = use_reliable
-
-        elif "mc" in section.lower() or "uc" in section.lower():
-            use_multicast = None
-
-            if "mc" in section.lower():
-                use_multicast = True
-            else:
-                use_multicast = False
-
-            qos_dict["use_multicast"] = use_reliable
-
-        elif section.lower().endswith("b"):
-            value = section.lower().replace("b", "")
-            value = int(value)
-            qos_dict["datalen_bytes"] = value
-
-        else:
-            logger.error(f"Couldn't recognise following section: {section}")
-            return None
-
-    # Final check for any None values
-    for key, value in qos_dict.items():
-        if value is None:
-            logger.error(f"Value for {key} is None.")
-            return None
-
-    return qos_dict
-
-
 def generate_dataset(
     summaries_dirpath: str = "", truncation_percent: int = 0
 ) -> Optional[str]:
@@ -221,6 +116,27 @@ def generate_dataset(
     Returns:
         - None
     """
+    filenames = generate_datasets(summaries_dirpath, [truncation_percent])
+    if filenames is None:
+        return None
+
+    return filenames[truncation_percent]
+
+
+def generate_datasets(
+    summaries_dirpath: str = "", truncation_percentages: List[int] = [0]
+) -> Optional[Dict[int, str]]:
+    """
+    Reduce each csv file in summarised_data folder to a single row per truncation
+    percentage, reading each csv file once and writing one csv file per percentage.
+
+    Params:
+        - summaries_dirpath (str): Directory path.
+        - truncation_percentages (List[int]): Truncation percentages e.g. [0, 10, 25, 50].
+
+    Returns:
+        - Dict: {truncation_percent: dataset filename, ...}
+    """
     if summaries_dirpath == "":
         logger.error(f"No summaries dirpath passed.")
         return None
@@ -229,6 +145,10 @@ def generate_dataset(
         logger.error(f"Summarised dirpath {summaries_dirpath} does NOT exist.")
         return None
 
+    if len(truncation_percentages) == 0:
+        logger.error(f"No truncation percentages passed.")
+        return None
+
     test_csvs = [
         os.path.join(summaries_dirpath, _) for _ in os.listdir(summaries_dirpath)
     ]
@@ -237,22 +157,35 @@ def generate_dataset(
         logger.error(f"No csv files found in {summaries_dirpath}.")
         return None
 
+    truncation_string = ", ".join([f"{_}%" for _ in truncation_percentages])
     logger.info(
-        f"Generating dataset from {len(test_csvs)} tests with {truncation_percent}% truncation..."
+        f"Generating datasets from {len(test_csvs)} tests with {truncation_string} truncation..."
     )
 
     experiment_name = os.path.basename(summaries_dirpath)
     current_timestamp = datetime.datetime.today().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"{current_timestamp}_{experiment_name}_dataset_{truncation_percent}_percent_truncation.csv"
-    filename = os.path.join(os.path.dirname(summaries_dirpath), filename).replace(
-        "summarised_data", "datasets"
-    )
+
+    filenames = {}
+    for truncation_percent in truncation_percentages:
+        filename = f"{current_timestamp}_{experiment_name}_dataset_{truncation_percent}_percent_truncation.csv"
+        filename = os.path.join(os.path.dirname(summaries_dirpath), filename).replace(
+            "summarised_data", "datasets"
+        )
+        filenames[truncation_percent] = filename
 
     os.makedirs("datasets", exist_ok=True)
 
-    dataset_df = pd.DataFrame()
-    for test_csv in track(test_csvs, description="Processing..."):
-        new_dataset_row = {}
+    qos_dicts = get_qos_dicts_from_test_names(
+        [os.path.basename(_) for _ in test_csvs], bools_as_ints=True
+    )
+
+    dataset_rows = {truncation_percent: [] for truncation_percent in truncation_percentages}
+    for test_csv, qos_dict in track(zip(test_csvs, qos_dicts), total=len(test_csvs), description="Processing..."):
+        test_name = os.path.basename(test_csv)
+
+        if qos_dict is None:
+            logger.error(f"Couldn't get qos dict for {test_name}.")
+            continue
 
         try:
             test_df = pd.read_csv(test_csv)
@@ -260,44 +193,23 @@ def generate_dataset(
             logger.error(f"UnicodeDecodeError reading {test_csv}.")
             continue
 
-        test_name = os.path.basename(test_csv)
-
-        new_dataset_row = get_qos_dict_from_test_name(test_name)
-        if new_dataset_row is None:
-            logger.error(f"Couldn't get qos dict for {test_name}.")
+        row_stats_per_truncation, error = get_dataset_row_stats_per_truncation(
+            test_df, truncation_percentages, PERCENTILES, []
+        )
+        if error:
+            logger.error(f"Couldn't get stats for {test_name}: {error}")
             continue
 
-        for key, value in new_dataset_row.items():
-            if value == True:
-                new_dataset_row[key] = 1
-            elif value == False:
-                new_dataset_row[key] = 0
-
-        for column in test_df.columns:
-            if "index" in column.lower():
-                continue
+        for truncation_percent, row_stats in row_stats_per_truncation.items():
+            new_dataset_row = dict(qos_dict)
+            new_dataset_row.update(row_stats)
+            dataset_rows[truncation_percent].append(new_dataset_row)
 
-            column_values = test_df[column]
-            value_count = len(column_values)
+    for truncation_percent, filename in filenames.items():
+        dataset_df = pd.DataFrame(dataset_rows[truncation_percent])
+        dataset_df.to_csv(filename, index=False)
 
-            values_to_truncate = int(value_count * (truncation_percent / 100))
-
-            column_values = test_df[column].iloc[values_to_truncate:]
-            column_df = pd.DataFrame(column_values)
-
-            for PERCENTILE in PERCENTILES:
-                new_dataset_row[f"{column}_{PERCENTILE}%"] = column_df.quantile(
-                    PERCENTILE / 100
-                ).values[0]
-
-        new_dataset_row_df = pd.DataFrame([new_dataset_row])
-
-        dataset_df = pd.concat(
-            [dataset_df, new_dataset_row_df], axis=0, ignore_index=True
-        )
-
-    dataset_df.to_csv(filename, index=False)
-    return filename
+    return filenames
 
 
 def validate_experiment(experiment: Dict) -> bool:
@@ -350,7 +262,7 @@ def main():
         3. For each path, check if the path exists and if contains csv files
         4. Collect filepaths from all folders.
         5. Remove duplicate basenames.
-        6. Combine all files into a single folder.
+        6. Link all files into a single folder through the blob store.
         7. Generate a dataset from the new folder.
         """
 
@@ -378,31 +290,41 @@ def main():
             else:
                 logger.warning(f"Duplicate file found: {basename}")
 
-        # Combine all files into a single folder
+        # Combine all files into a single folder. Each file is stored once in
+        # the blob store and the folder only links to it, so salvaging the same
+        # files again doesn't copy them again.
         combined_folder = os.path.join(
             os.path.dirname(EXPERIMENT["paths"][0]), f"salvaged_{EXPERIMENT['name']}"
         )
-        os.makedirs(combined_folder, exist_ok=True)
+        salvaged_manifest = {}
         for filepath in track(
             unique_filepaths, description=f"Combining files for {EXPERIMENT['name']}"
         ):
-            shutil.copy(filepath, combined_folder)
+            sha1, error = add_file_to_blob_store(filepath, BLOB_STORE_DIR, link_source=False)
+            if error:
+                logger.error(f"Couldn't salvage {filepath}: {error}")
+                continue
+
+            salvaged_manifest[os.path.basename(filepath)] = sha1
+
+        error = materialise_blobs(salvaged_manifest, combined_folder, BLOB_STORE_DIR)
+        if error:
+            logger.error(f"Couldn't combine files for {EXPERIMENT['name']}: {error}")
+            continue
 
         console.print(
-            f"Salvaged {len(unique_filepaths)} files for {EXPERIMENT['name']} to {combined_folder}.",
+            f"Salvaged {len(salvaged_manifest)} files for {EXPERIMENT['name']} to {combined_folder}.",
             style="bold green",
         )
 
-        # Generate a dataset from the new folder
+        # Generate a dataset per truncation percentage from the new folder
         truncation_percentages = [0, 10, 25, 50]
-        for truncation_percent in truncation_percentages:
-            trunc_ds_path = generate_dataset(combined_folder, truncation_percent)
-            if trunc_ds_path is None:
-                logger.error(
-                    f"Error generating dataset for {EXPERIMENT['name']} with {truncation_percent}% truncation."
-                )
-                continue
+        trunc_ds_paths = generate_datasets(combined_folder, truncation_percentages)
+        if trunc_ds_paths is None:
+            logger.error(f"Error generating datasets for {EXPERIMENT['name']}.")
+            continue
 
+        for truncation_percent, trunc_ds_path in trunc_ds_paths.items():
             logger.info(
                 f"Generated dataset with {truncation_percent}% truncation:\n\t{trunc_ds_path}"
             )
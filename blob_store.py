@@ -0,0 +1,292 @@
+import os
+import json
+import shutil
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from summary_manifest import get_file_hash
+
+# ? Result files are kept once under output/blobs/ named by their sha1. Test
+# ? results and salvaged experiments hold hard links to the blobs plus a
+# ? blob_manifest.json of {filename: sha1}, so salvaging or re-running tests
+# ? links files instead of copying them and the same csv never takes up space
+# ? twice. Hard links share their contents so blobs are made read-only and
+# ? anything that replaces a linked file has to write a new file over it
+# ? rather than write into it.
+# ? Filesystems that can't hard link get copies instead, so a blob's link count
+# ? alone can't tell whether anything still uses it. A blob is only unused once
+# ? no manifest lists its sha1 and nothing else links to it.
+
+BLOB_MANIFEST_FILENAME = "blob_manifest.json"
+BLOB_FILE_MODE = 0o444
+
+
+def get_blob_path(blob_store_dirpath: str = "", sha1: str = "") -> str:
+    """
+    e.g. output/blobs/3f/3f786850e387550fdab836ed7e6dc881de23001b
+    """
+    return os.path.join(blob_store_dirpath, sha1[:2], sha1)
+
+
+def link_or_copy(src_path: str = "", dest_path: str = "") -> Optional[str]:
+    """
+    Put a hard link to src_path at dest_path, replacing whatever is there in one
+    step, or a copy if the filesystem can't hard link.
+
+    Returns:
+        - error
+    """
+    tmp_dest_path = f"{dest_path}.tmp"
+    try:
+        if os.path.lexists(tmp_dest_path):
+            os.remove(tmp_dest_path)
+
+        try:
+            os.link(src_path, tmp_dest_path)
+        except OSError:
+            shutil.copy2(src_path, tmp_dest_path)
+
+        os.replace(tmp_dest_path, dest_path)
+    except OSError as e:
+        return f"Couldn't link {src_path} to {dest_path}: {e}"
+
+    return None
+
+
+def add_file_to_blob_store(
+    filepath: str = "",
+    blob_store_dirpath: str = "",
+    link_source: bool = True
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Add a file to the blob store.
+
+    Params:
+        - filepath (str): File to add.
+        - blob_store_dirpath (str): Blob store directory.
+        - link_source (bool): Replace the file with a link to its blob. Only for
+            files nothing writes to again, e.g. downloaded results. Otherwise the
+            blob is a copy of the file.
+
+    Returns:
+        - str: sha1 of the file.
+        - error
+    """
+    if filepath == "":
+        return None, "No filepath passed."
+
+    if blob_store_dirpath == "":
+        return None, "No blob store dirpath passed."
+
+    sha1, error = get_file_hash(filepath)
+    if error:
+        return None, error
+
+    blob_path = get_blob_path(blob_store_dirpath, sha1)
+    try:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+        if not os.path.exists(blob_path):
+            if link_source:
+                error = link_or_copy(filepath, blob_path)
+            else:
+                tmp_blob_path = f"{blob_path}.{os.getpid()}.tmp"
+                shutil.copy2(filepath, tmp_blob_path)
+                os.replace(tmp_blob_path, blob_path)
+
+            if error:
+                return None, error
+
+            os.chmod(blob_path, BLOB_FILE_MODE)
+
+    except OSError as e:
+        return None, f"Couldn't add {filepath} to the blob store: {e}"
+
+    if link_source and not os.path.samefile(filepath, blob_path):
+        error = link_or_copy(blob_path, filepath)
+        if error:
+            return None, error
+
+    return sha1, None
+
+
+def read_blob_manifest(dirpath: str = "") -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """
+    Get {filename: sha1} of a directory's blobs. Empty if it has no manifest.
+    """
+    manifest_path = os.path.join(dirpath, BLOB_MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {}, None
+
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f), None
+    except (OSError, ValueError) as e:
+        return None, f"Couldn't read {manifest_path}: {e}"
+
+
+def write_blob_manifest(dirpath: str = "", manifest: Dict[str, str] = {}) -> Optional[str]:
+    manifest_path = os.path.join(dirpath, BLOB_MANIFEST_FILENAME)
+    tmp_manifest_path = f"{manifest_path}.tmp"
+    try:
+        with open(tmp_manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_manifest_path, manifest_path)
+    except OSError as e:
+        return f"Couldn't write {manifest_path}: {e}"
+
+    return None
+
+
+def add_dir_to_blob_store(
+    dirpath: str = "", blob_store_dirpath: str = ""
+) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """
+    Add every csv in a directory to the blob store, link them to their blobs and
+    write the directory's manifest.
+
+    Params:
+        - dirpath (str): Directory of write-once results e.g. a test's results.
+        - blob_store_dirpath (str): Blob store directory.
+
+    Returns:
+        - Dict: {filename: sha1}
+        - error
+    """
+    if not os.path.isdir(dirpath):
+        return None, f"{dirpath} is not a directory."
+
+    manifest = {}
+    for filename in sorted(os.listdir(dirpath)):
+        if not filename.endswith(".csv"):
+            continue
+
+        sha1, error = add_file_to_blob_store(
+            os.path.join(dirpath, filename), blob_store_dirpath
+        )
+        if error:
+            return None, error
+
+        manifest[filename] = sha1
+
+    error = write_blob_manifest(dirpath, manifest)
+    if error:
+        return None, error
+
+    return manifest, None
+
+
+def materialise_blobs(
+    manifest: Dict[str, str] = {},
+    dest_dirpath: str = "",
+    blob_store_dirpath: str = ""
+) -> Optional[str]:
+    """
+    Link blobs into a directory under the filenames in the manifest and add them
+    to the directory's own manifest.
+
+    Params:
+        - manifest (Dict): {filename: sha1} of the blobs to link.
+        - dest_dirpath (str): Directory to link them into.
+        - blob_store_dirpath (str): Blob store directory.
+
+    Returns:
+        - error
+    """
+    if dest_dirpath == "":
+        return "No destination dirpath passed."
+
+    os.makedirs(dest_dirpath, exist_ok=True)
+
+    dest_manifest, error = read_blob_manifest(dest_dirpath)
+    if error:
+        return error
+
+    for filename, sha1 in manifest.items():
+        dest_filepath = os.path.join(dest_dirpath, filename)
+        if dest_manifest.get(filename) == sha1 and os.path.exists(dest_filepath):
+            continue
+
+        error = link_or_copy(get_blob_path(blob_store_dirpath, sha1), dest_filepath)
+        if error:
+            return error
+
+        dest_manifest[filename] = sha1
+
+    return write_blob_manifest(dest_dirpath, dest_manifest)
+
+
+def get_referenced_sha1s(
+    manifest_dirpaths: List[str] = []
+) -> Tuple[Optional[Set[str]], Optional[str]]:
+    """
+    Get the sha1 of every blob listed in a manifest anywhere under the directories.
+
+    Params:
+        - manifest_dirpaths (List[str]): Directories to look for manifests in
+            e.g. the data directory.
+
+    Returns:
+        - Set[str]: sha1s.
+        - error
+    """
+    referenced_sha1s = set()
+    for manifest_dirpath in manifest_dirpaths:
+        for dirpath, _, filenames in os.walk(manifest_dirpath):
+            if BLOB_MANIFEST_FILENAME not in filenames:
+                continue
+
+            manifest, error = read_blob_manifest(dirpath)
+            if error:
+                return None, error
+
+            referenced_sha1s.update(manifest.values())
+
+    return referenced_sha1s, None
+
+
+def remove_unreferenced_blobs(
+    blob_store_dirpath: str = "", manifest_dirpaths: List[str] = []
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Delete blobs that no directory uses any more, e.g. the results of a test
+    that was re-run. Only run this when nothing is adding to the store.
+
+    Params:
+        - blob_store_dirpath (str): Blob store directory.
+        - manifest_dirpaths (List[str]): Directories holding every manifest that
+            refers to the store. Blobs they list are kept even when the directory
+            has a copy rather than a link.
+
+    Returns:
+        - List[str]: sha1s of the deleted blobs.
+        - error
+    """
+    if not os.path.isdir(blob_store_dirpath):
+        return [], None
+
+    # A manifest that can't be read might list any blob so nothing is deleted.
+    referenced_sha1s, error = get_referenced_sha1s(manifest_dirpaths)
+    if error:
+        return [], error
+
+    removed_sha1s = []
+    try:
+        for prefix in sorted(os.listdir(blob_store_dirpath)):
+            prefix_dirpath = os.path.join(blob_store_dirpath, prefix)
+            if not os.path.isdir(prefix_dirpath):
+                continue
+
+            for sha1 in sorted(os.listdir(prefix_dirpath)):
+                if sha1 in referenced_sha1s:
+                    continue
+
+                blob_path = os.path.join(prefix_dirpath, sha1)
+                if os.stat(blob_path).st_nlink == 1:
+                    os.remove(blob_path)
+                    removed_sha1s.append(sha1)
+
+    except OSError as e:
+        return removed_sha1s, f"Couldn't clean up {blob_store_dirpath}: {e}"
+
+    return removed_sha1s, None
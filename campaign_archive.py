@@ -0,0 +1,241 @@
+import os
+import shutil
+import zipfile
+import warnings
+import threading
+
+from typing import Dict, List, Optional, Set, Tuple
+
+# ? Each test's results are added to <campaign>.zip as soon as the test has been
+# ? validated, instead of zipping the whole campaign directory once it's done.
+# ? Zip members are compressed one by one so adding a test only compresses that
+# ? test's files and rewrites the small central directory at the end.
+# ? A re-run test is added again under the same names. Later members shadow
+# ? earlier ones for zipfile and unzip -o, and sync_campaign_archive() rewrites
+# ? the archive without the shadowed ones so re-runs don't keep growing it.
+# ? If autoperf stops while a test is being added, the central directory is
+# ? lost, so an archive that can't be opened is rebuilt from the campaign
+# ? directory.
+
+ARCHIVE_COMPRESSION = zipfile.ZIP_DEFLATED
+
+# ? {archive path: lock} so campaigns sharing a process never write one archive
+# ? at the same time.
+archive_locks: Dict[str, threading.Lock] = {}
+archive_locks_lock = threading.Lock()
+
+
+def get_campaign_archive_path(campaign_dirpath: str = "") -> str:
+    """
+    e.g. output/data/campaign -> output/data/campaign.zip
+    """
+    return f"{os.path.normpath(campaign_dirpath)}.zip"
+
+
+def get_archive_lock(archive_path: str = "") -> threading.Lock:
+    with archive_locks_lock:
+        if archive_path not in archive_locks:
+            archive_locks[archive_path] = threading.Lock()
+
+        return archive_locks[archive_path]
+
+
+def get_test_members(test_dirpath: str = "") -> List[Tuple[str, str]]:
+    """
+    Get [(filepath, arcname)] for every file in a test's results directory with
+    the same arcnames shutil.make_archive() used e.g. test_name/pub_0.csv.
+    """
+    test_name = os.path.basename(os.path.normpath(test_dirpath))
+
+    return [
+        (os.path.join(test_dirpath, filename), f"{test_name}/{filename}")
+        for filename in sorted(os.listdir(test_dirpath))
+        if os.path.isfile(os.path.join(test_dirpath, filename))
+    ]
+
+
+def get_archived_test_names(archive_path: str = "") -> Tuple[Optional[Set[str]], Optional[str]]:
+    """
+    Get the names of the tests in an archive.
+
+    Returns:
+        - Set[str]: Test names. Empty if the archive doesn't exist.
+        - error: If the archive can't be read.
+    """
+    if not os.path.exists(archive_path):
+        return set(), None
+
+    try:
+        with zipfile.ZipFile(archive_path, "r") as archive:
+            return set([_.split("/")[0] for _ in archive.namelist() if "/" in _]), None
+    except (zipfile.BadZipFile, OSError) as e:
+        return None, f"Couldn't read {archive_path}: {e}"
+
+
+def write_test_members(archive: zipfile.ZipFile, test_dirpath: str = "") -> None:
+    with warnings.catch_warnings():
+        # Re-run tests are added again under the same names.
+        warnings.filterwarnings("ignore", message="Duplicate name")
+        for filepath, arcname in get_test_members(test_dirpath):
+            archive.write(filepath, arcname)
+
+
+def rebuild_campaign_archive(campaign_dirpath: str = "") -> Optional[str]:
+    """
+    Write the archive from scratch from every test in the campaign directory.
+
+    Returns:
+        - error
+    """
+    archive_path = get_campaign_archive_path(campaign_dirpath)
+    tmp_archive_path = f"{archive_path}.tmp"
+
+    try:
+        with zipfile.ZipFile(tmp_archive_path, "w", ARCHIVE_COMPRESSION) as archive:
+            for test_name in sorted(os.listdir(campaign_dirpath)):
+                test_dirpath = os.path.join(campaign_dirpath, test_name)
+                if os.path.isdir(test_dirpath):
+                    write_test_members(archive, test_dirpath)
+
+        os.replace(tmp_archive_path, archive_path)
+    except (zipfile.BadZipFile, OSError) as e:
+        return f"Couldn't rebuild {archive_path}: {e}"
+
+    return None
+
+
+def add_tests_to_campaign_archive(
+    campaign_dirpath: str = "", test_names: List[str] = []
+) -> Optional[str]:
+    """
+    Append tests' results to the campaign archive, rebuilding it if it can't be
+    opened.
+
+    Params:
+        - campaign_dirpath (str): Campaign directory.
+        - test_names (List[str]): Tests in the campaign directory to add.
+
+    Returns:
+        - error
+    """
+    if campaign_dirpath == "":
+        return "No campaign dirpath passed."
+
+    archive_path = get_campaign_archive_path(campaign_dirpath)
+
+    with get_archive_lock(archive_path):
+        _, error = get_archived_test_names(archive_path)
+        if error:
+            return rebuild_campaign_archive(campaign_dirpath)
+
+        try:
+            with zipfile.ZipFile(archive_path, "a", ARCHIVE_COMPRESSION) as archive:
+                for test_name in test_names:
+                    write_test_members(archive, os.path.join(campaign_dirpath, test_name))
+        except (zipfile.BadZipFile, OSError) as e:
+            error = rebuild_campaign_archive(campaign_dirpath)
+            if error:
+                return f"Couldn't add {', '.join(test_names)} to {archive_path}: {e}. {error}"
+
+    return None
+
+
+def add_test_to_campaign_archive(test_dirpath: str = "") -> Optional[str]:
+    """
+    Append a validated test's results to its campaign's archive.
+
+    Params:
+        - test_dirpath (str): Test's results directory in the campaign directory.
+
+    Returns:
+        - error
+    """
+    if not os.path.isdir(test_dirpath):
+        return f"{test_dirpath} is not a directory."
+
+    test_dirpath = os.path.normpath(test_dirpath)
+
+    return add_tests_to_campaign_archive(
+        os.path.dirname(test_dirpath), [os.path.basename(test_dirpath)]
+    )
+
+
+def compact_campaign_archive(campaign_dirpath: str = "") -> Tuple[int, Optional[str]]:
+    """
+    Rewrite the campaign archive without the members that later members of the
+    same name shadow, e.g. the results of a test from before it was re-run.
+
+    Params:
+        - campaign_dirpath (str): Campaign directory.
+
+    Returns:
+        - int: Number of members removed.
+        - error
+    """
+    archive_path = get_campaign_archive_path(campaign_dirpath)
+    if not os.path.exists(archive_path):
+        return 0, None
+
+    tmp_archive_path = f"{archive_path}.tmp"
+
+    with get_archive_lock(archive_path):
+        try:
+            with zipfile.ZipFile(archive_path, "r") as archive:
+                member_infos = archive.infolist()
+
+                # Later members win so only the last one of each name is kept.
+                latest_infos = {}
+                for member_info in member_infos:
+                    latest_infos[member_info.filename] = member_info
+
+                removed_member_count = len(member_infos) - len(latest_infos)
+                if removed_member_count == 0:
+                    return 0, None
+
+                with zipfile.ZipFile(tmp_archive_path, "w", ARCHIVE_COMPRESSION) as tmp_archive:
+                    for member_info in latest_infos.values():
+                        with archive.open(member_info) as src:
+                            with tmp_archive.open(member_info, "w") as dest:
+                                shutil.copyfileobj(src, dest)
+
+            os.replace(tmp_archive_path, archive_path)
+        except (zipfile.BadZipFile, OSError) as e:
+            return 0, f"Couldn't compact {archive_path}: {e}"
+
+    return removed_member_count, None
+
+
+def sync_campaign_archive(campaign_dirpath: str = "") -> Tuple[List[str], Optional[str]]:
+    """
+    Add any test in the campaign directory that isn't in the archive yet, e.g.
+    tests from before archives were kept per test or ones that failed to be added,
+    and drop the members re-runs have shadowed.
+
+    Params:
+        - campaign_dirpath (str): Campaign directory.
+
+    Returns:
+        - List[str]: Names of the tests that were added.
+        - error
+    """
+    if not os.path.isdir(campaign_dirpath):
+        return [], None
+
+    archive_path = get_campaign_archive_path(campaign_dirpath)
+    archived_test_names, error = get_archived_test_names(archive_path)
+    if error:
+        archived_test_names = set()
+    else:
+        _, error = compact_campaign_archive(campaign_dirpath)
+        if error:
+            return [], error
+
+    missing_test_names = sorted([
+        test_name for test_name in os.listdir(campaign_dirpath)
+        if os.path.isdir(os.path.join(campaign_dirpath, test_name))
+        and test_name not in archived_test_names
+    ])
+    if len(missing_test_names) == 0:
+        return [], None
+
+    return missing_test_names, add_tests_to_campaign_archive(campaign_dirpath, missing_test_names)
@@ -0,0 +1,65 @@
+import pandas as pd
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+# ? Validating a test's results (counting csvs, reading the start of each one and
+# ? moving them into the campaign directory) only needs the controller. Running
+# ? it in a background thread hides it behind the next test's checks and reboots.
+
+
+class StagedTestValidator:
+    """
+    Validate one staged test in the background while the next test runs.
+
+    Only one test is validated at a time and it has to be collected before the
+    next one is submitted, so the ESS rows are still added in the order the
+    tests were run.
+    """
+
+    def __init__(self, validate_staged_test: Callable):
+        """
+        Params:
+            - validate_staged_test (Callable):
+                def validate_staged_test(staged_test, ess_df, test_prefix) -> (ess_df, error)
+        """
+        self.validate_staged_test = validate_staged_test
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending: Optional[Tuple[Future, str]] = None
+
+    def submit(self, staged_test: Dict = {}, test_prefix: str = "") -> Optional[str]:
+        if self.pending is not None:
+            return "The previous test hasn't been collected yet."
+
+        future = self.executor.submit(
+            self.validate_staged_test, staged_test, pd.DataFrame(), test_prefix
+        )
+        self.pending = (future, test_prefix)
+
+        return None
+
+    def collect(self) -> Tuple[Optional[pd.DataFrame], Optional[str], str]:
+        """
+        Wait for the test being validated, if there is one.
+
+        Returns:
+            - pd.DataFrame: ESS row for the test. None if nothing was being validated.
+            - error: Why the test failed validation.
+            - str: test_prefix the test was submitted with.
+        """
+        if self.pending is None:
+            return None, None, ""
+
+        future, test_prefix = self.pending
+        self.pending = None
+
+        try:
+            test_ess_df, error = future.result()
+        except Exception as e:
+            return None, f"Exception validating test: {e}", test_prefix
+
+        return test_ess_df, error, test_prefix
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
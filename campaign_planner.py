@@ -0,0 +1,169 @@
+import json
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from qos_codec import get_test_name_from_combination_dict
+
+# ? PCG campaigns used to run their combinations in itertools.product order, so
+# ? the participant layout changed between most consecutive tests. Tests with the
+# ? same noise config and participant layout are now run back to back so that
+# ? machines which were left in the right state by the previous test can skip
+# ? their tc reconfiguration and csv cleanup.
+# ? The plan only depends on the campaign config, so the ESS row count is still
+# ? the index of the next test to run.
+
+PARTICIPANT_LAYOUT_KEYS = ["use_multicast", "pub_count", "sub_count"]
+
+
+def get_setup_key(test_config: Dict = {}, noise_gen_config: Dict = {}) -> Tuple:
+    """
+    Get what a test needs set up on the machines before it runs: the noise
+    config and the participant layout. Tests with the same key can reuse the
+    previous test's setup.
+    """
+    noise_key = json.dumps(noise_gen_config or {}, sort_keys=True)
+    layout_key = tuple([str(test_config.get(key)) for key in PARTICIPANT_LAYOUT_KEYS])
+
+    return (noise_key,) + layout_key
+
+
+def order_test_plan(combinations: List[Dict] = [], noise_gen_config: Dict = {}) -> List[Dict]:
+    """
+    Order the combinations so tests with the same setup key run back to back.
+    Groups are ordered by where they first appear and the combinations in each
+    group keep their original order, so the same combinations always give the
+    same plan.
+
+    Params:
+        - combinations (List[Dict]): Combinations from generate_combinations_from_qos().
+        - noise_gen_config (Dict): Noise generation config for the campaign.
+
+    Returns:
+        - List[Dict]: Ordered combinations.
+    """
+    groups = {}
+    for combination in combinations:
+        setup_key = get_setup_key(combination, noise_gen_config)
+        groups.setdefault(setup_key, []).append(combination)
+
+    return [combination for group in groups.values() for combination in group]
+
+
+def get_setup_transition_count(test_plan: List[Dict] = [], noise_gen_config: Dict = {}) -> int:
+    """
+    Count how many times the setup key changes between consecutive tests.
+    """
+    setup_keys = [get_setup_key(_, noise_gen_config) for _ in test_plan]
+
+    return len([
+        index for index in range(1, len(setup_keys))
+        if setup_keys[index] != setup_keys[index - 1]
+    ])
+
+
+def is_plan_prefix(test_plan: List[Dict] = [], test_names: List[str] = []) -> bool:
+    plan_test_names = []
+    for test_config in test_plan[:len(test_names)]:
+        test_name, error = get_test_name_from_combination_dict(test_config)
+        if error:
+            return False
+
+        plan_test_names.append(test_name)
+
+    return plan_test_names == test_names[:len(test_plan)]
+
+
+def get_pcg_test_plan(
+    combinations: List[Dict] = [],
+    noise_gen_config: Dict = {},
+    completed_test_names: List[str] = []
+) -> List[Dict]:
+    """
+    Get the order a PCG campaign's tests are run in.
+
+    Campaigns that were started before tests were grouped carry on in their
+    original order so that resuming from the ESS row count doesn't skip or
+    repeat tests.
+
+    Params:
+        - combinations (List[Dict]): Combinations from generate_combinations_from_qos().
+        - noise_gen_config (Dict): Noise generation config for the campaign.
+        - completed_test_names (List[str]): Test names in the ESS, in the order they were run.
+
+    Returns:
+        - List[Dict]: Combinations in the order they should be run.
+    """
+    test_plan = order_test_plan(combinations, noise_gen_config)
+
+    if is_plan_prefix(test_plan, completed_test_names):
+        return test_plan
+
+    if is_plan_prefix(combinations, completed_test_names):
+        return combinations
+
+    return test_plan
+
+
+def get_unchanged_setup_ips(
+    setup_state: Optional[Dict] = None,
+    setup_key: Tuple = (),
+    health_results: Dict = {},
+    rebooted_ips: Set[str] = set()
+) -> Tuple[Set[str], Set[str]]:
+    """
+    Get the machines that the previous test left ready for this one.
+
+    Nothing is reused if the previous test failed or had a different setup key.
+    A reboot clears the noise qdisc, and so does anything else that the health
+    probe catches.
+
+    Params:
+        - setup_state (Dict): setup_state from the previous test's staged test.
+        - setup_key (Tuple): Setup key of the next test.
+        - health_results (Dict): {ip: probe_machine_health() result}
+        - rebooted_ips (Set[str]): Machines that were just restarted.
+
+    Returns:
+        - Set[str]: IPs that still have the test's noise qdisc in place.
+        - Set[str]: IPs whose results directory has no csv files.
+    """
+    if setup_state is None or setup_state.get('setup_key') != setup_key:
+        return set(), set()
+
+    noise_ready_ips = set()
+    for ip in setup_state.get('noise_ips', set()) - rebooted_ips:
+        health = health_results.get(ip, {}).get('health')
+        if health is not None and health.get('noise_qdisc_count', 0) == 0:
+            continue
+
+        noise_ready_ips.add(ip)
+
+    return noise_ready_ips, set(setup_state.get('clean_ips', set()))
+
+
+def get_next_setup_state(
+    setup_key: Tuple = (),
+    noise_ips: Set[str] = set(),
+    download_results: Dict = {}
+) -> Dict:
+    """
+    Record what a test left set up on the machines for the next test.
+
+    Params:
+        - setup_key (Tuple): Setup key of the test.
+        - noise_ips (Set[str]): Machines with the test's noise qdisc in place.
+        - download_results (Dict): {ip: download_results_from_machine() result}
+
+    Returns:
+        - Dict: {"setup_key", "noise_ips", "clean_ips"}
+    """
+    clean_ips = set([
+        ip for ip, download_result in download_results.items()
+        if download_result.get('csvs_deleted', False)
+    ])
+
+    return {
+        "setup_key": setup_key,
+        "noise_ips": set(noise_ips),
+        "clean_ips": clean_ips,
+    }
@@ -0,0 +1,94 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set
+
+# ? A campaign holds every machine in its slave_machines for its whole run.
+# ? Campaigns whose machines don't overlap (e.g. separate 3 Pi and 5 Pi rigs)
+# ? run at the same time. A campaign that shares a machine with an earlier one
+# ? in the config waits for it, so campaigns on the same rig still run in the
+# ? order they were configured.
+
+
+def get_campaign_machine_ips(campaign_config: Dict = {}) -> Set[str]:
+    return set([machine['ip'] for machine in campaign_config.get('slave_machines', [])])
+
+
+def get_campaign_conflicts(campaign_configs: List[Dict] = []) -> Dict[int, Set[int]]:
+    """
+    Build the machine-resource graph between campaigns.
+
+    Params:
+        - campaign_configs (List[Dict]): Campaign configs in the order they were configured.
+
+    Returns:
+        - Dict: {campaign_index: indexes of the other campaigns it shares machines with}
+    """
+    machine_ips = [get_campaign_machine_ips(_) for _ in campaign_configs]
+
+    conflicts = {index: set() for index in range(len(campaign_configs))}
+    for index, ips in enumerate(machine_ips):
+        for other_index in range(index + 1, len(machine_ips)):
+            if len(ips & machine_ips[other_index]) > 0:
+                conflicts[index].add(other_index)
+                conflicts[other_index].add(index)
+
+    return conflicts
+
+
+def get_runnable_campaigns(
+    conflicts: Dict[int, Set[int]] = {},
+    waiting: List[int] = [],
+    running: Set[int] = set(),
+) -> List[int]:
+    """
+    Get the waiting campaigns that can start now: those that share no machines
+    with a running campaign or with an earlier campaign that is still waiting.
+    """
+    runnable = []
+    for index in waiting:
+        blockers = running | set([_ for _ in waiting if _ < index])
+        if len(conflicts[index] & blockers) == 0:
+            runnable.append(index)
+
+    return runnable
+
+
+def run_campaigns(
+    campaign_configs: List[Dict] = [],
+    run_campaign: Optional[Callable] = None,
+) -> Dict[int, Optional[str]]:
+    """
+    Run campaigns with disjoint machine pools concurrently, each in its own
+    thread, and queue campaigns that share machines.
+
+    Params:
+        - campaign_configs (List[Dict]): Campaign configs.
+        - run_campaign (Callable): def run_campaign(campaign_index, campaign_config, campaign_count)
+
+    Returns:
+        - Dict: {campaign_index: error} with None for campaigns that didn't raise.
+    """
+    if run_campaign is None or len(campaign_configs) == 0:
+        return {}
+
+    conflicts = get_campaign_conflicts(campaign_configs)
+
+    waiting = list(range(len(campaign_configs)))
+    running = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=len(campaign_configs)) as executor:
+        while len(waiting) > 0 or len(running) > 0:
+            for index in get_runnable_campaigns(conflicts, waiting, set(running.values())):
+                waiting.remove(index)
+                future = executor.submit(
+                    run_campaign, index, campaign_configs[index], len(campaign_configs)
+                )
+                running[future] = index
+
+            done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                error = future.exception()
+                errors[index] = None if error is None else str(error)
+
+    return errors
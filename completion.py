@@ -0,0 +1,238 @@
+import os
+import re
+import time
+import shlex
+import asyncio
+
+from typing import Callable, Dict, List, Optional
+
+from machine_health import get_perftest_process_name
+from orchestrator import run_command, run_stage_on_machine
+from ssh_pool import get_ssh_command, quote_remote_path
+
+# ? perftest writes its summary as the last lines of every csv it produces, so a
+# ? csv with its footer is finished even if the process that wrote it then hangs
+# ? waiting on a peer that has already gone. pub_0 writes a latency summary and
+# ? every subscriber writes a throughput summary.
+SUMMARY_FOOTER_PATTERN = "latency summary|throughput summary"
+SUMMARY_FOOTER_TAIL_BYTES = 4096
+FOOTER_POLL_INTERVAL_SECS = 1
+
+STOP_PERFTEST_TIMEOUT_SECS = 15
+
+OUTPUT_FILE_PATTERN = re.compile(r"-outputFile\s+(\S+)")
+
+
+def get_output_files_from_script(script: str = "") -> List[str]:
+    """
+    Get the csvs a machine's script writes e.g. ["pub_0.csv", "sub_2.csv"].
+    """
+    return OUTPUT_FILE_PATTERN.findall(script)
+
+
+def get_footer_watch_command(results_dir: str = "", output_files: List[str] = []) -> str:
+    """
+    Get a remote command that prints each output file's name once its summary
+    footer has been written and exits when every file has one. Files older than
+    the watch itself are ignored so a csv left over from an earlier test can't
+    finish the test early.
+
+    Params:
+        - results_dir (str): Directory on the machine the csvs are written to.
+        - output_files (List[str]): csvs to watch.
+
+    Returns:
+        - str: Remote shell command.
+    """
+    footer_pattern = shlex.quote(SUMMARY_FOOTER_PATTERN)
+    file_has_footer = (
+        f'[ "$f" -nt "$started" ] && '
+        f'tail -c {SUMMARY_FOOTER_TAIL_BYTES} -- "$f" 2>/dev/null | grep -q -i -E {footer_pattern}'
+    )
+    output_files_str = " ".join([shlex.quote(_) for _ in output_files])
+
+    return " ".join([
+        f"cd {quote_remote_path(results_dir)} &&",
+        'started=$(mktemp) &&',
+        f"for f in {output_files_str}; do",
+        f"(until {file_has_footer}; do sleep {FOOTER_POLL_INTERVAL_SECS}; done; echo \"$f\") &",
+        'done; wait; rm -f "$started"',
+    ])
+
+
+def get_stop_perftest_command(perftest_exec_path: str = "") -> str:
+    return "pkill -x {}; true".format(
+        shlex.quote(get_perftest_process_name(perftest_exec_path))
+    )
+
+
+async def watch_for_footers(machine_config: Dict = {}) -> Dict:
+    """
+    Wait until every csv the machine writes has its summary footer.
+
+    Params:
+        - machine_config (Dict): Machine config with the script it's running.
+
+    Returns:
+        - Dict: {"status", "footers_found"}
+    """
+    output_files = get_output_files_from_script(machine_config['script'])
+    results_dir = os.path.dirname(machine_config['perftest_exec_path'])
+
+    watch_result = await run_command(
+        get_ssh_command(
+            machine_config['username'],
+            machine_config['ip'],
+            get_footer_watch_command(results_dir, output_files),
+            machine_config['ssh_key_path']
+        )
+    )
+
+    footers_found = [_ for _ in watch_result['stdout'].splitlines() if _ in output_files]
+    if watch_result['return_code'] != 0 or set(footers_found) != set(output_files):
+        return {
+            "status": f"error: footer watch failed: {watch_result['stderr']}",
+            "footers_found": footers_found
+        }
+
+    return {"status": "complete", "footers_found": footers_found}
+
+
+async def stop_perftest(machine_config: Dict = {}) -> Dict:
+    result = await run_command(
+        get_ssh_command(
+            machine_config['username'],
+            machine_config['ip'],
+            get_stop_perftest_command(machine_config['perftest_exec_path']),
+            machine_config['ssh_key_path']
+        ),
+        STOP_PERFTEST_TIMEOUT_SECS
+    )
+
+    return {"status": "complete" if result['return_code'] == 0 else "error: pkill failed"}
+
+
+async def run_scripts_until_complete_async(
+    machine_configs: List[Dict],
+    script_stage: Callable,
+    deadline_secs: float,
+    *stage_args
+) -> Dict[str, Dict]:
+    start_time = time.monotonic()
+
+    script_tasks = {}
+    footer_tasks = {}
+    for machine_config in machine_configs:
+        ip = machine_config['ip']
+        script_tasks[ip] = asyncio.create_task(
+            run_stage_on_machine(machine_config, script_stage, deadline_secs, *stage_args)
+        )
+
+        if len(get_output_files_from_script(machine_config['script'])) > 0:
+            footer_tasks[ip] = asyncio.create_task(
+                run_stage_on_machine(machine_config, watch_for_footers, deadline_secs)
+            )
+
+    def have_all_scripts_exited():
+        return all([_.done() for _ in script_tasks.values()])
+
+    def have_all_footers_been_found():
+        return len(footer_tasks) > 0 and all([
+            _.done() and not _.cancelled() and _.result()['status'] == "complete"
+            for _ in footer_tasks.values()
+        ])
+
+    # ? Every participant has reported once every csv has its footer or once every
+    # ? script has exited, whichever happens first.
+    pending = set(script_tasks.values()) | set(footer_tasks.values())
+    while not have_all_scripts_exited() and not have_all_footers_been_found():
+        remaining_secs = deadline_secs - (time.monotonic() - start_time)
+        if remaining_secs <= 0:
+            break
+
+        _, pending = await asyncio.wait(
+            pending, timeout=remaining_secs, return_when=asyncio.FIRST_COMPLETED
+        )
+
+    all_footers_found = have_all_footers_been_found()
+    duration_secs = time.monotonic() - start_time
+
+    still_running_machine_configs = [
+        machine_config
+        for machine_config in machine_configs
+        if not script_tasks[machine_config['ip']].done()
+    ]
+
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    # Anything still running would only skew the next test.
+    await asyncio.gather(
+        *[stop_perftest(machine_config) for machine_config in still_running_machine_configs],
+        return_exceptions=True
+    )
+
+    stage_results = {}
+    for machine_config in machine_configs:
+        ip = machine_config['ip']
+        script_task = script_tasks[ip]
+        footer_task = footer_tasks.get(ip)
+
+        footers_complete = (
+            footer_task is not None
+            and not footer_task.cancelled()
+            and footer_task.done()
+            and footer_task.result()['status'] == "complete"
+        )
+
+        if script_task.done() and not script_task.cancelled():
+            stage_result = script_task.result()
+        elif footers_complete or (footer_task is None and all_footers_found):
+            stage_result = {"status": "complete"}
+        else:
+            stage_result = {"status": f"error: timed out after {deadline_secs} seconds"}
+
+        stage_result['ip'] = ip
+        stage_result['machine_name'] = machine_config['machine_name']
+        stage_result['exited'] = script_task.done() and not script_task.cancelled()
+        stage_result['footers_found'] = (
+            footer_task.result()['footers_found'] if footers_complete else []
+        )
+        stage_result['duration_secs'] = duration_secs
+        stage_results[ip] = stage_result
+
+    return stage_results
+
+
+def run_scripts_until_complete(
+    machine_configs: List[Dict] = [],
+    script_stage: Optional[Callable] = None,
+    deadline_secs: float = 0,
+    *stage_args
+) -> Dict[str, Dict]:
+    """
+    Run each machine's test script and return as soon as every participant has
+    reported instead of waiting out a timeout per machine. A participant that
+    writes a csv has reported once the csv has its summary footer. Otherwise it
+    has reported once its process has exited. The whole test shares one deadline.
+    perftest processes still running at the end are killed.
+
+    Params:
+        - machine_configs (List[Dict]): Machines with their scripts.
+        - script_stage (Callable): async def stage(machine_config, *stage_args) -> Dict
+            that runs the machine's script and returns once it exits.
+        - deadline_secs (float): Time the whole test gets.
+        - stage_args: Extra arguments passed to the script stage.
+
+    Returns:
+        - Dict: {ip: {"status", "exited", "footers_found", "duration_secs", ...}}
+    """
+    if script_stage is None or len(machine_configs) == 0:
+        return {}
+
+    return asyncio.run(
+        run_scripts_until_complete_async(
+            machine_configs, script_stage, deadline_secs, *stage_args
+        )
+    )
@@ -3,6 +3,8 @@ LOG_DIR = "output/logs/"
 SUMMARISED_DIR = "output/summarised_data/"
 DATASET_DIR = "output/datasets/"
 ESS_DIR = "output/ess/"
+STAGING_DIR = "output/staging/"
+BLOB_STORE_DIR = "output/blobs/"
 
 REQUIRED_CAMPAIGN_KEYS = [
     "campaign_name",
@@ -1,15 +1,27 @@
 import sys
 import os
+import io
+import numpy as np
 import pandas as pd
 import warnings
 
 from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from rich.pretty import pprint
 from rich.console import Console
 from rich.progress import track
 
 from constants import *
-from autoperf import get_qos_dict_from_test_name
+from qos_codec import get_qos_dicts_from_test_names
+from dataset_stats import get_dataset_row_stats
+from summary_schema import get_summary_table, write_summary_table
+from summary_manifest import (
+    get_manifest_path,
+    read_manifest,
+    write_manifest,
+    get_tests_to_summarise,
+    record_summarised_test,
+)
 from Timer import Timer
 
 console = Console()
@@ -18,6 +30,144 @@ warnings.simplefilter(action="ignore", category=pd.errors.PerformanceWarning)
 
 error_df = []
 
+# ? Perftest writes its column header within the first few lines and a short summary
+# ? block at the very end, so only these two windows need to be searched.
+HEADER_SEARCH_LINES = 5
+TAIL_SEEK_BYTES = 16 * 1024
+
+MANIFEST_SAVE_INTERVAL = 50
+
+
+class PerftestDataRegion(io.RawIOBase):
+    """
+    Raw stream over the header line and the data rows of a perftest CSV.
+
+    The file is read forwards exactly once, stopping where the summary footer starts,
+    so pandas can stream the data region without it ever being held as a list of lines.
+    """
+
+    def __init__(self, file_obj, header_line: bytes = b"", data_length: int = 0):
+        self.file_obj = file_obj
+        self.prefix = header_line
+        self.remaining = data_length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer)
+        if self.prefix:
+            count = min(len(view), len(self.prefix))
+            view[:count] = self.prefix[:count]
+            self.prefix = self.prefix[count:]
+            return count
+
+        if self.remaining <= 0:
+            return 0
+
+        count = self.file_obj.readinto(view[: min(len(view), self.remaining)])
+        if not count:
+            self.remaining = 0
+            return 0
+
+        self.remaining -= count
+        return count
+
+
+def read_perftest_csv(
+    filepath: str = "",
+    header_markers: list[str] = [],
+    footer_marker: str = "",
+) -> Tuple[Optional[dict[str, np.ndarray]], bool, Optional[str]]:
+    """
+    Parse the data rows of a perftest output CSV in a single pass.
+
+    The header row is looked for in the first HEADER_SEARCH_LINES lines and the summary
+    footer in the last TAIL_SEEK_BYTES bytes of the file. Only the rows in between are
+    handed to pandas and every column comes back as a float64 array.
+
+    Params:
+        - filepath (str): Path to the pub_n.csv or sub_n.csv file.
+        - header_markers (list[str]): Strings that must all appear in the header row.
+        - footer_marker (str): Lower case string that starts the summary footer.
+
+    Returns:
+        - dict[str, np.ndarray]: Stripped column names mapped to float64 values.
+        - bool: True if the summary footer was found, False if the file was cut short.
+        - error
+    """
+    if filepath == "":
+        return None, False, "No filepath passed."
+
+    if len(header_markers) == 0:
+        return None, False, "No header markers passed."
+
+    if footer_marker == "":
+        return None, False, "No footer marker passed."
+
+    file_size = os.path.getsize(filepath)
+    if file_size == 0:
+        return None, False, f"{os.path.basename(filepath)} is empty."
+
+    with open(filepath, "rb") as file_obj:
+        # ? Find out where to start parsing the file from
+        header_line = None
+        for _ in range(HEADER_SEARCH_LINES):
+            line = file_obj.readline()
+            if not line:
+                break
+
+            decoded_line = line.decode("utf-8", errors="replace")
+            if all(marker in decoded_line for marker in header_markers):
+                header_line = line
+                break
+
+        if header_line is None:
+            return None, False, "Couldn't get start_index for header row"
+
+        data_start = file_obj.tell()
+
+        # ? Find out where to stop parsing the file from (ignore the summary stats at the end)
+        tail_start = max(data_start, file_size - TAIL_SEEK_BYTES)
+        file_obj.seek(tail_start)
+        tail = file_obj.read(file_size - tail_start)
+
+        footer_found = False
+        data_end = file_size
+        footer_index = tail.lower().rfind(footer_marker.encode("utf-8"))
+        if footer_index != -1:
+            footer_found = True
+            data_end = tail_start + tail.rfind(b"\n", 0, footer_index) + 1
+            data_end = max(data_end, data_start)
+
+        file_obj.seek(data_start)
+        data_region = io.BufferedReader(
+            PerftestDataRegion(file_obj, header_line, data_end - data_start)
+        )
+
+        try:
+            df = pd.read_csv(
+                data_region,
+                on_bad_lines="skip",
+                skipinitialspace=True,
+                encoding_errors="replace",
+            )
+        except pd.errors.EmptyDataError:
+            return None, footer_found, "EmptyDataError"
+        except pd.errors.ParserError as e:
+            return None, footer_found, str(e)
+
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == "object":
+            values = values.str.strip()
+        columns[str(col).strip()] = pd.to_numeric(values, errors="coerce").to_numpy(
+            dtype=np.float64
+        )
+
+    return columns, footer_found, None
+
 
 def parse_sub_files(
     sub_files: list[str] = [],
@@ -26,52 +176,31 @@ def parse_sub_files(
     if len(sub_files) == 0:
         return None, "No subscriber files found"
 
-    subs_df = pd.DataFrame()
+    desired_metrics = ["total samples", "samples/s", "mbps", "lost samples"]
+
+    sub_columns = {}
     for sub_file in sub_files:
-        # ? Find out where to start parsing the file from
-        with open(sub_file, "r") as file_obj:
-            if os.stat(sub_file).st_size == 0:
-                continue
-            file_obj.seek(0)
-            sub_first_5_lines = [next(file_obj) for _ in range(5)]
-
-        start_index = 0
-        for i, line in enumerate(sub_first_5_lines):
-            if "Length (Bytes)" in line:
-                start_index = i
-                break
+        if os.stat(sub_file).st_size == 0:
+            continue
 
-        if start_index == 0:
+        columns, footer_found, error = read_perftest_csv(
+            sub_file, ["Length (Bytes)"], "throughput summary"
+        )
+        if error:
             console.print(
-                f"Couldn't get start_index for header row from {os.path.basename(sub_file)}.",
+                f"Error when getting data from {os.path.basename(sub_file)}: {error}",
                 style="bold red",
             )
             error_df.append(
                 {
                     "filepath": sub_file,
                     "filename": os.path.basename(sub_file),
-                    "error": "Couldn't get start_index for header row",
+                    "error": error,
                 }
             )
             continue
 
-        # ? Find out where to stop parsing the file from (ignore the summary stats at the end)
-        with open(sub_file, "r") as file_obj:
-            file_contents = file_obj.readlines()
-        sub_last_5_lines = file_contents[-5:]
-        line_count = len(file_contents)
-
-        end_index = 0
-        for i, line in enumerate(sub_last_5_lines):
-            if "throughput summary" in line.lower():
-                end_index = line_count - 5 + i - 2
-                break
-
-        if end_index == 0:
-            # console.print(
-            #     f"Couldn't get end_index for summary row from {os.path.basename(sub_file)}. Defaulting to end of file.",
-            #     style="bold white"
-            # )
+        if not footer_found:
             error_df.append(
                 {
                     "filepath": sub_file,
@@ -79,49 +208,22 @@ def parse_sub_files(
                     "error": "Couldn't get end_index for summary row. File writing might have been interrupted.",
                 }
             )
-            end_index = line_count - 1
-
-        nrows = end_index - start_index
-        nrows = 0 if nrows < 0 else nrows
-
-        try:
-            df = pd.read_csv(
-                sub_file, on_bad_lines="skip", skiprows=start_index, nrows=nrows
-            )
-        except pd.errors.ParserError as e:
-            console.log(
-                f"Error when getting data from {os.path.basename(sub_file)}:{e}",
-                style="bold red",
-            )
-            error_df.append(
-                {
-                    "filepath": sub_file,
-                    "filename": os.path.basename(sub_file),
-                    "error": e,
-                }
-            )
-            continue
-
-        desired_metrics = ["total samples", "samples/s", "mbps", "lost samples"]
 
         sub_name = os.path.basename(sub_file).replace(".csv", "")
 
-        for col in df.columns:
+        for col, values in columns.items():
             for desired_metric in desired_metrics:
                 if desired_metric in col.lower() and "avg" not in col.lower():
-                    col_name = col.strip().lower().replace(" ", "_")
+                    col_name = col.lower().replace(" ", "_")
 
                     if "samples/s" in col_name:
                         col_name = "samples_per_sec"
                     elif "%" in col_name:
                         col_name = "lost_samples_percent"
 
-                    subs_df[f"{sub_name}_{col_name}"] = df[col]
-                    subs_df[f"{sub_name}_{col_name}"] = subs_df[
-                        f"{sub_name}_{col_name}"
-                    ].astype(float, errors="ignore")
+                    sub_columns[f"{sub_name}_{col_name}"] = pd.Series(values)
 
-    if subs_df.empty:
+    if len(sub_columns) == 0:
         error_df.append(
             {
                 "filepath": sub_file,
@@ -131,6 +233,8 @@ def parse_sub_files(
         )
         return None, "Subscriber data is empty"
 
+    subs_df = pd.concat(sub_columns, axis=1)
+
     return subs_df, None
 
 
@@ -155,79 +259,50 @@ def parse_pub_file(pub_file: str = "") -> Tuple[Optional[pd.Series], Optional[st
     if pub_file == "":
         return None, "Publisher file not specified"
 
-    with open(pub_file, "r") as pub_file_obj:
-        pub_first_5_lines = []
-        for i in range(5):
-            line = pub_file_obj.readline()
-            if not line:
-                break
-            pub_first_5_lines.append(line)
-
-    start_index = 0
-    for i, line in enumerate(pub_first_5_lines):
-        if "Ave" in line and "Length (Bytes)" in line:
-            start_index = i
-            break
-
-    if start_index == 0:
+    columns, footer_found, error = read_perftest_csv(
+        pub_file, ["Ave", "Length (Bytes)"], "latency summary"
+    )
+    if error == "Couldn't get start_index for header row":
         return (
             None,
             f"Couldn't find start index for header row for {os.path.basename(pub_file)}.",
         )
 
-    # ? Find out where to stop parsing the file from (ignore the summary stats at the end)
-    with open(pub_file, "r") as pub_file_obj:
-        pub_file_contents = pub_file_obj.readlines()
-
-    pub_last_5_lines = pub_file_contents[-5:]
-    line_count = len(pub_file_contents)
-
-    end_index = 0
-    for i, line in enumerate(pub_last_5_lines):
-        if "latency summary" in line.lower():
-            end_index = line_count - 5 + i - 2
-            break
-
-    if end_index == 0:
+    if error:
         error_df.append(
             {
                 "filepath": pub_file,
                 "filename": os.path.basename(pub_file),
-                "error": "Couldn't get end_index for summary row. File writing might have been interrupted.",
+                "error": error,
             }
         )
-        end_index = line_count - 1
+        return None, f"{error} for {os.path.basename(pub_file)}."
 
-    try:
-        lat_df = pd.read_csv(
-            pub_file,
-            skiprows=start_index,
-            nrows=end_index - start_index,
-            on_bad_lines="skip",
-        )
-    except pd.errors.EmptyDataError:
+    if not footer_found:
         error_df.append(
             {
                 "filepath": pub_file,
                 "filename": os.path.basename(pub_file),
-                "error": "EmptyDataError",
+                "error": "Couldn't get end_index for summary row. File writing might have been interrupted.",
             }
         )
-        return None, f"EmptyDataError for {os.path.basename(pub_file)}."
 
-    min_colname, error = get_colname("min", lat_df.columns)
+    colnames = list(columns.keys())
+
+    min_colname, error = get_colname("min", colnames)
     if error:
         console.print(
             f"Error getting min colname for {pub_file}: {error}", style="bold red"
         )
 
-    max_colname, error = get_colname("max", lat_df.columns)
+    max_colname, error = get_colname("max", colnames)
     if error:
         console.print(
             f"Error getting max colname for {pub_file}: {error}", style="bold red"
         )
 
-    if len(lat_df) == 0:
+    row_count = len(columns[colnames[0]]) if len(colnames) > 0 else 0
+    if row_count == 0:
         error_df.append(
             {
                 "filepath": pub_file,
@@ -237,15 +312,9 @@ def parse_pub_file(pub_file: str = "") -> Tuple[Optional[pd.Series], Optional[st
         )
         return None, f"Publisher data is empty for {os.path.basename(pub_file)}."
 
-    first_row = lat_df.iloc[0]
-    first_min = first_row[min_colname]
-    first_max = first_row[max_colname]
-
-    first_latency_values = list(set([first_min, first_max]))
-
     # ? Pick out the latency column ONLY
     latency_col = None
-    for col in lat_df.columns:
+    for col in colnames:
         if "latency" in col.lower():
             latency_col = col
             break
@@ -260,21 +329,19 @@ def parse_pub_file(pub_file: str = "") -> Tuple[Optional[pd.Series], Optional[st
         )
         return None, f"Couldn't find latency column for {os.path.basename(pub_file)}."
 
-    lat_df = lat_df[latency_col]
-
     # ? Add the first latency values to the dataframe
-    lat_df = pd.concat([pd.Series(first_latency_values), lat_df], axis=0)
-
-    lat_df = lat_df.reset_index(drop=True)
-
-    # Apply strip() to remove leading and trailing whitespaces
-    lat_df = lat_df.apply(lambda x: x.strip() if isinstance(x, str) else x)
-
-    # Set the type to float
-    lat_df = pd.to_numeric(lat_df, errors="coerce")
+    first_latency_values = []
+    for colname in [min_colname, max_colname]:
+        if colname in columns:
+            first_latency_values.append(columns[colname][0])
+    first_latency_values = list(dict.fromkeys(first_latency_values))
+
+    latency_values = np.concatenate(
+        [np.asarray(first_latency_values, dtype=np.float64), columns[latency_col]]
+    )
 
-    lat_df = lat_df.rename("latency_us")
-    lat_df = lat_df.dropna()
+    lat_df = pd.Series(latency_values, name="latency_us", dtype=np.float64)
+    lat_df = lat_df.dropna().reset_index(drop=True)
 
     return lat_df, None
 
@@ -360,49 +427,110 @@ def summarise_test(
     if subs_df is None or error:
         return test_summ_path, f"Error parsing subscriber files: {error}"
 
-    test_df = pd.concat([lat_df, subs_df], axis=1)
+    summary_columns = {"latency_us": lat_df.to_numpy()}
+    for col in subs_df.columns:
+        summary_columns[col] = subs_df[col].to_numpy()
 
     # Calculate average and total for subs
-    sub_cols = [col for col in test_df.columns if "sub" in col.lower()]
+    sub_cols = [col for col in subs_df.columns if "sub" in col.lower()]
     sub_cols_without_sub = ["_".join(col.split("_")[2:]) for col in sub_cols]
     sub_metrics = list(set(sub_cols_without_sub))
 
     for sub_metric in sub_metrics:
-        sub_metric_cols = [col for col in sub_cols if sub_metric in col]
-        sub_metric_df = test_df[sub_metric_cols]
+        sub_metric_cols = [col for col in sub_cols if col.endswith(f"_{sub_metric}")]
+        sub_metric_df = subs_df[sub_metric_cols]
 
-        sub_metric_df, error = remove_strings(sub_metric_df)
-        if error:
-            error_df.append(
-                {
-                    "filepath": test_dir,
-                    "filename": os.path.basename(test_dir),
-                    "error": error,
-                }
-            )
-            continue
+        summary_columns["avg_" + sub_metric + "_per_sub"] = sub_metric_df.mean(
+            axis=1
+        ).to_numpy()
+        summary_columns["total_" + sub_metric + "_over_subs"] = sub_metric_df.sum(
+            axis=1
+        ).to_numpy()
 
-        test_df["avg_" + sub_metric + "_per_sub"] = sub_metric_df.mean(axis=1)
-        test_df["total_" + sub_metric + "_over_subs"] = sub_metric_df.sum(axis=1)
+    summary_table, error = get_summary_table(test_name, summary_columns)
+    if error:
+        error_df.append(
+            {"filepath": test_dir, "filename": os.path.basename(test_dir), "error": error}
+        )
+        return test_summ_path, f"Error building test summary: {error}"
 
-    try:
-        test_df.to_parquet(test_summ_path, index=False)
-    except Exception as e:
+    error = write_summary_table(summary_table, test_summ_path)
+    if error:
         error_df.append(
-            {"filepath": test_dir, "filename": os.path.basename(test_dir), "error": e}
+            {"filepath": test_dir, "filename": os.path.basename(test_dir), "error": error}
         )
-        return test_summ_path, f"Error saving test summary: {e}"
+        return test_summ_path, f"Error saving test summary: {error}"
 
     return test_summ_path, None
 
 
+def summarise_test_and_collect_errors(
+    test_dir: str = "", summ_path: str = ""
+) -> Tuple[str, str, Optional[str], list[dict]]:
+    """
+    Summarise one test and return the error records it produced instead of leaving
+    them in the module level error_df, which isn't shared between worker processes.
+    """
+    global error_df
+    parent_error_df = error_df
+    error_df = []
+
+    try:
+        test_summ_path, error = summarise_test(test_dir, summ_path)
+        test_error_records = error_df
+    finally:
+        error_df = parent_error_df
+
+    return test_dir, test_summ_path, error, test_error_records
+
+
+def summarise_tests_in_serial(
+    test_dirs: list[str] = [], summ_path: str = "", status: Console.status = None
+):
+    for test_dir_count, test_dir in enumerate(test_dirs):
+        count_string = f"[{test_dir_count + 1}/{len(test_dirs)}]"
+        status.update(
+            "{} Summarising {}".format(count_string, os.path.basename(test_dir))
+        )
+        yield summarise_test_and_collect_errors(test_dir, summ_path)
+
+
+def summarise_tests_in_parallel(
+    test_dirs: list[str] = [],
+    summ_path: str = "",
+    jobs: int = 1,
+    status: Console.status = None,
+):
+    status.update(f"[0/{len(test_dirs)}] Summarising with {jobs} processes")
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(summarise_test_and_collect_errors, test_dir, summ_path)
+            for test_dir in test_dirs
+        ]
+
+        for test_dir_count, future in enumerate(as_completed(futures)):
+            test_dir, test_summ_path, error, test_error_records = future.result()
+
+            count_string = f"[{test_dir_count + 1}/{len(test_dirs)}]"
+            status.update(
+                "{} Summarised {} with {} processes".format(
+                    count_string, os.path.basename(test_dir), jobs
+                )
+            )
+            yield test_dir, test_summ_path, error, test_error_records
+
+
 def summarise_tests(
-    data_path: str = "", status: Console.status = None
+    data_path: str = "", status: Console.status = None, jobs: int = 1
 ) -> Tuple[str, Optional[str]]:
     global error_df
     if data_path == "":
         return "", "Data path not specified"
 
+    if jobs < 1:
+        return data_path, f"Job count must be at least 1: {jobs}"
+
     if not os.path.exists(data_path):
         return data_path, f"Data path does not exist: {data_path}"
 
@@ -417,12 +545,49 @@ def summarise_tests(
     test_dirs = [d for d in test_dirs if os.path.isdir(d)]
     test_list = [os.path.basename(d) for d in test_dirs]
 
-    for test_dir_count, test_dir in enumerate(test_dirs):
-        count_string = f"[{test_dir_count + 1}/{len(test_dirs)}]"
-        status.update(
-            "{} Summarising {}".format(count_string, os.path.basename(test_dir))
+    manifest_path, error = get_manifest_path(SUMM_PATH, "parquet")
+    if error:
+        return SUMM_PATH, error
+
+    manifest, error = read_manifest(manifest_path)
+    if error:
+        return SUMM_PATH, error
+
+    status.update(f"Checking {len(test_dirs)} tests for changes...")
+    changed_test_dirs, fingerprints, error = get_tests_to_summarise(
+        test_dirs, SUMM_PATH, manifest
+    )
+    if error:
+        return SUMM_PATH, error
+
+    console.print(
+        f"Summarising {len(changed_test_dirs)} new or changed tests. "
+        f"Skipping {len(test_dirs) - len(changed_test_dirs)} unchanged tests.",
+        style="bold white",
+    )
+
+    if jobs > 1:
+        summarised_tests = summarise_tests_in_parallel(
+            changed_test_dirs, SUMM_PATH, jobs, status
         )
-        test_summ_path, error = summarise_test(test_dir, SUMM_PATH)
+    else:
+        summarised_tests = summarise_tests_in_serial(changed_test_dirs, SUMM_PATH, status)
+
+    for test_dir_count, (test_dir, test_summ_path, error, test_error_records) in enumerate(
+        summarised_tests
+    ):
+        error_df.extend(test_error_records)
+
+        test_name = os.path.basename(test_dir)
+        summary_filename = None if error else os.path.basename(test_summ_path)
+        record_summarised_test(
+            manifest, test_name, fingerprints[test_name], summary_filename
+        )
+
+        # ? Save progress so an interrupted run can pick up where it left off
+        if (test_dir_count + 1) % MANIFEST_SAVE_INTERVAL == 0:
+            write_manifest(manifest_path, manifest)
+
         if error:
             console.print(
                 f"Error summarising test {os.path.basename(test_dir)}: {error}",
@@ -435,12 +600,10 @@ def summarise_tests(
                     "error": error,
                 }
             )
-            continue
 
-        # console.print(
-        #     f"{count_string} Summarised {os.path.basename(test_dir)}.",
-        #     style="bold green"
-        # )
+    error = write_manifest(manifest_path, manifest)
+    if error:
+        console.print(error, style="bold red")
 
     # Check if all tests were summarised and if not list out which ones were not summarised
     summ_test_list = [
@@ -489,8 +652,12 @@ def generate_dataset(
     ds_path = ds_path + ds_filename
     os.makedirs(os.path.dirname(ds_path), exist_ok=True)
 
-    dataset_df = pd.DataFrame()
-    for test_csv_count, test_csv in enumerate(test_files):
+    qos_dicts = get_qos_dicts_from_test_names(
+        [os.path.basename(_) for _ in test_files], bools_as_ints=True
+    )
+
+    dataset_rows = []
+    for test_csv_count, (test_csv, qos_dict) in enumerate(zip(test_files, qos_dicts)):
         count_string = f"[{test_csv_count + 1}/{len(test_files)}]"
         status.update(
             "{} Generating {} dataset from {}".format(
@@ -498,7 +665,11 @@ def generate_dataset(
             )
         )
 
-        new_dataset_row = {}
+        test_name = os.path.basename(test_csv)
+
+        if qos_dict is None:
+            console.print(f"Couldn't get qos dict for {test_name}.", style="bold red")
+            continue
 
         try:
             test_df = pd.read_csv(test_csv)
@@ -506,61 +677,44 @@ def generate_dataset(
             console.print(f"UnicodeDecodeError reading {test_csv}.", style="bold red")
             continue
 
-        test_name = os.path.basename(test_csv)
+        new_dataset_row = dict(qos_dict)
 
-        new_dataset_row = get_qos_dict_from_test_name(test_name)
-        if new_dataset_row is None:
-            console.print(f"Couldn't get qos dict for {test_name}.", style="bold red")
+        row_stats, error = get_dataset_row_stats(test_df, truncation_percent)
+        if error:
+            console.print(
+                f"Couldn't get stats for {test_name}: {error}", style="bold red"
+            )
             continue
 
-        for key, value in new_dataset_row.items():
-            if value == True:
-                new_dataset_row[key] = 1
-            elif value == False:
-                new_dataset_row[key] = 0
-
-        for column in test_df.columns:
-            if "index" in column.lower():
-                continue
-
-            column_values = test_df[column]
-            value_count = len(column_values)
-
-            values_to_truncate = int(value_count * (truncation_percent / 100))
-
-            column_values = test_df[column].iloc[values_to_truncate:]
-            column_df = pd.DataFrame(column_values)
-
-            for PERCENTILE in PERCENTILES:
-                new_dataset_row[f"{column}_{PERCENTILE}%"] = column_df.quantile(
-                    PERCENTILE / 100
-                ).values[0]
+        new_dataset_row.update(row_stats)
+        dataset_rows.append(new_dataset_row)
 
-            for STAT in DISTRIBUTION_STATS:
-                if STAT == "mean":
-                    new_dataset_row[f"{column}_mean"] = column_df.mean().values[0]
+    dataset_df = pd.DataFrame(dataset_rows)
+    dataset_df.to_parquet(ds_path, index=False)
+    console.print(
+        f"Generated {truncation_integer}% dataset at {ds_path}.", style="bold green"
+    )
 
-                elif STAT == "std":
-                    new_dataset_row[f"{column}_std"] = column_df.std().values[0]
+    return ds_path, None
 
-                elif STAT == "min":
-                    new_dataset_row[f"{column}_min"] = column_df.min().values[0]
 
-                elif STAT == "max":
-                    new_dataset_row[f"{column}_max"] = column_df.max().values[0]
+def get_jobs_from_args(sys_args: list[str] = []) -> Tuple[Optional[int], Optional[str]]:
+    if "--jobs" not in sys_args:
+        return 1, None
 
-        new_dataset_row_df = pd.DataFrame([new_dataset_row])
+    jobs_index = sys_args.index("--jobs") + 1
+    if jobs_index >= len(sys_args):
+        return None, "No value passed for --jobs. Usage: --jobs N"
 
-        dataset_df = pd.concat(
-            [dataset_df, new_dataset_row_df], axis=0, ignore_index=True
-        )
+    try:
+        jobs = int(sys_args[jobs_index])
+    except ValueError:
+        return None, f"--jobs must be a whole number: {sys_args[jobs_index]}"
 
-    dataset_df.to_parquet(ds_path, index=False)
-    console.print(
-        f"Generated {truncation_integer}% dataset at {ds_path}.", style="bold green"
-    )
+    if jobs < 1:
+        return None, f"--jobs must be at least 1: {jobs}"
 
-    return ds_path, None
+    return jobs, None
 
 
 def main(sys_args: list[str]) -> None:
@@ -570,7 +724,7 @@ def main(sys_args: list[str]) -> None:
             if len(sys_args) < 2:
                 console.print(
                     "Filepath not specified. Usage:{}".format(
-                        "\n\tpython data_summariser.py <path_to_test_folders>"
+                        "\n\tpython data_summariser.py <path_to_test_folders> [--jobs N]"
                     ),
                     style="bold red",
                 )
@@ -581,8 +735,13 @@ def main(sys_args: list[str]) -> None:
                 console.print(f"Path does not exist: {DATA_PATH}", style="bold red")
                 return
 
+            JOBS, error = get_jobs_from_args(sys_args)
+            if error:
+                console.print(error, style="bold red")
+                return
+
             status.update("Summarising tests...")
-            SUMM_PATH, error = summarise_tests(DATA_PATH, status)
+            SUMM_PATH, error = summarise_tests(DATA_PATH, status, JOBS)
             if error:
                 console.print(
                     "Error summarising tests: {}".format(error), style="bold red"
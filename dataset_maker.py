@@ -1,11 +1,17 @@
 import os
 import sys
+import shutil
 import unittest
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 from rich.console import Console
 from pprint import pprint
 from Timer import Timer
+from summary_schema import read_summary, get_wide_summary
+from qos_codec import get_qos_dict_from_test_name, get_qos_dicts_from_test_names
 
 console = Console()
 
@@ -21,107 +27,194 @@ class APExperiment:
         self.filename = os.path.basename(path)
 
     def get_qos(self):
-        self.qos = {}
-
-        split_filename = self.filename.replace(".parquet", "").split("_")
-        for item in split_filename:
-            item = item.lower()
+        self.qos = get_qos_dict_from_test_name(self.filename)
+        return self.qos
 
-            if "sec" in item:
-                self.qos["duration_secs"] = int(item.replace("sec", ""))
 
-            elif "pub" in item:
-                self.qos["pub_count"] = int(item.replace("pub", ""))
+class DatasetMaker:
+    # ? The dataset is hive partitioned on these so every file in a partition has the
+    # ? same sub_N_* columns and readers can skip partitions they don't need.
+    PARTITION_KEYS = ["pub_count", "sub_count"]
 
-            elif "sub" in item:
-                self.qos["sub_count"] = int(item.replace("sub", ""))
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.output_dir = f"./output/datasets/{self.name}"
+        self.dataset_dir = f"{self.output_dir}_dataset"
+        self.writers = {}
+        self.part_counts = {}
 
-            elif "be" in item or "rel" in item:
-                if "be" in item:
-                    self.qos["use_reliable"] = False
-                else:
-                    self.qos["use_reliable"] = True
+    def get_partition_dir(self, qos):
+        partition_dirs = [f"{key}={qos[key]}" for key in self.PARTITION_KEYS]
+        return os.path.join(self.dataset_dir, *partition_dirs)
 
-            elif "uc" in item or "mc" in item:
-                if "uc" in item:
-                    self.qos["use_multicast"] = False
-                else:
-                    self.qos["use_multicast"] = True
+    def get_test_table(self, file, qos):
+        summary_df, error = read_summary(file)
+        if error:
+            return None, error
 
-            elif "dur" in item:
-                self.qos["durability_level"] = int(item.replace("dur", ""))
+        file_df, error = get_wide_summary(summary_df)
+        if error:
+            return None, error
+
+        file_df["duration_secs"] = qos["duration_secs"]
+        file_df["datalen_bytes"] = qos["datalen_bytes"]
+        file_df["use_reliable"] = qos["use_reliable"]
+        file_df["use_multicast"] = qos["use_multicast"]
+        file_df["durability_level"] = qos["durability_level"]
+        file_df["latency_count"] = qos["latency_count"]
+        file_df["config"] = "{}B_{}PUB_{}SUB_{}_{}_{}DUR_{}LC".format(
+            qos["datalen_bytes"],
+            qos["pub_count"],
+            qos["sub_count"],
+            "BE" if qos["use_reliable"] else "REL",
+            "UC" if qos["use_multicast"] else "MC",
+            qos["durability_level"],
+            qos["latency_count"],
+        )
 
-            elif "lc" in item:
-                self.qos["latency_count"] = int(item.replace("lc", ""))
+        return pa.Table.from_pandas(file_df, preserve_index=False), None
 
-            elif item.endswith("b"):
-                self.qos["datalen_bytes"] = int(item.replace("b", ""))
+    def open_writer(self, partition_dir, schema):
+        """
+        Start the partition's next part file. Earlier part files are kept.
+        """
+        part_index = self.part_counts.get(partition_dir, 0)
+        self.part_counts[partition_dir] = part_index + 1
 
+        os.makedirs(partition_dir, exist_ok=True)
+        writer = pq.ParquetWriter(
+            os.path.join(partition_dir, f"part-{part_index}.parquet"),
+            schema,
+            compression="zstd",
+        )
+        self.writers[partition_dir] = writer
+
+        return writer
+
+    def write_test_table(self, table, partition_dir):
+        """
+        Append a test to its partition as one row group. A partition's part file
+        takes the schema of its first test and later tests are aligned to it.
+        A test with columns the part file doesn't have, e.g. a sub column that was
+        all NaN in the earlier tests, starts a new part file with both sets of
+        columns. read_dataset() unifies the part files' schemas.
+        """
+        writer = self.writers.get(partition_dir)
+        if writer is None:
+            writer = self.open_writer(partition_dir, table.schema)
+
+        extra_columns = [_ for _ in table.column_names if _ not in writer.schema.names]
+        if len(extra_columns) > 0:
+            try:
+                schema = pa.unify_schemas([writer.schema, table.schema])
+            except pa.ArrowInvalid as e:
+                return f"Columns don't match the partition schema: {e}"
+
+            writer.close()
+            writer = self.open_writer(partition_dir, schema)
+
+        columns = []
+        for field in writer.schema:
+            if field.name in table.column_names:
+                columns.append(table.column(field.name).cast(field.type))
             else:
-                print(f"Unknown item: {item}")
+                columns.append(pa.nulls(table.num_rows, type=field.type))
 
-        return self.qos
+        writer.write_table(pa.Table.from_arrays(columns, schema=writer.schema))
 
+        return None
 
-class DatasetMaker:
-    def __init__(self, path):
-        self.path = path
-        self.name = os.path.basename(path)
-        self.output_dir = f"./output/datasets/{self.name}"
+    def close_writers(self):
+        for writer in self.writers.values():
+            writer.close()
+
+        self.writers = {}
+        self.part_counts = {}
 
     def make_dataset(self):
         files = os.listdir(self.path)
         parquet_files = [file for file in files if file.endswith(".parquet")]
-        parquet_files = [os.path.join(self.path, file) for file in parquet_files]
-
-        df = pd.DataFrame()
-        for index, file in enumerate(parquet_files):
-            file_count_str = f"[{index + 1}/{len(parquet_files)}]"
-
-            with console.status(
-                f"{file_count_str} Processing {os.path.basename(file)}..."
-            ) as status:
-                ap_experiment = APExperiment(file)
-                qos = ap_experiment.get_qos()
-
-                file_df = pd.read_parquet(file)
-
-                df_obj = file_df.select_dtypes(["object"])
-                file_df[df_obj.columns] = df_obj.apply(lambda x: x.str.strip())
-                file_df[df_obj.columns] = df_obj.apply(pd.to_numeric, errors="coerce")
-
-                file_df["duration_secs"] = qos["duration_secs"]
-                file_df["datalen_bytes"] = qos["datalen_bytes"]
-                file_df["pub_count"] = qos["pub_count"]
-                file_df["sub_count"] = qos["sub_count"]
-                file_df["use_reliable"] = qos["use_reliable"]
-                file_df["use_multicast"] = qos["use_multicast"]
-                file_df["durability_level"] = qos["durability_level"]
-                file_df["latency_count"] = qos["latency_count"]
-                file_df["config"] = "{}B_{}PUB_{}SUB_{}_{}_{}DUR_{}LC".format(
-                    qos["datalen_bytes"],
-                    qos["pub_count"],
-                    qos["sub_count"],
-                    "BE" if qos["use_reliable"] else "REL",
-                    "UC" if qos["use_multicast"] else "MC",
-                    qos["durability_level"],
-                    qos["latency_count"],
-                )
-
-                df = pd.concat([df, file_df])
-
-            if index % 50 == 0:
-                try:
-                    df.to_parquet(f"{self.output_dir}_dataset.parquet", index=False)
-                    print(
-                        f"Dataset periodically saved to {self.output_dir}_dataset.parquet"
-                    )
-                except Exception as e:
-                    pprint(e)
-                    return
-
-        df.to_parquet(f"{self.output_dir}_dataset.parquet", index=False)
-        print(f"Dataset saved to {self.output_dir}_dataset.parquet")
+        parquet_files = sorted([os.path.join(self.path, file) for file in parquet_files])
+
+        if os.path.exists(self.dataset_dir):
+            shutil.rmtree(self.dataset_dir)
+
+        # ? Only one test is held in memory at a time. Writers are always closed so
+        # ? an interrupted run still leaves readable files for the tests written so far.
+        qos_dicts = get_qos_dicts_from_test_names(
+            [os.path.basename(file) for file in parquet_files]
+        )
+
+        try:
+            for index, (file, qos) in enumerate(zip(parquet_files, qos_dicts)):
+                file_count_str = f"[{index + 1}/{len(parquet_files)}]"
+
+                with console.status(
+                    f"{file_count_str} Processing {os.path.basename(file)}..."
+                ) as status:
+                    if qos is None:
+                        console.print(
+                            f"Couldn't get qos from {os.path.basename(file)}",
+                            style="bold red",
+                        )
+                        continue
+
+                    table, error = self.get_test_table(file, qos)
+                    if error:
+                        console.print(error, style="bold red")
+                        continue
+
+                    error = self.write_test_table(table, self.get_partition_dir(qos))
+                    if error:
+                        console.print(
+                            f"Couldn't add {os.path.basename(file)}: {error}",
+                            style="bold red",
+                        )
+                        continue
+
+        finally:
+            self.close_writers()
+
+        print(f"Dataset saved to {self.dataset_dir}")
+
+
+def read_dataset(dataset_dir="", columns=None, filters=None):
+    """
+    Read a partitioned dataset made by DatasetMaker. Partitions with more subscribers
+    have more sub_N_* columns so the schemas of every partition are unified first.
+
+    Params:
+        - dataset_dir (str): Path to the <campaign>_dataset directory.
+        - columns (List[str]): Columns to read. None reads all.
+        - filters: pyarrow filters e.g. [("sub_count", "in", [1, 3])].
+
+    Returns:
+        - pd.DataFrame: Dataset
+        - error
+    """
+    if dataset_dir == "":
+        return None, "No dataset dir passed."
+
+    if not os.path.isdir(dataset_dir):
+        return None, f"Dataset dir does not exist: {dataset_dir}"
+
+    dataset = ds.dataset(dataset_dir, format="parquet", partitioning="hive")
+    if len(dataset.files) == 0:
+        return pd.DataFrame(), None
+
+    schema = pa.unify_schemas(
+        [pq.read_schema(file) for file in dataset.files] + [dataset.partitioning.schema]
+    )
+    dataset = ds.dataset(
+        dataset_dir, schema=schema, format="parquet", partitioning="hive"
+    )
+
+    filter_expression = None
+    if filters is not None:
+        filter_expression = pq.filters_to_expression(filters)
+
+    return dataset.to_table(columns=columns, filter=filter_expression).to_pandas(), None
 
 
 def main(args):
@@ -0,0 +1,104 @@
+import pandas as pd
+
+from typing import Dict, List, Optional, Tuple
+
+from constants import PERCENTILES, DISTRIBUTION_STATS
+
+
+def get_dataset_row_stats(
+    test_df: pd.DataFrame = pd.DataFrame(),
+    truncation_percent: float = 0,
+    percentiles: List[int] = PERCENTILES,
+    distribution_stats: List[str] = DISTRIBUTION_STATS,
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Reduce a summarised test to the percentile and distribution stats of every column.
+
+    All percentiles for all columns are computed in one quantile() call and the
+    distribution stats in one agg() call instead of once per column per stat.
+
+    Params:
+        - test_df (pd.DataFrame): Summarised test data e.g. latency_us, sub_0_mbps, ...
+        - truncation_percent (float): Percentage of rows to drop from the start.
+        - percentiles (List[int]): Percentiles to compute e.g. [0, 1, ..., 100].
+        - distribution_stats (List[str]): Any of "mean", "std", "min" and "max".
+
+    Returns:
+        - Dict: {"<column>_<percentile>%": value, "<column>_<stat>": value, ...}
+        - error
+    """
+    if test_df is None:
+        return None, "No test dataframe passed."
+
+    for stat in distribution_stats:
+        if stat not in ["mean", "std", "min", "max"]:
+            return None, f"Unknown distribution stat: {stat}"
+
+    columns = [column for column in test_df.columns if "index" not in column.lower()]
+
+    # Every column has the same length so they all lose the same number of rows.
+    values_to_truncate = int(len(test_df.index) * (truncation_percent / 100))
+    truncated_df = test_df[columns].iloc[values_to_truncate:]
+    truncated_df = truncated_df.apply(pd.to_numeric, errors="coerce")
+
+    percentile_df = truncated_df.quantile([percentile / 100 for percentile in percentiles])
+
+    if len(distribution_stats) > 0:
+        distribution_df = truncated_df.agg(distribution_stats)
+    else:
+        distribution_df = pd.DataFrame(columns=columns)
+
+    row_stats = {}
+    for column in columns:
+        percentile_values = percentile_df[column].to_numpy()
+        for percentile, value in zip(percentiles, percentile_values):
+            row_stats[f"{column}_{percentile}%"] = value
+
+        for stat in distribution_stats:
+            row_stats[f"{column}_{stat}"] = distribution_df.at[stat, column]
+
+    return row_stats, None
+
+
+def get_dataset_row_stats_per_truncation(
+    test_df: pd.DataFrame = pd.DataFrame(),
+    truncation_percents: List[float] = [0],
+    percentiles: List[int] = PERCENTILES,
+    distribution_stats: List[str] = DISTRIBUTION_STATS,
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Compute the dataset row stats of one summarised test for several truncations.
+
+    The test is converted to numbers once and every truncation is a slice of the
+    same in-memory frame, so the summary only has to be read and parsed once.
+
+    Params:
+        - test_df (pd.DataFrame): Summarised test data e.g. latency_us, sub_0_mbps, ...
+        - truncation_percents (List[float]): Truncation percentages e.g. [0, 10, 25, 50].
+        - percentiles (List[int]): Percentiles to compute e.g. [0, 1, ..., 100].
+        - distribution_stats (List[str]): Any of "mean", "std", "min" and "max".
+
+    Returns:
+        - Dict: {truncation_percent: {"<column>_<percentile>%": value, ...}, ...}
+        - error
+    """
+    if test_df is None:
+        return None, "No test dataframe passed."
+
+    if len(truncation_percents) == 0:
+        return None, "No truncation percentages passed."
+
+    columns = [column for column in test_df.columns if "index" not in column.lower()]
+    numeric_df = test_df[columns].apply(pd.to_numeric, errors="coerce")
+
+    row_stats_per_truncation = {}
+    for truncation_percent in truncation_percents:
+        row_stats, error = get_dataset_row_stats(
+            numeric_df, truncation_percent, percentiles, distribution_stats
+        )
+        if error:
+            return None, error
+
+        row_stats_per_truncation[truncation_percent] = row_stats
+
+    return row_stats_per_truncation, None
@@ -1,27 +1,52 @@
 import pandas as pd
 import os
+import sys
 
 from rich.console import Console
 from rich.pretty import pprint
 
+from ess_journal import read_ess_journal, merge_ess_journal
+from ess_store import (
+    get_ess_store_path,
+    open_ess_store,
+    sync_ess_store,
+    get_ess_store_row_count,
+    query_status_count,
+    query_tests_with_status,
+    set_end_status,
+    export_ess_store_to_parquet
+)
+
 console = Console()
 
 CAMP_NAME = "5Pi_Data_Collection_71Mbps_Missing_Reruns"
 ESS_PATH = f"./output/ess/{CAMP_NAME}.parquet"
 
-ess_df = pd.read_parquet(ESS_PATH, engine="fastparquet")
+# Make sure the store has every row in the parquet and journal before using it.
+journal_records, error = read_ess_journal(ESS_PATH)
+if error:
+    sys.exit(error)
+
+ess_df = merge_ess_journal(pd.read_parquet(ESS_PATH, engine="fastparquet"), journal_records)
 
-empty_ess_df = ess_df[ess_df["end_status"] == "empty_file_found"]
+ess_store, error = open_ess_store(get_ess_store_path(ESS_PATH))
+if error:
+    sys.exit(error)
 
-print(f"success Before: {len(ess_df[ess_df['end_status'] == 'success'])}")
+error = sync_ess_store(ess_store, ess_df)
+if error:
+    sys.exit(error)
+
+ess_row_count = get_ess_store_row_count(ess_store)
+
+print(f"success Before: {query_status_count(ess_store, 'success')}")
 print(
-    f"empty_file_found Before: {len(ess_df[ess_df['end_status'] == 'empty_file_found'])}"
+    f"empty_file_found Before: {query_status_count(ess_store, 'empty_file_found')}"
 )
 
-for index, row in empty_ess_df.iterrows():
-    count_string = f"[{index}/{len(ess_df)}]"
-    with console.status(f"{count_string} Processing {row['test_name']}...") as status:
-        test_name = row["test_name"]
+for seq, test_name in query_tests_with_status(ess_store, "empty_file_found"):
+    count_string = f"[{seq}/{ess_row_count}]"
+    with console.status(f"{count_string} Processing {test_name}...") as status:
         output_path = os.path.join(f"./output/data/{CAMP_NAME}/", test_name)
 
         if not os.path.exists(output_path):
@@ -52,11 +77,15 @@ for index, row in empty_ess_df.iterrows():
                 continue
 
         if not really_has_empty_file:
-            ess_df.at[index, "end_status"] = "success"
+            set_end_status(ess_store, seq, "success")
 
-print(f"success After: {len(ess_df[ess_df['end_status'] == 'success'])}")
+print(f"success After: {query_status_count(ess_store, 'success')}")
 print(
-    f"empty_file_found After: {len(ess_df[ess_df['end_status'] == 'empty_file_found'])}"
+    f"empty_file_found After: {query_status_count(ess_store, 'empty_file_found')}"
 )
 
-ess_df.to_parquet(ESS_PATH)
+error = export_ess_store_to_parquet(ess_store, ESS_PATH)
+if error:
+    sys.exit(error)
+
+ess_store.close()
@@ -0,0 +1,296 @@
+import os
+import json
+import threading
+
+import pandas as pd
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ess_store import (
+    get_ess_store_path,
+    open_ess_store,
+    sync_ess_store,
+    insert_ess_rows,
+    get_json_value,
+    write_parquet_atomically
+)
+
+# ? Each test's ESS row is appended to a JSON lines journal next to the ESS
+# ? parquet and fsynced, instead of rewriting the whole parquet after every test.
+# ? The journal is compacted into the parquet in the background every
+# ? ESS_COMPACTION_ROW_COUNT rows and when the campaign finishes.
+# ? Every journal record has the row's position in the ESS as its seq. The
+# ? parquet always holds the first rows of the ESS, so the full ESS is the
+# ? parquet followed by the journal records with a seq past the end of it. This
+# ? stays true however a compaction is interrupted.
+# ? Rows are also inserted into the campaign's SQLite ESS store for querying.
+
+ESS_COMPACTION_ROW_COUNT = 25
+ESS_TIMESTAMP_COLUMNS = ["start_timestamp", "end_timestamp"]
+
+
+def get_ess_journal_path(ess_path: str = "") -> str:
+    """
+    e.g. output/ess/campaign.parquet -> output/ess/campaign.journal.jsonl
+    """
+    ess_root, _ = os.path.splitext(ess_path)
+
+    return f"{ess_root}.journal.jsonl"
+
+
+def get_journal_line(seq: int = 0, row: Dict = {}) -> str:
+    return json.dumps({"seq": seq, "row": row}, default=get_json_value) + "\n"
+
+
+def read_ess_journal(ess_path: str = "") -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """
+    Read the records in an ESS's journal.
+
+    Read the journal before the parquet. A compaction only removes records
+    after the parquet that holds them has been written.
+
+    Params:
+        - ess_path (str): Path of the ESS parquet.
+
+    Returns:
+        - List[Dict]: [{"seq", "row"}]. Empty if there is no journal.
+        - error
+    """
+    journal_path = get_ess_journal_path(ess_path)
+    if not os.path.exists(journal_path):
+        return [], None
+
+    try:
+        with open(journal_path, "r") as f:
+            lines = f.read().split("\n")
+    except Exception as e:
+        return None, f"Couldn't read {journal_path}: {e}"
+
+    records = []
+    for line_index, line in enumerate(lines):
+        if line.strip() == "":
+            continue
+
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            # The last line is cut short if autoperf stopped mid-append.
+            if line_index == len(lines) - 1:
+                break
+
+            return None, f"Couldn't decode line {line_index + 1} of {journal_path}: {e}"
+
+    return records, None
+
+
+def merge_ess_journal(ess_df: pd.DataFrame = pd.DataFrame(), records: List[Dict] = []) -> pd.DataFrame:
+    """
+    Add the journal records that aren't in the parquet yet to the parquet's rows.
+
+    Params:
+        - ess_df (pd.DataFrame): Rows read from the ESS parquet.
+        - records (List[Dict]): Records from read_ess_journal().
+
+    Returns:
+        - pd.DataFrame: Full ESS.
+    """
+    parquet_row_count = len(ess_df.index)
+
+    rows_by_seq = {}
+    for record in records:
+        if record['seq'] >= parquet_row_count:
+            rows_by_seq[record['seq']] = record['row']
+
+    if len(rows_by_seq) == 0:
+        return ess_df
+
+    journal_df = pd.DataFrame([rows_by_seq[seq] for seq in sorted(rows_by_seq.keys())])
+    for column in ESS_TIMESTAMP_COLUMNS:
+        if column in journal_df.columns:
+            journal_df[column] = pd.to_datetime(journal_df[column], format="ISO8601")
+
+    return pd.concat([ess_df, journal_df], axis=0, ignore_index=True)
+
+
+class EssJournal:
+    """
+    Append-only writer for one campaign's ESS.
+
+    Holds the full ESS in memory so readers in the same campaign never have to
+    go back to disk, and keeps the SQLite ESS store in step with it. Only one
+    EssJournal should be open per ESS.
+    """
+
+    def __init__(
+        self,
+        ess_path: str = "",
+        ess_df: pd.DataFrame = pd.DataFrame(),
+        compaction_row_count: int = ESS_COMPACTION_ROW_COUNT
+    ):
+        """
+        Params:
+            - ess_path (str): Path of the ESS parquet.
+            - ess_df (pd.DataFrame): Full ESS as it is on disk, e.g. from get_ess_df().
+            - compaction_row_count (int): Journal rows to wait for before compacting.
+        """
+        self.ess_path = ess_path
+        self.journal_path = get_ess_journal_path(ess_path)
+        self.ess_df = ess_df
+        self.compaction_row_count = compaction_row_count
+
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_compaction: Optional[Future] = None
+
+        self.journal_row_count = 0
+        if os.path.exists(self.journal_path):
+            self.journal_row_count = self.truncate_torn_line()
+
+        # The store is only for querying so the journal carries on without it.
+        self.store, self.store_error = open_ess_store(get_ess_store_path(ess_path))
+        if self.store is not None:
+            self.store_error = sync_ess_store(self.store, ess_df)
+
+    def truncate_torn_line(self) -> int:
+        """
+        Cut off a line that was only half written so the next append starts on
+        a line of its own.
+
+        Returns:
+            - int: Number of complete lines in the journal.
+        """
+        with open(self.journal_path, "rb+") as f:
+            content = f.read()
+            complete_length = content.rfind(b"\n") + 1
+            if complete_length < len(content):
+                f.truncate(complete_length)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return content[:complete_length].count(b"\n")
+
+    def append(self, test_ess_df: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, Optional[str]]:
+        """
+        Append a test's ESS rows to the journal.
+
+        Params:
+            - test_ess_df (pd.DataFrame): Rows for the test.
+
+        Returns:
+            - pd.DataFrame: Full ESS with the new rows.
+            - error
+        """
+        if test_ess_df is None or len(test_ess_df.index) == 0:
+            return self.ess_df, None
+
+        first_seq = len(self.ess_df.index)
+        if first_seq == 0:
+            self.ess_df = test_ess_df.reset_index(drop=True)
+        else:
+            self.ess_df = pd.concat([self.ess_df, test_ess_df], axis=0, ignore_index=True)
+
+        lines = [
+            get_journal_line(first_seq + row_index, row)
+            for row_index, row in enumerate(test_ess_df.to_dict('records'))
+        ]
+
+        with self.lock:
+            try:
+                with open(self.journal_path, "a") as f:
+                    f.write("".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                return self.ess_df, f"Couldn't append to {self.journal_path}: {e}"
+
+            self.journal_row_count += len(lines)
+
+        store_error = None
+        if self.store is not None:
+            store_error = insert_ess_rows(self.store, first_seq, test_ess_df)
+
+        if self.journal_row_count >= self.compaction_row_count and self.pending_compaction is None:
+            self.pending_compaction = self.executor.submit(self.compact, self.ess_df)
+
+        compaction_error = self.collect_compaction(wait=False)
+
+        return self.ess_df, store_error or compaction_error
+
+    def collect_compaction(self, wait: bool = False) -> Optional[str]:
+        if self.pending_compaction is None:
+            return None
+
+        if not wait and not self.pending_compaction.done():
+            return None
+
+        future = self.pending_compaction
+        self.pending_compaction = None
+
+        try:
+            return future.result()
+        except Exception as e:
+            return f"Exception compacting {self.journal_path}: {e}"
+
+    def compact(self, ess_df: pd.DataFrame = pd.DataFrame()) -> Optional[str]:
+        """
+        Write ess_df to the parquet and drop the journal records it now holds.
+
+        Params:
+            - ess_df (pd.DataFrame): Snapshot of the full ESS.
+
+        Returns:
+            - error
+        """
+        if len(ess_df.index) == 0:
+            return None
+
+        error = write_parquet_atomically(ess_df, self.ess_path)
+        if error:
+            return error
+
+        compacted_row_count = len(ess_df.index)
+        with self.lock:
+            records, error = read_ess_journal(self.ess_path)
+            if error:
+                return error
+
+            lines = [
+                get_journal_line(record['seq'], record['row'])
+                for record in records if record['seq'] >= compacted_row_count
+            ]
+
+            tmp_journal_path = f"{self.journal_path}.tmp"
+            try:
+                with open(tmp_journal_path, "w") as f:
+                    f.write("".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_journal_path, self.journal_path)
+            except Exception as e:
+                return f"Couldn't rewrite {self.journal_path}: {e}"
+
+            self.journal_row_count = len(lines)
+
+        return None
+
+    def close(self) -> Optional[str]:
+        """
+        Wait for any compaction in progress and compact what's left so the
+        parquet holds the whole ESS.
+
+        Returns:
+            - error
+        """
+        error = self.collect_compaction(wait=True)
+
+        if error is None and self.journal_row_count > 0:
+            error = self.compact(self.ess_df)
+
+        self.executor.shutdown(wait=True)
+
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+        return error
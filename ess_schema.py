@@ -0,0 +1,186 @@
+import ast
+
+import pandas as pd
+
+from typing import Dict, List, Optional
+
+from constants import REQUIRED_QOS_KEYS
+from qos_codec import get_qos_df_from_test_names
+
+# ? Every ESS row has its QoS settings in their own columns, the IP of the machine
+# ? the test failed on, how long each stage took and which stage it failed in.
+# ? Nothing on the hot path has to parse comments or stringified dicts any more.
+# ? ESS files from before this still have qos_settings and ip columns, which the
+# ? helpers below fall back to.
+
+ESS_BOOL_QOS_COLUMNS = ["use_multicast", "use_reliable"]
+ESS_STAGE_DURATION_COLUMNS = ["ping_secs", "reboot_secs", "run_secs", "check_secs", "download_secs"]
+
+FAILURE_STAGES = [
+    "connection_check",
+    "readiness",
+    "script_generation",
+    "script_distribution",
+    "noise_generation",
+    "script_execution",
+    "download",
+    "validation",
+]
+
+END_STATUS_FAILURE_STAGES = {
+    "ping_check_fail": "connection_check",
+    "ssh_check_fail": "connection_check",
+    "connection_check_fail": "readiness",
+    "script_generation_fail": "script_generation",
+    "script_distribution_fail": "script_distribution",
+    "noise_script_generation_fail": "noise_generation",
+    "script_execution_fail": "script_execution",
+    "file_count_mismatch": "validation",
+    "empty_file_found": "validation",
+}
+
+ESS_COLUMN_DTYPES = {
+    "start_timestamp": "datetime64[ns]",
+    "end_timestamp": "datetime64[ns]",
+    "test_name": "string",
+    "ping_count": "Int64",
+    "ssh_check_count": "Int64",
+    "end_status": "string",
+    "failure_stage": pd.CategoricalDtype(FAILURE_STAGES),
+    "failed_machine_ip": "string",
+    **{
+        qos_key: "boolean" if qos_key in ESS_BOOL_QOS_COLUMNS else "Int64"
+        for qos_key in REQUIRED_QOS_KEYS
+    },
+    **{column: "Float64" for column in ESS_STAGE_DURATION_COLUMNS},
+    "comments": "string",
+}
+
+# ? scripts_per_machine, boot_to_ready_secs and reboot_decisions are nested.
+ESS_COLUMNS = list(ESS_COLUMN_DTYPES.keys()) + [
+    "scripts_per_machine",
+    "boot_to_ready_secs",
+    "reboot_decisions",
+]
+
+
+def get_failure_stage(end_status: str = "") -> Optional[str]:
+    return END_STATUS_FAILURE_STAGES.get(end_status)
+
+
+def get_ess_scripts(scripts_per_machine: List = []) -> List[Dict]:
+    """
+    Keep only what the ESS needs from the machine configs the scripts were
+    written into.
+    """
+    if not isinstance(scripts_per_machine, list):
+        return []
+
+    return [
+        {
+            "machine_name": str(machine.get('machine_name', "")),
+            "ip": str(machine.get('ip', "")),
+            "script": str(machine.get('script', "")),
+        }
+        for machine in scripts_per_machine
+    ]
+
+
+def get_ess_df_with_qos_columns(ess_df: pd.DataFrame = pd.DataFrame()) -> pd.DataFrame:
+    """
+    Fill in missing QoS columns, e.g. of older ESS files, by decoding every test
+    name at once instead of parsing each row's qos_settings.
+    """
+    if "test_name" not in ess_df.columns:
+        return ess_df
+
+    missing_qos_keys = [
+        qos_key for qos_key in REQUIRED_QOS_KEYS
+        if qos_key not in ess_df.columns or ess_df[qos_key].isna().any()
+    ]
+    if len(missing_qos_keys) == 0:
+        return ess_df
+
+    qos_df, error = get_qos_df_from_test_names(ess_df['test_name'])
+    if error:
+        return ess_df
+
+    ess_df = ess_df.copy()
+    for qos_key in missing_qos_keys:
+        if qos_key not in ess_df.columns:
+            ess_df[qos_key] = qos_df[qos_key]
+        else:
+            ess_df[qos_key] = ess_df[qos_key].astype("object").where(
+                ess_df[qos_key].notna(), qos_df[qos_key].astype("object")
+            )
+
+    return ess_df
+
+
+def get_typed_ess_df(ess_df: pd.DataFrame = pd.DataFrame()) -> pd.DataFrame:
+    """
+    Cast the ESS columns to their types. Columns the ESS doesn't know about,
+    e.g. from older ESS files, are left alone.
+    """
+    typed_ess_df = get_ess_df_with_qos_columns(ess_df).copy()
+    for column, dtype in ESS_COLUMN_DTYPES.items():
+        if column not in typed_ess_df.columns:
+            continue
+
+        if dtype == "datetime64[ns]":
+            typed_ess_df[column] = pd.to_datetime(typed_ess_df[column], format="ISO8601")
+        elif isinstance(dtype, pd.CategoricalDtype):
+            # Casting values outside the categories is deprecated so unknown ones
+            # are turned into missing values first.
+            column_values = typed_ess_df[column].astype("object")
+            typed_ess_df[column] = column_values.where(
+                column_values.isin(dtype.categories), None
+            ).astype(dtype)
+        else:
+            typed_ess_df[column] = typed_ess_df[column].astype(dtype)
+
+    return typed_ess_df
+
+
+def get_qos_settings_from_ess_row(row) -> Dict:
+    """
+    Get the QoS settings of an ESS row as a dict.
+
+    Params:
+        - row (pd.Series or Dict): ESS row.
+
+    Returns:
+        - Dict: {qos_key: value}. Empty if the row has no QoS settings.
+    """
+    if all([qos_key in row.keys() and not pd.isna(row[qos_key]) for qos_key in REQUIRED_QOS_KEYS]):
+        return {
+            qos_key: bool(row[qos_key]) if qos_key in ESS_BOOL_QOS_COLUMNS else int(row[qos_key])
+            for qos_key in REQUIRED_QOS_KEYS
+        }
+
+    # Rows from before the QoS settings had their own columns.
+    qos_settings = row.get('qos_settings')
+    if isinstance(qos_settings, str):
+        qos_settings = ast.literal_eval(qos_settings.replace("'", "\""))
+    if not isinstance(qos_settings, dict):
+        return {}
+
+    return qos_settings
+
+
+def get_failed_machine_ips(ess_df: pd.DataFrame = pd.DataFrame()) -> pd.Series:
+    """
+    Get the IP of the machine each test failed on, falling back to the ip
+    column of older ESS files.
+    """
+    failed_machine_ips = pd.Series([None] * len(ess_df.index), index=ess_df.index, dtype="object")
+
+    if "failed_machine_ip" in ess_df.columns:
+        failed_machine_ips = ess_df['failed_machine_ip'].astype("object")
+
+    if "ip" in ess_df.columns:
+        failed_machine_ips = failed_machine_ips.where(
+            failed_machine_ips.notna(), ess_df['ip'].astype("object")
+        )
+
+    return failed_machine_ips.where(failed_machine_ips.notna(), None)
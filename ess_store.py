@@ -0,0 +1,324 @@
+import os
+import json
+import sqlite3
+
+import pandas as pd
+
+from typing import Dict, List, Optional, Tuple
+
+from constants import REQUIRED_QOS_KEYS
+from ess_schema import (
+    ESS_COLUMNS,
+    ESS_STAGE_DURATION_COLUMNS,
+    get_typed_ess_df,
+    get_ess_df_with_qos_columns,
+    get_qos_settings_from_ess_row
+)
+
+# ? The ESS is mirrored into a SQLite database next to the parquet so that
+# ? status, IP and test name lookups are index lookups instead of loading the
+# ? whole ESS into pandas. Rows use the same seq as the ESS journal so the store
+# ? can always be caught up from the parquet and journal.
+# ? WAL mode lets the running campaign write while other processes read.
+# ? The store can always be rebuilt from the ESS so it's dropped and rebuilt
+# ? whenever ESS_STORE_VERSION changes.
+
+ESS_STORE_VERSION = 2
+ESS_STORE_TEXT_COLUMNS = ["test_name", "end_status", "failure_stage", "failed_machine_ip", "comments"]
+ESS_STORE_JSON_COLUMNS = ["scripts_per_machine", "boot_to_ready_secs", "reboot_decisions"]
+ESS_STORE_TIMESTAMP_COLUMNS = ["start_timestamp", "end_timestamp"]
+
+ESS_STORE_COLUMNS = [
+    ("seq", "INTEGER PRIMARY KEY"),
+    ("start_timestamp", "TEXT"),
+    ("end_timestamp", "TEXT"),
+    ("test_name", "TEXT"),
+    ("ping_count", "INTEGER"),
+    ("ssh_check_count", "INTEGER"),
+    ("end_status", "TEXT"),
+    ("failure_stage", "TEXT"),
+    ("failed_machine_ip", "TEXT"),
+    ("comments", "TEXT"),
+] + [(qos_key, "INTEGER") for qos_key in REQUIRED_QOS_KEYS] + [
+    (duration_column, "REAL") for duration_column in ESS_STAGE_DURATION_COLUMNS
+] + [
+    (json_column, "TEXT") for json_column in ESS_STORE_JSON_COLUMNS
+]
+
+ESS_STORE_INDEXED_COLUMNS = ["end_status", "failed_machine_ip", "test_name", "start_timestamp"]
+
+
+def get_ess_store_path(ess_path: str = "") -> str:
+    """
+    e.g. output/ess/campaign.parquet -> output/ess/campaign.sqlite
+    """
+    ess_root, _ = os.path.splitext(ess_path)
+
+    return f"{ess_root}.sqlite"
+
+
+def get_json_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+
+    if hasattr(value, 'item'):
+        return value.item()
+
+    return str(value)
+
+
+def write_parquet_atomically(ess_df: pd.DataFrame = pd.DataFrame(), ess_path: str = "") -> Optional[str]:
+    tmp_ess_path = f"{ess_path}.tmp"
+    try:
+        get_typed_ess_df(ess_df).to_parquet(tmp_ess_path, index=False)
+        with open(tmp_ess_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_ess_path, ess_path)
+    except Exception as e:
+        return f"Couldn't write {ess_path}: {e}"
+
+    return None
+
+
+def open_ess_store(store_path: str = "") -> Tuple[Optional[sqlite3.Connection], Optional[str]]:
+    """
+    Open an ESS store, creating its table and indexes if they don't exist.
+
+    Params:
+        - store_path (str): Path of the SQLite database.
+
+    Returns:
+        - sqlite3.Connection
+        - error
+    """
+    if store_path == "":
+        return None, "No ESS store path passed."
+
+    try:
+        connection = sqlite3.connect(store_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        column_definitions = ", ".join([f"{name} {kind}" for name, kind in ESS_STORE_COLUMNS])
+        with connection:
+            store_version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if store_version != ESS_STORE_VERSION:
+                connection.execute("DROP TABLE IF EXISTS ess")
+                connection.execute(f"PRAGMA user_version = {ESS_STORE_VERSION}")
+
+            connection.execute(f"CREATE TABLE IF NOT EXISTS ess ({column_definitions})")
+            for column in ESS_STORE_INDEXED_COLUMNS:
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS ess_{column} ON ess ({column})"
+                )
+    except sqlite3.Error as e:
+        return None, f"Couldn't open {store_path}: {e}"
+
+    return connection, None
+
+
+def is_missing(value) -> bool:
+    if value is None:
+        return True
+
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def get_store_row(seq: int = 0, row: Dict = {}) -> Dict:
+    """
+    Turn an ESS row into a store row.
+    """
+    store_row = {"seq": seq}
+
+    for column in ESS_STORE_TIMESTAMP_COLUMNS:
+        value = row.get(column)
+        store_row[column] = None if is_missing(value) else pd.Timestamp(value).isoformat()
+
+    # Older ESS files only have the failed machine's IP in their ip column.
+    if is_missing(row.get('failed_machine_ip')):
+        row = {**row, "failed_machine_ip": row.get('ip')}
+
+    for column in ESS_STORE_TEXT_COLUMNS:
+        value = row.get(column)
+        store_row[column] = None if is_missing(value) else str(value)
+
+    for column in ["ping_count", "ssh_check_count"]:
+        value = row.get(column)
+        store_row[column] = None if is_missing(value) else int(value)
+
+    qos_settings = get_qos_settings_from_ess_row(row)
+    for qos_key in REQUIRED_QOS_KEYS:
+        value = qos_settings.get(qos_key)
+        store_row[qos_key] = None if is_missing(value) else int(value)
+
+    for column in ESS_STAGE_DURATION_COLUMNS:
+        value = row.get(column)
+        store_row[column] = None if is_missing(value) else float(value)
+
+    for column in ESS_STORE_JSON_COLUMNS:
+        value = row.get(column)
+        store_row[column] = None if is_missing(value) else json.dumps(value, default=get_json_value)
+
+    return store_row
+
+
+def insert_ess_rows(
+    connection: sqlite3.Connection,
+    first_seq: int = 0,
+    ess_df: pd.DataFrame = pd.DataFrame()
+) -> Optional[str]:
+    """
+    Insert ESS rows into the store in one transaction. Rows that are already in
+    the store are replaced.
+
+    Params:
+        - connection (sqlite3.Connection): ESS store.
+        - first_seq (int): Position of the first row in the ESS.
+        - ess_df (pd.DataFrame): Rows to insert.
+
+    Returns:
+        - error
+    """
+    if ess_df is None or len(ess_df.index) == 0:
+        return None
+
+    store_rows = [
+        get_store_row(first_seq + row_index, row)
+        for row_index, row in enumerate(get_ess_df_with_qos_columns(ess_df).to_dict('records'))
+    ]
+
+    column_names = [name for name, _ in ESS_STORE_COLUMNS]
+    placeholders = ", ".join([f":{name}" for name in column_names])
+    try:
+        with connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO ess ({', '.join(column_names)}) VALUES ({placeholders})",
+                store_rows
+            )
+    except (sqlite3.Error, ValueError, SyntaxError) as e:
+        return f"Couldn't insert ESS rows: {e}"
+
+    return None
+
+
+def get_ess_store_row_count(connection: sqlite3.Connection) -> int:
+    return connection.execute("SELECT COUNT(*) FROM ess").fetchone()[0]
+
+
+def sync_ess_store(
+    connection: sqlite3.Connection,
+    ess_df: pd.DataFrame = pd.DataFrame()
+) -> Optional[str]:
+    """
+    Catch the store up with the full ESS, e.g. after a crash between a journal
+    append and the store insert or for an ESS that never had a store.
+
+    Params:
+        - connection (sqlite3.Connection): ESS store.
+        - ess_df (pd.DataFrame): Full ESS.
+
+    Returns:
+        - error
+    """
+    ess_row_count = len(ess_df.index)
+    try:
+        store_row_count = get_ess_store_row_count(connection)
+        if store_row_count > ess_row_count:
+            with connection:
+                connection.execute("DELETE FROM ess WHERE seq >= ?", (ess_row_count,))
+            return None
+    except sqlite3.Error as e:
+        return f"Couldn't sync ESS store: {e}"
+
+    return insert_ess_rows(connection, store_row_count, ess_df.iloc[store_row_count:])
+
+
+def query_last_n_statuses(connection: sqlite3.Connection, n: int = 0) -> List[str]:
+    """
+    Get the end status of the last n tests, oldest first.
+    """
+    rows = connection.execute(
+        "SELECT end_status FROM ess ORDER BY seq DESC LIMIT ?", (n,)
+    ).fetchall()
+
+    return [row[0] for row in reversed(rows)]
+
+
+def query_failed_test_names(connection: sqlite3.Connection) -> List[str]:
+    """
+    Get the names of tests that didn't succeed, in the order they first failed.
+    """
+    rows = connection.execute(
+        "SELECT test_name FROM ess WHERE end_status != 'success' "
+        "GROUP BY test_name ORDER BY MIN(seq)"
+    ).fetchall()
+
+    return [row[0] for row in rows]
+
+
+def query_last_failed_ip(connection: sqlite3.Connection) -> Optional[str]:
+    """
+    Get the IP of the machine blamed for the most recent failed test.
+    """
+    row = connection.execute(
+        "SELECT failed_machine_ip FROM ess "
+        "WHERE failed_machine_ip IS NOT NULL AND LOWER(end_status) LIKE '%fail%' "
+        "ORDER BY seq DESC LIMIT 1"
+    ).fetchone()
+
+    return None if row is None else row[0]
+
+
+def query_status_count(connection: sqlite3.Connection, end_status: str = "") -> int:
+    return connection.execute(
+        "SELECT COUNT(*) FROM ess WHERE end_status = ?", (end_status,)
+    ).fetchone()[0]
+
+
+def query_tests_with_status(connection: sqlite3.Connection, end_status: str = "") -> List[Tuple[int, str]]:
+    """
+    Get the (seq, test_name) of every test that ended with end_status.
+    """
+    return connection.execute(
+        "SELECT seq, test_name FROM ess WHERE end_status = ? ORDER BY seq", (end_status,)
+    ).fetchall()
+
+
+def set_end_status(connection: sqlite3.Connection, seq: int = 0, end_status: str = "") -> None:
+    with connection:
+        connection.execute("UPDATE ess SET end_status = ? WHERE seq = ?", (end_status, seq))
+
+
+def read_ess_store(connection: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Read the whole store back into the ESS's dataframe layout.
+    """
+    store_df = pd.read_sql_query("SELECT * FROM ess ORDER BY seq", connection)
+
+    for column in ESS_STORE_JSON_COLUMNS:
+        store_df[column] = [None if is_missing(_) else json.loads(_) for _ in store_df[column]]
+
+    return get_typed_ess_df(store_df[ESS_COLUMNS])
+
+
+def export_ess_store_to_parquet(
+    connection: sqlite3.Connection,
+    ess_path: str = ""
+) -> Optional[str]:
+    """
+    Write the store out as the ESS parquet.
+
+    Params:
+        - connection (sqlite3.Connection): ESS store.
+        - ess_path (str): Path of the ESS parquet.
+
+    Returns:
+        - error
+    """
+    if ess_path == "":
+        return "No ESS path passed."
+
+    return write_parquet_atomically(read_ess_store(connection), ess_path)
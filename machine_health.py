@@ -0,0 +1,221 @@
+import time
+import shlex
+
+from typing import Dict, List, Optional, Tuple
+
+from orchestrator import run_command
+from ssh_pool import get_ssh_command
+
+# ? Rebooting every machine before every test adds a full boot cycle to each test.
+# ? With the "health" policy a machine is only rebooted when a cheap probe finds
+# ? something left over from the last test that would skew the next one.
+REBOOT_POLICIES = ["always", "health", "never"]
+
+HEALTH_PROBE_TIMEOUT_SECS = 15
+
+MIN_MEM_AVAILABLE_MB = 256
+
+# ? The 1 minute load average is still close to the core count right after a test
+# ? that kept every core busy, so the load is compared per core. Only more
+# ? runnable work than the machine has cores counts as something left running.
+MAX_LOAD_AVERAGE_PER_CORE = 1.5
+MAX_CLOCK_SKEW_SECS = 1.0
+
+# ? Only qdiscs that change traffic count as leftovers. The default pfifo_fast,
+# ? fq_codel, mq and noqueue qdiscs are always there.
+NOISE_QDISC_KINDS = ["netem", "tbf", "htb"]
+
+HEALTH_PROBE_KEYS = [
+    "perftest_process_count",
+    "mem_available_kb",
+    "load_average_1min",
+    "cpu_count",
+    "noise_qdisc_count",
+    "remote_time",
+]
+
+
+def get_perftest_process_name(perftest_exec_path: str = "") -> str:
+    """
+    Get the process name pgrep -x and pkill -x match perftest by. The kernel
+    truncates process names to 15 characters.
+    """
+    return perftest_exec_path.split("/")[-1][:15]
+
+
+def get_health_probe_command(perftest_exec_path: str = "") -> str:
+    """
+    Get one remote command that prints key=value lines for everything the probe
+    checks, so the whole probe costs a single round trip.
+
+    Params:
+        - perftest_exec_path (str): Path to perftest on the machine.
+
+    Returns:
+        - str: Remote shell command.
+    """
+    perftest_process_name = shlex.quote(get_perftest_process_name(perftest_exec_path))
+    noise_qdisc_pattern = shlex.quote("|".join(NOISE_QDISC_KINDS))
+
+    return "; ".join([
+        'PATH="$PATH:/usr/sbin:/sbin"',
+        f"echo perftest_process_count=$(pgrep -c -x {perftest_process_name})",
+        "echo mem_available_kb=$(awk '/^MemAvailable:/ {print $2}' /proc/meminfo)",
+        "echo load_average_1min=$(cut -d ' ' -f 1 /proc/loadavg)",
+        "echo cpu_count=$(nproc)",
+        f"echo noise_qdisc_count=$(tc qdisc show 2>/dev/null | grep -c -E {noise_qdisc_pattern})",
+        "echo remote_time=$(date +%s.%N)",
+    ])
+
+
+def parse_health_probe_output(
+    probe_output: str = "",
+) -> Tuple[Optional[Dict[str, float]], Optional[str]]:
+    """
+    Get {key: value} from the output of the health probe command.
+
+    Params:
+        - probe_output (str): stdout of the health probe command.
+
+    Returns:
+        - Dict: Value of every key in HEALTH_PROBE_KEYS.
+        - error
+    """
+    health = {}
+    for line in probe_output.splitlines():
+        key, _, value = line.strip().partition("=")
+        if key not in HEALTH_PROBE_KEYS:
+            continue
+
+        try:
+            health[key] = float(value)
+        except ValueError:
+            return None, f"Couldn't parse {key} from health probe: {value!r}"
+
+    missing_keys = [key for key in HEALTH_PROBE_KEYS if key not in health]
+    if len(missing_keys) > 0:
+        return None, f"Health probe output is missing: {', '.join(missing_keys)}"
+
+    return health, None
+
+
+def get_unhealthy_reasons(
+    health: Dict[str, float] = {}, resets_qdisc: bool = False
+) -> List[str]:
+    """
+    Get every reason a machine shouldn't run the next test without a reboot.
+
+    Params:
+        - health (Dict): Parsed health probe output plus clock_skew_secs.
+        - resets_qdisc (bool): True if the next test deletes the root qdisc itself
+            before adding its own noise, in which case leftover qdiscs don't matter.
+
+    Returns:
+        - List[str]: Reasons. Empty if the machine is healthy.
+    """
+    reasons = []
+
+    if health['perftest_process_count'] > 0:
+        reasons.append(
+            f"{int(health['perftest_process_count'])} perftest processes still running"
+        )
+
+    mem_available_mb = health['mem_available_kb'] / 1024
+    if mem_available_mb < MIN_MEM_AVAILABLE_MB:
+        reasons.append(f"only {mem_available_mb:.0f} MB memory available")
+
+    load_average_per_core = health['load_average_1min'] / max(health['cpu_count'], 1)
+    if load_average_per_core > MAX_LOAD_AVERAGE_PER_CORE:
+        reasons.append(
+            f"load average is {health['load_average_1min']:.2f} on {int(health['cpu_count'])} cores"
+        )
+
+    if abs(health['clock_skew_secs']) > MAX_CLOCK_SKEW_SECS:
+        reasons.append(f"clock is off by {health['clock_skew_secs']:.2f} seconds")
+
+    if health['noise_qdisc_count'] > 0 and not resets_qdisc:
+        reasons.append("noise qdisc left over from a previous test")
+
+    return reasons
+
+
+async def probe_machine_health(
+    machine_config: Dict = {}, resets_qdisc: bool = False
+) -> Dict:
+    """
+    Probe a machine for anything left over from the last test. Meant to be run on
+    every machine at once with orchestrator.run_stage_on_machines().
+
+    Params:
+        - machine_config (Dict): Machine config.
+        - resets_qdisc (bool): True if the next test sets up its own noise qdisc.
+
+    Returns:
+        - Dict: {"status", "health", "unhealthy_reasons"}
+            - status is "healthy", "unhealthy" or starts with "error"
+    """
+    request_time = time.time()
+    probe_result = await run_command(
+        get_ssh_command(
+            machine_config['username'],
+            machine_config['ip'],
+            get_health_probe_command(machine_config['perftest_exec_path']),
+            machine_config['ssh_key_path']
+        ),
+        HEALTH_PROBE_TIMEOUT_SECS
+    )
+    response_time = time.time()
+
+    if probe_result['timed_out']:
+        return {"status": f"error: health probe timed out after {HEALTH_PROBE_TIMEOUT_SECS} seconds"}
+
+    if probe_result['return_code'] != 0:
+        return {"status": f"error: health probe failed: {probe_result['stderr']}"}
+
+    health, error = parse_health_probe_output(probe_result['stdout'])
+    if error:
+        return {"status": f"error: {error}"}
+
+    # The remote clock is read roughly halfway through the round trip.
+    health['clock_skew_secs'] = health.pop('remote_time') - (request_time + response_time) / 2
+
+    unhealthy_reasons = get_unhealthy_reasons(health, resets_qdisc)
+
+    return {
+        "status": "unhealthy" if len(unhealthy_reasons) > 0 else "healthy",
+        "health": health,
+        "unhealthy_reasons": unhealthy_reasons,
+    }
+
+
+def get_reboot_decision(
+    reboot_policy: str = "health", health_result: Optional[Dict] = None
+) -> Tuple[bool, str]:
+    """
+    Decide whether to reboot a machine before the next test.
+
+    Params:
+        - reboot_policy (str): "always", "health" or "never".
+        - health_result (Dict): Result of probe_machine_health() for the machine.
+            Only needed for the "health" policy.
+
+    Returns:
+        - bool: True if the machine should be rebooted.
+        - str: Reason for the decision.
+    """
+    if reboot_policy == "always":
+        return True, "reboot policy is always"
+
+    if reboot_policy == "never":
+        return False, "reboot policy is never"
+
+    if health_result is None:
+        return True, "no health probe result"
+
+    if health_result['status'].startswith("error"):
+        return True, health_result['status'].replace("error: ", "", 1)
+
+    if health_result['status'] == "unhealthy":
+        return True, "; ".join(health_result['unhealthy_reasons'])
+
+    return False, "healthy"
@@ -0,0 +1,143 @@
+import os
+import time
+import signal
+import asyncio
+
+from typing import Callable, Dict, List, Optional
+
+# ? Each per-machine stage of a test runs on every machine at the same time. A
+# ? stage result is a dict with at least a "status" that is "complete" (or another
+# ? non-error status) on success and starts with "error" on failure, the same
+# ? strings that were used for the old machine_statuses.
+
+
+def kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """
+    Kill a command started by run_command() along with anything it started. A
+    child left behind would keep the output pipes open and the command would
+    never finish.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def run_command(command: List[str] = [], timeout_secs: float = 0) -> Dict:
+    """
+    Run a command without a shell and collect its output.
+
+    The process is killed if it runs past the timeout or if the stage running it
+    is cancelled because it hit its deadline.
+
+    Params:
+        - command (List[str]): Command and arguments e.g. ["ssh", "pi@10.0.0.2", "ls"].
+        - timeout_secs (float): Seconds to wait for the command. 0 waits forever.
+
+    Returns:
+        - Dict: {"return_code", "stdout", "stderr", "timed_out", "duration_secs"}
+    """
+    start_time = time.monotonic()
+
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    timed_out = False
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(), timeout=timeout_secs if timeout_secs > 0 else None
+        )
+    except asyncio.TimeoutError:
+        timed_out = True
+        kill_process_group(process)
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        kill_process_group(process)
+        await process.wait()
+        raise
+
+    return {
+        "return_code": process.returncode,
+        "stdout": stdout.decode("utf-8", errors="replace").strip(),
+        "stderr": stderr.decode("utf-8", errors="replace").strip(),
+        "timed_out": timed_out,
+        "duration_secs": time.monotonic() - start_time,
+    }
+
+
+async def run_stage_on_machine(
+    machine_config: Dict, stage: Callable, deadline_secs: float, *stage_args
+) -> Dict:
+    start_time = time.monotonic()
+
+    try:
+        stage_result = await asyncio.wait_for(
+            stage(machine_config, *stage_args), timeout=deadline_secs
+        )
+    except asyncio.TimeoutError:
+        stage_result = {"status": f"error: timed out after {deadline_secs} seconds"}
+    except Exception as e:
+        stage_result = {"status": f"error: {e}"}
+
+    stage_result["ip"] = machine_config["ip"]
+    stage_result["machine_name"] = machine_config["machine_name"]
+    stage_result["duration_secs"] = time.monotonic() - start_time
+
+    return stage_result
+
+
+async def run_stage_on_machines_async(
+    machine_configs: List[Dict], stage: Callable, deadline_secs: float, *stage_args
+) -> Dict[str, Dict]:
+    stage_results = await asyncio.gather(
+        *[
+            run_stage_on_machine(machine_config, stage, deadline_secs, *stage_args)
+            for machine_config in machine_configs
+        ]
+    )
+
+    return {stage_result["ip"]: stage_result for stage_result in stage_results}
+
+
+def run_stage_on_machines(
+    machine_configs: List[Dict] = [],
+    stage: Optional[Callable] = None,
+    deadline_secs: float = 0,
+    *stage_args,
+) -> Dict[str, Dict]:
+    """
+    Run an async stage on every machine concurrently so the stage takes as long as
+    the slowest machine rather than the sum of all of them.
+
+    Params:
+        - machine_configs (List[Dict]): Machines to run the stage on.
+        - stage (Callable): async def stage(machine_config, *stage_args) -> Dict
+        - deadline_secs (float): Time each machine gets before its stage is cancelled.
+        - stage_args: Extra arguments passed to the stage.
+
+    Returns:
+        - Dict: {ip: {"status": ..., "machine_name": ..., "duration_secs": ..., ...}}
+    """
+    if stage is None or len(machine_configs) == 0:
+        return {}
+
+    return asyncio.run(
+        run_stage_on_machines_async(machine_configs, stage, deadline_secs, *stage_args)
+    )
+
+
+def is_failed_status(status: str = "") -> bool:
+    return status.startswith("error") or status.endswith("_fail")
+
+
+def get_failed_stage_results(stage_results: Dict[str, Dict] = {}) -> List[Dict]:
+    return [
+        stage_result
+        for stage_result in stage_results.values()
+        if is_failed_status(stage_result["status"])
+    ]
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+
+from blob_store import *
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blob_store_dirpath = os.path.join(self.tmp_dir.name, "blobs")
+
+        self.test_dirpaths = []
+        for test_index in range(2):
+            test_dirpath = os.path.join(self.tmp_dir.name, "campaign", f"test_{test_index}")
+            os.makedirs(test_dirpath)
+            with open(os.path.join(test_dirpath, "pub_0.csv"), "w") as f:
+                f.write("latency\n1\n")
+            with open(os.path.join(test_dirpath, "sub_0.csv"), "w") as f:
+                f.write(f"mbps\n{test_index}\n")
+            self.test_dirpaths.append(test_dirpath)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_add_dir_to_blob_store(self):
+        manifests = []
+        for test_dirpath in self.test_dirpaths:
+            manifest, error = add_dir_to_blob_store(test_dirpath, self.blob_store_dirpath)
+            self.assertIsNone(error)
+            manifests.append(manifest)
+
+        self.assertEqual(manifests[0]["pub_0.csv"], manifests[1]["pub_0.csv"])
+        self.assertNotEqual(manifests[0]["sub_0.csv"], manifests[1]["sub_0.csv"])
+        self.assertEqual(read_blob_manifest(self.test_dirpaths[0]), (manifests[0], None))
+
+        # Both pub_0.csv files are the same file as their blob.
+        pub_blob_path = get_blob_path(self.blob_store_dirpath, manifests[0]["pub_0.csv"])
+        for test_dirpath in self.test_dirpaths:
+            self.assertTrue(os.path.samefile(os.path.join(test_dirpath, "pub_0.csv"), pub_blob_path))
+        self.assertEqual(os.stat(pub_blob_path).st_nlink, 3)
+
+        with open(os.path.join(self.test_dirpaths[1], "sub_0.csv"), "r") as f:
+            self.assertEqual(f.read(), "mbps\n1\n")
+
+    def test_copy_into_blob_store(self):
+        filepath = os.path.join(self.test_dirpaths[0], "sub_0.csv")
+        sha1, error = add_file_to_blob_store(filepath, self.blob_store_dirpath, link_source=False)
+        self.assertIsNone(error)
+
+        blob_path = get_blob_path(self.blob_store_dirpath, sha1)
+        self.assertFalse(os.path.samefile(filepath, blob_path))
+        self.assertEqual(os.stat(filepath).st_nlink, 1)
+
+    def test_materialise_blobs(self):
+        manifest, _ = add_dir_to_blob_store(self.test_dirpaths[0], self.blob_store_dirpath)
+
+        salvaged_dirpath = os.path.join(self.tmp_dir.name, "salvaged")
+        self.assertIsNone(materialise_blobs(manifest, salvaged_dirpath, self.blob_store_dirpath))
+        self.assertIsNone(
+            materialise_blobs({"sub_9.csv": manifest["sub_0.csv"]}, salvaged_dirpath, self.blob_store_dirpath)
+        )
+
+        self.assertEqual(
+            sorted(os.listdir(salvaged_dirpath)),
+            [BLOB_MANIFEST_FILENAME, "pub_0.csv", "sub_0.csv", "sub_9.csv"]
+        )
+        self.assertTrue(os.path.samefile(
+            os.path.join(salvaged_dirpath, "sub_9.csv"),
+            os.path.join(self.test_dirpaths[0], "sub_0.csv")
+        ))
+        self.assertEqual(read_blob_manifest(salvaged_dirpath)[0]["sub_9.csv"], manifest["sub_0.csv"])
+
+    def test_remove_unreferenced_blobs(self):
+        manifests = [
+            add_dir_to_blob_store(_, self.blob_store_dirpath)[0] for _ in self.test_dirpaths
+        ]
+        self.assertEqual(remove_unreferenced_blobs(self.blob_store_dirpath), ([], None))
+
+        # A re-run replaces the test's results.
+        for filename in ["pub_0.csv", "sub_0.csv", BLOB_MANIFEST_FILENAME]:
+            os.remove(os.path.join(self.test_dirpaths[1], filename))
+
+        self.assertEqual(
+            remove_unreferenced_blobs(self.blob_store_dirpath),
+            ([manifests[1]["sub_0.csv"]], None)
+        )
+        self.assertTrue(os.path.exists(
+            get_blob_path(self.blob_store_dirpath, manifests[0]["pub_0.csv"])
+        ))
+
+    def test_remove_unreferenced_blobs_without_hard_links(self):
+        def fail_to_link(src_path, dest_path):
+            raise OSError("Operation not permitted")
+
+        link = os.link
+        os.link = fail_to_link
+        try:
+            manifests = [
+                add_dir_to_blob_store(_, self.blob_store_dirpath)[0] for _ in self.test_dirpaths
+            ]
+        finally:
+            os.link = link
+
+        pub_blob_path = get_blob_path(self.blob_store_dirpath, manifests[0]["pub_0.csv"])
+        self.assertEqual(os.stat(pub_blob_path).st_nlink, 1)
+
+        campaign_dirpath = os.path.dirname(self.test_dirpaths[0])
+        self.assertEqual(
+            remove_unreferenced_blobs(self.blob_store_dirpath, [campaign_dirpath]), ([], None)
+        )
+        for manifest in manifests:
+            for sha1 in manifest.values():
+                self.assertTrue(os.path.exists(get_blob_path(self.blob_store_dirpath, sha1)))
+
+        for filename in ["pub_0.csv", "sub_0.csv", BLOB_MANIFEST_FILENAME]:
+            os.remove(os.path.join(self.test_dirpaths[1], filename))
+
+        self.assertEqual(
+            remove_unreferenced_blobs(self.blob_store_dirpath, [campaign_dirpath]),
+            ([manifests[1]["sub_0.csv"]], None)
+        )
+        self.assertTrue(os.path.exists(pub_blob_path))
+
+        # Nothing is deleted while a manifest can't be read.
+        with open(os.path.join(self.test_dirpaths[0], BLOB_MANIFEST_FILENAME), "w") as f:
+            f.write("{")
+        removed_sha1s, error = remove_unreferenced_blobs(
+            self.blob_store_dirpath, [campaign_dirpath]
+        )
+        self.assertEqual(removed_sha1s, [])
+        self.assertIsNotNone(error)
+        self.assertTrue(os.path.exists(pub_blob_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
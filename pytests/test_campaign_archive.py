@@ -0,0 +1,99 @@
+import os
+import zipfile
+import tempfile
+import unittest
+
+from campaign_archive import *
+
+
+class TestCampaignArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.campaign_dirpath = os.path.join(self.tmp_dir.name, "campaign")
+        self.archive_path = get_campaign_archive_path(self.campaign_dirpath)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_test(self, test_name, contents="1\n"):
+        test_dirpath = os.path.join(self.campaign_dirpath, test_name)
+        os.makedirs(test_dirpath, exist_ok=True)
+        for filename in ["pub_0.csv", "sub_0.csv"]:
+            with open(os.path.join(test_dirpath, filename), "w") as f:
+                f.write(contents)
+
+        return test_dirpath
+
+    def read_member(self, arcname):
+        with zipfile.ZipFile(self.archive_path, "r") as archive:
+            return archive.read(arcname).decode()
+
+    def test_get_campaign_archive_path(self):
+        self.assertEqual(get_campaign_archive_path("output/data/campaign/"), "output/data/campaign.zip")
+
+    def test_add_test_to_campaign_archive(self):
+        for test_index in range(2):
+            self.assertIsNone(add_test_to_campaign_archive(self.write_test(f"test_{test_index}")))
+
+        with zipfile.ZipFile(self.archive_path, "r") as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ["test_0/pub_0.csv", "test_0/sub_0.csv", "test_1/pub_0.csv", "test_1/sub_0.csv"]
+            )
+            self.assertEqual(archive.getinfo("test_0/pub_0.csv").compress_type, zipfile.ZIP_DEFLATED)
+
+        # A re-run shadows the test's earlier results.
+        self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_0", "2\n")))
+        self.assertEqual(self.read_member("test_0/pub_0.csv"), "2\n")
+        self.assertEqual(get_archived_test_names(self.archive_path), ({"test_0", "test_1"}, None))
+
+    def test_torn_archive_is_rebuilt(self):
+        self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_0")))
+
+        # autoperf stopped part way through adding the next test.
+        with open(self.archive_path, "r+b") as f:
+            f.truncate(os.path.getsize(self.archive_path) - 10)
+
+        self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_1")))
+        self.assertEqual(get_archived_test_names(self.archive_path), ({"test_0", "test_1"}, None))
+
+    def test_sync_campaign_archive(self):
+        self.assertEqual(sync_campaign_archive(self.campaign_dirpath), ([], None))
+
+        self.write_test("test_0")
+        self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_1")))
+        self.write_test("test_2")
+
+        self.assertEqual(sync_campaign_archive(self.campaign_dirpath), (["test_0", "test_2"], None))
+        self.assertEqual(sync_campaign_archive(self.campaign_dirpath), ([], None))
+        self.assertEqual(
+            get_archived_test_names(self.archive_path), ({"test_0", "test_1", "test_2"}, None)
+        )
+
+    def test_sync_campaign_archive_drops_rerun_members(self):
+        self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_0")))
+        self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_1")))
+        for contents in ["2\n", "3\n"]:
+            self.assertIsNone(add_test_to_campaign_archive(self.write_test("test_0", contents)))
+
+        with zipfile.ZipFile(self.archive_path, "r") as archive:
+            self.assertEqual(len(archive.namelist()), 8)
+
+        self.assertEqual(sync_campaign_archive(self.campaign_dirpath), ([], None))
+
+        with zipfile.ZipFile(self.archive_path, "r") as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ["test_0/pub_0.csv", "test_0/sub_0.csv", "test_1/pub_0.csv", "test_1/sub_0.csv"]
+            )
+            self.assertEqual(archive.getinfo("test_0/pub_0.csv").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(self.read_member("test_0/pub_0.csv"), "3\n")
+        self.assertEqual(self.read_member("test_1/sub_0.csv"), "1\n")
+
+        self.assertEqual(compact_campaign_archive(self.campaign_dirpath), (0, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
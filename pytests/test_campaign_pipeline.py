@@ -0,0 +1,87 @@
+import time
+import threading
+import unittest
+
+import pandas as pd
+
+from campaign_pipeline import *
+
+
+def slow_validate_staged_test(staged_test, ess_df, test_prefix):
+    time.sleep(staged_test["validation_secs"])
+    test_ess_df = pd.DataFrame([{
+        "test_name": staged_test["test_name"],
+        "end_status": staged_test["end_status"],
+        "thread_name": threading.current_thread().name,
+    }])
+
+    error = None
+    if staged_test["end_status"] != "success":
+        error = f"{staged_test['test_name']} failed validation"
+
+    return pd.concat([ess_df, test_ess_df], ignore_index=True), error
+
+
+def broken_validate_staged_test(staged_test, ess_df, test_prefix):
+    raise ValueError("disk full")
+
+
+class TestCampaignPipeline(unittest.TestCase):
+    def test_validation_overlaps_with_caller(self):
+        validator = StagedTestValidator(slow_validate_staged_test)
+        try:
+            start_time = time.monotonic()
+            error = validator.submit(
+                {"test_name": "test_1", "end_status": "success", "validation_secs": 0.5},
+                "[1/2]"
+            )
+            self.assertIsNone(error)
+            self.assertLess(time.monotonic() - start_time, 0.2)
+
+            # Only one test can be in flight at a time.
+            self.assertIsNotNone(validator.submit({}, "[2/2]"))
+
+            test_ess_df, error, test_prefix = validator.collect()
+        finally:
+            validator.close()
+
+        self.assertIsNone(error)
+        self.assertEqual(test_prefix, "[1/2]")
+        self.assertEqual(test_ess_df["test_name"].tolist(), ["test_1"])
+        self.assertNotEqual(test_ess_df["thread_name"].iloc[0], threading.current_thread().name)
+
+    def test_collect_with_nothing_pending(self):
+        validator = StagedTestValidator(slow_validate_staged_test)
+        try:
+            self.assertEqual(validator.collect(), (None, None, ""))
+        finally:
+            validator.close()
+
+    def test_collect_failed_validation(self):
+        validator = StagedTestValidator(slow_validate_staged_test)
+        try:
+            validator.submit(
+                {"test_name": "test_1", "end_status": "empty_file_found", "validation_secs": 0},
+                "[1/1]"
+            )
+            test_ess_df, error, _ = validator.collect()
+        finally:
+            validator.close()
+
+        self.assertEqual(test_ess_df["end_status"].tolist(), ["empty_file_found"])
+        self.assertEqual(error, "test_1 failed validation")
+
+    def test_collect_exception(self):
+        validator = StagedTestValidator(broken_validate_staged_test)
+        try:
+            validator.submit({}, "[1/1]")
+            test_ess_df, error, _ = validator.collect()
+        finally:
+            validator.close()
+
+        self.assertIsNone(test_ess_df)
+        self.assertIn("disk full", error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import itertools
+import unittest
+
+from campaign_planner import *
+from qos_codec import get_test_name_from_combination_dict
+
+QOS = {
+    "duration_secs": [60],
+    "datalen_bytes": [100, 1000],
+    "pub_count": [1],
+    "sub_count": [1, 5],
+    "use_reliable": [True],
+    "use_multicast": [True, False],
+    "durability_level": [0],
+    "latency_count": [100],
+}
+NOISE_GEN_CONFIG = {"packet_loss": "1%"}
+
+
+def get_combinations():
+    return [dict(zip(QOS.keys(), _)) for _ in itertools.product(*QOS.values())]
+
+
+def get_test_names(test_plan):
+    return [get_test_name_from_combination_dict(_)[0] for _ in test_plan]
+
+
+class TestCampaignPlanner(unittest.TestCase):
+    def test_order_test_plan(self):
+        combinations = get_combinations()
+        test_plan = order_test_plan(combinations, NOISE_GEN_CONFIG)
+
+        self.assertEqual(get_test_names(test_plan), [
+            "60SEC_100B_1PUB_1SUB_REL_MC_0DUR_100LC",
+            "60SEC_1000B_1PUB_1SUB_REL_MC_0DUR_100LC",
+            "60SEC_100B_1PUB_1SUB_REL_UC_0DUR_100LC",
+            "60SEC_1000B_1PUB_1SUB_REL_UC_0DUR_100LC",
+            "60SEC_100B_1PUB_5SUB_REL_MC_0DUR_100LC",
+            "60SEC_1000B_1PUB_5SUB_REL_MC_0DUR_100LC",
+            "60SEC_100B_1PUB_5SUB_REL_UC_0DUR_100LC",
+            "60SEC_1000B_1PUB_5SUB_REL_UC_0DUR_100LC",
+        ])
+        self.assertEqual(get_setup_transition_count(combinations, NOISE_GEN_CONFIG), 7)
+        self.assertEqual(get_setup_transition_count(test_plan, NOISE_GEN_CONFIG), 3)
+
+        # The plan only depends on the combinations.
+        self.assertEqual(order_test_plan(get_combinations(), NOISE_GEN_CONFIG), test_plan)
+
+    def test_get_pcg_test_plan_resumes(self):
+        combinations = get_combinations()
+        test_plan = order_test_plan(combinations, NOISE_GEN_CONFIG)
+
+        self.assertEqual(get_pcg_test_plan(combinations, NOISE_GEN_CONFIG, []), test_plan)
+        self.assertEqual(
+            get_pcg_test_plan(combinations, NOISE_GEN_CONFIG, get_test_names(test_plan)[:3]),
+            test_plan
+        )
+
+        # Campaigns started in product order finish in product order.
+        self.assertEqual(
+            get_pcg_test_plan(combinations, NOISE_GEN_CONFIG, get_test_names(combinations)[:3]),
+            combinations
+        )
+
+        # Failed test reruns are appended after the whole plan.
+        completed_test_names = get_test_names(test_plan) + get_test_names(test_plan)[:2]
+        self.assertEqual(
+            get_pcg_test_plan(combinations, NOISE_GEN_CONFIG, completed_test_names),
+            test_plan
+        )
+
+    def test_get_unchanged_setup_ips(self):
+        setup_key = get_setup_key(get_combinations()[0], NOISE_GEN_CONFIG)
+        setup_state = get_next_setup_state(
+            setup_key,
+            {"10.0.0.1", "10.0.0.2", "10.0.0.3"},
+            {
+                "10.0.0.1": {"status": "results downloaded", "csvs_deleted": True},
+                "10.0.0.2": {"status": "results downloaded", "csvs_deleted": False},
+                "10.0.0.3": {"status": "error: no CSV files found"},
+            }
+        )
+        health_results = {
+            "10.0.0.1": {"status": "healthy", "health": {"noise_qdisc_count": 1}},
+            "10.0.0.2": {"status": "healthy", "health": {"noise_qdisc_count": 0}},
+            "10.0.0.3": {"status": "error: health probe timed out"},
+        }
+
+        self.assertEqual(
+            get_unchanged_setup_ips(setup_state, setup_key, health_results, set()),
+            ({"10.0.0.1", "10.0.0.3"}, {"10.0.0.1"})
+        )
+        self.assertEqual(
+            get_unchanged_setup_ips(setup_state, setup_key, health_results, {"10.0.0.1"}),
+            ({"10.0.0.3"}, {"10.0.0.1"})
+        )
+
+        other_setup_key = get_setup_key(get_combinations()[-1], NOISE_GEN_CONFIG)
+        self.assertEqual(
+            get_unchanged_setup_ips(setup_state, other_setup_key, health_results, set()),
+            (set(), set())
+        )
+        self.assertEqual(
+            get_unchanged_setup_ips(None, setup_key, health_results, set()),
+            (set(), set())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
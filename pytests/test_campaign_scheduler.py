@@ -0,0 +1,70 @@
+import time
+import threading
+import unittest
+
+from campaign_scheduler import *
+
+
+def get_campaign(name, ips):
+    return {
+        "campaign_name": name,
+        "slave_machines": [{"machine_name": ip, "ip": ip} for ip in ips],
+    }
+
+
+CAMPAIGNS = [
+    get_campaign("3pi_a", ["10.0.0.1", "10.0.0.2", "10.0.0.3"]),
+    get_campaign("5pi_a", ["10.0.1.1", "10.0.1.2", "10.0.1.3", "10.0.1.4", "10.0.1.5"]),
+    get_campaign("3pi_b", ["10.0.0.1", "10.0.0.2", "10.0.0.3"]),
+    get_campaign("shared", ["10.0.0.1", "10.0.1.1"]),
+]
+
+
+class TestCampaignScheduler(unittest.TestCase):
+    def test_get_campaign_conflicts(self):
+        self.assertEqual(
+            get_campaign_conflicts(CAMPAIGNS),
+            {0: {2, 3}, 1: {3}, 2: {0, 3}, 3: {0, 1, 2}},
+        )
+
+    def test_get_runnable_campaigns(self):
+        conflicts = get_campaign_conflicts(CAMPAIGNS)
+
+        self.assertEqual(get_runnable_campaigns(conflicts, [0, 1, 2, 3], set()), [0, 1])
+        self.assertEqual(get_runnable_campaigns(conflicts, [2, 3], {1}), [2])
+        # 3pi_b has to wait for 3pi_a even though nothing else blocks it.
+        self.assertEqual(get_runnable_campaigns(conflicts, [2, 3], {0}), [])
+        self.assertEqual(get_runnable_campaigns(conflicts, [3], set()), [3])
+
+    def test_run_campaigns(self):
+        lock = threading.Lock()
+        spans = {}
+
+        def run_campaign(campaign_index, campaign_config, campaign_count):
+            start_time = time.monotonic()
+            time.sleep(0.3)
+            if campaign_config["campaign_name"] == "3pi_b":
+                raise RuntimeError("machine unreachable")
+
+            with lock:
+                spans[campaign_config["campaign_name"]] = (start_time, time.monotonic())
+
+        start_time = time.monotonic()
+        errors = run_campaigns(CAMPAIGNS, run_campaign)
+        duration_secs = time.monotonic() - start_time
+
+        self.assertEqual(errors, {0: None, 1: None, 2: "machine unreachable", 3: None})
+
+        # 3pi_a and 5pi_a overlap, 3pi_b runs after 3pi_a and shared runs last.
+        self.assertLess(spans["3pi_a"][0], spans["5pi_a"][1])
+        self.assertLess(spans["5pi_a"][0], spans["3pi_a"][1])
+        self.assertGreaterEqual(spans["shared"][0], spans["5pi_a"][1])
+        self.assertLess(duration_secs, 1.2)
+
+    def test_run_campaigns_nothing_to_run(self):
+        self.assertEqual(run_campaigns([], lambda *args: None), {})
+        self.assertEqual(run_campaigns(CAMPAIGNS, None), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
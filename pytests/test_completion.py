@@ -0,0 +1,75 @@
+import os
+import time
+import tempfile
+import threading
+import subprocess
+import unittest
+
+from completion import *
+
+
+SCRIPT = (
+    "source ~/.bashrc; cd /home/pi/perftest; "
+    "./perftest_cpp -dataLen 100 -pub -outputFile pub_0.csv -numSubscribers 2 & "
+    "./perftest_cpp -dataLen 100 -pub -pidMultiPubTest 1 -numSubscribers 2 & "
+    "./perftest_cpp -dataLen 100 -sub -sidMultiSubTest 1 -outputFile sub_1.csv"
+)
+
+
+def append_to_file(filepath, text, delay_secs):
+    time.sleep(delay_secs)
+    with open(filepath, "a") as f:
+        f.write(text)
+
+
+class TestCompletion(unittest.TestCase):
+    def test_get_output_files_from_script(self):
+        self.assertEqual(get_output_files_from_script(SCRIPT), ["pub_0.csv", "sub_1.csv"])
+        self.assertEqual(get_output_files_from_script("./perftest_cpp -pub"), [])
+
+    def test_get_stop_perftest_command(self):
+        self.assertEqual(
+            get_stop_perftest_command("/home/pi/perftest/perftest_cpp"),
+            "pkill -x perftest_cpp; true"
+        )
+
+    def test_footer_watch_command(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # A footer left over from an earlier test must not count.
+            with open(os.path.join(tmp_dir, "sub_1.csv"), "w") as f:
+                f.write("Length (Bytes),Mbps\n100,5\n\nThroughput Summary:\n")
+            os.utime(os.path.join(tmp_dir, "sub_1.csv"), (0, 0))
+
+            writers = [
+                threading.Thread(
+                    target=append_to_file,
+                    args=(os.path.join(tmp_dir, "pub_0.csv"), "100,23\n\nLatency Summary:\n", 0.5)
+                ),
+                threading.Thread(
+                    target=append_to_file,
+                    args=(os.path.join(tmp_dir, "sub_1.csv"), "\nThroughput Summary:\n", 1.5)
+                ),
+            ]
+            for writer in writers:
+                writer.start()
+
+            start_time = time.monotonic()
+            watch_result = subprocess.run(
+                ["bash", "-c", get_footer_watch_command(tmp_dir, ["pub_0.csv", "sub_1.csv"])],
+                capture_output=True,
+                text=True,
+                timeout=20
+            )
+            duration_secs = time.monotonic() - start_time
+
+            for writer in writers:
+                writer.join()
+
+        self.assertEqual(watch_result.returncode, 0)
+        self.assertEqual(watch_result.stdout.splitlines(), ["pub_0.csv", "sub_1.csv"])
+        self.assertGreaterEqual(duration_secs, 1.5)
+        self.assertLess(duration_secs, 1.5 + FOOTER_POLL_INTERVAL_SECS * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_summariser
+from data_summariser import *
+
+PUB_HEADER_MARKERS = ["Ave", "Length (Bytes)"]
+PUB_FOOTER_MARKER = "latency summary"
+
+PUB_HEADER = "Length (Bytes), Latency (μs), Ave (μs), Std (μs), Min (μs), Max (μs)\n"
+PUB_ROWS = [
+    "100, 250, 250, 0.0, 240, 260\n",
+    "100, 200, 230, 5.0, 200, 300\n",
+    "100, 249, 230, 5.0, 200, 300\n",
+]
+PUB_FOOTER = [
+    "\n",
+    "One-way Latency Summary:\n",
+    "Length (Bytes), Ave (μs), Std\n",
+    "100, 230, 5\n",
+]
+
+SUB_CSV = (
+    "Perftest\n"
+    "\n"
+    "Length (Bytes), Total Samples, Samples/s, Avg Samples/s, Mbps, Avg Mbps, Lost Samples, Lost Samples (%)\n"
+    "100, 1000, 1000, 1000, 0.8, 0.8, 0, 0.00\n"
+    "100, 3000, 2000, 1500, 1.6, 1.2, 2, 0.07\n"
+    "100, 5000, 2000, 1667, 1.6, 1.3, 2, 0.04\n"
+    "\n"
+    "Throughput Summary:\n"
+    "Length (Bytes), Total Samples, Ave Samples/s\n"
+)
+
+
+class Status:
+    def update(self, *args, **kwargs):
+        pass
+
+
+def read_with_old_parser(
+    filepath: str = "", header_markers: list[str] = [], footer_marker: str = ""
+) -> Tuple[Optional[dict], bool]:
+    """
+    Parse a perftest csv the way data_summariser did before read_perftest_csv(): find
+    the header in the first 5 lines and the footer in the last 5 lines by line index
+    and pass them to pd.read_csv() as skiprows and nrows.
+    """
+    with open(filepath, "r") as f:
+        lines = f.readlines()
+
+    start_index = None
+    for i, line in enumerate(lines[:5]):
+        if all([_ in line for _ in header_markers]):
+            start_index = i
+            break
+
+    if start_index is None:
+        return None, False
+
+    footer_found = False
+    end_index = len(lines) - 1
+    for i, line in enumerate(lines[-5:]):
+        if footer_marker in line.lower():
+            footer_found = True
+            end_index = len(lines) - 5 + i - 2
+            break
+
+    df = pd.read_csv(
+        filepath,
+        on_bad_lines="skip",
+        skiprows=start_index,
+        nrows=max(0, end_index - start_index),
+        skipinitialspace=True,
+    )
+
+    return {
+        str(col).strip(): pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        for col in df.columns
+    }, footer_found
+
+
+class TestReadPerftestCsv(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmp_dir.name, "pub_0.csv")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, lines: list[str] = []) -> None:
+        with open(self.filepath, "w") as f:
+            f.write("".join(lines))
+
+    def assert_same_as_old_parser(self, expected_footer_found: bool = True) -> dict:
+        columns, footer_found, error = read_perftest_csv(
+            self.filepath, PUB_HEADER_MARKERS, PUB_FOOTER_MARKER
+        )
+        self.assertIsNone(error)
+        self.assertEqual(footer_found, expected_footer_found)
+
+        old_columns, old_footer_found = read_with_old_parser(
+            self.filepath, PUB_HEADER_MARKERS, PUB_FOOTER_MARKER
+        )
+        self.assertEqual(footer_found, old_footer_found)
+        self.assertEqual(list(columns.keys()), list(old_columns.keys()))
+        for colname, values in old_columns.items():
+            np.testing.assert_array_equal(columns[colname], values)
+
+        return columns
+
+    def test_header_after_preamble(self):
+        self.write_csv(["Perftest 4\n", "some info\n", PUB_HEADER] + PUB_ROWS + PUB_FOOTER)
+
+        columns = self.assert_same_as_old_parser()
+        np.testing.assert_array_equal(columns["Latency (μs)"], [250, 200, 249])
+
+    def test_header_on_first_line(self):
+        self.write_csv([PUB_HEADER] + PUB_ROWS + PUB_FOOTER)
+
+        columns = self.assert_same_as_old_parser()
+        self.assertEqual(len(columns["Latency (μs)"]), 3)
+
+    def test_header_past_search_lines(self):
+        preamble = ["info\n"] * HEADER_SEARCH_LINES
+        self.write_csv(preamble + [PUB_HEADER] + PUB_ROWS + PUB_FOOTER)
+
+        columns, footer_found, error = read_perftest_csv(
+            self.filepath, PUB_HEADER_MARKERS, PUB_FOOTER_MARKER
+        )
+        self.assertIsNone(columns)
+        self.assertEqual(error, "Couldn't get start_index for header row")
+        self.assertEqual(read_with_old_parser(self.filepath, PUB_HEADER_MARKERS, PUB_FOOTER_MARKER), (None, False))
+
+    def test_footer_outside_tail_window(self):
+        # The footer is neither in the last 5 lines nor in the tail window so both
+        # parsers treat the file as cut short.
+        footer = PUB_FOOTER + ["100, 230, 5\n"] * 5
+        self.write_csv(["Perftest 4\n", PUB_HEADER] + PUB_ROWS + footer)
+
+        tail_seek_bytes = data_summariser.TAIL_SEEK_BYTES
+        data_summariser.TAIL_SEEK_BYTES = len("".join(footer[-5:]))
+        try:
+            self.assert_same_as_old_parser(expected_footer_found=False)
+        finally:
+            data_summariser.TAIL_SEEK_BYTES = tail_seek_bytes
+
+    def test_truncated_file(self):
+        self.write_csv(["Perftest 4\n", PUB_HEADER] + PUB_ROWS + ["100, 24"])
+
+        columns = self.assert_same_as_old_parser(expected_footer_found=False)
+        np.testing.assert_array_equal(columns["Latency (μs)"], [250, 200, 249, 24])
+
+    def test_empty_file(self):
+        self.write_csv([])
+
+        columns, footer_found, error = read_perftest_csv(
+            self.filepath, PUB_HEADER_MARKERS, PUB_FOOTER_MARKER
+        )
+        self.assertIsNone(columns)
+        self.assertFalse(footer_found)
+        self.assertEqual(error, "pub_0.csv is empty.")
+
+
+class TestSummariseTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        self.data_path = os.path.join(self.tmp_dir.name, "campaign")
+
+        for test_index in range(3):
+            test_dir = os.path.join(self.data_path, f"600SEC_100B_1P_{test_index + 1}S_BE_UC_0DUR_100LC")
+            os.makedirs(test_dir)
+            with open(os.path.join(test_dir, "pub_0.csv"), "w") as f:
+                f.write("".join(["Perftest 4\n", PUB_HEADER] + PUB_ROWS + PUB_FOOTER))
+            for sub_index in range(test_index + 1):
+                with open(os.path.join(test_dir, f"sub_{sub_index}.csv"), "w") as f:
+                    f.write(SUB_CSV)
+
+        # No sub csvs so summarising this test fails.
+        self.failing_test_name = "600SEC_100B_1P_1S_BE_MC_0DUR_100LC"
+        os.makedirs(os.path.join(self.data_path, self.failing_test_name))
+        shutil.copy(
+            os.path.join(self.data_path, "600SEC_100B_1P_1S_BE_UC_0DUR_100LC", "pub_0.csv"),
+            os.path.join(self.data_path, self.failing_test_name, "pub_0.csv"),
+        )
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        data_summariser.error_df = []
+        self.tmp_dir.cleanup()
+
+    def summarise_in(self, dirname: str = "", jobs: int = 1) -> Tuple[dict, list[dict]]:
+        """
+        Summarise the campaign from its own working directory so each run starts
+        without a manifest. Returns ({test name: summary df}, error records).
+        """
+        run_dirpath = os.path.join(self.tmp_dir.name, dirname)
+        os.makedirs(run_dirpath)
+        os.chdir(run_dirpath)
+        data_summariser.error_df = []
+
+        summ_path, error = summarise_tests(self.data_path, Status(), jobs)
+        self.assertIsNone(error)
+
+        summaries = {
+            filename.replace(".parquet", ""): pd.read_parquet(os.path.join(summ_path, filename))
+            for filename in sorted(os.listdir(summ_path))
+            if filename.endswith(".parquet") and not filename.endswith("_manifest.parquet")
+        }
+
+        return summaries, data_summariser.error_df
+
+    def test_parallel_matches_serial(self):
+        serial_summaries, serial_errors = self.summarise_in("serial", 1)
+        parallel_summaries, parallel_errors = self.summarise_in("parallel", 2)
+
+        self.assertEqual(len(serial_summaries), 3)
+        self.assertEqual(serial_summaries.keys(), parallel_summaries.keys())
+        for test_name, summary_df in serial_summaries.items():
+            pd.testing.assert_frame_equal(summary_df, parallel_summaries[test_name])
+
+        self.assertIn(self.failing_test_name, [_["filename"] for _ in parallel_errors])
+        self.assertEqual(
+            sorted([str(_) for _ in serial_errors]), sorted([str(_) for _ in parallel_errors])
+        )
+
+    def test_summarise_test_and_collect_errors(self):
+        test_dir = os.path.join(self.data_path, self.failing_test_name)
+        summ_path = os.path.join(self.tmp_dir.name, "summaries")
+        os.makedirs(summ_path)
+        data_summariser.error_df = [{"error": "from an earlier test"}]
+
+        _, _, error, test_error_records = summarise_test_and_collect_errors(test_dir, summ_path)
+
+        self.assertIn("No subscriber files found", error)
+        self.assertEqual([_["error"] for _ in test_error_records], ["No subscriber files found"])
+        self.assertEqual(data_summariser.error_df, [{"error": "from an earlier test"}])
+
+    def test_get_jobs_from_args(self):
+        self.assertEqual(get_jobs_from_args(["data_summariser.py", "data"]), (1, None))
+        self.assertEqual(get_jobs_from_args(["data_summariser.py", "data", "--jobs", "4"]), (4, None))
+        for args in [["--jobs"], ["--jobs", "four"], ["--jobs", "0"]]:
+            jobs, error = get_jobs_from_args(["data_summariser.py", "data"] + args)
+            self.assertIsNone(jobs)
+            self.assertIsNotNone(error)
+
+
+if __name__ == "__main__":
+    unittest.main()
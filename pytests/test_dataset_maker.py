@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dataset_maker import DatasetMaker, read_dataset
+from summary_schema import get_summary_table, write_summary_table
+
+
+class TestDatasetMaker(unittest.TestCase):
+    def write_summary(self, summaries_dir, test_name, sub_count, nan_sub_indexes=[]):
+        columns = {"latency_us": np.arange(10, dtype=np.float64)}
+        for sub_index in range(sub_count):
+            columns[f"sub_{sub_index}_mbps"] = np.ones(10)
+            if sub_index in nan_sub_indexes:
+                columns[f"sub_{sub_index}_mbps"] = np.full(10, np.nan)
+
+        table, error = get_summary_table(test_name, columns)
+        write_summary_table(table, os.path.join(summaries_dir, f"{test_name}.parquet"))
+
+    def test_make_dataset(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            summaries_dir = os.path.join(tmp_dir, "camp")
+            os.makedirs(summaries_dir)
+
+            self.write_summary(summaries_dir, "60SEC_100B_1PUB_1SUB_REL_MC_0DUR_100LC", 1)
+            self.write_summary(summaries_dir, "60SEC_100B_1PUB_3SUB_BE_UC_0DUR_100LC", 3)
+            self.write_summary(summaries_dir, "60SEC_200B_1PUB_3SUB_BE_UC_0DUR_100LC", 3)
+
+            dataset_maker = DatasetMaker(summaries_dir)
+            dataset_maker.dataset_dir = os.path.join(tmp_dir, "camp_dataset")
+            dataset_maker.make_dataset()
+
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(
+                        dataset_maker.dataset_dir,
+                        "pub_count=1",
+                        "sub_count=3",
+                        "part-0.parquet",
+                    )
+                )
+            )
+
+            dataset_df, error = read_dataset(dataset_maker.dataset_dir)
+            self.assertIsNone(error)
+            self.assertEqual(len(dataset_df), 30)
+            self.assertEqual(dataset_df["sub_2_mbps"].isna().sum(), 10)
+
+            dataset_df, error = read_dataset(
+                dataset_maker.dataset_dir, ["latency_us"], [("sub_count", "=", 1)]
+            )
+            self.assertEqual(len(dataset_df), 10)
+
+    def test_wider_test_after_narrow_test(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            summaries_dir = os.path.join(tmp_dir, "camp")
+            os.makedirs(summaries_dir)
+
+            # sub_1_mbps is all NaN so it isn't in the first test's summary.
+            self.write_summary(summaries_dir, "60SEC_100B_1PUB_2SUB_BE_UC_0DUR_100LC", 2, [1])
+            self.write_summary(summaries_dir, "60SEC_200B_1PUB_2SUB_BE_UC_0DUR_100LC", 2)
+            self.write_summary(summaries_dir, "60SEC_300B_1PUB_2SUB_BE_UC_0DUR_100LC", 2, [1])
+
+            dataset_maker = DatasetMaker(summaries_dir)
+            dataset_maker.dataset_dir = os.path.join(tmp_dir, "camp_dataset")
+            dataset_maker.make_dataset()
+
+            partition_dir = os.path.join(dataset_maker.dataset_dir, "pub_count=1", "sub_count=2")
+            self.assertEqual(sorted(os.listdir(partition_dir)), ["part-0.parquet", "part-1.parquet"])
+
+            dataset_df, error = read_dataset(dataset_maker.dataset_dir)
+            self.assertIsNone(error)
+            self.assertEqual(len(dataset_df), 30)
+            self.assertEqual(
+                dataset_df.groupby("datalen_bytes")["sub_1_mbps"].count().to_dict(),
+                {100: 0, 200: 10, 300: 0}
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
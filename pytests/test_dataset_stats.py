@@ -0,0 +1,91 @@
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+
+from dataset_stats import get_dataset_row_stats, get_dataset_row_stats_per_truncation
+from constants import PERCENTILES, DISTRIBUTION_STATS
+
+
+class TestDatasetStats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.test_df = pd.DataFrame(
+            {
+                "index": range(200),
+                "latency_us": rng.normal(500, 50, 200),
+                "avg_mbps_per_sub": rng.normal(10, 1, 200),
+            }
+        )
+        self.test_df.loc[150:, "avg_mbps_per_sub"] = np.nan
+
+    def test_get_dataset_row_stats(self):
+        for truncation_percent in [0, 10, 25, 50]:
+            with self.subTest(truncation_percent=truncation_percent):
+                row_stats, error = get_dataset_row_stats(
+                    self.test_df, truncation_percent
+                )
+                self.assertIsNone(error)
+
+                for column in ["latency_us", "avg_mbps_per_sub"]:
+                    values_to_truncate = int(
+                        len(self.test_df[column]) * (truncation_percent / 100)
+                    )
+                    column_df = pd.DataFrame(
+                        self.test_df[column].iloc[values_to_truncate:]
+                    )
+
+                    for PERCENTILE in PERCENTILES:
+                        self.assertAlmostEqual(
+                            row_stats[f"{column}_{PERCENTILE}%"],
+                            column_df.quantile(PERCENTILE / 100).values[0],
+                        )
+
+                    self.assertAlmostEqual(
+                        row_stats[f"{column}_mean"], column_df.mean().values[0]
+                    )
+                    self.assertAlmostEqual(
+                        row_stats[f"{column}_std"], column_df.std().values[0]
+                    )
+                    self.assertAlmostEqual(
+                        row_stats[f"{column}_min"], column_df.min().values[0]
+                    )
+                    self.assertAlmostEqual(
+                        row_stats[f"{column}_max"], column_df.max().values[0]
+                    )
+
+                self.assertEqual(
+                    len(row_stats), 2 * (len(PERCENTILES) + len(DISTRIBUTION_STATS))
+                )
+
+    def test_get_dataset_row_stats_without_distribution_stats(self):
+        row_stats, error = get_dataset_row_stats(self.test_df, 0, PERCENTILES, [])
+        self.assertIsNone(error)
+        self.assertEqual(len(row_stats), 2 * len(PERCENTILES))
+
+        row_stats, error = get_dataset_row_stats(self.test_df, 0, PERCENTILES, ["var"])
+        self.assertIsNone(row_stats)
+        self.assertEqual(error, "Unknown distribution stat: var")
+
+    def test_get_dataset_row_stats_per_truncation(self):
+        truncation_percents = [0, 10, 25, 50]
+        row_stats_per_truncation, error = get_dataset_row_stats_per_truncation(
+            self.test_df, truncation_percents
+        )
+        self.assertIsNone(error)
+        self.assertEqual(list(row_stats_per_truncation.keys()), truncation_percents)
+
+        for truncation_percent in truncation_percents:
+            row_stats, error = get_dataset_row_stats(self.test_df, truncation_percent)
+            self.assertEqual(row_stats_per_truncation[truncation_percent], row_stats)
+
+        row_stats_per_truncation, error = get_dataset_row_stats_per_truncation(
+            self.test_df, []
+        )
+        self.assertIsNone(row_stats_per_truncation)
+        self.assertEqual(error, "No truncation percentages passed.")
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    unittest.main()
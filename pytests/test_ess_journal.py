@@ -0,0 +1,123 @@
+import os
+import datetime
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ess_journal import *
+
+
+def get_test_ess_df(test_name):
+    return pd.DataFrame([{
+        "start_timestamp": pd.Timestamp("2026-01-01 10:00:00"),
+        "end_timestamp": datetime.datetime(2026, 1, 1, 10, 1, 30, 250000),
+        "test_name": test_name,
+        "end_status": "success",
+        "qos_settings": {"pub_count": 1, "sub_count": 2},
+        "comments": "",
+    }])
+
+
+def read_full_ess(ess_path):
+    records, error = read_ess_journal(ess_path)
+    if error:
+        raise ValueError(error)
+
+    ess_df = pd.DataFrame()
+    if os.path.exists(ess_path):
+        ess_df = pd.read_parquet(ess_path)
+
+    return merge_ess_journal(ess_df, records)
+
+
+class TestEssJournal(unittest.TestCase):
+    def test_get_ess_journal_path(self):
+        self.assertEqual(
+            get_ess_journal_path("output/ess/campaign.parquet"),
+            "output/ess/campaign.journal.jsonl"
+        )
+
+    def test_append_and_compact(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ess_path = os.path.join(tmp_dir, "campaign.parquet")
+            ess_journal = EssJournal(ess_path, pd.DataFrame(), compaction_row_count=3)
+            try:
+                for test_index in range(2):
+                    ess_df, error = ess_journal.append(get_test_ess_df(f"test_{test_index}"))
+                    self.assertIsNone(error)
+
+                # Nothing is compacted until there are enough rows.
+                self.assertFalse(os.path.exists(ess_path))
+                self.assertEqual(read_full_ess(ess_path)["test_name"].tolist(), ["test_0", "test_1"])
+
+                ess_df, error = ess_journal.append(get_test_ess_df("test_2"))
+                self.assertIsNone(error)
+                self.assertIsNone(ess_journal.collect_compaction(wait=True))
+
+                self.assertEqual(len(pd.read_parquet(ess_path).index), 3)
+                self.assertEqual(read_ess_journal(ess_path), ([], None))
+
+                ess_df, error = ess_journal.append(get_test_ess_df("test_3"))
+                self.assertIsNone(error)
+            finally:
+                self.assertIsNone(ess_journal.close())
+
+            self.assertEqual(len(ess_df.index), 4)
+            ess_df = read_full_ess(ess_path)
+            self.assertEqual(
+                ess_df["test_name"].tolist(), ["test_0", "test_1", "test_2", "test_3"]
+            )
+            self.assertEqual(
+                ess_df["end_timestamp"].iloc[0], pd.Timestamp("2026-01-01 10:01:30.250")
+            )
+
+    def test_interrupted_compaction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ess_path = os.path.join(tmp_dir, "campaign.parquet")
+            ess_journal = EssJournal(ess_path, pd.DataFrame(), compaction_row_count=100)
+            for test_index in range(3):
+                ess_df, _ = ess_journal.append(get_test_ess_df(f"test_{test_index}"))
+            ess_journal.executor.shutdown()
+
+            # The parquet was written but the journal wasn't rewritten.
+            ess_df.head(2).to_parquet(ess_path, index=False)
+            self.assertEqual(
+                read_full_ess(ess_path)["test_name"].tolist(), ["test_0", "test_1", "test_2"]
+            )
+
+    def test_torn_last_line(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ess_path = os.path.join(tmp_dir, "campaign.parquet")
+            ess_journal = EssJournal(ess_path, pd.DataFrame())
+            ess_df, _ = ess_journal.append(get_test_ess_df("test_0"))
+            ess_journal.executor.shutdown()
+
+            with open(get_ess_journal_path(ess_path), "a") as f:
+                f.write('{"seq": 1, "row": {"test_na')
+
+            self.assertEqual(read_full_ess(ess_path)["test_name"].tolist(), ["test_0"])
+
+            ess_journal = EssJournal(ess_path, ess_df)
+            try:
+                ess_journal.append(get_test_ess_df("test_1"))
+                self.assertEqual(read_full_ess(ess_path)["test_name"].tolist(), ["test_0", "test_1"])
+            finally:
+                ess_journal.close()
+
+    def test_append_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ess_path = os.path.join(tmp_dir, "campaign.parquet")
+            ess_journal = EssJournal(ess_path, pd.DataFrame())
+            try:
+                ess_df, error = ess_journal.append(None)
+            finally:
+                self.assertIsNone(ess_journal.close())
+
+            self.assertIsNone(error)
+            self.assertEqual(len(ess_df.index), 0)
+            self.assertFalse(os.path.exists(ess_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import warnings
+
+import pandas as pd
+
+from ess_schema import *
+
+QOS_SETTINGS = {
+    "datalen_bytes": 100,
+    "durability_level": 0,
+    "duration_secs": 60,
+    "latency_count": 100,
+    "pub_count": 1,
+    "sub_count": 2,
+    "use_multicast": True,
+    "use_reliable": False,
+}
+
+
+class TestEssSchema(unittest.TestCase):
+    def test_get_failure_stage(self):
+        self.assertEqual(get_failure_stage("ping_check_fail"), "connection_check")
+        self.assertEqual(get_failure_stage("script_execution_fail"), "script_execution")
+        self.assertIsNone(get_failure_stage("success"))
+
+    def test_get_typed_ess_df(self):
+        ess_df = get_typed_ess_df(pd.DataFrame([{
+            "start_timestamp": "2026-01-01T10:00:00",
+            "test_name": "600SEC_100B_1P_2S_BE_MC_0DUR_100LC",
+            "end_status": "file_count_mismatch",
+            "failure_stage": "download",
+            "failed_machine_ip": None,
+            **QOS_SETTINGS,
+            "run_secs": 61,
+            "qos_settings": "legacy",
+        }]))
+
+        self.assertEqual(str(ess_df["pub_count"].dtype), "Int64")
+        self.assertEqual(str(ess_df["use_multicast"].dtype), "boolean")
+        self.assertEqual(str(ess_df["run_secs"].dtype), "Float64")
+        self.assertEqual(ess_df["failure_stage"].dtype.categories.tolist(), FAILURE_STAGES)
+        self.assertEqual(ess_df["start_timestamp"].iloc[0], pd.Timestamp("2026-01-01 10:00:00"))
+        self.assertTrue(pd.isna(ess_df["failed_machine_ip"].iloc[0]))
+        self.assertEqual(ess_df["qos_settings"].iloc[0], "legacy")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            ess_df = get_typed_ess_df(
+                pd.DataFrame([{"failure_stage": "unknown"}, {"failure_stage": FAILURE_STAGES[0]}])
+            )
+        self.assertTrue(pd.isna(ess_df["failure_stage"].iloc[0]))
+        self.assertEqual(ess_df["failure_stage"].iloc[1], FAILURE_STAGES[0])
+
+    def test_get_qos_settings_from_ess_row(self):
+        ess_df = get_typed_ess_df(pd.DataFrame([QOS_SETTINGS]))
+        self.assertEqual(get_qos_settings_from_ess_row(ess_df.iloc[0]), QOS_SETTINGS)
+
+        self.assertEqual(
+            get_qos_settings_from_ess_row({"qos_settings": str(QOS_SETTINGS)}), QOS_SETTINGS
+        )
+        self.assertEqual(
+            get_qos_settings_from_ess_row({"qos_settings": QOS_SETTINGS}), QOS_SETTINGS
+        )
+        self.assertEqual(get_qos_settings_from_ess_row({"test_name": "test_0"}), {})
+
+    def test_get_ess_df_with_qos_columns(self):
+        # Older ESS rows only have qos_settings.
+        ess_df = get_ess_df_with_qos_columns(pd.DataFrame({
+            "test_name": ["60SEC_100B_1PUB_2SUB_BE_MC_0DUR_100LC", "not_a_test"],
+            "qos_settings": ["legacy", "legacy"],
+        }))
+        self.assertEqual(
+            get_qos_settings_from_ess_row(ess_df.iloc[0]),
+            {**QOS_SETTINGS, "duration_secs": 60},
+        )
+        self.assertTrue(pd.isna(ess_df["pub_count"].iloc[1]))
+
+        ess_df = pd.DataFrame([{"test_name": "not_a_test", **QOS_SETTINGS}])
+        self.assertIs(get_ess_df_with_qos_columns(ess_df), ess_df)
+
+    def test_get_failed_machine_ips(self):
+        ess_df = pd.DataFrame({
+            "failed_machine_ip": ["10.0.0.1", None, None],
+            "ip": [None, "10.0.0.2", None],
+        })
+        self.assertEqual(
+            get_failed_machine_ips(ess_df).tolist(), ["10.0.0.1", "10.0.0.2", None]
+        )
+
+        self.assertEqual(
+            get_failed_machine_ips(pd.DataFrame({"comments": [""]})).tolist(), [None]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
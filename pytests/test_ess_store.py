@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ess_store import *
+from ess_journal import EssJournal
+from ess_schema import get_failure_stage
+
+QOS_SETTINGS = {
+    "datalen_bytes": 100,
+    "durability_level": 0,
+    "duration_secs": 60,
+    "latency_count": 100,
+    "pub_count": 1,
+    "sub_count": 2,
+    "use_multicast": True,
+    "use_reliable": False,
+}
+
+
+def get_test_ess_df(test_name, end_status="success", ip=None):
+    return pd.DataFrame([{
+        "start_timestamp": pd.Timestamp("2026-01-01 10:00:00"),
+        "end_timestamp": pd.Timestamp("2026-01-01 10:01:00"),
+        "test_name": test_name,
+        "ping_count": 1,
+        "ssh_check_count": 2,
+        "end_status": end_status,
+        "failure_stage": get_failure_stage(end_status),
+        "failed_machine_ip": ip,
+        **QOS_SETTINGS,
+        "ping_secs": 0.5,
+        "reboot_secs": None,
+        "run_secs": 61.25,
+        "download_secs": 2.0,
+        "scripts_per_machine": [{"ip": "10.0.0.1", "script": "./perftest_cpp -pub"}],
+        "comments": "",
+        "boot_to_ready_secs": None,
+        "reboot_decisions": {"pi0": "skipped: healthy"},
+    }])
+
+
+def get_legacy_test_ess_df(test_name, end_status="success", ip=None):
+    """
+    Row from an ESS written before the typed columns.
+    """
+    return pd.DataFrame([{
+        "start_timestamp": pd.Timestamp("2026-01-01 10:00:00"),
+        "end_timestamp": pd.Timestamp("2026-01-01 10:01:00"),
+        "test_name": test_name,
+        "end_status": end_status,
+        "qos_settings": str(QOS_SETTINGS),
+        "comments": "",
+        "ip": ip,
+    }])
+
+
+class TestEssStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.ess_path = os.path.join(self.tmp_dir.name, "campaign.parquet")
+        self.store, error = open_ess_store(get_ess_store_path(self.ess_path))
+        self.assertIsNone(error)
+
+        ess_df = pd.concat([
+            get_test_ess_df("test_0"),
+            get_test_ess_df("test_1", "ping_check_fail", "10.0.0.2"),
+            get_test_ess_df("test_2", "empty_file_found"),
+            get_legacy_test_ess_df("test_1", "connection_check_fail", "10.0.0.3"),
+            get_test_ess_df("test_3"),
+        ], ignore_index=True)
+        self.assertIsNone(insert_ess_rows(self.store, 0, ess_df))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_open_ess_store(self):
+        self.assertEqual(
+            self.store.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+        )
+        indexes = [
+            row[1] for row in self.store.execute("PRAGMA index_list(ess)").fetchall()
+        ]
+        for column in ESS_STORE_INDEXED_COLUMNS:
+            self.assertIn(f"ess_{column}", indexes)
+
+        plan = self.store.execute(
+            "EXPLAIN QUERY PLAN SELECT seq FROM ess WHERE end_status = 'success'"
+        ).fetchall()
+        self.assertIn("ess_end_status", str(plan))
+
+    def test_queries(self):
+        self.assertEqual(query_last_n_statuses(self.store, 2), ["connection_check_fail", "success"])
+        self.assertEqual(query_failed_test_names(self.store), ["test_1", "test_2"])
+        self.assertEqual(query_last_failed_ip(self.store), "10.0.0.3")
+        self.assertEqual(query_status_count(self.store, "success"), 2)
+        self.assertEqual(query_tests_with_status(self.store, "empty_file_found"), [(2, "test_2")])
+
+        set_end_status(self.store, 2, "success")
+        self.assertEqual(query_status_count(self.store, "success"), 3)
+
+    def test_typed_columns(self):
+        row = self.store.execute(
+            "SELECT pub_count, sub_count, use_multicast, use_reliable, run_secs FROM ess WHERE seq = 0"
+        ).fetchone()
+        self.assertEqual(row, (1, 2, 1, 0, 61.25))
+
+        row = self.store.execute(
+            "SELECT failure_stage, failed_machine_ip FROM ess WHERE seq = 1"
+        ).fetchone()
+        self.assertEqual(row, ("connection_check", "10.0.0.2"))
+
+    def test_legacy_row(self):
+        row = self.store.execute(
+            "SELECT pub_count, use_multicast, failed_machine_ip FROM ess WHERE seq = 3"
+        ).fetchone()
+        self.assertEqual(row, (1, 1, "10.0.0.3"))
+
+    def test_store_version(self):
+        self.store.execute("PRAGMA user_version = 0")
+        self.store.commit()
+        self.store.close()
+
+        self.store, error = open_ess_store(get_ess_store_path(self.ess_path))
+        self.assertIsNone(error)
+        self.assertEqual(get_ess_store_row_count(self.store), 0)
+
+    def test_export_ess_store_to_parquet(self):
+        self.assertIsNone(export_ess_store_to_parquet(self.store, self.ess_path))
+
+        ess_df = pd.read_parquet(self.ess_path)
+        self.assertEqual(len(ess_df.index), 5)
+        self.assertEqual(ess_df["test_name"].iloc[4], "test_3")
+
+        ess_df = read_ess_store(self.store)
+        self.assertEqual(ess_df.columns.tolist(), ESS_COLUMNS)
+        self.assertEqual(ess_df["pub_count"].iloc[0], 1)
+        self.assertEqual(ess_df["use_multicast"].iloc[0], True)
+        self.assertEqual(ess_df["failed_machine_ip"].iloc[3], "10.0.0.3")
+        self.assertEqual(ess_df["failure_stage"].iloc[2], "validation")
+        self.assertEqual(ess_df["reboot_decisions"].iloc[0], {"pi0": "skipped: healthy"})
+        self.assertEqual(ess_df["start_timestamp"].iloc[0], pd.Timestamp("2026-01-01 10:00:00"))
+
+    def test_sync_ess_store(self):
+        ess_df = read_ess_store(self.store)
+
+        more_ess_df = pd.concat([ess_df, get_test_ess_df("test_4")], ignore_index=True)
+        self.assertIsNone(sync_ess_store(self.store, more_ess_df))
+        self.assertEqual(get_ess_store_row_count(self.store), 6)
+
+        self.assertIsNone(sync_ess_store(self.store, ess_df.head(3)))
+        self.assertEqual(get_ess_store_row_count(self.store), 3)
+
+    def test_journal_keeps_store_in_step(self):
+        ess_df = read_ess_store(self.store)
+        ess_journal = EssJournal(self.ess_path, ess_df)
+        try:
+            self.assertIsNone(ess_journal.store_error)
+            _, error = ess_journal.append(get_test_ess_df("test_4", "script_execution_fail", "10.0.0.1"))
+            self.assertIsNone(error)
+        finally:
+            self.assertIsNone(ess_journal.close())
+
+        self.assertEqual(get_ess_store_row_count(self.store), 6)
+        self.assertEqual(query_last_failed_ip(self.store), "10.0.0.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import subprocess
+import unittest
+
+from machine_health import *
+
+
+HEALTHY = {
+    "perftest_process_count": 0,
+    "mem_available_kb": 800 * 1024,
+    "load_average_1min": 0.2,
+    "cpu_count": 4,
+    "noise_qdisc_count": 0,
+    "clock_skew_secs": 0.05,
+}
+
+
+class TestMachineHealth(unittest.TestCase):
+    def test_health_probe_command_output_parses(self):
+        probe_command = get_health_probe_command("/home/pi/perftest/perftest_cpp")
+        probe_output = subprocess.run(
+            ["bash", "-c", probe_command], capture_output=True, text=True
+        ).stdout
+
+        health, error = parse_health_probe_output(probe_output)
+        self.assertIsNone(error)
+        self.assertEqual(set(health.keys()), set(HEALTH_PROBE_KEYS))
+
+    def test_parse_health_probe_output(self):
+        health, error = parse_health_probe_output(
+            "Warning: motd\nperftest_process_count=2\nmem_available_kb=1000\n"
+            "load_average_1min=0.50\ncpu_count=4\nnoise_qdisc_count=1\nremote_time=1700000000.25\n"
+        )
+        self.assertIsNone(error)
+        self.assertEqual(health["perftest_process_count"], 2)
+        self.assertEqual(health["remote_time"], 1700000000.25)
+
+        health, error = parse_health_probe_output("perftest_process_count=0\n")
+        self.assertIsNone(health)
+        self.assertIn("mem_available_kb", error)
+
+        health, error = parse_health_probe_output(
+            "perftest_process_count=\nmem_available_kb=1\nload_average_1min=0\ncpu_count=4\n"
+            "noise_qdisc_count=0\nremote_time=0\n"
+        )
+        self.assertIsNone(health)
+        self.assertIn("perftest_process_count", error)
+
+    def test_get_unhealthy_reasons(self):
+        self.assertEqual(get_unhealthy_reasons(HEALTHY), [])
+
+        unhealthy = dict(HEALTHY, perftest_process_count=3, clock_skew_secs=-4)
+        reasons = get_unhealthy_reasons(unhealthy)
+        self.assertEqual(len(reasons), 2)
+        self.assertIn("3 perftest processes still running", reasons)
+
+        leftover_qdisc = dict(HEALTHY, noise_qdisc_count=1)
+        self.assertEqual(len(get_unhealthy_reasons(leftover_qdisc)), 1)
+        self.assertEqual(get_unhealthy_reasons(leftover_qdisc, resets_qdisc=True), [])
+
+    def test_load_average_just_after_test(self):
+        # Perftest kept all 4 cores busy until a few seconds ago.
+        just_after_test = dict(HEALTHY, load_average_1min=3.9)
+        self.assertEqual(get_unhealthy_reasons(just_after_test), [])
+        self.assertEqual(
+            get_reboot_decision("health", {
+                "status": "healthy",
+                "health": just_after_test,
+                "unhealthy_reasons": get_unhealthy_reasons(just_after_test),
+            }),
+            (False, "healthy"),
+        )
+
+        overloaded = dict(HEALTHY, load_average_1min=7.5)
+        self.assertEqual(get_unhealthy_reasons(overloaded), ["load average is 7.50 on 4 cores"])
+
+        single_core = dict(HEALTHY, load_average_1min=1.6, cpu_count=1)
+        self.assertEqual(len(get_unhealthy_reasons(single_core)), 1)
+
+    def test_get_reboot_decision(self):
+        self.assertEqual(get_reboot_decision("always", None)[0], True)
+        self.assertEqual(get_reboot_decision("never", None)[0], False)
+        self.assertEqual(get_reboot_decision("health", None)[0], True)
+
+        healthy_result = {"status": "healthy", "unhealthy_reasons": []}
+        self.assertEqual(get_reboot_decision("health", healthy_result), (False, "healthy"))
+
+        unhealthy_result = {
+            "status": "unhealthy",
+            "unhealthy_reasons": ["load average is 3.00", "only 100 MB memory available"],
+        }
+        self.assertEqual(
+            get_reboot_decision("health", unhealthy_result),
+            (True, "load average is 3.00; only 100 MB memory available"),
+        )
+
+        error_result = {"status": "error: timed out after 30 seconds"}
+        self.assertEqual(
+            get_reboot_decision("health", error_result),
+            (True, "timed out after 30 seconds"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import time
+import asyncio
+import unittest
+
+from orchestrator import *
+
+
+MACHINE_CONFIGS = [
+    {"machine_name": "pi0", "ip": "10.0.0.1"},
+    {"machine_name": "pi1", "ip": "10.0.0.2"},
+]
+
+
+async def sleep_stage(machine_config, sleep_secs):
+    await asyncio.sleep(sleep_secs)
+    return {"status": "complete"}
+
+
+async def slow_pi1_stage(machine_config):
+    if machine_config["machine_name"] == "pi1":
+        await asyncio.sleep(5)
+
+    return {"status": "complete"}
+
+
+async def failing_stage(machine_config):
+    raise RuntimeError("ssh exploded")
+
+
+class TestOrchestrator(unittest.TestCase):
+    def test_run_stage_on_machines_is_concurrent(self):
+        start_time = time.monotonic()
+        stage_results = run_stage_on_machines(MACHINE_CONFIGS, sleep_stage, 5, 0.5)
+        duration_secs = time.monotonic() - start_time
+
+        self.assertLess(duration_secs, 0.9)
+        self.assertEqual(set(stage_results.keys()), {"10.0.0.1", "10.0.0.2"})
+        self.assertEqual(stage_results["10.0.0.2"]["machine_name"], "pi1")
+        self.assertEqual(get_failed_stage_results(stage_results), [])
+
+    def test_run_stage_on_machines_deadline(self):
+        stage_results = run_stage_on_machines(MACHINE_CONFIGS, slow_pi1_stage, 0.2)
+
+        self.assertEqual(stage_results["10.0.0.1"]["status"], "complete")
+        self.assertTrue(stage_results["10.0.0.2"]["status"].startswith("error: timed out"))
+
+        failed_results = get_failed_stage_results(stage_results)
+        self.assertEqual([_["machine_name"] for _ in failed_results], ["pi1"])
+
+    def test_run_stage_on_machines_exception(self):
+        stage_results = run_stage_on_machines(MACHINE_CONFIGS, failing_stage, 1)
+
+        self.assertEqual(stage_results["10.0.0.1"]["status"], "error: ssh exploded")
+        self.assertEqual(len(get_failed_stage_results(stage_results)), 2)
+
+    def test_run_stage_on_machines_no_machines(self):
+        self.assertEqual(run_stage_on_machines([], sleep_stage, 1, 0), {})
+
+    def test_run_command(self):
+        result = asyncio.run(run_command(["sh", "-c", "echo out; echo err 1>&2; exit 3"]))
+        self.assertEqual(result["return_code"], 3)
+        self.assertEqual(result["stdout"], "out")
+        self.assertEqual(result["stderr"], "err")
+        self.assertFalse(result["timed_out"])
+
+    def test_run_command_timeout(self):
+        result = asyncio.run(run_command(["sleep", "5"], timeout_secs=0.2))
+        self.assertTrue(result["timed_out"])
+        self.assertLess(result["duration_secs"], 2)
+
+    def test_is_failed_status(self):
+        self.assertTrue(is_failed_status("ping_check_fail"))
+        self.assertTrue(is_failed_status("error: timed out after 60 seconds"))
+        self.assertFalse(is_failed_status("complete"))
+        self.assertFalse(is_failed_status("results downloaded"))
+
+
+if __name__ == "__main__":
+    unittest.main()
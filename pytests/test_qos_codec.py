@@ -0,0 +1,89 @@
+import unittest
+
+import pandas as pd
+
+from qos_codec import *
+
+
+class TestQosCodec(unittest.TestCase):
+    def setUp(self):
+        self.qos_dict = {
+            "datalen_bytes": 100,
+            "durability_level": 0,
+            "duration_secs": 600,
+            "latency_count": 100,
+            "pub_count": 5,
+            "sub_count": 1,
+            "use_multicast": True,
+            "use_reliable": False,
+        }
+
+    def test_get_test_name_from_combination_dict(self):
+        test_name, error = get_test_name_from_combination_dict(self.qos_dict)
+        self.assertIsNone(error)
+        self.assertEqual(test_name, "600SEC_100B_5PUB_1SUB_BE_MC_0DUR_100LC")
+
+        missing_key_dict = dict(self.qos_dict)
+        del missing_key_dict["latency_count"]
+        test_name, error = get_test_name_from_combination_dict(missing_key_dict)
+        self.assertIsNone(test_name)
+        self.assertEqual(error, "Invalid configuration options in combination dict.")
+
+    def test_get_qos_dict_from_test_name(self):
+        qos_dict = get_qos_dict_from_test_name(
+            "600SEC_100B_5PUB_1SUB_BE_MC_0DUR_100LC.parquet"
+        )
+        self.assertEqual(dict(qos_dict), self.qos_dict)
+        self.assertIs(
+            qos_dict,
+            get_qos_dict_from_test_name("600SEC_100B_5PUB_1SUB_BE_MC_0DUR_100LC.parquet"),
+        )
+
+        with self.assertRaises(TypeError):
+            qos_dict["pub_count"] = 10
+
+        self.assertIsNone(get_qos_dict_from_test_name(""))
+        self.assertIsNone(get_qos_dict_from_test_name("600SEC_100B_5PUB_1SUB"))
+
+    def test_round_trip(self):
+        test_name, error = get_test_name_from_combination_dict(self.qos_dict)
+        self.assertEqual(
+            get_test_name_from_combination_dict(get_qos_dict_from_test_name(test_name)),
+            (test_name, None),
+        )
+
+    def test_get_qos_df_from_test_names(self):
+        test_names = pd.Series(
+            [
+                "600SEC_100B_5PUB_1SUB_BE_MC_0DUR_100LC",
+                "not_a_test",
+                None,
+                "600sec_100b_5pub_1sub_be_mc_0dur_100lc.csv",
+            ],
+            index=[10, 11, 12, 13],
+        )
+        qos_df, error = get_qos_df_from_test_names(test_names)
+        self.assertIsNone(error)
+        self.assertEqual(list(qos_df.index), [10, 11, 12, 13])
+        self.assertEqual(list(qos_df.columns), REQUIRED_QOS_KEYS)
+        self.assertEqual(qos_df.loc[10].to_dict(), self.qos_dict)
+        self.assertEqual(qos_df.loc[13].to_dict(), self.qos_dict)
+        self.assertTrue(qos_df.loc[[11, 12]].isna().all().all())
+
+    def test_get_qos_dicts_from_test_names(self):
+        qos_dicts = get_qos_dicts_from_test_names(
+            ["600SEC_100B_5PUB_1SUB_BE_MC_0DUR_100LC.csv", "not_a_test"]
+        )
+        self.assertEqual(qos_dicts, [self.qos_dict, None])
+        self.assertIsInstance(qos_dicts[0]["use_multicast"], bool)
+
+        qos_dicts = get_qos_dicts_from_test_names(
+            ["600SEC_100B_5PUB_1SUB_BE_MC_0DUR_100LC"], bools_as_ints=True
+        )
+        self.assertEqual(qos_dicts[0]["use_multicast"], 1)
+        self.assertEqual(qos_dicts[0]["use_reliable"], 0)
+        self.assertEqual(get_qos_dicts_from_test_names([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
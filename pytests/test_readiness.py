@@ -0,0 +1,170 @@
+import time
+import socket
+import asyncio
+import unittest
+
+from readiness import *
+
+
+def get_closed_port():
+    with socket.socket() as closed_socket:
+        closed_socket.bind(("127.0.0.1", 0))
+        return closed_socket.getsockname()[1]
+
+
+async def read_banner_from_server(server_banner):
+    async def handle_client(reader, writer):
+        writer.write(server_banner)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle_client, "127.0.0.1", 0)
+    server_port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await read_ssh_banner("127.0.0.1", server_port, 1)
+
+
+class TestReadiness(unittest.TestCase):
+    def test_get_backoff_secs(self):
+        self.assertEqual(get_backoff_secs(1), READINESS_INITIAL_BACKOFF_SECS)
+        self.assertEqual(
+            get_backoff_secs(2),
+            READINESS_INITIAL_BACKOFF_SECS * READINESS_BACKOFF_MULTIPLIER
+        )
+        self.assertEqual(get_backoff_secs(50), READINESS_MAX_BACKOFF_SECS)
+
+    def test_read_ssh_banner(self):
+        banner, error = asyncio.run(
+            read_banner_from_server(b"SSH-2.0-OpenSSH_9.2p1 Debian-2\r\n")
+        )
+        self.assertIsNone(error)
+        self.assertEqual(banner, "SSH-2.0-OpenSSH_9.2p1 Debian-2")
+
+    def test_read_ssh_banner_after_preamble(self):
+        banner, error = asyncio.run(
+            read_banner_from_server(b"Welcome to pi0\r\nSSH-2.0-OpenSSH_9.2\r\n")
+        )
+        self.assertIsNone(error)
+        self.assertEqual(banner, "SSH-2.0-OpenSSH_9.2")
+
+    def test_read_ssh_banner_not_ssh(self):
+        banner, error = asyncio.run(read_banner_from_server(b"HTTP/1.1 400\r\n"))
+        self.assertIsNone(banner)
+        self.assertIsNotNone(error)
+
+    def test_read_ssh_banner_closed_port(self):
+        banner, error = asyncio.run(read_ssh_banner("127.0.0.1", get_closed_port(), 1))
+        self.assertIsNone(banner)
+        self.assertIn("Couldn't connect", error)
+
+    def test_wait_until_ssh_ready_times_out(self):
+        start_time = time.monotonic()
+        result = asyncio.run(
+            wait_until_ssh_ready(
+                {"ip": "127.0.0.1"}, 1.2, {"127.0.0.1": time.monotonic()}, get_closed_port()
+            )
+        )
+        duration_secs = time.monotonic() - start_time
+
+        self.assertTrue(result["status"].startswith("error: not ready"))
+        self.assertIsNone(result["boot_to_ready_secs"])
+        self.assertGreater(result["probe_count"], 1)
+        self.assertLess(duration_secs, 3)
+
+    def test_wait_until_ssh_ready(self):
+        async def wait_for_late_server():
+            port = get_closed_port()
+            rebooted_at = time.monotonic()
+
+            async def handle_client(reader, writer):
+                writer.write(b"SSH-2.0-OpenSSH_9.2\r\n")
+                await writer.drain()
+                writer.close()
+
+            async def start_server_late():
+                await asyncio.sleep(0.7)
+                return await asyncio.start_server(handle_client, "127.0.0.1", port)
+
+            server_task = asyncio.create_task(start_server_late())
+            result = await wait_until_ssh_ready(
+                {"ip": "127.0.0.1"}, 5, {"127.0.0.1": rebooted_at}, port
+            )
+            server = await server_task
+            server.close()
+            await server.wait_closed()
+            return result
+
+        result = asyncio.run(wait_for_late_server())
+
+        self.assertEqual(result["status"], "ready")
+        self.assertGreater(result["probe_count"], 1)
+        self.assertGreaterEqual(result["boot_to_ready_secs"], 0.7)
+        self.assertLess(result["boot_to_ready_secs"], 3)
+
+    def test_wait_until_ssh_ready_waits_for_reboot(self):
+        async def wait_for_rebooting_server():
+            port = get_closed_port()
+            rebooted_at = time.monotonic()
+            came_back_at = None
+
+            async def handle_client(reader, writer):
+                writer.write(b"SSH-2.0-OpenSSH_9.2\r\n")
+                await writer.drain()
+                writer.close()
+
+            # The sshd from before the reboot answers the first probe, then the
+            # machine goes down and comes back a while later.
+            server = await asyncio.start_server(handle_client, "127.0.0.1", port)
+
+            async def reboot_server():
+                nonlocal came_back_at
+                await asyncio.sleep(0.2)
+                server.close()
+                await server.wait_closed()
+                await asyncio.sleep(0.7)
+                came_back_at = time.monotonic()
+                return await asyncio.start_server(handle_client, "127.0.0.1", port)
+
+            server_task = asyncio.create_task(reboot_server())
+            result = await wait_until_ssh_ready(
+                {"ip": "127.0.0.1"}, 5, {"127.0.0.1": rebooted_at}, port
+            )
+            new_server = await server_task
+            new_server.close()
+            await new_server.wait_closed()
+            return result, came_back_at - rebooted_at
+
+        result, down_secs = asyncio.run(wait_for_rebooting_server())
+
+        self.assertEqual(result["status"], "ready")
+        self.assertGreaterEqual(result["probe_count"], 3)
+        self.assertGreaterEqual(result["boot_to_ready_secs"], down_secs)
+
+    def test_wait_until_ssh_ready_never_goes_down(self):
+        async def wait_for_server_that_stays_up():
+            async def handle_client(reader, writer):
+                writer.write(b"SSH-2.0-OpenSSH_9.2\r\n")
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(handle_client, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                rebooted_result = await wait_until_ssh_ready(
+                    {"ip": "127.0.0.1"}, 1, {"127.0.0.1": time.monotonic()}, port
+                )
+                not_rebooted_result = await wait_until_ssh_ready(
+                    {"ip": "127.0.0.1"}, 1, {}, port
+                )
+            return rebooted_result, not_rebooted_result
+
+        rebooted_result, not_rebooted_result = asyncio.run(wait_for_server_that_stays_up())
+
+        self.assertTrue(rebooted_result["status"].startswith("error: still up"))
+        self.assertGreater(rebooted_result["probe_count"], 1)
+        self.assertEqual(not_rebooted_result["status"], "ready")
+        self.assertEqual(not_rebooted_result["probe_count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from result_agent import *
+
+PUB_CSV = (
+    "Perftest 4\n"
+    "some info\n"
+    "Length (Bytes), Latency (μs), Ave (μs), Std (μs), Min (μs), Max (μs)\n"
+    "100, 250, 250, 0.0, 240, 260\n"
+    "100, 200, 230, 5.0, 200, 300\n"
+    "100, 249, 230, 5.0, 200, 300\n"
+    "\n"
+    "One-way Latency Summary:\n"
+    "Length (Bytes), Ave (μs), Std\n"
+    "100, 230, 5\n"
+)
+
+SUB_CSV = (
+    "Perftest\n"
+    "\n"
+    "Length (Bytes), Total Samples, Samples/s, Avg Samples/s, Mbps, Avg Mbps, Lost Samples, Lost Samples (%)\n"
+    "100, 1000, 1000, 1000, 0.8, 0.8, 0, 0.00\n"
+    "100, 3000, 2000, 1500, 1.6, 1.2, 2, 0.07\n"
+)
+
+
+class TestResultAgent(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp_dir.name, "pub_0.csv"), "w") as f:
+            f.write(PUB_CSV)
+        with open(os.path.join(self.tmp_dir.name, "sub_0.csv"), "w") as f:
+            f.write(SUB_CSV)
+        with open(os.path.join(self.tmp_dir.name, "sub_1.csv"), "w") as f:
+            f.write("")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_metric_stats(self):
+        values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0]
+        stats = get_metric_stats(values)
+
+        self.assertEqual(stats["count"], 6)
+        self.assertAlmostEqual(stats["mean"], np.mean(values))
+        self.assertAlmostEqual(stats["std"], np.std(values, ddof=1))
+        for percent in PERCENTILES:
+            self.assertAlmostEqual(stats[f"p{percent}"], np.percentile(values, percent))
+        self.assertEqual(stats["last"], 9.0)
+
+        self.assertEqual(get_metric_stats([]), {"count": 0})
+
+    def test_check_pub_file(self):
+        pub_filepath = os.path.join(self.tmp_dir.name, "pub_0.csv")
+        file_check = check_result_file(pub_filepath)
+
+        self.assertIsNone(file_check["error"])
+        self.assertTrue(file_check["header_found"])
+        self.assertTrue(file_check["footer_found"])
+        self.assertEqual(file_check["row_count"], 3)
+        self.assertEqual(list(file_check["metrics"].keys()), ["latency_us"])
+        self.assertEqual(file_check["metrics"]["latency_us"]["max"], 250)
+
+        with open(pub_filepath, "rb") as f:
+            self.assertEqual(file_check["sha1"], hashlib.sha1(f.read()).hexdigest())
+
+    def test_check_sub_file(self):
+        file_check = check_result_file(os.path.join(self.tmp_dir.name, "sub_0.csv"))
+
+        self.assertIsNone(file_check["error"])
+        self.assertFalse(file_check["footer_found"])
+        self.assertEqual(
+            sorted(file_check["metrics"].keys()),
+            sorted(SUB_METRIC_COLUMNS.values())
+        )
+        self.assertEqual(file_check["metrics"]["total_samples"]["last"], 3000)
+        self.assertAlmostEqual(file_check["metrics"]["mbps"]["mean"], 1.2)
+        self.assertEqual(file_check["metrics"]["lost_samples_percent"]["last"], 0.07)
+
+    def test_check_bad_files(self):
+        file_check = check_result_file(os.path.join(self.tmp_dir.name, "sub_1.csv"))
+        self.assertEqual(file_check["error"], "sub_1.csv is empty.")
+        self.assertIsNotNone(file_check["sha1"])
+
+        file_check = check_result_file(os.path.join(self.tmp_dir.name, "sub_2.csv"))
+        self.assertEqual(file_check["error"], "sub_2.csv doesn't exist.")
+        self.assertIsNone(file_check["sha1"])
+
+        headless_filepath = os.path.join(self.tmp_dir.name, "sub_3.csv")
+        with open(headless_filepath, "w") as f:
+            f.write("Perftest\n" + "\n" * 10 + SUB_CSV)
+        file_check = check_result_file(headless_filepath)
+        self.assertEqual(file_check["error"], "Couldn't find the header row in sub_3.csv.")
+
+    def test_main(self):
+        manifest_path = os.path.join(self.tmp_dir.name, "manifest.json")
+        with open(manifest_path, "w") as f:
+            sys.stdout = f
+            try:
+                self.assertEqual(
+                    main(["--results-dir", self.tmp_dir.name, "pub_0.csv", "sub_0.csv"]), 0
+                )
+            finally:
+                sys.stdout = sys.__stdout__
+
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        self.assertEqual(manifest["version"], RESULT_MANIFEST_VERSION)
+        self.assertEqual([_["filename"] for _ in manifest["files"]], ["pub_0.csv", "sub_0.csv"])
+
+
+if __name__ == "__main__":
+    unittest.main()
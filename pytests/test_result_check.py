@@ -0,0 +1,112 @@
+import os
+import json
+import tempfile
+import unittest
+
+from result_check import *
+
+
+def get_file_check(filename, error=None, footer_found=True):
+    return {
+        "filename": filename,
+        "size_bytes": 0 if error == "missing" else 100,
+        "sha1": None if error == "missing" else "0" * 40,
+        "header_found": True,
+        "footer_found": footer_found,
+        "row_count": 5,
+        "metrics": {},
+        "error": error,
+    }
+
+
+def get_check_result(*file_checks):
+    return {
+        "status": "complete",
+        "manifest": {"version": 1, "files": list(file_checks)},
+    }
+
+
+MACHINE_CONFIGS = [{"ip": "10.0.0.1"}, {"ip": "10.0.0.2"}]
+
+
+class TestResultCheck(unittest.TestCase):
+    def test_get_result_agent_command(self):
+        self.assertEqual(
+            get_result_agent_command("/home/pi/perftest dir/perftest_cpp", ["pub_0.csv", "sub_0.csv"]),
+            "python3 '/home/pi/perftest dir/result_agent.py' "
+            "--results-dir '/home/pi/perftest dir' pub_0.csv sub_0.csv"
+        )
+        self.assertEqual(
+            get_result_agent_command("~/perftest/perftest_cpp", ["pub_0.csv"]),
+            'python3 "$HOME"/perftest/result_agent.py --results-dir "$HOME"/perftest pub_0.csv'
+        )
+
+    def test_parse_result_manifest(self):
+        manifest = {"version": 1, "files": []}
+        self.assertEqual(
+            parse_result_manifest("motd\n" + json.dumps(manifest) + "\n"), (manifest, None)
+        )
+        self.assertIsNotNone(parse_result_manifest("")[1])
+        self.assertIsNotNone(parse_result_manifest("{not json")[1])
+        self.assertIsNotNone(parse_result_manifest('{"version": 1}')[1])
+
+    def test_accepted(self):
+        result_check = get_result_check(
+            {
+                "10.0.0.1": get_check_result(get_file_check("pub_0.csv")),
+                "10.0.0.2": get_check_result(
+                    get_file_check("sub_0.csv"), get_file_check("sub_1.csv", footer_found=False)
+                ),
+            },
+            MACHINE_CONFIGS,
+            3
+        )
+        self.assertTrue(result_check["accepted"])
+        self.assertEqual(get_files_without_footer(result_check), ["sub_1.csv"])
+
+    def test_rejected(self):
+        result_check = get_result_check(
+            {
+                "10.0.0.1": get_check_result(get_file_check("pub_0.csv")),
+                "10.0.0.2": get_check_result(get_file_check("sub_0.csv", "missing")),
+            },
+            MACHINE_CONFIGS,
+            2
+        )
+        self.assertFalse(result_check["accepted"])
+        self.assertEqual(result_check["end_status"], "file_count_mismatch")
+        self.assertEqual(result_check["failed_machine_ip"], "10.0.0.2")
+
+        result_check = get_result_check(
+            {
+                "10.0.0.1": get_check_result(get_file_check("pub_0.csv")),
+                "10.0.0.2": get_check_result(get_file_check("sub_0.csv", "sub_0.csv is empty.")),
+            },
+            MACHINE_CONFIGS,
+            2
+        )
+        self.assertFalse(result_check["accepted"])
+        self.assertEqual(result_check["end_status"], "empty_file_found")
+        self.assertEqual(result_check["error"], "sub_0.csv is empty.")
+
+    def test_agent_failed(self):
+        result_check = get_result_check(
+            {
+                "10.0.0.1": get_check_result(get_file_check("pub_0.csv")),
+                "10.0.0.2": {"status": "error: result agent failed", "manifest": None},
+            },
+            MACHINE_CONFIGS,
+            2
+        )
+        self.assertIsNone(result_check["accepted"])
+        self.assertEqual(list(result_check["manifests"].keys()), ["10.0.0.1"])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_dirpath = os.path.join(tmp_dir, "test")
+            self.assertIsNone(write_result_manifests(result_check, results_dirpath))
+            with open(os.path.join(results_dirpath, RESULT_MANIFEST_FILENAME), "r") as f:
+                self.assertEqual(json.load(f), result_check["manifests"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import os
+import hashlib
+import tarfile
+import time
+import tempfile
+import threading
+import unittest
+
+import result_transfer
+from result_transfer import *
+
+
+class TestResultTransfer(unittest.TestCase):
+    def get_tar_stream(self, files):
+        tar_bytes = io.BytesIO()
+        with tarfile.open(fileobj=tar_bytes, mode="w:gz") as tar:
+            for name, contents in files.items():
+                member = tarfile.TarInfo(name)
+                member.size = len(contents)
+                tar.addfile(member, io.BytesIO(contents))
+
+        tar_bytes.seek(0)
+        return tar_bytes
+
+    def test_parse_sha1sum_output(self):
+        sha1 = hashlib.sha1(b"a").hexdigest()
+        checksums = parse_sha1sum_output(
+            f"Warning: Permanently added host\n{sha1}  pub_0.csv\n{sha1} *sub_0.csv\n"
+        )
+        self.assertEqual(checksums, {"pub_0.csv": sha1, "sub_0.csv": sha1})
+
+    def test_extract_csv_tar_stream(self):
+        files = {
+            "pub_0.csv": b"latency\n1\n",
+            "sub_0.csv": b"mbps\n2\n",
+            "../escape.csv": b"x",
+            "notes.txt": b"ignored",
+        }
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checksums, error = extract_csv_tar_stream(self.get_tar_stream(files), tmp_dir)
+            self.assertIsNone(error)
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)), ["escape.csv", "pub_0.csv", "sub_0.csv"]
+            )
+            self.assertEqual(
+                checksums["pub_0.csv"], hashlib.sha1(files["pub_0.csv"]).hexdigest()
+            )
+
+            checksums, error = extract_csv_tar_stream(io.BytesIO(b"not a tar"), tmp_dir)
+            self.assertEqual(checksums, {})
+            self.assertIsNotNone(error)
+
+    def test_extract_csv_tar_stream_keeps_complete_files(self):
+        files = {"pub_0.csv": b"latency\n1\n", "sub_0.csv": os.urandom(256 * 1024)}
+        tar_bytes = self.get_tar_stream(files).getvalue()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checksums, error = extract_csv_tar_stream(
+                io.BytesIO(tar_bytes[:len(tar_bytes) // 2]), tmp_dir
+            )
+            self.assertIsNotNone(error)
+            self.assertEqual(
+                checksums, {"pub_0.csv": hashlib.sha1(files["pub_0.csv"]).hexdigest()}
+            )
+            self.assertEqual(os.listdir(tmp_dir), ["pub_0.csv"])
+
+    def download_with_local_command(self, command: str = "", cancel_event=None):
+        """
+        Run download_csvs_as_tar_stream() with the ssh command swapped for a local one.
+        """
+        get_ssh_command = result_transfer.get_ssh_command
+        result_transfer.get_ssh_command = lambda *args: ["sh", "-c", command]
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                downloaded_files, error = download_csvs_as_tar_stream(
+                    "pi", "10.0.0.2", "~/perftest", tmp_dir, cancel_event
+                )
+                return downloaded_files, error, sorted(os.listdir(tmp_dir))
+        finally:
+            result_transfer.get_ssh_command = get_ssh_command
+
+    def test_download_csvs_as_tar_stream_returns_complete_files_on_error(self):
+        with tempfile.TemporaryDirectory() as results_dir:
+            with open(os.path.join(results_dir, "a_pub_0.csv"), "wb") as f:
+                f.write(b"latency\n1\n")
+            with open(os.path.join(results_dir, "b_sub_0.csv"), "wb") as f:
+                f.write(os.urandom(256 * 1024))
+
+            downloaded_files, error, local_files = self.download_with_local_command(
+                get_tar_stream_command(results_dir) + " | head -c 100000"
+            )
+
+        self.assertIsNotNone(error)
+        self.assertEqual(downloaded_files, ["a_pub_0.csv"])
+        self.assertEqual(local_files, ["a_pub_0.csv"])
+
+    def test_download_csvs_as_tar_stream_cancel(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+
+        start_time = time.time()
+        downloaded_files, error, _ = self.download_with_local_command(
+            "exec sleep 30", cancel_event
+        )
+
+        self.assertLess(time.time() - start_time, 10)
+        self.assertEqual(downloaded_files, [])
+        self.assertEqual(error, "Cancelled.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from sftp_download import *
+
+
+class LocalSftp:
+    """
+    Serves local files through the part of paramiko.SFTPClient download_file()
+    uses. Fails after fail_after_bytes bytes to act like a dropped connection.
+    """
+    def __init__(self, fail_after_bytes=None):
+        self.fail_after_bytes = fail_after_bytes
+        self.offsets = []
+
+    def open(self, path, mode="rb"):
+        sftp = self
+        remote_file = open(path, mode)
+        seek = remote_file.seek
+        read = remote_file.read
+
+        def seek_and_record(offset, whence=0):
+            sftp.offsets.append(offset)
+            return seek(offset, whence)
+
+        def read_until_failure(size=-1):
+            if sftp.fail_after_bytes is not None and remote_file.tell() >= sftp.fail_after_bytes:
+                raise EOFError("Connection dropped.")
+            if sftp.fail_after_bytes is not None:
+                size = min(size, sftp.fail_after_bytes - remote_file.tell())
+            return read(size)
+
+        remote_file.seek = seek_and_record
+        remote_file.read = read_until_failure
+
+        return remote_file
+
+    def close(self):
+        pass
+
+
+class LocalSsh:
+    """
+    Gives out a LocalSftp per channel. The first channel drops its connection.
+    """
+    def __init__(self, fail_after_bytes=None):
+        self.fail_after_bytes = fail_after_bytes
+        self.channel_count = 0
+
+    def open_sftp(self):
+        self.channel_count += 1
+        if self.channel_count == 1:
+            return LocalSftp(self.fail_after_bytes)
+
+        return LocalSftp()
+
+
+class TestSftpDownload(unittest.TestCase):
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.remote_path = os.path.join(self.dirpath, "remote.zip")
+        self.local_path = os.path.join(self.dirpath, "local.zip")
+
+        self.contents = os.urandom(DOWNLOAD_CHUNK_BYTES * 2 + 123)
+        with open(self.remote_path, "wb") as f:
+            f.write(self.contents)
+        self.sha1 = hashlib.sha1(self.contents).hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def test_parse_sha1sum_output(self):
+        self.assertEqual(
+            parse_sha1sum_output("abc  a.zip\ndef *dir/b.zip\n\n"),
+            {"a.zip": "abc", "b.zip": "def"}
+        )
+
+    def test_download_file(self):
+        status, error = download_file(
+            LocalSftp(), self.remote_path, self.local_path, len(self.contents), self.sha1
+        )
+        self.assertIsNone(error)
+        self.assertEqual(status, "downloaded")
+        with open(self.local_path, "rb") as f:
+            self.assertEqual(f.read(), self.contents)
+        self.assertFalse(os.path.exists(get_partial_path(self.local_path)))
+        self.assertEqual(read_recorded_hash(self.local_path), self.sha1)
+
+        status, error = download_file(
+            LocalSftp(), self.remote_path, self.local_path, len(self.contents), self.sha1
+        )
+        self.assertEqual(status, "skipped")
+
+    def test_download_file_without_recorded_hash(self):
+        with open(get_hash_path(self.local_path), "w") as f:
+            f.write("stale")
+
+        for expected_status in ["downloaded", "downloaded"]:
+            status, error = download_file(
+                LocalSftp(),
+                self.remote_path,
+                self.local_path,
+                len(self.contents),
+                self.sha1,
+                record_hash=False
+            )
+            self.assertIsNone(error)
+            self.assertEqual(status, expected_status)
+
+        with open(self.local_path, "rb") as f:
+            self.assertEqual(f.read(), self.contents)
+        self.assertEqual(sorted(os.listdir(self.dirpath)), ["local.zip", "remote.zip"])
+
+    def test_download_file_resumes(self):
+        sftp = LocalSftp(fail_after_bytes=DOWNLOAD_CHUNK_BYTES + 10)
+        with self.assertRaises(EOFError):
+            download_file(sftp, self.remote_path, self.local_path, len(self.contents), self.sha1)
+        self.assertEqual(
+            os.path.getsize(get_partial_path(self.local_path)), DOWNLOAD_CHUNK_BYTES + 10
+        )
+
+        sftp = LocalSftp()
+        status, error = download_file(
+            sftp, self.remote_path, self.local_path, len(self.contents), self.sha1
+        )
+        self.assertIsNone(error)
+        self.assertEqual(status, "resumed")
+        self.assertEqual(sftp.offsets, [DOWNLOAD_CHUNK_BYTES + 10])
+        with open(self.local_path, "rb") as f:
+            self.assertEqual(f.read(), self.contents)
+
+    def test_download_file_hash_mismatch(self):
+        with open(get_partial_path(self.local_path), "wb") as f:
+            f.write(b"x" * 10)
+
+        status, error = download_file(
+            LocalSftp(), self.remote_path, self.local_path, len(self.contents), self.sha1
+        )
+        self.assertIsNone(status)
+        self.assertIsNotNone(error)
+        self.assertFalse(os.path.exists(get_partial_path(self.local_path)))
+        self.assertFalse(os.path.exists(self.local_path))
+
+    def test_download_file_records_existing_hash(self):
+        shutil.copy(self.remote_path, self.local_path)
+
+        status, error = download_file(
+            LocalSftp(fail_after_bytes=0),
+            self.remote_path,
+            self.local_path,
+            len(self.contents),
+            self.sha1
+        )
+        self.assertEqual(status, "skipped")
+        self.assertEqual(read_recorded_hash(self.local_path), self.sha1)
+
+    def test_download_files(self):
+        downloads = [
+            {
+                "remote_path": self.remote_path,
+                "local_path": os.path.join(self.dirpath, f"local_{index}.zip"),
+                "size": len(self.contents),
+                "sha1": self.sha1,
+                "record_hash": index != 0,
+            }
+            for index in range(3)
+        ]
+
+        ssh = LocalSsh(fail_after_bytes=100)
+        results = download_files(ssh, downloads, stream_count=1)
+
+        self.assertEqual(ssh.channel_count, 4)
+        self.assertEqual(sorted([_[0] for _ in results.values()]), ["downloaded", "downloaded", "resumed"])
+        for download in downloads:
+            with open(download['local_path'], "rb") as f:
+                self.assertEqual(f.read(), self.contents)
+            self.assertEqual(
+                os.path.exists(get_hash_path(download['local_path'])), download['record_hash']
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
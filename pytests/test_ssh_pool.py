@@ -0,0 +1,81 @@
+import os
+import unittest
+import subprocess
+
+from ssh_pool import *
+
+
+def get_remote_shell_output(quoted_path: str = "") -> str:
+    """
+    Run the quoted path through a shell like the remote one would with HOME set.
+    """
+    return subprocess.run(
+        ["sh", "-c", f"printf %s {quoted_path}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "HOME": "/home/pi"},
+    ).stdout
+
+
+class TestSshPool(unittest.TestCase):
+    def test_quote_remote_path(self):
+        self.assertEqual(quote_remote_path("~"), '"$HOME"')
+        self.assertEqual(quote_remote_path("~/perftest"), '"$HOME"/perftest')
+        self.assertEqual(quote_remote_path("/tmp/perftest"), "/tmp/perftest")
+
+        for path, expected_path in [
+            ("~", "/home/pi"),
+            ("~/perftest/pub_0.csv", "/home/pi/perftest/pub_0.csv"),
+            ("~/my results/sub 0.csv", "/home/pi/my results/sub 0.csv"),
+            ("/tmp/my results/$HOME", "/tmp/my results/$HOME"),
+            ("~user/perftest", "~user/perftest"),
+        ]:
+            self.assertEqual(get_remote_shell_output(quote_remote_path(path)), expected_path)
+
+    def test_get_ssh_options(self):
+        ssh_options = get_ssh_options()
+        self.assertEqual(ssh_options[::2], ["-o"] * (len(ssh_options) // 2))
+
+        options = dict([_.split("=", 1) for _ in ssh_options[1::2]])
+        self.assertEqual(options["ControlMaster"], "no")
+        self.assertEqual(options["ControlPath"], os.path.join(SSH_CONTROL_DIR, "%C"))
+        self.assertEqual(options["ControlPersist"], str(SSH_CONTROL_PERSIST_SECS))
+        self.assertEqual(options["ConnectTimeout"], str(SSH_CONNECT_TIMEOUT_SECS))
+        self.assertEqual(options["ServerAliveInterval"], str(SSH_SERVER_ALIVE_INTERVAL_SECS))
+        self.assertEqual(options["ServerAliveCountMax"], str(SSH_SERVER_ALIVE_COUNT_MAX))
+
+        self.assertIn("ControlMaster=yes", get_ssh_options("yes"))
+
+    def test_get_ssh_command(self):
+        self.assertEqual(
+            get_ssh_command("pi", "10.0.0.2", "ls ~/perftest/*.csv"),
+            ["ssh"] + get_ssh_options() + ["pi@10.0.0.2", "ls ~/perftest/*.csv"],
+        )
+        self.assertEqual(
+            get_ssh_command("pi", "10.0.0.2", "ls", "~/.ssh/id_rsa"),
+            ["ssh"] + get_ssh_options() + ["-i", "~/.ssh/id_rsa", "pi@10.0.0.2", "ls"],
+        )
+
+    def test_get_scp_command(self):
+        self.assertEqual(
+            get_scp_command("pi", "10.0.0.2", "~/perftest/pub_0.csv", "output/pub_0.csv"),
+            ["scp"] + get_ssh_options() + ["pi@10.0.0.2:~/perftest/pub_0.csv", "output/pub_0.csv"],
+        )
+        self.assertEqual(
+            get_scp_command("pi", "10.0.0.2", "a.csv", "b.csv", "key")[-4:],
+            ["-i", "key", "pi@10.0.0.2:a.csv", "b.csv"],
+        )
+
+    def test_get_scp_upload_command(self):
+        self.assertEqual(
+            get_scp_upload_command("pi", "10.0.0.2", "result_agent.py", "~/perftest/result_agent.py"),
+            ["scp"] + get_ssh_options() + ["result_agent.py", "pi@10.0.0.2:~/perftest/result_agent.py"],
+        )
+        self.assertEqual(
+            get_scp_upload_command("pi", "10.0.0.2", "a.py", "b.py", "key")[-4:],
+            ["-i", "key", "a.py", "pi@10.0.0.2:b.py"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+
+import summary_manifest as sm
+
+
+class TestSummaryManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dirpath = os.path.join(self.tmp_dir.name, "data")
+        self.summaries_dirpath = os.path.join(self.tmp_dir.name, "summarised_data")
+        os.makedirs(self.summaries_dirpath)
+
+        self.test_dirpaths = []
+        for test_name in ["60SEC_100B_1PUB_1SUB_REL_MC_0DUR_100LC", "60SEC_100B_1PUB_1SUB_BE_UC_0DUR_100LC"]:
+            test_dirpath = os.path.join(self.data_dirpath, test_name)
+            os.makedirs(test_dirpath)
+            for filename in ["pub_0.csv", "sub_0.csv"]:
+                with open(os.path.join(test_dirpath, filename), "w") as f:
+                    f.write(f"{test_name} {filename}\n")
+
+            with open(os.path.join(self.summaries_dirpath, f"{test_name}.csv"), "w") as f:
+                f.write("summary\n")
+
+            self.test_dirpaths.append(test_dirpath)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def summarise(self, test_dirpaths):
+        manifest_path, error = sm.get_manifest_path(self.summaries_dirpath, "csv")
+        manifest, error = sm.read_manifest(manifest_path)
+
+        changed_test_dirpaths, fingerprints, error = sm.get_tests_to_summarise(
+            test_dirpaths, self.summaries_dirpath, manifest
+        )
+        self.assertIsNone(error)
+
+        for test_dirpath in changed_test_dirpaths:
+            test_name = os.path.basename(test_dirpath)
+            sm.record_summarised_test(
+                manifest, test_name, fingerprints[test_name], f"{test_name}.csv"
+            )
+
+        self.assertIsNone(sm.write_manifest(manifest_path, manifest))
+
+        return changed_test_dirpaths
+
+    def test_get_manifest_path(self):
+        self.assertEqual(
+            sm.get_manifest_path("output/summarised_data/camp/", "parquet"),
+            ("output/summarised_data/camp_parquet_manifest.json", None),
+        )
+        self.assertEqual(sm.get_manifest_path("", "csv")[0], None)
+
+    def test_get_tests_to_summarise(self):
+        self.assertEqual(self.summarise(self.test_dirpaths), self.test_dirpaths)
+        self.assertEqual(self.summarise(self.test_dirpaths), [])
+
+        with open(os.path.join(self.test_dirpaths[0], "sub_0.csv"), "a") as f:
+            f.write("more data\n")
+
+        self.assertEqual(self.summarise(self.test_dirpaths), [self.test_dirpaths[0]])
+
+    def test_stale_summaries_are_removed(self):
+        self.summarise(self.test_dirpaths)
+        self.summarise(self.test_dirpaths[:1])
+
+        removed_test_name = os.path.basename(self.test_dirpaths[1])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.summaries_dirpath, f"{removed_test_name}.csv"))
+        )
+
+    def test_interrupted_test_is_summarised_again(self):
+        import autoperf as ap
+
+        summarised_test_names = []
+
+        def summarise_test_to_csv(test_dirpath, summaries_dirpath):
+            test_name = os.path.basename(test_dirpath)
+            if test_name == interrupted_test_name:
+                raise KeyboardInterrupt
+
+            summarised_test_names.append(test_name)
+            return f"{test_name}.csv", None
+
+        cwd = os.getcwd()
+        summarise_test_to_csv_function = ap.summarise_test_to_csv
+        save_interval = ap.SUMMARY_MANIFEST_SAVE_INTERVAL
+        try:
+            os.chdir(self.tmp_dir.name)
+            ap.summarise_test_to_csv = summarise_test_to_csv
+            ap.SUMMARY_MANIFEST_SAVE_INTERVAL = 1
+
+            test_names = sorted(os.listdir(self.data_dirpath))
+            interrupted_test_name = test_names[-1]
+            with self.assertRaises(KeyboardInterrupt):
+                ap.summarise_tests(self.data_dirpath)
+
+            manifest_path, _ = sm.get_manifest_path(
+                os.path.join(ap.SUMMARISED_DIR, "data"), "csv"
+            )
+            manifest, error = sm.read_manifest(manifest_path)
+            self.assertIsNone(error)
+            self.assertNotIn(interrupted_test_name, manifest["tests"])
+
+            interrupted_test_name = None
+            ap.summarise_tests(self.data_dirpath)
+
+        finally:
+            os.chdir(cwd)
+            ap.summarise_test_to_csv = summarise_test_to_csv_function
+            ap.SUMMARY_MANIFEST_SAVE_INTERVAL = save_interval
+
+        # Each test is summarised once, the interrupted one on the second run.
+        self.assertEqual(sorted(summarised_test_names), test_names)
+
+
+if __name__ == "__main__":
+    unittest.main()
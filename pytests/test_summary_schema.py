@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from summary_schema import *
+
+
+class TestSummarySchema(unittest.TestCase):
+    def setUp(self):
+        self.columns = {
+            "latency_us": np.array([240, 260, 250, np.nan], dtype=np.float64),
+            "sub_0_mbps": np.array([0.8, 0.9, np.nan, np.nan], dtype=np.float64),
+            "sub_12_mbps": np.array([0.7, 0.6, 0.5, 0.4], dtype=np.float64),
+            "avg_mbps_per_sub": np.array([0.75, 0.75, 0.5, 0.4], dtype=np.float64),
+        }
+
+    def test_get_sub_column_parts(self):
+        self.assertEqual(get_sub_column_parts("sub_12_mbps"), (12, "mbps"))
+        self.assertEqual(
+            get_sub_column_parts("sub_0_lost_samples_percent"),
+            (0, "lost_samples_percent"),
+        )
+        self.assertEqual(
+            get_sub_column_parts("avg_mbps_per_sub"), (None, "avg_mbps_per_sub")
+        )
+
+    def test_get_summary_table(self):
+        table, error = get_summary_table("", self.columns)
+        self.assertEqual(error, "No test id passed.")
+
+        table, error = get_summary_table("TEST", self.columns)
+        self.assertIsNone(error)
+        self.assertEqual(table.schema, SUMMARY_SCHEMA)
+
+        # NaN padding is dropped: 3 + 2 + 4 + 4
+        self.assertEqual(table.num_rows, 13)
+
+    def test_summary_round_trip(self):
+        table, error = get_summary_table("TEST", self.columns)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            summary_path = os.path.join(tmp_dir, "TEST.parquet")
+            self.assertIsNone(write_summary_table(table, summary_path))
+
+            summary_df, error = read_summary(summary_path)
+            self.assertIsNone(error)
+            self.assertEqual(summary_df["sub_index"].cat.categories.dtype, np.int16)
+            self.assertEqual(summary_df["value"].dtype, np.float32)
+
+            wide_df, error = get_wide_summary(summary_df)
+            self.assertIsNone(error)
+            self.assertEqual(sorted(wide_df.columns), sorted(self.columns.keys()))
+            for column, values in self.columns.items():
+                np.testing.assert_allclose(
+                    wide_df[column].to_numpy(), values.astype(np.float32)
+                )
+
+            latency_df, error = read_summary(summary_path, ["latency_us"])
+            self.assertEqual(list(latency_df["metric"].unique()), ["latency_us"])
+            self.assertEqual(len(latency_df), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
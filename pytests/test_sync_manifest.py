@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from sync_manifest import *
+
+
+class TestSyncManifest(unittest.TestCase):
+    def setUp(self):
+        self.remote_dirpath = tempfile.mkdtemp()
+        self.local_dirpath = tempfile.mkdtemp()
+
+        os.makedirs(os.path.join(self.remote_dirpath, "campaign"))
+        for relpath, contents in [
+            ("a.zip", b"a"),
+            ("b.zip", b"bb"),
+            ("campaign/pub_0.csv", b"latency"),
+            ("a.zip.part", b"partial"),
+            ("zi123456", b"zip temp file"),
+        ]:
+            with open(os.path.join(self.remote_dirpath, relpath), "wb") as f:
+                f.write(contents)
+
+    def tearDown(self):
+        shutil.rmtree(self.remote_dirpath)
+        shutil.rmtree(self.local_dirpath)
+
+    def test_list_files(self):
+        self.assertEqual(
+            list_files(self.remote_dirpath),
+            ["a.zip", "b.zip", "campaign/pub_0.csv"]
+        )
+        self.assertEqual(list_files(self.remote_dirpath, "*.zip", True), ["a.zip", "b.zip"])
+
+    def test_get_dir_manifest(self):
+        files = get_dir_manifest(self.remote_dirpath, {}, "*.zip", True)
+        self.assertEqual(sorted(files.keys()), ["a.zip", "b.zip"])
+        self.assertEqual(files["b.zip"]["size"], 2)
+        self.assertEqual(files["a.zip"]["sha1"], get_file_sha1(os.path.join(self.remote_dirpath, "a.zip")))
+
+        # Unchanged files aren't hashed again.
+        files["a.zip"]["sha1"] = "cached"
+        self.assertEqual(
+            get_dir_manifest(self.remote_dirpath, files, "*.zip", True)["a.zip"]["sha1"], "cached"
+        )
+
+        with open(os.path.join(self.remote_dirpath, "a.zip"), "wb") as f:
+            f.write(b"changed")
+        self.assertNotEqual(
+            get_dir_manifest(self.remote_dirpath, files, "*.zip", True)["a.zip"]["sha1"], "cached"
+        )
+
+    def test_read_write_sync_manifest(self):
+        self.assertEqual(read_sync_manifest(self.local_dirpath), {})
+
+        files = get_dir_manifest(self.remote_dirpath)
+        self.assertIsNone(write_sync_manifest(self.local_dirpath, files))
+        self.assertEqual(read_sync_manifest(self.local_dirpath), files)
+
+    def test_get_changed_files(self):
+        remote_files = get_dir_manifest(self.remote_dirpath, {}, "*.zip", True)
+        self.assertEqual(get_changed_files(remote_files, {}, self.local_dirpath), ["a.zip", "b.zip"])
+
+        for filename in ["a.zip", "b.zip"]:
+            shutil.copy(
+                os.path.join(self.remote_dirpath, filename),
+                os.path.join(self.local_dirpath, filename)
+            )
+        self.assertEqual(get_changed_files(remote_files, remote_files, self.local_dirpath), [])
+
+        local_files = json.loads(json.dumps(remote_files))
+        local_files["a.zip"]["sha1"] = "old"
+        self.assertEqual(get_changed_files(remote_files, local_files, self.local_dirpath), ["a.zip"])
+
+        os.remove(os.path.join(self.local_dirpath, "b.zip"))
+        self.assertEqual(
+            get_changed_files(remote_files, remote_files, self.local_dirpath), ["b.zip"]
+        )
+
+    def test_main_from_stdin(self):
+        # The downloader runs the script by piping it into python3 on the machine.
+        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), "sync_manifest.py")) as f:
+            script = f.read()
+
+        process = subprocess.run(
+            [sys.executable, "-", "--dir", self.remote_dirpath, "--include", "*.zip", "--top-level"],
+            input=script,
+            capture_output=True,
+            text=True
+        )
+        self.assertEqual(process.returncode, 0, process.stderr)
+
+        manifest = json.loads(process.stdout.splitlines()[-1])
+        self.assertEqual(manifest["version"], SYNC_MANIFEST_VERSION)
+        self.assertEqual(manifest["dirpath"], os.path.abspath(self.remote_dirpath))
+        self.assertEqual(sorted(manifest["files"].keys()), ["a.zip", "b.zip"])
+        self.assertEqual(read_sync_manifest(self.remote_dirpath), manifest["files"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import re
+import logging
+
+import pandas as pd
+
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from constants import REQUIRED_QOS_KEYS
+
+logger = logging.getLogger(__name__)
+
+# ? e.g. 600SEC_100B_5PUB_1SUB_REL_MC_0DUR_100LC with an optional file extension
+TEST_NAME_PATTERN = re.compile(
+    r"^(?P<duration_secs>\d+)SEC"
+    r"_(?P<datalen_bytes>\d+)B"
+    r"_(?P<pub_count>\d+)PUB"
+    r"_(?P<sub_count>\d+)SUB"
+    r"_(?P<use_reliable>REL|BE)"
+    r"_(?P<use_multicast>MC|UC)"
+    r"_(?P<durability_level>\d+)DUR"
+    r"_(?P<latency_count>\d+)LC"
+    r"(?:\..*)?$",
+    re.IGNORECASE,
+)
+
+INT_QOS_KEYS = [
+    "duration_secs",
+    "datalen_bytes",
+    "pub_count",
+    "sub_count",
+    "durability_level",
+    "latency_count",
+]
+
+QOS_DICT_CACHE_SIZE = 4096
+
+
+def get_test_name_from_combination_dict(
+    combination_dict: Mapping = {},
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the test name from the combination dict by concatenating the values of the dict together.
+
+    Params:
+        - combination_dict (Dict): Combination dict.
+
+    Returns:
+        - str: Test name if valid, None otherwise.
+        - error
+    """
+    if combination_dict is None:
+        return None, f"Combination dict is None."
+
+    if combination_dict == {}:
+        return None, f"No combination dict passed."
+
+    if set(combination_dict.keys()) != set(REQUIRED_QOS_KEYS):
+        return None, f"Invalid configuration options in combination dict."
+
+    for key, value in combination_dict.items():
+        if value == "":
+            return None, f"Value for {key} is empty."
+
+    test_name = "{}SEC_{}B_{}PUB_{}SUB_{}_{}_{}DUR_{}LC".format(
+        combination_dict["duration_secs"],
+        combination_dict["datalen_bytes"],
+        combination_dict["pub_count"],
+        combination_dict["sub_count"],
+        "REL" if combination_dict["use_reliable"] else "BE",
+        "MC" if combination_dict["use_multicast"] else "UC",
+        combination_dict["durability_level"],
+        combination_dict["latency_count"],
+    )
+
+    return test_name, None
+
+
+@lru_cache(maxsize=QOS_DICT_CACHE_SIZE)
+def get_qos_dict_from_test_name(test_name: str = "") -> Optional[Mapping]:
+    """
+    Take test name and get qos settings from it.
+    e.g. 100SEC_100B_5PUB_1SUB_REL_MC_0DUR_100LC returns:
+    {
+        "datalen_bytes": 100,
+        "durability_level": 0,
+        "duration_secs": 100,
+        "latency_count": 100,
+        "pub_count": 5,
+        "sub_count": 1,
+        "use_multicast": true,
+        "use_reliable": true
+    }
+
+    Results are cached so the returned mapping is read only. Use dict() on it to get
+    a copy that can be changed.
+
+    Params:
+        - test_name (str): Test name, optionally with a file extension.
+
+    Returns:
+        - Mapping: QoS settings if successful, None if not.
+    """
+    if test_name == "":
+        logger.error("No test name passed to get_qos_dict_from_test_name().")
+        return None
+
+    match = TEST_NAME_PATTERN.match(test_name)
+    if match is None:
+        logger.error(f"Couldn't get qos settings from test name: {test_name}")
+        return None
+
+    qos_dict = {key: int(match.group(key)) for key in INT_QOS_KEYS}
+    qos_dict["use_reliable"] = match.group("use_reliable").upper() == "REL"
+    qos_dict["use_multicast"] = match.group("use_multicast").upper() == "MC"
+
+    return MappingProxyType({key: qos_dict[key] for key in REQUIRED_QOS_KEYS})
+
+
+def get_qos_df_from_test_names(
+    test_names: Optional[pd.Series] = None,
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Decode a whole column of test names at once. Each distinct name is only parsed
+    once, which matters for ESS files where the same test appears on many rows.
+
+    Params:
+        - test_names (pd.Series): Test names, optionally with file extensions.
+
+    Returns:
+        - pd.DataFrame: One column per qos setting with the same index as test_names.
+            Names that can't be decoded get missing values.
+        - error
+    """
+    if test_names is None:
+        return None, "No test names passed."
+
+    test_names_as_strings = test_names.astype("string").fillna("")
+    unique_test_names = pd.Series(test_names_as_strings.unique(), dtype="string")
+    unique_qos_df = unique_test_names.str.extract(TEST_NAME_PATTERN)
+
+    for key in INT_QOS_KEYS:
+        unique_qos_df[key] = pd.to_numeric(unique_qos_df[key]).astype("Int64")
+
+    for key, true_value in [("use_reliable", "REL"), ("use_multicast", "MC")]:
+        unique_qos_df[key] = (unique_qos_df[key].str.upper() == true_value).astype(
+            "boolean"
+        )
+
+    name_indexes = pd.Index(unique_test_names).get_indexer(test_names_as_strings)
+    qos_df = unique_qos_df.iloc[name_indexes][REQUIRED_QOS_KEYS]
+    qos_df.index = test_names.index
+
+    return qos_df, None
+
+
+def get_qos_dicts_from_test_names(
+    test_names: List[str] = [], bools_as_ints: bool = False
+) -> List[Optional[Dict]]:
+    """
+    Decode a list of test names at once with get_qos_df_from_test_names(), e.g.
+    every test csv of a campaign before building its dataset.
+
+    Params:
+        - test_names (List[str]): Test names, optionally with file extensions.
+        - bools_as_ints (bool): Give use_reliable and use_multicast as 1/0 like
+            the dataset columns.
+
+    Returns:
+        - List[Dict]: QoS settings per test name in the same order. None for
+            names that can't be decoded.
+    """
+    if len(test_names) == 0:
+        return []
+
+    qos_df, error = get_qos_df_from_test_names(pd.Series(test_names, dtype="object"))
+    if error:
+        return [None] * len(test_names)
+
+    is_decoded = qos_df.notna().all(axis=1).tolist()
+
+    qos_dicts = []
+    for test_name, decoded, qos_record in zip(test_names, is_decoded, qos_df.to_dict("records")):
+        if not decoded:
+            logger.error(f"Couldn't get qos settings from test name: {test_name}")
+            qos_dicts.append(None)
+            continue
+
+        qos_dicts.append({
+            key: int(value) if key in INT_QOS_KEYS or bools_as_ints else bool(value)
+            for key, value in qos_record.items()
+        })
+
+    return qos_dicts
@@ -0,0 +1,170 @@
+import time
+import asyncio
+
+from typing import Dict, Optional, Tuple
+
+# ? A machine is only ready once sshd answers with its banner. An open port alone
+# ? isn't enough because the kernel accepts connections a while before sshd can
+# ? actually authenticate anyone.
+SSH_PORT = 22
+SSH_BANNER_PREFIX = "SSH-"
+
+# ? sshd may send a few lines of text before the version line (RFC 4253 4.2).
+SSH_BANNER_MAX_LINES = 5
+
+READINESS_CONNECT_TIMEOUT_SECS = 3
+READINESS_INITIAL_BACKOFF_SECS = 0.5
+READINESS_MAX_BACKOFF_SECS = 8
+READINESS_BACKOFF_MULTIPLIER = 2
+
+# ? sshd keeps answering for a moment after "sudo reboot" returns so a rebooted
+# ? machine is probed at this interval until it stops answering before waiting
+# ? for it to come back. Otherwise the old sshd would count as ready.
+READINESS_DOWN_PROBE_INTERVAL_SECS = 0.5
+
+
+def get_backoff_secs(probe_count: int = 1) -> float:
+    """
+    Get how long to wait after the nth failed probe. Starts short so machines
+    that boot fast aren't left idle and caps out so a slow machine is still
+    noticed soon after it comes back.
+    """
+    backoff_secs = READINESS_INITIAL_BACKOFF_SECS * (
+        READINESS_BACKOFF_MULTIPLIER ** max(probe_count - 1, 0)
+    )
+
+    return min(backoff_secs, READINESS_MAX_BACKOFF_SECS)
+
+
+async def read_ssh_banner(
+    ip: str = "",
+    port: int = SSH_PORT,
+    timeout_secs: float = READINESS_CONNECT_TIMEOUT_SECS,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Connect to sshd and read its version banner without logging in.
+
+    Params:
+        - ip (str): IP of the machine.
+        - port (int): SSH port.
+        - timeout_secs (float): Time allowed for each of connecting and reading.
+
+    Returns:
+        - str: Banner e.g. "SSH-2.0-OpenSSH_9.2p1 Debian-2".
+        - error
+    """
+    if ip == "":
+        return None, "No IP passed."
+
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip, port), timeout=timeout_secs
+        )
+    except asyncio.TimeoutError:
+        return None, f"Timed out connecting to {ip}:{port}."
+    except OSError as e:
+        return None, f"Couldn't connect to {ip}:{port}: {e}"
+
+    try:
+        for _ in range(SSH_BANNER_MAX_LINES):
+            line = await asyncio.wait_for(reader.readline(), timeout=timeout_secs)
+            if line == b"":
+                return None, f"{ip}:{port} closed the connection without a banner."
+
+            banner = line.decode("utf-8", errors="replace").strip()
+            if banner.startswith(SSH_BANNER_PREFIX):
+                return banner, None
+
+        return None, f"No SSH banner from {ip}:{port}."
+
+    except asyncio.TimeoutError:
+        return None, f"Timed out waiting for the SSH banner from {ip}:{port}."
+    except OSError as e:
+        return None, f"Couldn't read the SSH banner from {ip}:{port}: {e}"
+
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def wait_until_ssh_ready(
+    machine_config: Dict = {},
+    deadline_secs: float = 0,
+    rebooted_at_by_ip: Dict[str, float] = {},
+    port: int = SSH_PORT,
+) -> Dict:
+    """
+    Probe a machine's sshd with exponential backoff until it answers with a banner
+    or the deadline passes. Meant to be run on every machine at once with
+    orchestrator.run_stage_on_machines().
+    A rebooted machine first has to stop answering so the sshd that was running
+    before the reboot isn't mistaken for the one after it.
+
+    Params:
+        - machine_config (Dict): Machine config.
+        - deadline_secs (float): Time to keep probing for.
+        - rebooted_at_by_ip (Dict): {ip: time.monotonic() when the reboot was sent}
+            for machines that were rebooted.
+        - port (int): SSH port.
+
+    Returns:
+        - Dict: {"status", "probe_count", "banner", "boot_to_ready_secs"}
+            - status is "ready" or starts with "error"
+            - boot_to_ready_secs is None if the machine wasn't rebooted
+    """
+    machine_ip = machine_config['ip']
+    rebooted_at = rebooted_at_by_ip.get(machine_ip)
+
+    start_time = time.monotonic()
+    probe_count = 0
+
+    if rebooted_at is not None:
+        while True:
+            probe_count += 1
+            _, error = await read_ssh_banner(machine_ip, port)
+            if error is not None:
+                break
+
+            remaining_secs = deadline_secs - (time.monotonic() - start_time)
+            if remaining_secs <= 0:
+                return {
+                    "status": f"error: still up after {probe_count} probes since the reboot",
+                    "probe_count": probe_count,
+                    "banner": None,
+                    "boot_to_ready_secs": None,
+                }
+
+            await asyncio.sleep(min(READINESS_DOWN_PROBE_INTERVAL_SECS, remaining_secs))
+
+    down_probe_count = probe_count
+
+    while True:
+        probe_count += 1
+        banner, error = await read_ssh_banner(machine_ip, port)
+        ready_time = time.monotonic()
+
+        if error is None:
+            return {
+                "status": "ready",
+                "probe_count": probe_count,
+                "banner": banner,
+                "boot_to_ready_secs": (
+                    None if rebooted_at is None else round(ready_time - rebooted_at, 3)
+                ),
+            }
+
+        remaining_secs = deadline_secs - (ready_time - start_time)
+        if remaining_secs <= 0:
+            return {
+                "status": f"error: not ready after {probe_count} probes: {error}",
+                "probe_count": probe_count,
+                "banner": None,
+                "boot_to_ready_secs": None,
+            }
+
+        await asyncio.sleep(
+            min(get_backoff_secs(probe_count - down_probe_count), remaining_secs)
+        )
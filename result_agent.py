@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import math
+import hashlib
+import argparse
+
+from typing import Dict, List, Optional, Tuple
+
+# ? Runs on each machine once a test has finished, from the directory perftest
+# ? writes its csvs to. It checks every csv has its header and summary footer and
+# ? works out the per-file latency/throughput stats, then prints one JSON manifest
+# ? so the controller can accept or reject the test before downloading anything.
+# ? The Pis don't have pandas so this only uses the standard library and can't
+# ? import anything else from AutoPerf.
+
+RESULT_MANIFEST_VERSION = 1
+
+# ? Same windows and markers data_summariser.read_perftest_csv() uses.
+HEADER_SEARCH_LINES = 5
+PUB_HEADER_MARKERS = ["Ave", "Length (Bytes)"]
+SUB_HEADER_MARKERS = ["Length (Bytes)"]
+PUB_FOOTER_MARKER = "latency summary"
+SUB_FOOTER_MARKER = "throughput summary"
+
+# ? {lower case column name: metric name}
+SUB_METRIC_COLUMNS = {
+    "total samples": "total_samples",
+    "samples/s": "samples_per_sec",
+    "mbps": "mbps",
+    "lost samples": "lost_samples",
+    "lost samples (%)": "lost_samples_percent",
+}
+
+PERCENTILES = [50, 90, 99]
+
+
+def get_markers_from_filename(filename: str = "") -> Tuple[List[str], str]:
+    """
+    Get the header markers and footer marker of a pub_n.csv or sub_n.csv.
+    """
+    if filename.startswith("pub_"):
+        return PUB_HEADER_MARKERS, PUB_FOOTER_MARKER
+
+    return SUB_HEADER_MARKERS, SUB_FOOTER_MARKER
+
+
+def get_percentile(sorted_values: List[float] = [], percent: float = 0) -> Optional[float]:
+    """
+    Get a percentile with linear interpolation, the same as numpy's default.
+    """
+    if len(sorted_values) == 0:
+        return None
+
+    position = (len(sorted_values) - 1) * percent / 100
+    lower_index = math.floor(position)
+    upper_index = math.ceil(position)
+    fraction = position - lower_index
+
+    return sorted_values[lower_index] + (
+        sorted_values[upper_index] - sorted_values[lower_index]
+    ) * fraction
+
+
+def get_metric_stats(values: List[float] = []) -> Dict:
+    """
+    Get {"count", "mean", "std", "min", "max", "p50", "p90", "p99", "last"} of a
+    column. std is the sample standard deviation like pandas'.
+    """
+    if len(values) == 0:
+        return {"count": 0}
+
+    count = len(values)
+    mean = sum(values) / count
+    std = None
+    if count > 1:
+        std = math.sqrt(sum([(_ - mean) ** 2 for _ in values]) / (count - 1))
+
+    sorted_values = sorted(values)
+    stats = {
+        "count": count,
+        "mean": mean,
+        "std": std,
+        "min": sorted_values[0],
+        "max": sorted_values[-1],
+    }
+    for percent in PERCENTILES:
+        stats[f"p{percent}"] = get_percentile(sorted_values, percent)
+    stats["last"] = values[-1]
+
+    return stats
+
+
+def parse_float(value: str = "") -> Optional[float]:
+    try:
+        number = float(value.strip())
+    except ValueError:
+        return None
+
+    if math.isnan(number):
+        return None
+
+    return number
+
+
+def get_metric_columns(filename: str = "", column_names: List[str] = []) -> Dict[int, str]:
+    """
+    Get {column index: metric name} for the columns whose stats go in the manifest.
+    pub_0.csv only has its latency column summarised.
+    """
+    metric_columns = {}
+    for column_index, column_name in enumerate(column_names):
+        column_name = column_name.strip().lower()
+
+        if filename.startswith("pub_"):
+            if "latency" in column_name:
+                metric_columns[column_index] = "latency_us"
+                break
+            continue
+
+        if column_name in SUB_METRIC_COLUMNS:
+            metric_columns[column_index] = SUB_METRIC_COLUMNS[column_name]
+
+    return metric_columns
+
+
+def check_result_file(filepath: str = "") -> Dict:
+    """
+    Check one perftest csv and work out its stats in a single pass over the file.
+
+    Params:
+        - filepath (str): Path to the pub_n.csv or sub_n.csv file.
+
+    Returns:
+        - Dict: {"filename", "size_bytes", "sha1", "header_found", "footer_found",
+            "row_count", "metrics", "error"}
+            - metrics is {metric name: get_metric_stats()}
+            - error is None if the file is usable
+    """
+    filename = os.path.basename(filepath)
+    file_check = {
+        "filename": filename,
+        "size_bytes": 0,
+        "sha1": None,
+        "header_found": False,
+        "footer_found": False,
+        "row_count": 0,
+        "metrics": {},
+        "error": None,
+    }
+
+    if not os.path.isfile(filepath):
+        file_check["error"] = f"{filename} doesn't exist."
+        return file_check
+
+    header_markers, footer_marker = get_markers_from_filename(filename)
+
+    file_hash = hashlib.sha1()
+    metric_columns = {}
+    metric_values = {}
+    column_count = 0
+
+    # ? Lines are hashed as they're read so the file is only read once.
+    with open(filepath, "rb") as f:
+        for line_index, line in enumerate(f):
+            file_hash.update(line)
+            file_check["size_bytes"] += len(line)
+
+            if file_check["footer_found"]:
+                continue
+
+            decoded_line = line.decode("utf-8", errors="replace")
+
+            if not file_check["header_found"]:
+                if line_index >= HEADER_SEARCH_LINES:
+                    continue
+
+                if all([_ in decoded_line for _ in header_markers]):
+                    column_names = decoded_line.strip().split(",")
+                    column_count = len(column_names)
+                    metric_columns = get_metric_columns(filename, column_names)
+                    metric_values = {_: [] for _ in metric_columns.values()}
+                    file_check["header_found"] = True
+                continue
+
+            if footer_marker in decoded_line.lower():
+                file_check["footer_found"] = True
+                continue
+
+            fields = decoded_line.strip().split(",")
+            if len(fields) != column_count:
+                continue
+
+            file_check["row_count"] += 1
+            for column_index, metric_name in metric_columns.items():
+                value = parse_float(fields[column_index])
+                if value is not None:
+                    metric_values[metric_name].append(value)
+
+    file_check["sha1"] = file_hash.hexdigest()
+    file_check["metrics"] = {
+        metric_name: get_metric_stats(values)
+        for metric_name, values in metric_values.items()
+    }
+
+    if file_check["size_bytes"] == 0:
+        file_check["error"] = f"{filename} is empty."
+    elif not file_check["header_found"]:
+        file_check["error"] = f"Couldn't find the header row in {filename}."
+    elif file_check["row_count"] == 0:
+        file_check["error"] = f"{filename} has no data rows."
+
+    return file_check
+
+
+def get_result_manifest(results_dir: str = "", filenames: List[str] = []) -> Dict:
+    """
+    Check every expected csv in results_dir.
+
+    Params:
+        - results_dir (str): Directory perftest wrote the csvs to.
+        - filenames (List[str]): csvs the machine's script was expected to write.
+
+    Returns:
+        - Dict: {"version", "files"} where files is a check_result_file() per csv.
+    """
+    return {
+        "version": RESULT_MANIFEST_VERSION,
+        "files": [
+            check_result_file(os.path.join(results_dir, filename))
+            for filename in filenames
+        ],
+    }
+
+
+def main(sys_args: List[str] = []) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check perftest csvs and print a JSON manifest of them."
+    )
+    parser.add_argument("--results-dir", required=True)
+    parser.add_argument("filenames", nargs="+")
+    args = parser.parse_args(sys_args)
+
+    manifest = get_result_manifest(args.results_dir, args.filenames)
+    sys.stdout.write(json.dumps(manifest) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,271 @@
+import os
+import json
+import shlex
+import hashlib
+import threading
+
+from typing import Dict, List, Optional, Tuple
+
+from completion import get_output_files_from_script
+from orchestrator import run_command
+from ssh_pool import get_ssh_command, get_scp_upload_command, quote_remote_path
+
+# ? result_agent.py is copied next to perftest on each machine and run there once
+# ? the test has finished. Its manifest is enough to accept or reject the test, so
+# ? a rejected test's csvs never have to cross the Pis' slow links. Tests the
+# ? agent accepts are still downloaded in full for summarising.
+# ? If the agent can't run on a machine the test falls back to being checked
+# ? after it's downloaded, like before.
+
+RESULT_AGENT_FILENAME = "result_agent.py"
+RESULT_AGENT_LOCAL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), RESULT_AGENT_FILENAME
+)
+RESULT_AGENT_TIMEOUT_SECS = 60
+RESULT_AGENT_UPLOAD_TIMEOUT_SECS = 30
+
+# ? Written into each test's results directory.
+RESULT_MANIFEST_FILENAME = "result_manifest.json"
+
+# ? {ip: sha1 of the agent last copied to it} so each machine only gets the agent
+# ? once per run, or again if it changes.
+deployed_agent_sha1s: Dict[str, str] = {}
+deployed_agent_lock = threading.Lock()
+
+
+def get_result_agent_sha1() -> str:
+    with open(RESULT_AGENT_LOCAL_PATH, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def get_remote_result_agent_path(perftest_exec_path: str = "") -> str:
+    return os.path.join(os.path.dirname(perftest_exec_path), RESULT_AGENT_FILENAME)
+
+
+def get_result_agent_command(
+    perftest_exec_path: str = "", output_files: List[str] = []
+) -> str:
+    """
+    Get the remote command that runs the agent over the machine's csvs.
+    """
+    results_dir = os.path.dirname(perftest_exec_path)
+
+    return "python3 {} --results-dir {} {}".format(
+        quote_remote_path(get_remote_result_agent_path(perftest_exec_path)),
+        quote_remote_path(results_dir),
+        " ".join([shlex.quote(_) for _ in output_files])
+    )
+
+
+def parse_result_manifest(agent_output: str = "") -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get the manifest from the agent's stdout. The manifest is the last line so
+    anything the shell prints before it is ignored.
+
+    Params:
+        - agent_output (str): stdout of the agent.
+
+    Returns:
+        - Dict: {"version", "files"}
+        - error
+    """
+    lines = [_ for _ in agent_output.splitlines() if _.strip() != ""]
+    if len(lines) == 0:
+        return None, "No manifest received."
+
+    try:
+        manifest = json.loads(lines[-1])
+    except json.JSONDecodeError as e:
+        return None, f"Couldn't decode manifest: {e}"
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('files'), list):
+        return None, "Manifest has no files."
+
+    return manifest, None
+
+
+async def deploy_result_agent(machine_config: Dict = {}) -> Optional[str]:
+    """
+    Copy the agent next to perftest on the machine unless this run already has.
+
+    Returns:
+        - error
+    """
+    machine_ip = machine_config['ip']
+    agent_sha1 = get_result_agent_sha1()
+
+    with deployed_agent_lock:
+        if deployed_agent_sha1s.get(machine_ip) == agent_sha1:
+            return None
+
+    upload_result = await run_command(
+        get_scp_upload_command(
+            machine_config['username'],
+            machine_ip,
+            RESULT_AGENT_LOCAL_PATH,
+            get_remote_result_agent_path(machine_config['perftest_exec_path']),
+            machine_config['ssh_key_path']
+        ),
+        RESULT_AGENT_UPLOAD_TIMEOUT_SECS
+    )
+    if upload_result['return_code'] != 0:
+        return f"Couldn't copy {RESULT_AGENT_FILENAME}: {upload_result['stderr']}"
+
+    with deployed_agent_lock:
+        deployed_agent_sha1s[machine_ip] = agent_sha1
+
+    return None
+
+
+async def check_results_on_machine(machine_config: Dict = {}) -> Dict:
+    """
+    Run the agent on the machine over the csvs its script wrote. Meant to be run
+    on every machine with results at once with orchestrator.run_stage_on_machines().
+
+    Params:
+        - machine_config (Dict): Machine config with the script it ran.
+
+    Returns:
+        - Dict: {"status", "manifest"}
+            - status is "complete" or starts with "error" if the agent couldn't run
+            - manifest is None if the agent couldn't run
+    """
+    error = await deploy_result_agent(machine_config)
+    if error:
+        return {"status": f"error: {error}", "manifest": None}
+
+    agent_result = await run_command(
+        get_ssh_command(
+            machine_config['username'],
+            machine_config['ip'],
+            get_result_agent_command(
+                machine_config['perftest_exec_path'],
+                get_output_files_from_script(machine_config['script'])
+            ),
+            machine_config['ssh_key_path']
+        ),
+        RESULT_AGENT_TIMEOUT_SECS
+    )
+    if agent_result['return_code'] != 0:
+        # The next test copies the agent again in case it's gone missing.
+        with deployed_agent_lock:
+            deployed_agent_sha1s.pop(machine_config['ip'], None)
+
+        return {
+            "status": f"error: result agent failed: {agent_result['stderr']}",
+            "manifest": None
+        }
+
+    manifest, error = parse_result_manifest(agent_result['stdout'])
+    if error:
+        return {"status": f"error: {error}", "manifest": None}
+
+    return {"status": "complete", "manifest": manifest}
+
+
+def get_result_check(
+    check_results: Dict[str, Dict] = {},
+    machine_configs: List[Dict] = [],
+    expected_file_count: Optional[int] = None
+) -> Dict:
+    """
+    Decide from the agents' manifests whether a test's results are worth
+    downloading. The checks are the same ones validate_staged_test() does on
+    downloaded csvs.
+
+    Params:
+        - check_results (Dict): {ip: check_results_on_machine() result}
+        - machine_configs (List[Dict]): Machines that were expected to write csvs.
+        - expected_file_count (int): Number of csvs the test should have written.
+
+    Returns:
+        - Dict: {"accepted", "end_status", "error", "failed_machine_ip", "manifests"}
+            - accepted is None if an agent couldn't run so the test has to be
+                checked after it's downloaded
+            - manifests is {ip: manifest} for every agent that ran
+    """
+    result_check = {
+        "accepted": None,
+        "end_status": None,
+        "error": None,
+        "failed_machine_ip": None,
+        "manifests": {
+            ip: check_result['manifest']
+            for ip, check_result in check_results.items()
+            if check_result.get('manifest') is not None
+        },
+    }
+
+    machine_ips = [_['ip'] for _ in machine_configs]
+    if len(machine_ips) == 0 or any([_ not in result_check['manifests'] for _ in machine_ips]):
+        return result_check
+
+    # Missing files are the only ones without a sha1.
+    file_checks_by_ip = {
+        ip: [
+            file_check for file_check in result_check['manifests'][ip]['files']
+            if file_check.get('sha1') is not None
+        ]
+        for ip in machine_ips
+    }
+
+    file_count = sum([len(_) for _ in file_checks_by_ip.values()])
+    if expected_file_count is not None and file_count != expected_file_count:
+        result_check.update({
+            "accepted": False,
+            "end_status": "file_count_mismatch",
+            "error": f"expected {expected_file_count} files and found {file_count} files instead.",
+            "failed_machine_ip": next(
+                (
+                    ip for ip in machine_ips
+                    if any([_.get('sha1') is None for _ in result_check['manifests'][ip]['files']])
+                ),
+                None
+            ),
+        })
+        return result_check
+
+    for ip in machine_ips:
+        for file_check in file_checks_by_ip[ip]:
+            if file_check.get('error') is not None:
+                result_check.update({
+                    "accepted": False,
+                    "end_status": "empty_file_found",
+                    "error": file_check['error'],
+                    "failed_machine_ip": ip,
+                })
+                return result_check
+
+    result_check['accepted'] = True
+
+    return result_check
+
+
+def get_files_without_footer(result_check: Dict = {}) -> List[str]:
+    return sorted([
+        file_check['filename']
+        for manifest in result_check.get('manifests', {}).values()
+        for file_check in manifest['files']
+        if file_check.get('sha1') is not None and not file_check.get('footer_found', False)
+    ])
+
+
+def write_result_manifests(result_check: Dict = {}, results_dirpath: str = "") -> Optional[str]:
+    """
+    Write the agents' manifests into a test's results directory so the per-file
+    stats are kept with the csvs.
+
+    Returns:
+        - error
+    """
+    if len(result_check.get('manifests', {})) == 0:
+        return None
+
+    try:
+        os.makedirs(results_dirpath, exist_ok=True)
+        with open(os.path.join(results_dirpath, RESULT_MANIFEST_FILENAME), "w") as f:
+            json.dump(result_check['manifests'], f, indent=4)
+    except Exception as e:
+        return f"Couldn't write {RESULT_MANIFEST_FILENAME}: {e}"
+
+    return None
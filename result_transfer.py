@@ -0,0 +1,217 @@
+import os
+import re
+import hashlib
+import tarfile
+import tempfile
+import threading
+import subprocess
+
+from typing import Dict, List, Optional, Tuple
+
+from ssh_pool import get_ssh_command, quote_remote_path
+
+TAR_STREAM_TIMEOUT_SECS = 120
+TAR_STREAM_CHUNK_BYTES = 1024 * 1024
+TAR_STREAM_CANCEL_POLL_SECS = 0.5
+
+SHA1SUM_LINE_PATTERN = re.compile(r"^(?P<sha1>[0-9a-f]{40}) [ *](?P<filename>.+\.csv)$")
+
+
+def get_tar_stream_command(results_dir: str = "") -> str:
+    """
+    Get the remote command that writes the sha1 of every csv to stderr and then
+    streams all of them as one gzipped tar on stdout. gzip -1 keeps the Pi's CPU
+    from becoming the bottleneck while still shrinking the csvs several times.
+    """
+    return "cd {} && sha1sum -- *.csv 1>&2 && tar -cf - -- *.csv | gzip -1".format(
+        quote_remote_path(results_dir)
+    )
+
+
+def parse_sha1sum_output(sha1sum_output: str = "") -> Dict[str, str]:
+    """
+    Get {filename: sha1} from sha1sum output, ignoring any other lines such as
+    ssh warnings that end up on the same stream.
+    """
+    checksums = {}
+    for line in sha1sum_output.splitlines():
+        match = SHA1SUM_LINE_PATTERN.match(line.strip())
+        if match:
+            checksums[os.path.basename(match.group("filename"))] = match.group("sha1")
+
+    return checksums
+
+
+def extract_csv_tar_stream(
+    tar_stream=None, local_results_dirpath: str = ""
+) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """
+    Unpack csvs from a gzipped tar stream straight into a directory, hashing each
+    file as it's written. Nothing but plain .csv files are extracted and any
+    directories in member names are dropped.
+    If the stream breaks, the file being written is removed and the files that
+    were fully extracted before it are still returned alongside the error.
+
+    Params:
+        - tar_stream: Readable binary stream e.g. the stdout of an ssh process.
+        - local_results_dirpath (str): Directory to write the csvs to.
+
+    Returns:
+        - Dict: {filename: sha1} of the fully extracted files.
+        - error
+    """
+    if tar_stream is None:
+        return None, "No tar stream passed."
+
+    if local_results_dirpath == "":
+        return None, "No local results dirpath passed."
+
+    os.makedirs(local_results_dirpath, exist_ok=True)
+
+    checksums = {}
+    local_filepath = None
+    try:
+        with tarfile.open(fileobj=tar_stream, mode="r|gz") as tar:
+            for member in tar:
+                filename = os.path.basename(member.name)
+                if not member.isfile() or not filename.endswith(".csv"):
+                    continue
+
+                member_file = tar.extractfile(member)
+                file_hash = hashlib.sha1()
+                local_filepath = os.path.join(local_results_dirpath, filename)
+                with open(local_filepath, "wb") as f:
+                    for chunk in iter(lambda: member_file.read(TAR_STREAM_CHUNK_BYTES), b""):
+                        file_hash.update(chunk)
+                        f.write(chunk)
+
+                checksums[filename] = file_hash.hexdigest()
+                local_filepath = None
+
+    except (tarfile.TarError, EOFError, OSError) as e:
+        if local_filepath is not None and os.path.exists(local_filepath):
+            os.remove(local_filepath)
+
+        return checksums, f"Couldn't unpack tar stream: {e}"
+
+    return checksums, None
+
+
+def kill_process_when_cancelled(
+    process: Optional[subprocess.Popen] = None, cancel_event: Optional[threading.Event] = None
+) -> None:
+    """
+    Kill the process once cancel_event is set. Returns without killing it if the
+    process exits first.
+    """
+    while not cancel_event.wait(TAR_STREAM_CANCEL_POLL_SECS):
+        if process.poll() is not None:
+            return
+
+    process.kill()
+
+
+def download_csvs_as_tar_stream(
+    username: str = "",
+    machine_ip: str = "",
+    results_dir: str = "",
+    local_results_dirpath: str = "",
+    cancel_event: Optional[threading.Event] = None,
+) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    Download every csv in results_dir over a single ssh channel and check each one
+    against the sha1 computed on the machine.
+    When the transfer fails part way, the files that were fully extracted and
+    match their sha1 are still returned alongside the error so only the rest
+    need downloading again.
+
+    Params:
+        - username (str): Username on the machine.
+        - machine_ip (str): IP of the machine.
+        - results_dir (str): Directory on the machine holding the csvs.
+        - local_results_dirpath (str): Directory to write the csvs to.
+        - cancel_event (threading.Event): Kills the ssh process when set.
+
+    Returns:
+        - List[str]: Filenames downloaded and verified.
+        - error
+    """
+    if username == "":
+        return None, "No username passed."
+
+    if machine_ip == "":
+        return None, "No machine IP passed."
+
+    if results_dir == "":
+        return None, "No results dir passed."
+
+    if local_results_dirpath == "":
+        return None, "No local results dirpath passed."
+
+    ssh_command = get_ssh_command(
+        username, machine_ip, get_tar_stream_command(results_dir)
+    )
+
+    if cancel_event is None:
+        cancel_event = threading.Event()
+
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            ssh_command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+        )
+
+        # ? The extraction blocks on the stream so the timeout has to kill the process.
+        timer = threading.Timer(TAR_STREAM_TIMEOUT_SECS, process.kill)
+        timer.start()
+        cancel_watcher = threading.Thread(
+            target=kill_process_when_cancelled, args=(process, cancel_event), daemon=True
+        )
+        cancel_watcher.start()
+        try:
+            checksums, extract_error = extract_csv_tar_stream(
+                process.stdout, local_results_dirpath
+            )
+            process.stdout.close()
+            return_code = process.wait()
+            timed_out = not timer.is_alive()
+        finally:
+            timer.cancel()
+
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode("utf-8", errors="replace").strip()
+
+    checksums = checksums or {}
+    expected_checksums = parse_sha1sum_output(stderr)
+    verified_files = sorted([
+        filename
+        for filename, sha1 in expected_checksums.items()
+        if checksums.get(filename) == sha1
+    ])
+
+    if cancel_event.is_set():
+        return verified_files, "Cancelled."
+
+    if timed_out:
+        return verified_files, f"Timed out after {TAR_STREAM_TIMEOUT_SECS} seconds."
+
+    if return_code != 0:
+        return verified_files, f"Tar stream failed with return code {return_code}: {stderr}"
+
+    if extract_error:
+        return verified_files, extract_error
+
+    if len(expected_checksums) == 0:
+        return verified_files, "No checksums received."
+
+    missing_files = sorted(set(expected_checksums) - set(checksums))
+    if len(missing_files) > 0:
+        return verified_files, f"Files missing from tar stream: {', '.join(missing_files)}"
+
+    mismatched_files = sorted(set(expected_checksums) - set(verified_files))
+    if len(mismatched_files) > 0:
+        return verified_files, f"Checksum mismatch for: {', '.join(mismatched_files)}"
+
+    return verified_files, None
@@ -0,0 +1,281 @@
+import os
+import shlex
+import hashlib
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ? Downloads files over several SFTP channels of one SSH connection at once.
+# ? Each file is written to <file>.part and hashed as it arrives. If the
+# ? connection drops, the next attempt hashes what's already in the .part file
+# ? and carries on from that byte instead of starting again. A finished file's
+# ? sha1 is kept in <file>.sha1 so later runs can skip it without re-reading it.
+# ? Callers that track hashes themselves, like the sync mode of the full results
+# ? downloader, turn the .sha1 files off so they don't end up in their tree.
+
+DOWNLOAD_STREAM_COUNT = 4
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+DOWNLOAD_ATTEMPT_COUNT = 3
+
+PARTIAL_FILE_SUFFIX = ".part"
+HASH_FILE_SUFFIX = ".sha1"
+
+
+def get_partial_path(local_path: str = "") -> str:
+    return f"{local_path}{PARTIAL_FILE_SUFFIX}"
+
+
+def get_hash_path(local_path: str = "") -> str:
+    return f"{local_path}{HASH_FILE_SUFFIX}"
+
+
+def hash_local_file(filepath: str = "", file_hash=None):
+    """
+    Feed a local file into a hash in chunks.
+
+    Params:
+        - filepath (str): File to hash.
+        - file_hash: hashlib object to update. A new sha1 if None.
+
+    Returns:
+        - The updated hashlib object.
+    """
+    if file_hash is None:
+        file_hash = hashlib.sha1()
+
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_BYTES), b""):
+            file_hash.update(chunk)
+
+    return file_hash
+
+
+def read_recorded_hash(local_path: str = "") -> Optional[str]:
+    """
+    Get the sha1 recorded when local_path was downloaded or None if it wasn't
+    recorded or the file has changed since.
+    """
+    hash_path = get_hash_path(local_path)
+    if not os.path.exists(local_path) or not os.path.exists(hash_path):
+        return None
+
+    if os.path.getmtime(hash_path) < os.path.getmtime(local_path):
+        return None
+
+    with open(hash_path, "r") as f:
+        return f.read().strip() or None
+
+
+def write_recorded_hash(local_path: str = "", sha1: str = "") -> None:
+    with open(get_hash_path(local_path), "w") as f:
+        f.write(f"{sha1}\n")
+
+
+def parse_sha1sum_output(sha1sum_output: str = "") -> Dict[str, str]:
+    """
+    Get {filename: sha1} from sha1sum's output.
+    """
+    sha1s = {}
+    for line in sha1sum_output.splitlines():
+        parts = line.strip().split(maxsplit=1)
+        if len(parts) != 2:
+            continue
+
+        sha1, filename = parts
+        sha1s[os.path.basename(filename.lstrip("*"))] = sha1
+
+    return sha1s
+
+
+def get_remote_hashes(
+    ssh, remote_dirpath: str = "", filenames: List[str] = []
+) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """
+    Hash several remote files with one sha1sum call.
+
+    Params:
+        - ssh: Connected paramiko.SSHClient.
+        - remote_dirpath (str): Directory the files are in.
+        - filenames (List[str]): Files to hash.
+
+    Returns:
+        - Dict: {filename: sha1}
+        - error
+    """
+    if len(filenames) == 0:
+        return {}, None
+
+    stdin, stdout, stderr = ssh.exec_command(
+        "cd {} && sha1sum -- {}".format(
+            shlex.quote(remote_dirpath),
+            " ".join([shlex.quote(_) for _ in filenames])
+        )
+    )
+    sha1sum_output = stdout.read().decode()
+    exit_status = stdout.channel.recv_exit_status()
+
+    sha1s = parse_sha1sum_output(sha1sum_output)
+    if exit_status != 0 and len(sha1s) == 0:
+        return None, f"Couldn't hash files in {remote_dirpath}: {stderr.read().decode()}"
+
+    return sha1s, None
+
+
+def download_file(
+    sftp,
+    remote_path: str = "",
+    local_path: str = "",
+    remote_size: Optional[int] = None,
+    remote_sha1: Optional[str] = None,
+    record_hash: bool = True
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Download one file, carrying on from its .part file if there is one.
+
+    Params:
+        - sftp: paramiko.SFTPClient or anything with the same open().
+        - remote_path (str): File to download.
+        - local_path (str): Where to put it.
+        - remote_size (int): Size of the remote file.
+        - remote_sha1 (str): sha1 of the remote file. Not checked if None.
+        - record_hash (bool): Keep the sha1 in <file>.sha1 and skip the file if it
+            matches. Otherwise the file is always downloaded and any .sha1 file
+            left next to it is removed.
+
+    Returns:
+        - str: "skipped", "downloaded" or "resumed"
+        - error
+    """
+    recorded_sha1 = None
+    if record_hash:
+        recorded_sha1 = read_recorded_hash(local_path)
+    elif os.path.exists(get_hash_path(local_path)):
+        os.remove(get_hash_path(local_path))
+
+    # Files downloaded before hashes were recorded are hashed once here.
+    if (
+        record_hash
+        and recorded_sha1 is None
+        and remote_sha1 is not None
+        and os.path.exists(local_path)
+        and os.path.getsize(local_path) == remote_size
+    ):
+        recorded_sha1 = hash_local_file(local_path).hexdigest()
+        write_recorded_hash(local_path, recorded_sha1)
+
+    if remote_sha1 is not None and recorded_sha1 == remote_sha1:
+        return "skipped", None
+
+    partial_path = get_partial_path(local_path)
+    offset = 0
+    if os.path.exists(partial_path):
+        offset = os.path.getsize(partial_path)
+
+    # A .part file that's longer than the remote file is from an older version of it.
+    if remote_size is not None and offset > remote_size:
+        os.remove(partial_path)
+        offset = 0
+
+    file_hash = hashlib.sha1()
+    if offset > 0:
+        file_hash = hash_local_file(partial_path, file_hash)
+
+    with sftp.open(remote_path, "rb") as remote_file:
+        remote_file.seek(offset)
+        if remote_size is not None and hasattr(remote_file, "prefetch"):
+            remote_file.prefetch(remote_size)
+
+        with open(partial_path, "ab") as local_file:
+            for chunk in iter(lambda: remote_file.read(DOWNLOAD_CHUNK_BYTES), b""):
+                local_file.write(chunk)
+                file_hash.update(chunk)
+
+    local_sha1 = file_hash.hexdigest()
+    if remote_sha1 is not None and local_sha1 != remote_sha1:
+        os.remove(partial_path)
+        return None, f"Hashes don't match for {os.path.basename(local_path)}."
+
+    os.replace(partial_path, local_path)
+    if record_hash:
+        write_recorded_hash(local_path, local_sha1)
+
+    return ("resumed" if offset > 0 else "downloaded"), None
+
+
+def download_file_with_retries(ssh, download: Dict = {}) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Download one file over its own SFTP channel, resuming it after each failure.
+
+    Params:
+        - ssh: Connected paramiko.SSHClient.
+        - download (Dict): {"remote_path", "local_path", "size", "sha1", "record_hash"}
+            Only remote_path and local_path are required.
+
+    Returns:
+        - str: "skipped", "downloaded" or "resumed"
+        - error
+    """
+    error = None
+    for attempt in range(DOWNLOAD_ATTEMPT_COUNT):
+        try:
+            sftp = ssh.open_sftp()
+            try:
+                status, error = download_file(
+                    sftp,
+                    download['remote_path'],
+                    download['local_path'],
+                    download.get('size'),
+                    download.get('sha1'),
+                    download.get('record_hash', True)
+                )
+            finally:
+                sftp.close()
+
+            # A hash mismatch has already thrown away the .part file so the
+            # next attempt starts from the beginning.
+            if error is None:
+                return status, None
+
+        except Exception as e:
+            error = f"Couldn't download {download['remote_path']}: {e}"
+
+    return None, error
+
+
+def download_files(
+    ssh,
+    downloads: List[Dict] = [],
+    stream_count: int = DOWNLOAD_STREAM_COUNT,
+    on_done: Optional[Callable[[Dict, Optional[str], Optional[str]], None]] = None
+) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+    Download files from one machine over several SFTP channels at once.
+
+    Params:
+        - ssh: Connected paramiko.SSHClient.
+        - downloads (List[Dict]): {"remote_path", "local_path", "size", "sha1",
+            "record_hash"} per file.
+        - stream_count (int): Number of files to download at the same time.
+        - on_done (Callable): Called with (download, status, error) as each file
+            finishes.
+
+    Returns:
+        - Dict: {local_path: (status, error)}
+    """
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, stream_count)) as executor:
+        futures = {
+            executor.submit(download_file_with_retries, ssh, download): download
+            for download in downloads
+        }
+        for future in as_completed(futures):
+            download = futures[future]
+            status, error = future.result()
+
+            results[download['local_path']] = (status, error)
+
+            if on_done:
+                on_done(download, status, error)
+
+    return results
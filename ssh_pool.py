@@ -0,0 +1,222 @@
+import os
+import shlex
+import subprocess
+import tempfile
+
+from typing import List, Optional, Tuple
+
+# ? Every ssh/scp call to a machine goes through one OpenSSH ControlMaster per
+# ? username@ip. The master socket lives on disk so the per-machine worker
+# ? processes and every later test share the same authenticated connection.
+SSH_CONTROL_DIR = os.path.join(tempfile.gettempdir(), "autoperf_ssh")
+SSH_CONTROL_PERSIST_SECS = 600
+SSH_CONNECT_TIMEOUT_SECS = 10
+
+# ? A master whose machine has been rebooted is noticed after 3 missed keepalives.
+SSH_SERVER_ALIVE_INTERVAL_SECS = 5
+SSH_SERVER_ALIVE_COUNT_MAX = 3
+
+
+def quote_remote_path(path: str = "") -> str:
+    """
+    Quote a path for a remote shell while still letting a leading ~ expand, e.g.
+    perftest_exec_path is usually given relative to the home directory.
+    """
+    if path == "~":
+        return '"$HOME"'
+
+    if path.startswith("~/"):
+        return '"$HOME"/' + shlex.quote(path[2:])
+
+    return shlex.quote(path)
+
+
+def get_ssh_options(control_master: str = "no") -> List[str]:
+    """
+    Get the -o options shared by ssh and scp.
+
+    Commands use ControlMaster=no so they multiplex over an existing master and
+    fall back to a direct connection if there isn't one. Only open_ssh_connection()
+    starts masters, so a command never becomes a background master itself and
+    never leaves its stdout pipe held open.
+
+    Params:
+        - control_master (str): "no" for commands, "yes" for the master itself.
+
+    Returns:
+        - List[str]: ["-o", "ControlMaster=no", "-o", ...]
+    """
+    control_path = os.path.join(SSH_CONTROL_DIR, "%C")
+
+    options = [
+        f"ControlMaster={control_master}",
+        f"ControlPath={control_path}",
+        f"ControlPersist={SSH_CONTROL_PERSIST_SECS}",
+        f"ConnectTimeout={SSH_CONNECT_TIMEOUT_SECS}",
+        f"ServerAliveInterval={SSH_SERVER_ALIVE_INTERVAL_SECS}",
+        f"ServerAliveCountMax={SSH_SERVER_ALIVE_COUNT_MAX}",
+    ]
+
+    ssh_options = []
+    for option in options:
+        ssh_options += ["-o", option]
+
+    return ssh_options
+
+
+def get_ssh_command(
+    username: str = "", ip: str = "", remote_command: str = "", ssh_key_path: str = ""
+) -> List[str]:
+    """
+    Get a pooled ssh command as arguments for running without a local shell e.g.
+    get_ssh_command("pi", "10.0.0.2", "ls ~/perftest/*.csv")
+    """
+    ssh_command = ["ssh"] + get_ssh_options()
+    if ssh_key_path != "":
+        ssh_command += ["-i", ssh_key_path]
+
+    return ssh_command + [f"{username}@{ip}", remote_command]
+
+
+def get_scp_command(
+    username: str = "",
+    ip: str = "",
+    remote_path: str = "",
+    local_path: str = "",
+    ssh_key_path: str = "",
+) -> List[str]:
+    """
+    Get a pooled scp command that downloads remote_path to local_path.
+    """
+    scp_command = ["scp"] + get_ssh_options()
+    if ssh_key_path != "":
+        scp_command += ["-i", ssh_key_path]
+
+    return scp_command + [f"{username}@{ip}:{remote_path}", local_path]
+
+
+def get_scp_upload_command(
+    username: str = "",
+    ip: str = "",
+    local_path: str = "",
+    remote_path: str = "",
+    ssh_key_path: str = "",
+) -> List[str]:
+    """
+    Get a pooled scp command that uploads local_path to remote_path.
+    """
+    scp_command = ["scp"] + get_ssh_options()
+    if ssh_key_path != "":
+        scp_command += ["-i", ssh_key_path]
+
+    return scp_command + [local_path, f"{username}@{ip}:{remote_path}"]
+
+
+def is_ssh_connection_open(username: str = "", ip: str = "") -> bool:
+    if username == "" or ip == "":
+        return False
+
+    check_command = ["ssh"] + get_ssh_options() + ["-O", "check", f"{username}@{ip}"]
+    try:
+        result = subprocess.run(
+            check_command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=SSH_CONNECT_TIMEOUT_SECS,
+        )
+    except subprocess.TimeoutExpired:
+        return False
+
+    return result.returncode == 0
+
+
+def open_ssh_connection(
+    username: str = "", ip: str = "", ssh_key_path: str = ""
+) -> Tuple[Optional[bool], Optional[str]]:
+    """
+    Make sure a master connection to the machine is open, starting one if needed.
+
+    Params:
+        - username (str): Username on the machine.
+        - ip (str): IP of the machine.
+        - ssh_key_path (str): Optional key to authenticate with.
+
+    Returns:
+        - bool: True if a new master was started, False if one was already open.
+        - error
+    """
+    if username == "":
+        return None, "No username passed."
+
+    if ip == "":
+        return None, "No IP passed."
+
+    os.makedirs(SSH_CONTROL_DIR, mode=0o700, exist_ok=True)
+
+    if is_ssh_connection_open(username, ip):
+        return False, None
+
+    master_command = ["ssh"] + get_ssh_options("yes") + ["-f", "-N"]
+    if ssh_key_path != "":
+        master_command += ["-i", ssh_key_path]
+    master_command.append(f"{username}@{ip}")
+
+    # ? stderr goes to a file because the backgrounded master inherits it and a
+    # ? pipe would stay open for as long as the master lives.
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            result = subprocess.run(
+                master_command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file,
+                timeout=SSH_CONNECT_TIMEOUT_SECS * 2,
+            )
+        except subprocess.TimeoutExpired:
+            return None, f"Timed out opening SSH connection to {username}@{ip}."
+
+        if result.returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode("utf-8").strip()
+            return None, f"Couldn't open SSH connection to {username}@{ip}: {stderr}"
+
+    return True, None
+
+
+def close_ssh_connection(username: str = "", ip: str = "") -> Optional[str]:
+    """
+    Close the master connection to a machine e.g. when it's rebooted, so that the
+    next command opens a fresh connection instead of waiting on a dead one.
+
+    Params:
+        - username (str): Username on the machine.
+        - ip (str): IP of the machine.
+
+    Returns:
+        - error
+    """
+    if username == "":
+        return "No username passed."
+
+    if ip == "":
+        return "No IP passed."
+
+    if not is_ssh_connection_open(username, ip):
+        return None
+
+    exit_command = ["ssh"] + get_ssh_options() + ["-O", "exit", f"{username}@{ip}"]
+    try:
+        result = subprocess.run(
+            exit_command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=SSH_CONNECT_TIMEOUT_SECS,
+        )
+    except subprocess.TimeoutExpired:
+        return f"Timed out closing SSH connection to {username}@{ip}."
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8").strip()
+        return f"Couldn't close SSH connection to {username}@{ip}: {stderr}"
+
+    return None
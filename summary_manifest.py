@@ -0,0 +1,279 @@
+import os
+import json
+import hashlib
+
+from typing import Dict, List, Optional, Tuple
+
+# ? Bumped whenever the summary format changes so that every test is re-summarised.
+MANIFEST_VERSION = 2
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def get_manifest_path(
+    summaries_dirpath: str = "", summary_format: str = ""
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the manifest path for a summaries directory. Each summary format gets its own
+    manifest so that csv and parquet summaries in the same folder are tracked separately.
+    e.g. output/summarised_data/campaign -> output/summarised_data/campaign_parquet_manifest.json
+
+    Params:
+        - summaries_dirpath (str): Directory the test summaries are written to.
+        - summary_format (str): Summary file extension e.g. "parquet" or "csv".
+
+    Returns:
+        - str: Manifest path.
+        - error
+    """
+    if summaries_dirpath == "":
+        return None, "No summaries dirpath passed."
+
+    if summary_format == "":
+        return None, "No summary format passed."
+
+    summaries_dirpath = os.path.normpath(summaries_dirpath)
+
+    return f"{summaries_dirpath}_{summary_format}_manifest.json", None
+
+
+def read_manifest(manifest_path: str = "") -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Read the summarisation manifest or start an empty one if it doesn't exist yet.
+
+    Params:
+        - manifest_path (str): Path to the manifest json file.
+
+    Returns:
+        - Dict: {"version": MANIFEST_VERSION, "tests": {test_name: {"summary": ..., "files": ...}}}
+        - error
+    """
+    if manifest_path == "":
+        return None, "No manifest path passed."
+
+    if not os.path.exists(manifest_path):
+        return {"version": MANIFEST_VERSION, "tests": {}}, None
+
+    with open(manifest_path, "r") as f:
+        try:
+            manifest = json.load(f)
+        except ValueError as e:
+            return None, f"Error parsing manifest {manifest_path}: \n\t{e}"
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "tests": {}}, None
+
+    return manifest, None
+
+
+def write_manifest(manifest_path: str = "", manifest: Dict = {}) -> Optional[str]:
+    """
+    Write the manifest to a temporary file and move it into place so that an
+    interrupted run never leaves a half written manifest behind.
+
+    Params:
+        - manifest_path (str): Path to the manifest json file.
+        - manifest (Dict): Manifest to write.
+
+    Returns:
+        - error
+    """
+    if manifest_path == "":
+        return "No manifest path passed."
+
+    if manifest == {}:
+        return "No manifest passed."
+
+    tmp_manifest_path = f"{manifest_path}.tmp"
+    try:
+        with open(tmp_manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_manifest_path, manifest_path)
+    except OSError as e:
+        return f"Couldn't write manifest {manifest_path}: {e}"
+
+    return None
+
+
+def get_file_hash(filepath: str = "") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the sha1 of a file by reading it in chunks.
+
+    Params:
+        - filepath (str): Path to the file.
+
+    Returns:
+        - str: Hex digest of the file contents.
+        - error
+    """
+    if filepath == "":
+        return None, "No filepath passed."
+
+    file_hash = hashlib.sha1()
+    try:
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                file_hash.update(chunk)
+    except OSError as e:
+        return None, f"Couldn't hash {filepath}: {e}"
+
+    return file_hash.hexdigest(), None
+
+
+def get_test_fingerprint(
+    test_dirpath: str = "", previous_files: Dict = {}
+) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get the size, mtime and content hash of every csv file in a test folder.
+
+    Files whose size and mtime match the previous fingerprint keep their previous
+    hash so that only new or modified files are read.
+
+    Params:
+        - test_dirpath (str): Path to the test folder.
+        - previous_files (Dict): "files" of the test's previous manifest entry.
+
+    Returns:
+        - Dict: {filename: {"size": int, "mtime_ns": int, "sha1": str}}
+        - error
+    """
+    if test_dirpath == "":
+        return None, "No test dirpath passed."
+
+    if not os.path.isdir(test_dirpath):
+        return None, f"Test dirpath is not a directory: {test_dirpath}"
+
+    files = {}
+    for filename in sorted(os.listdir(test_dirpath)):
+        if not filename.endswith(".csv"):
+            continue
+
+        filepath = os.path.join(test_dirpath, filename)
+        file_stat = os.stat(filepath)
+
+        previous_file = previous_files.get(filename, {})
+        if (
+            previous_file.get("size") == file_stat.st_size
+            and previous_file.get("mtime_ns") == file_stat.st_mtime_ns
+        ):
+            files[filename] = previous_file
+            continue
+
+        file_hash, error = get_file_hash(filepath)
+        if error:
+            return None, error
+
+        files[filename] = {
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+            "sha1": file_hash,
+        }
+
+    return files, None
+
+
+def has_test_changed(previous_files: Dict = {}, files: Dict = {}) -> bool:
+    if previous_files.keys() != files.keys():
+        return True
+
+    for filename, file in files.items():
+        if previous_files[filename].get("sha1") != file["sha1"]:
+            return True
+
+    return False
+
+
+def get_tests_to_summarise(
+    test_dirpaths: List[str] = [],
+    summaries_dirpath: str = "",
+    manifest: Dict = {},
+) -> Tuple[Optional[List[str]], Optional[Dict], Optional[str]]:
+    """
+    Work out which tests are new or have changed since the manifest was written and
+    delete the summaries of tests that have changed or no longer exist.
+
+    Params:
+        - test_dirpaths (List[str]): Paths to every test folder of the campaign.
+        - summaries_dirpath (str): Directory the test summaries are written to.
+        - manifest (Dict): Manifest from read_manifest().
+
+    Returns:
+        - List[str]: Test folders that need summarising.
+        - Dict: {test_name: fingerprint} for the tests that need summarising.
+        - error
+    """
+    if summaries_dirpath == "":
+        return None, None, "No summaries dirpath passed."
+
+    if manifest == {}:
+        return None, None, "No manifest passed."
+
+    manifest_tests = manifest["tests"]
+    test_names = set([os.path.basename(_) for _ in test_dirpaths])
+
+    stale_test_names = [_ for _ in manifest_tests.keys() if _ not in test_names]
+
+    changed_test_dirpaths = []
+    fingerprints = {}
+    for test_dirpath in test_dirpaths:
+        test_name = os.path.basename(test_dirpath)
+        previous_files = manifest_tests.get(test_name, {}).get("files", {})
+
+        files, error = get_test_fingerprint(test_dirpath, previous_files)
+        if error:
+            return None, None, error
+
+        if test_name in manifest_tests and not has_test_changed(previous_files, files):
+            manifest_tests[test_name]["files"] = files
+            continue
+
+        if test_name in manifest_tests:
+            stale_test_names.append(test_name)
+
+        changed_test_dirpaths.append(test_dirpath)
+        fingerprints[test_name] = files
+
+    for test_name in stale_test_names:
+        summary_filename = manifest_tests[test_name].get("summary")
+        if summary_filename is not None:
+            summary_path = os.path.join(summaries_dirpath, summary_filename)
+            if os.path.exists(summary_path):
+                os.remove(summary_path)
+
+        del manifest_tests[test_name]
+
+    return changed_test_dirpaths, fingerprints, None
+
+
+def record_summarised_test(
+    manifest: Dict = {},
+    test_name: str = "",
+    files: Dict = {},
+    summary_filename: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Record a test in the manifest once it has been summarised.
+
+    Tests that couldn't be summarised are recorded with no summary so that they
+    are only retried once their files change.
+
+    Params:
+        - manifest (Dict): Manifest from read_manifest().
+        - test_name (str): Name of the test folder.
+        - files (Dict): Fingerprint from get_tests_to_summarise().
+        - summary_filename (str): Summary filename or None if summarising failed.
+
+    Returns:
+        - error
+    """
+    if manifest == {}:
+        return "No manifest passed."
+
+    if test_name == "":
+        return "No test name passed."
+
+    manifest["tests"][test_name] = {
+        "summary": summary_filename,
+        "files": files,
+    }
+
+    return None
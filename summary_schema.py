@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from typing import Dict, List, Optional, Tuple
+
+# ? One row per sample of one metric. Test level metrics (latency_us, avg_*_per_sub,
+# ? total_*_over_subs) have a null sub_index, subscriber metrics have the sub number.
+SUMMARY_SCHEMA = pa.schema(
+    [
+        pa.field("test_id", pa.dictionary(pa.int32(), pa.string()), nullable=False),
+        pa.field("sub_index", pa.dictionary(pa.int16(), pa.int16())),
+        pa.field("metric", pa.dictionary(pa.int16(), pa.string()), nullable=False),
+        pa.field("sample_index", pa.int32(), nullable=False),
+        pa.field("value", pa.float32()),
+    ]
+)
+
+SUMMARY_ROW_GROUP_SIZE = 64 * 1024
+
+
+def get_sub_column_parts(column: str = "") -> Tuple[Optional[int], str]:
+    """
+    Split a wide summary column into its subscriber index and metric.
+    e.g. sub_3_mbps -> (3, "mbps"), avg_mbps_per_sub -> (None, "avg_mbps_per_sub")
+
+    Params:
+        - column (str): Wide summary column name.
+
+    Returns:
+        - int: Subscriber index or None for test level columns.
+        - str: Metric name.
+    """
+    parts = column.split("_")
+    if len(parts) > 2 and parts[0] == "sub" and parts[1].isdigit():
+        return int(parts[1]), "_".join(parts[2:])
+
+    return None, column
+
+
+def get_wide_column_name(sub_index: Optional[int] = None, metric: str = "") -> str:
+    if sub_index is None or pd.isna(sub_index):
+        return metric
+
+    return f"sub_{int(sub_index)}_{metric}"
+
+
+def get_summary_table(
+    test_id: str = "", columns: Dict[str, np.ndarray] = {}
+) -> Tuple[Optional[pa.Table], Optional[str]]:
+    """
+    Build the long format summary of one test from its wide columns.
+
+    Rows are ordered by metric and then subscriber so that each row group covers as
+    few metrics as possible and readers can skip row groups using the metric stats.
+    Missing samples are dropped rather than stored as padding.
+
+    Params:
+        - test_id (str): Test name e.g. 600SEC_100B_1PUB_3SUB_REL_MC_0DUR_100LC.
+        - columns (Dict[str, np.ndarray]): {"latency_us": [...], "sub_0_mbps": [...], ...}
+
+    Returns:
+        - pa.Table: Table following SUMMARY_SCHEMA.
+        - error
+    """
+    if test_id == "":
+        return None, "No test id passed."
+
+    if len(columns) == 0:
+        return None, "No columns passed."
+
+    column_parts = [(get_sub_column_parts(column), column) for column in columns]
+    metrics = sorted(set(metric for (_, metric), _ in column_parts))
+    sub_indexes = sorted(
+        set(sub_index for (sub_index, _), _ in column_parts if sub_index is not None)
+    )
+    column_parts = sorted(
+        column_parts,
+        key=lambda item: (item[0][1], -1 if item[0][0] is None else item[0][0]),
+    )
+
+    metric_codes = {metric: code for code, metric in enumerate(metrics)}
+    sub_codes = {sub_index: code for code, sub_index in enumerate(sub_indexes)}
+
+    value_arrays = []
+    sample_index_arrays = []
+    metric_code_arrays = []
+    sub_code_arrays = []
+    for (sub_index, metric), column in column_parts:
+        values = np.asarray(columns[column], dtype=np.float32)
+        sample_indexes = np.flatnonzero(~np.isnan(values)).astype(np.int32)
+        if len(sample_indexes) == 0:
+            continue
+
+        value_arrays.append(values[sample_indexes])
+        sample_index_arrays.append(sample_indexes)
+        metric_code_arrays.append(
+            np.full(len(sample_indexes), metric_codes[metric], dtype=np.int16)
+        )
+        sub_code_arrays.append(
+            np.full(
+                len(sample_indexes),
+                -1 if sub_index is None else sub_codes[sub_index],
+                dtype=np.int16,
+            )
+        )
+
+    if len(value_arrays) == 0:
+        return None, f"No samples found for {test_id}."
+
+    sub_codes_array = np.concatenate(sub_code_arrays)
+    row_count = len(sub_codes_array)
+
+    table = pa.Table.from_arrays(
+        [
+            pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(row_count, dtype=np.int32)),
+                pa.array([test_id], type=pa.string()),
+            ),
+            pa.DictionaryArray.from_arrays(
+                pa.array(sub_codes_array, mask=sub_codes_array < 0),
+                pa.array(sub_indexes, type=pa.int16()),
+            ),
+            pa.DictionaryArray.from_arrays(
+                pa.array(np.concatenate(metric_code_arrays)),
+                pa.array(metrics, type=pa.string()),
+            ),
+            pa.array(np.concatenate(sample_index_arrays)),
+            pa.array(np.concatenate(value_arrays)),
+        ],
+        schema=SUMMARY_SCHEMA,
+    )
+
+    return table, None
+
+
+def write_summary_table(
+    table: Optional[pa.Table] = None, summary_path: str = ""
+) -> Optional[str]:
+    """
+    Write a long format summary with column statistics for every row group.
+
+    Params:
+        - table (pa.Table): Table from get_summary_table().
+        - summary_path (str): Path of the .parquet file to write.
+
+    Returns:
+        - error
+    """
+    if table is None:
+        return "No summary table passed."
+
+    if summary_path == "":
+        return "No summary path passed."
+
+    try:
+        pq.write_table(
+            table,
+            summary_path,
+            row_group_size=SUMMARY_ROW_GROUP_SIZE,
+            write_statistics=True,
+            compression="zstd",
+        )
+    except (OSError, pa.ArrowException) as e:
+        return f"Couldn't write summary {summary_path}: {e}"
+
+    return None
+
+
+def read_summary(
+    summary_path: str = "", metrics: Optional[List[str]] = None
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Read a long format summary, optionally only the rows of the given metrics.
+
+    Params:
+        - summary_path (str): Path of the .parquet summary.
+        - metrics (List[str]): Metrics to read e.g. ["latency_us", "mbps"]. None reads all.
+
+    Returns:
+        - pd.DataFrame: test_id, sub_index, metric, sample_index, value
+        - error
+    """
+    if summary_path == "":
+        return None, "No summary path passed."
+
+    filters = None
+    if metrics is not None:
+        filters = [("metric", "in", metrics)]
+
+    try:
+        table = pq.read_table(summary_path, filters=filters)
+    except (OSError, pa.ArrowException) as e:
+        return None, f"Couldn't read summary {summary_path}: {e}"
+
+    if table.schema.names != SUMMARY_SCHEMA.names:
+        return None, f"{summary_path} is not a long format summary."
+
+    # ? Parquet only keeps dictionary encoding for string columns, so sub_index comes
+    # ? back as plain int16 and is re-encoded to read as a category.
+    sub_index_field = SUMMARY_SCHEMA.field("sub_index")
+    if not pa.types.is_dictionary(table.schema.field("sub_index").type):
+        table = table.set_column(
+            table.schema.get_field_index("sub_index"),
+            sub_index_field,
+            table.column("sub_index").dictionary_encode().cast(sub_index_field.type),
+        )
+
+    return table.to_pandas(), None
+
+
+def get_wide_summary(
+    summary_df: Optional[pd.DataFrame] = None,
+) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Turn a long format summary back into one column per (sub_)metric with one row
+    per sample, e.g. latency_us, sub_0_mbps, avg_mbps_per_sub, ...
+
+    Params:
+        - summary_df (pd.DataFrame): Summary from read_summary().
+
+    Returns:
+        - pd.DataFrame: Wide summary with float32 columns.
+        - error
+    """
+    if summary_df is None:
+        return None, "No summary dataframe passed."
+
+    columns = {}
+    for (sub_index, metric), group_df in summary_df.groupby(
+        ["sub_index", "metric"], observed=True, dropna=False, sort=False
+    ):
+        column = get_wide_column_name(sub_index, metric)
+        columns[column] = pd.Series(
+            group_df["value"].to_numpy(), index=group_df["sample_index"].to_numpy()
+        )
+
+    if len(columns) == 0:
+        return pd.DataFrame(), None
+
+    return pd.DataFrame(columns).sort_index().reset_index(drop=True), None
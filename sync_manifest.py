@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import fnmatch
+import hashlib
+import argparse
+
+from typing import Dict, List, Optional, Tuple
+
+# ? Lists a directory's files with their sizes, mtimes and sha1s. The results
+# ? downloader pipes this script into python3 on each machine so one SSH call
+# ? gets the whole remote manifest, then only downloads files whose sha1 differs
+# ? from the local manifest of the last sync.
+# ? Each side keeps its manifest in the synced directory and only re-hashes
+# ? files whose size or mtime has changed since, so a sync with nothing new
+# ? doesn't read any file.
+# ? Like result_agent.py this runs on the Pis so it only uses the standard library.
+
+SYNC_MANIFEST_VERSION = 1
+SYNC_MANIFEST_FILENAME = ".sync_manifest.json"
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# ? Left behind by sftp_download and zip.
+IGNORED_PATTERNS = [SYNC_MANIFEST_FILENAME, "*.part", "*.sha1", "zi*"]
+
+
+def get_file_sha1(filepath: str = "") -> str:
+    file_hash = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def read_sync_manifest(dirpath: str = "") -> Dict[str, Dict]:
+    """
+    Get {relative path: {"size", "mtime", "sha1"}} from a directory's manifest.
+    Empty if it doesn't have one or it can't be read.
+    """
+    manifest_path = os.path.join(dirpath, SYNC_MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(manifest, dict) or manifest.get("version") != SYNC_MANIFEST_VERSION:
+        return {}
+
+    return manifest.get("files", {})
+
+
+def write_sync_manifest(dirpath: str = "", files: Dict[str, Dict] = {}) -> Optional[str]:
+    """
+    Returns:
+        - error
+    """
+    manifest_path = os.path.join(dirpath, SYNC_MANIFEST_FILENAME)
+    tmp_manifest_path = f"{manifest_path}.tmp"
+    try:
+        with open(tmp_manifest_path, "w") as f:
+            json.dump(
+                {"version": SYNC_MANIFEST_VERSION, "files": files}, f, indent=2, sort_keys=True
+            )
+        os.replace(tmp_manifest_path, manifest_path)
+    except OSError as e:
+        return f"Couldn't write {manifest_path}: {e}"
+
+    return None
+
+
+def is_ignored(filename: str = "") -> bool:
+    return any([fnmatch.fnmatch(filename, _) for _ in IGNORED_PATTERNS])
+
+
+def list_files(
+    dirpath: str = "", include_pattern: str = "*", top_level: bool = False
+) -> List[str]:
+    """
+    Get the relative paths of the files to sync in a directory.
+
+    Params:
+        - dirpath (str): Directory to list.
+        - include_pattern (str): Only files whose names match e.g. "*.zip".
+        - top_level (bool): Don't look in subdirectories.
+    """
+    relpaths = []
+    for root, dirnames, filenames in os.walk(dirpath):
+        if top_level:
+            dirnames[:] = []
+        dirnames.sort()
+
+        for filename in sorted(filenames):
+            if is_ignored(filename) or not fnmatch.fnmatch(filename, include_pattern):
+                continue
+
+            relpaths.append(os.path.relpath(os.path.join(root, filename), dirpath))
+
+    return relpaths
+
+
+def get_dir_manifest(
+    dirpath: str = "",
+    previous_files: Dict[str, Dict] = {},
+    include_pattern: str = "*",
+    top_level: bool = False
+) -> Dict[str, Dict]:
+    """
+    Get {relative path: {"size", "mtime", "sha1"}} for the files in a directory,
+    reusing the sha1 of any file whose size and mtime haven't changed.
+
+    Params:
+        - dirpath (str): Directory to list.
+        - previous_files (Dict): The directory's last manifest.
+        - include_pattern (str): Only files whose names match e.g. "*.zip".
+        - top_level (bool): Don't look in subdirectories.
+    """
+    files = {}
+    for relpath in list_files(dirpath, include_pattern, top_level):
+        try:
+            file_stat = os.stat(os.path.join(dirpath, relpath))
+        except OSError:
+            # Deleted while listing.
+            continue
+
+        file_entry = {"size": file_stat.st_size, "mtime": file_stat.st_mtime}
+
+        previous_entry = previous_files.get(relpath, {})
+        if (
+            previous_entry.get("size") == file_entry["size"]
+            and previous_entry.get("mtime") == file_entry["mtime"]
+            and previous_entry.get("sha1") is not None
+        ):
+            file_entry["sha1"] = previous_entry["sha1"]
+        else:
+            try:
+                file_entry["sha1"] = get_file_sha1(os.path.join(dirpath, relpath))
+            except OSError:
+                continue
+
+        files[relpath] = file_entry
+
+    return files
+
+
+def get_changed_files(
+    remote_files: Dict[str, Dict] = {},
+    local_files: Dict[str, Dict] = {},
+    local_dirpath: str = ""
+) -> List[str]:
+    """
+    Get the relative paths of the remote files that are missing locally or differ
+    from the local copy.
+
+    Params:
+        - remote_files (Dict): Remote manifest's files.
+        - local_files (Dict): Local manifest's files from the last sync.
+        - local_dirpath (str): Directory the files are synced into.
+    """
+    changed_relpaths = []
+    for relpath, remote_entry in sorted(remote_files.items()):
+        local_entry = local_files.get(relpath)
+        local_filepath = os.path.join(local_dirpath, relpath)
+
+        if (
+            local_entry is None
+            or local_entry.get("sha1") != remote_entry.get("sha1")
+            or not os.path.isfile(local_filepath)
+            or os.path.getsize(local_filepath) != local_entry.get("size")
+        ):
+            changed_relpaths.append(relpath)
+
+    return changed_relpaths
+
+
+def main(sys_args: List[str] = []) -> int:
+    parser = argparse.ArgumentParser(
+        description="Print a JSON manifest of a directory's files."
+    )
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--include", default="*")
+    parser.add_argument("--top-level", action="store_true")
+    args = parser.parse_args(sys_args)
+
+    dirpath = os.path.abspath(os.path.expanduser(args.dir))
+    files = {}
+    if os.path.isdir(dirpath):
+        files = get_dir_manifest(
+            dirpath, read_sync_manifest(dirpath), args.include, args.top_level
+        )
+
+        # The cache is only there to save hashing next time.
+        write_sync_manifest(dirpath, files)
+
+    sys.stdout.write(
+        json.dumps({"version": SYNC_MANIFEST_VERSION, "dirpath": dirpath, "files": files}) + "\n"
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))